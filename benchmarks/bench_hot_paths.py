@@ -0,0 +1,177 @@
+"""
+Бенчмарки горячих путей: команды, события, логирование, хранилище, расписание, статусы
+"""
+
+import os
+import time
+from datetime import datetime
+
+from harness import benchmark, summarize
+
+from devices.climate.thermostat import Thermostat
+from devices.device_manager import DeviceManager
+from services.command_dispatcher import CommandDispatcher
+from services.event_bus import EventBus
+from services.logging_service import LoggingService
+from services.schedule_service import ScheduleService
+from services.storage_service import StateStorage
+
+
+def make_manager(extra_devices: int, storage_file: str = "bench_state.json") -> DeviceManager:
+    """DeviceManager со стандартными устройствами и extra_devices термостатами"""
+    manager = DeviceManager(state_storage=StateStorage(os.path.abspath(storage_file)))
+    for i in range(extra_devices):
+        manager.add_device(Thermostat(f"bench_thermo_{i}", f"Термостат {i}"))
+    return manager
+
+
+def make_state(device_count: int) -> dict:
+    """Состояние устройств в формате DeviceManager.save_state"""
+    return {
+        f"device_{i}": {
+            "type": "thermostat",
+            "state": "on" if i % 2 else "off",
+            "data": {"temperature": 21.5, "target_temperature": 22.0},
+        }
+        for i in range(device_count)
+    }
+
+
+class _Controller:
+    """Минимальный контроллер для ScheduleService"""
+
+    def __init__(self, device_manager, command_dispatcher=None):
+        self.device_manager = device_manager
+        if command_dispatcher is not None:
+            self.command_dispatcher = command_dispatcher
+
+
+@benchmark("device_manager.send_command")
+def bench_send_command(run):
+    results = {}
+    for extra in (0, run.scale(200, 50)):
+        manager = make_manager(extra)
+        total = len(manager.devices)
+        # Каждая команда меняет состояние: история, лог, save_state, событие
+        results[f"toggle_{total}_devices"] = run.measure(
+            lambda: manager.send_command("thermostat", "toggle"),
+            iterations=run.scale(500, 50)
+        )
+    return results
+
+
+@benchmark("event_bus.publish")
+def bench_event_bus(run):
+    results = {}
+    for subscribers in (1, 10, 100):
+        bus = EventBus()
+        received = []
+        for _ in range(subscribers):
+            bus.subscribe(EventBus.DEVICE_STATE_CHANGED, received.append)
+        event = {"device_id": "thermostat", "old_state": "off", "new_state": "on"}
+        results[f"fanout_{subscribers}"] = run.measure(
+            lambda: bus.publish(EventBus.DEVICE_STATE_CHANGED, event),
+            iterations=run.scale(5000, 500)
+        )
+    return results
+
+
+@benchmark("logging_service.info")
+def bench_logging(run):
+    results = {}
+    for to_file in (False, True):
+        service = LoggingService(log_to_file=to_file)
+        results["file" if to_file else "memory"] = run.measure(
+            lambda: service.info("DEVICE", "Состояние Термостат изменено: off → on"),
+            iterations=run.scale(5000, 500)
+        )
+    return results
+
+
+@benchmark("state_storage")
+def bench_state_storage(run):
+    results = {}
+    storage = StateStorage(os.path.abspath("bench_storage.json"))
+    for count in (10, 100, 1000, run.scale(10000, 2000)):
+        state = make_state(count)
+        iterations = run.scale(max(20, 20000 // count), 10)
+        results[f"save_{count}"] = run.measure(lambda: storage.save(state), iterations, warmup=2)
+        results[f"load_{count}"] = run.measure(storage.load, iterations, warmup=2)
+    return results
+
+
+@benchmark("state_storage.binary")
+def bench_state_storage_binary(run):
+    """Двоичный снимок: полное сохранение/загрузка и чтение одного устройства"""
+    results = {}
+    for compression in ("none", "zlib"):
+        storage = StateStorage(os.path.abspath(f"bench_storage_{compression}.bin"),
+                               format="binary", compression=compression)
+        for count in (1000, run.scale(50000, 5000)):
+            state = make_state(count)
+            iterations = run.scale(max(5, 20000 // count), 3)
+            prefix = f"{compression}_{count}"
+            results[f"save_{prefix}"] = run.measure(lambda: storage.save(state), iterations, warmup=1)
+            results[f"load_{prefix}"] = run.measure(storage.load, iterations, warmup=1)
+            device_id = f"device_{count // 2}"
+            results[f"load_device_{prefix}"] = run.measure(
+                lambda: storage.load_device(device_id), iterations, warmup=1)
+            results[f"file_{prefix}"] = {"size_kb": round(os.path.getsize(storage.filename) / 1024, 1)}
+    return results
+
+
+@benchmark("schedule_service.fire")
+def bench_schedule_jitter(run):
+    """Задержка выполнения задач одного слота от начала проверки расписания"""
+    results = {}
+    task_count = run.scale(100, 20)
+    manager = make_manager(task_count)
+    fired = []
+    original_send = manager.send_command
+
+    def recording_send(device_id, action):
+        result = original_send(device_id, action)
+        fired.append(time.perf_counter())
+        return result
+
+    manager.send_command = recording_send
+    dispatcher = CommandDispatcher(manager)
+
+    for mode, controller in (("sync", _Controller(manager)),
+                             ("dispatcher", _Controller(manager, dispatcher))):
+        schedule = ScheduleService(controller, autostart=False)
+        schedule.schedule = {"07:00": [
+            {"device_id": f"bench_thermo_{i}", "action": "toggle", "enabled": True, "days": [0]}
+            for i in range(task_count)
+        ]}
+        offsets = []
+        for repeat in range(run.scale(10, 3)):
+            fired.clear()
+            schedule._last_checked_minute = -1
+            start = time.perf_counter()
+            schedule.tick(datetime(2024, 1, 1, 7, 0))
+            deadline = start + 30
+            while len(fired) < task_count and time.perf_counter() < deadline:
+                time.sleep(0.001)
+            offsets.extend(moment - start for moment in fired)
+        results[f"{mode}_{task_count}_tasks"] = summarize(offsets)
+
+    dispatcher.shutdown()
+    return results
+
+
+@benchmark("device_manager.get_all_devices_status")
+def bench_all_status(run):
+    results = {}
+    for extra in (0, 100, run.scale(1000, 300)):
+        manager = make_manager(extra)
+        total = len(manager.devices)
+        results[f"{total}_devices"] = run.measure(
+            manager.get_all_devices_status, iterations=run.scale(200, 20), warmup=2
+        )
+        # Для сравнения: опрос изменений по журналу, когда ничего не менялось
+        seq = manager.change_seq
+        results[f"{total}_devices_changes_since"] = run.measure(
+            lambda: manager.get_changes_since(seq), iterations=run.scale(200, 20), warmup=2
+        )
+    return results
@@ -0,0 +1,107 @@
+"""
+Генератор синтетического парка устройств и типичного расписания для нагрузочных тестов
+"""
+
+import random
+from typing import Dict, List
+
+from devices.climate.thermostat import Thermostat
+from devices.lighting.smart_light import SmartLight
+from devices.security.security_camera import SecurityCamera
+from devices.security.smoke_sensor import SmokeSensor
+from devices.security.water_leak_sensor import WaterLeakSensor
+
+# Тип парка -> (класс устройства, префикс id, название)
+DEVICE_TYPES = {
+    "light": (SmartLight, "light", "Свет"),
+    "thermostat": (Thermostat, "thermostat", "Термостат"),
+    "camera": (SecurityCamera, "camera", "Камера"),
+    "smoke": (SmokeSensor, "smoke", "Датчик дыма"),
+    "water": (WaterLeakSensor, "water", "Датчик протечки"),
+}
+
+ROOMS = ["Гостиная", "Кухня", "Спальня", "Детская", "Кабинет", "Коридор", "Ванная", "Гараж"]
+
+WEEKDAYS = [0, 1, 2, 3, 4]
+ALL_DAYS = [0, 1, 2, 3, 4, 5, 6]
+
+
+def generate_fleet(device_manager, counts: Dict[str, int], seed: int = 0,
+                   external_simulation: bool = True) -> Dict[str, List[str]]:
+    """Добавить в device_manager counts[тип] устройств каждого типа.
+
+    external_simulation=True - у устройств нет собственных потоков симуляции
+    (иначе тысячи ламп и камер запустят по потоку каждая).
+    Возвращает id созданных устройств по типам.
+    """
+    rng = random.Random(seed)
+    if external_simulation:
+        device_manager.use_external_simulation()
+
+    created = {}
+    for kind, count in counts.items():
+        device_class, prefix, title = DEVICE_TYPES[kind]
+        devices = []
+        for i in range(count):
+            device_id = f"{prefix}_{i:05d}"
+            room = rng.choice(ROOMS)
+            device = device_class(device_id, f"{title}: {room} {i}")
+            device.metadata["room"] = room
+            devices.append(device)
+        # Одной заменой словаря устройств, а не копией на каждое устройство
+        device_manager.add_devices(devices)
+        created[kind] = [device.device_id for device in devices]
+    return created
+
+
+def _at(rng: random.Random, hour: int, minute: int, spread: int) -> str:
+    """Время hour:minute со случайным сдвигом ±spread минут"""
+    total = (hour * 60 + minute + rng.randint(-spread, spread)) % (24 * 60)
+    return f"{total // 60:02d}:{total % 60:02d}"
+
+
+def build_schedule(fleet: Dict[str, List[str]], seed: int = 0) -> Dict[str, List[Dict]]:
+    """Типичное расписание: свет вечером, климат утром и вечером, камеры днем по будням"""
+    rng = random.Random(seed)
+    schedule: Dict[str, List[Dict]] = {}
+
+    def add(time_str, device_id, action, days):
+        schedule.setdefault(time_str, []).append({
+            "device_id": device_id,
+            "action": action,
+            "enabled": True,
+            "days": days,
+            "added": "2024-01-01 00:00:00",
+        })
+
+    for device_id in fleet.get("light", []):
+        add(_at(rng, 19, 0, 60), device_id, f"on_and_set_brightness:{rng.choice([40, 60, 80, 100])}", ALL_DAYS)
+        add(_at(rng, 23, 0, 45), device_id, "off", ALL_DAYS)
+        if rng.random() < 0.5:
+            add(_at(rng, 6, 45, 20), device_id, "on_and_set_brightness:60", WEEKDAYS)
+            add(_at(rng, 8, 15, 20), device_id, "off", WEEKDAYS)
+
+    for device_id in fleet.get("thermostat", []):
+        add(_at(rng, 6, 30, 30), device_id, f"on_and_set_temperature:{rng.choice([21, 22, 23])}", ALL_DAYS)
+        add(_at(rng, 9, 0, 15), device_id, "set_temperature:18", WEEKDAYS)
+        add(_at(rng, 17, 30, 30), device_id, "set_temperature:22", WEEKDAYS)
+        add(_at(rng, 23, 0, 30), device_id, "set_temperature:19", ALL_DAYS)
+
+    for device_id in fleet.get("camera", []):
+        add(_at(rng, 9, 0, 10), device_id, "on", WEEKDAYS)
+        add(_at(rng, 18, 0, 10), device_id, "off", WEEKDAYS)
+
+    # Датчики включаются один раз в сутки (страховка после сбоев питания)
+    for device_id in fleet.get("smoke", []) + fleet.get("water", []):
+        add(_at(rng, 0, 5, 5), device_id, "on", ALL_DAYS)
+
+    return schedule
+
+
+def random_command(rng: random.Random, kind: str) -> str:
+    """Случайная допустимая команда для устройства данного типа"""
+    if kind == "light":
+        return rng.choice(["on", "off", "toggle", f"set_brightness:{rng.randint(1, 100)}"])
+    if kind == "thermostat":
+        return rng.choice(["on", "toggle", f"set_temperature:{rng.randint(16, 28)}"])
+    return rng.choice(["on", "off", "toggle"])
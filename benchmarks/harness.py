@@ -0,0 +1,156 @@
+"""
+Инструменты замеров: регистрация бенчмарков, статистика, JSON-результаты, сравнение с базой
+"""
+
+import contextlib
+import json
+import os
+import platform
+import statistics
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+# Зарегистрированные бенчмарки: имя -> функция
+BENCHMARKS: Dict[str, Callable] = {}
+
+
+def benchmark(name: str):
+    """Декоратор регистрации бенчмарка.
+
+    Функция получает объект Run и возвращает словарь метрик
+    (обычно через run.measure / run.samples).
+    """
+    def decorator(func):
+        BENCHMARKS[name] = func
+        return func
+    return decorator
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    """Статистика по замерам (секунды -> микросекунды)"""
+    ordered = sorted(samples)
+    to_us = 1e6
+
+    def percentile(p):
+        index = min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))
+        return ordered[index] * to_us
+
+    return {
+        "n": len(ordered),
+        "min_us": ordered[0] * to_us,
+        "median_us": statistics.median(ordered) * to_us,
+        "mean_us": statistics.fmean(ordered) * to_us,
+        "p95_us": percentile(95),
+        "p99_us": percentile(99),
+        "max_us": ordered[-1] * to_us,
+    }
+
+
+class Run:
+    """Параметры прогона и помощники замеров"""
+
+    def __init__(self, quick: bool = False):
+        self.quick = quick
+
+    def scale(self, full: int, quick: int) -> int:
+        return quick if self.quick else full
+
+    def measure(self, func: Callable[[], None], iterations: int, warmup: int = 10) -> Dict[str, float]:
+        """Время одного вызова func: iterations замеров после прогрева"""
+        for _ in range(warmup):
+            func()
+        samples = []
+        perf_counter = time.perf_counter
+        for _ in range(iterations):
+            start = perf_counter()
+            func()
+            samples.append(perf_counter() - start)
+        result = summarize(samples)
+        result["ops_per_sec"] = 1e6 / result["mean_us"] if result["mean_us"] else 0.0
+        return result
+
+    def throughput(self, func: Callable[[], None], iterations: int) -> Dict[str, float]:
+        """Пропускная способность: iterations вызовов одним замером"""
+        start = time.perf_counter()
+        for _ in range(iterations):
+            func()
+        elapsed = time.perf_counter() - start
+        return {"n": iterations, "total_s": elapsed, "ops_per_sec": iterations / elapsed if elapsed else 0.0}
+
+
+@contextlib.contextmanager
+def quiet():
+    """Подавить вывод сервисов (LoggingService печатает каждое сообщение)"""
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        yield
+
+
+def run_all(names: Optional[List[str]] = None, quick: bool = False,
+            progress: Callable[[str], None] = print) -> Dict:
+    """Выполнить бенчмарки и вернуть результаты в машиночитаемом виде"""
+    run = Run(quick=quick)
+    results = {}
+    for name, func in BENCHMARKS.items():
+        if names and not any(name.startswith(prefix) for prefix in names):
+            continue
+        progress(f"▶ {name}")
+        with quiet():
+            metrics = func(run)
+        results[name] = metrics
+    return {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "quick": quick,
+        "results": results,
+    }
+
+
+def _key_metric(metrics: Dict) -> Optional[tuple]:
+    """Метрика для сравнения: медиана времени (меньше - лучше) или ops/s (больше - лучше)"""
+    if "median_us" in metrics:
+        return "median_us", False
+    if "ops_per_sec" in metrics:
+        return "ops_per_sec", True
+    return None
+
+
+def compare(current: Dict, baseline: Dict, threshold: float = 0.20) -> List[Dict]:
+    """Сравнить результаты с базой. Регрессия - ухудшение ключевой метрики больше threshold"""
+    rows = []
+    for name, groups in current["results"].items():
+        base_groups = baseline.get("results", {}).get(name)
+        if base_groups is None:
+            continue
+        for case, metrics in groups.items():
+            base = base_groups.get(case)
+            key = _key_metric(metrics)
+            if base is None or key is None or key[0] not in base:
+                continue
+            metric, higher_is_better = key
+            old, new = base[metric], metrics[metric]
+            if not old:
+                continue
+            change = (new - old) / old
+            worse = -change if higher_is_better else change
+            rows.append({
+                "benchmark": f"{name}/{case}",
+                "metric": metric,
+                "baseline": old,
+                "current": new,
+                "change": change,
+                "regression": worse > threshold,
+            })
+    return rows
+
+
+def load_results(path: str) -> Dict:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_results(results: Dict, path: str):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2, ensure_ascii=False)
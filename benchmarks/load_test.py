@@ -0,0 +1,330 @@
+"""
+Нагрузочный тест: синтетический парк устройств и поток команд/событий с заданной частотой.
+
+    python benchmarks/load_test.py --per-type 200 --rate 500 --duration 20
+    python benchmarks/load_test.py --lights 2000 --cameras 100 --target api --runtime asyncio
+    python benchmarks/load_test.py --target api --url http://127.0.0.1:8080 --rate 200
+
+Нагрузка открытая (open-loop): операции запускаются по расписанию с частотой --rate
+независимо от завершения предыдущих, задержка считается от запланированного момента -
+так очередь перед медленной системой видна в процентилях, а не скрывается.
+"""
+
+import argparse
+import http.client
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, "..", "src"))
+sys.path.insert(0, BENCH_DIR)
+
+from harness import quiet, save_results, summarize  # noqa: E402
+from fleet import DEVICE_TYPES, build_schedule, generate_fleet, random_command  # noqa: E402
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def rss_mb() -> Optional[float]:
+    """Текущий объем резидентной памяти процесса, МБ (Linux) или пиковый (другие ОС)"""
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except (OSError, ValueError, AttributeError):
+        if resource is None:
+            return None
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 2 ** 20 if sys.platform == "darwin" else peak / 1024
+
+
+# ============================================================
+#  Цели нагрузки
+# ============================================================
+
+class InProcessTarget:
+    """Команды через CommandDispatcher контроллера в этом же процессе"""
+
+    name = "inprocess"
+
+    def __init__(self, controller):
+        self.controller = controller
+
+    def command(self, device_id: str, action: str) -> bool:
+        return self.controller.command_dispatcher.send(device_id, action)
+
+    def close(self):
+        pass
+
+
+class ApiTarget:
+    """Команды через HTTP API (постоянное соединение на каждый поток нагрузки)"""
+
+    name = "api"
+
+    def __init__(self, url: str):
+        parts = urlsplit(url)
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self._local = threading.local()
+        self._connections = []
+
+    def _connection(self) -> http.client.HTTPConnection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = http.client.HTTPConnection(self.host, self.port, timeout=30)
+            self._local.conn = conn
+            self._connections.append(conn)
+        return conn
+
+    def command(self, device_id: str, action: str) -> bool:
+        conn = self._connection()
+        try:
+            conn.request("POST", f"/devices/{device_id}/commands",
+                         body=json.dumps({"action": action}),
+                         headers={"Content-Type": "application/json"})
+            response = conn.getresponse()
+            body = json.loads(response.read())
+        except (OSError, http.client.HTTPException):
+            conn.close()
+            self._local.conn = None
+            return False
+        return response.status == 200 and body.get("success", False)
+
+    def close(self):
+        for conn in self._connections:
+            conn.close()
+
+
+def emit_device_event(device) -> bool:
+    """Событие от устройства (как от датчика или симуляции) под его блокировкой"""
+    with device.lock:
+        kind = device.type
+        if kind == "security_camera":
+            device.data["motion_detected"] = not device.data.get("motion_detected", False)
+            device.emit_event("motion_detected", {"device_id": device.device_id})
+        elif kind == "thermostat":
+            device.data["temperature"] = round(device.data.get("temperature", 22.0) + random.uniform(-0.5, 0.5), 1)
+            device.emit_event("temperature_changed", {"temperature": device.data["temperature"]})
+        elif kind == "lamp":
+            device.data["temperature"] = round(random.uniform(20, 24), 1)
+            device.emit_event("temperature_changed", {"temperature": device.data["temperature"]})
+        else:
+            device.emit_event("heartbeat", {"device_id": device.device_id})
+    return True
+
+
+# ============================================================
+#  Генератор нагрузки
+# ============================================================
+
+def drive(operations: List[Tuple[str, Callable[[], bool]]], rate: float, workers: int) -> Dict:
+    """Запустить операции с частотой rate (open-loop) и собрать задержки по типам"""
+    latencies: Dict[str, List[float]] = {}
+    errors: Dict[str, int] = {}
+    lock = threading.Lock()
+
+    def run(kind: str, operation: Callable[[], bool], intended: float):
+        try:
+            ok = operation()
+        except Exception:
+            ok = False
+        latency = time.perf_counter() - intended
+        with lock:
+            latencies.setdefault(kind, []).append(latency)
+            if not ok:
+                errors[kind] = errors.get(kind, 0) + 1
+
+    interval = 1.0 / rate
+    late = 0
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="load") as pool:
+        start = time.perf_counter()
+        for i, (kind, operation) in enumerate(operations):
+            intended = start + i * interval
+            delay = intended - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            elif delay < -interval:
+                late += 1  # генератор не успевает - частота ниже заданной
+            pool.submit(run, kind, operation, intended)
+        issued = time.perf_counter() - start
+    elapsed = time.perf_counter() - start
+
+    report = {
+        "operations": len(operations),
+        "target_rate": rate,
+        "issue_seconds": issued,
+        "elapsed_seconds": elapsed,
+        "throughput": len(operations) / elapsed if elapsed else 0.0,
+        "late_issues": late,
+        "by_type": {},
+    }
+    all_latencies = []
+    for kind, values in latencies.items():
+        all_latencies.extend(values)
+        stats = summarize(values)
+        stats["errors"] = errors.get(kind, 0)
+        report["by_type"][kind] = stats
+    if all_latencies:
+        report["overall"] = summarize(all_latencies)
+        report["overall"]["errors"] = sum(errors.values())
+    return report
+
+
+def build_operations(controller, target, fleet: Dict[str, List[str]], count: int,
+                     event_share: float, seed: int) -> List[Tuple[str, Callable[[], bool]]]:
+    rng = random.Random(seed)
+    kinds = [kind for kind, ids in fleet.items() if ids]
+    devices = controller.device_manager.devices if controller is not None else {}
+    operations = []
+    for _ in range(count):
+        kind = rng.choice(kinds)
+        device_id = rng.choice(fleet[kind])
+        if controller is not None and rng.random() < event_share:
+            device = devices[device_id]
+            operations.append(("event", lambda device=device: emit_device_event(device)))
+        else:
+            action = random_command(rng, kind)
+            operations.append(("command", lambda d=device_id, a=action: target.command(d, a)))
+    return operations
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Нагрузочный тест умного дома")
+    parser.add_argument("--per-type", type=int, default=None, help="устройств каждого типа")
+    for kind in DEVICE_TYPES:
+        parser.add_argument(f"--{kind}s" if kind != "water" else "--water", type=int, default=None,
+                            dest=kind, help=f"число устройств типа {kind}")
+    parser.add_argument("--rate", type=float, default=200.0, help="операций в секунду")
+    parser.add_argument("--duration", type=float, default=10.0, help="длительность, с")
+    parser.add_argument("--workers", type=int, default=32, help="потоков генератора нагрузки")
+    parser.add_argument("--events", type=float, default=0.5, help="доля событий устройств (0-1)")
+    parser.add_argument("--target", choices=["inprocess", "api"], default="inprocess")
+    parser.add_argument("--url", help="адрес внешнего API (без него API поднимается в процессе)")
+    parser.add_argument("--runtime", choices=["threads", "asyncio"], default="threads")
+    parser.add_argument("--tracemalloc", action="store_true", help="учет памяти Python-объектов")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="файл отчета JSON")
+    args = parser.parse_args(argv)
+
+    per_type = 100 if args.per_type is None else args.per_type
+    counts = {kind: getattr(args, kind) if getattr(args, kind) is not None else per_type
+              for kind in DEVICE_TYPES}
+    operation_count = int(args.rate * args.duration)
+
+    cwd = os.getcwd()
+    workdir = tempfile.TemporaryDirectory(prefix="smart_home_load_")
+    os.chdir(workdir.name)
+    controller = None
+    target = None
+    try:
+        if args.tracemalloc:
+            tracemalloc.start()
+        rss_start = rss_mb()
+
+        if args.url:
+            # Внешний сервер: только команды, парк должен совпадать по id
+            fleet = {kind: [f"{DEVICE_TYPES[kind][1]}_{i:05d}" for i in range(count)]
+                     for kind, count in counts.items()}
+            target = ApiTarget(args.url)
+        else:
+            with quiet():
+                from core.home_controller import HomeController
+                from services.storage_service import StateStorage
+
+                controller = HomeController()
+                controller.device_manager.state_storage = StateStorage(
+                    os.path.join(workdir.name, "device_state.json"))
+                fleet = generate_fleet(controller.device_manager, counts, seed=args.seed)
+                controller.schedule_service.schedule = build_schedule(fleet, seed=args.seed)
+                controller.start_system(runtime=args.runtime)
+                if args.target == "api":
+                    server = controller.start_api(port=0)
+                    target = ApiTarget(f"http://127.0.0.1:{server.port}")
+                else:
+                    target = InProcessTarget(controller)
+
+        operations = build_operations(controller, target, fleet, operation_count, args.events, args.seed)
+        rss_ready = rss_mb()
+        traced_ready = tracemalloc.get_traced_memory()[0] if args.tracemalloc else None
+
+        print(f"Парк: {sum(counts.values())} устройств {counts}; "
+              f"{operation_count} операций с частотой {args.rate:g}/с ({args.target}, {args.runtime})")
+        with quiet():
+            report = drive(operations, args.rate, args.workers)
+
+        report["fleet"] = counts
+        report["target"] = args.target
+        report["runtime"] = args.runtime
+        report["memory"] = {
+            "rss_start_mb": rss_start,
+            "rss_after_setup_mb": rss_ready,
+            "rss_end_mb": rss_mb(),
+        }
+        if args.tracemalloc:
+            current, peak = tracemalloc.get_traced_memory()
+            report["memory"].update({
+                "traced_after_setup_mb": traced_ready / 2 ** 20,
+                "traced_end_mb": current / 2 ** 20,
+                "traced_peak_mb": peak / 2 ** 20,
+            })
+        if controller is not None:
+            depths = controller.command_dispatcher.get_metrics().values()
+            report["mailboxes"] = {
+                "max_depth": max((m["max_depth"] for m in depths), default=0),
+                "coalesced": sum(m["coalesced"] for m in depths),
+                "rejected": sum(m["rejected"] for m in depths),
+            }
+    finally:
+        if target is not None:
+            target.close()
+        if controller is not None:
+            with quiet():
+                controller.stop_system()
+        os.chdir(cwd)
+        workdir.cleanup()
+
+    print_report(report)
+    if args.output:
+        save_results(report, args.output)
+        print(f"Отчет: {args.output}")
+    return 0
+
+
+def print_report(report: Dict):
+    print(f"\nВыполнено {report['operations']} операций за {report['elapsed_seconds']:.1f} с "
+          f"({report['throughput']:.0f} оп/с, цель {report['target_rate']:g}/с, "
+          f"опозданий генератора {report['late_issues']})")
+    rows = dict(report["by_type"])
+    if "overall" in report:
+        rows["всего"] = report["overall"]
+    for kind, stats in rows.items():
+        print(f"  {kind:8} n={stats['n']:7}  p50 {stats['median_us'] / 1000:8.2f} мс  "
+              f"p95 {stats['p95_us'] / 1000:8.2f} мс  p99 {stats['p99_us'] / 1000:8.2f} мс  "
+              f"max {stats['max_us'] / 1000:8.2f} мс  ошибок {stats['errors']}")
+    memory = report["memory"]
+    if memory.get("rss_end_mb") is not None:
+        print(f"  память RSS: {memory['rss_after_setup_mb']:.1f} → {memory['rss_end_mb']:.1f} МБ "
+              f"(+{memory['rss_end_mb'] - memory['rss_after_setup_mb']:.1f} МБ за прогон)")
+    if "traced_end_mb" in memory:
+        print(f"  tracemalloc: {memory['traced_after_setup_mb']:.1f} → {memory['traced_end_mb']:.1f} МБ "
+              f"(пик {memory['traced_peak_mb']:.1f} МБ)")
+    if "mailboxes" in report:
+        print(f"  очереди команд: max глубина {report['mailboxes']['max_depth']}, "
+              f"слито {report['mailboxes']['coalesced']}, отклонено {report['mailboxes']['rejected']}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
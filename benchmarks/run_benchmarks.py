@@ -0,0 +1,108 @@
+"""
+Запуск бенчмарков горячих путей умного дома.
+
+    python benchmarks/run_benchmarks.py                       # все замеры, результаты в benchmarks/results/
+    python benchmarks/run_benchmarks.py --quick event_bus     # быстрый прогон по префиксу имени
+    python benchmarks/run_benchmarks.py --save-baseline       # сохранить результаты как базу
+    python benchmarks/run_benchmarks.py --compare             # сравнить с базой (код 1 при регрессии)
+
+Замеры выполняются во временной папке: логи и файлы состояния не попадают в проект.
+
+benchmarks/baseline.json в репозитории - полный прогон на машине разработчика (версия
+Python и платформа записаны в файле). Времена зависят от машины, поэтому CI сначала
+сохраняет базу на своей машине прогоном исходной ветки с --save-baseline, а затем
+запускает --compare на изменениях. База и результаты должны быть сняты в одном режиме
+(с --quick или без).
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, "..", "src"))
+sys.path.insert(0, BENCH_DIR)
+
+import harness  # noqa: E402
+import bench_hot_paths  # noqa: E402,F401  (регистрирует бенчмарки)
+
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, "baseline.json")
+DEFAULT_RESULTS_DIR = os.path.join(BENCH_DIR, "results")
+
+
+def print_results(results):
+    for name, cases in results["results"].items():
+        print(f"\n{name}")
+        for case, metrics in cases.items():
+            if "median_us" in metrics:
+                line = (f"median {metrics['median_us']:10.1f} мкс   "
+                        f"p95 {metrics['p95_us']:10.1f} мкс")
+            else:
+                line = ""
+            if "ops_per_sec" in metrics:
+                line += f"   {metrics['ops_per_sec']:12.0f} оп/с"
+            print(f"  {case:40} {line}")
+
+
+def print_comparison(rows, threshold):
+    print(f"\nСравнение с базой (порог регрессии {threshold:.0%}):")
+    for row in rows:
+        mark = "❌" if row["regression"] else "✅"
+        print(f"  {mark} {row['benchmark']:55} {row['metric']:11} "
+              f"{row['baseline']:12.1f} → {row['current']:12.1f} ({row['change']:+.1%})")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Бенчмарки горячих путей")
+    parser.add_argument("names", nargs="*", help="префиксы имен бенчмарков")
+    parser.add_argument("--quick", action="store_true", help="меньше итераций и устройств")
+    parser.add_argument("--output", help="файл результатов JSON")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="файл базы для сравнения")
+    parser.add_argument("--save-baseline", action="store_true", help="сохранить результаты как базу")
+    parser.add_argument("--compare", action="store_true", help="сравнить с базой")
+    parser.add_argument("--threshold", type=float, default=0.20, help="допустимое ухудшение (0.2 = 20%%)")
+    parser.add_argument("--list", action="store_true", help="показать список бенчмарков")
+    args = parser.parse_args(argv)
+
+    if args.list:
+        for name in harness.BENCHMARKS:
+            print(name)
+        return 0
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix="smart_home_bench_") as workdir:
+        os.chdir(workdir)
+        try:
+            results = harness.run_all(args.names, quick=args.quick)
+        finally:
+            os.chdir(cwd)
+
+    print_results(results)
+
+    output = args.output or os.path.join(
+        DEFAULT_RESULTS_DIR, f"results_{results['created'].replace(':', '-')}.json")
+    harness.save_results(results, output)
+    print(f"\nРезультаты: {output}")
+
+    if args.save_baseline:
+        harness.save_results(results, args.baseline)
+        print(f"База сохранена: {args.baseline}")
+
+    if args.compare:
+        if not os.path.exists(args.baseline):
+            print(f"База {args.baseline} не найдена (создайте ее с --save-baseline)")
+            return 2
+        baseline = harness.load_results(args.baseline)
+        if baseline.get("quick") != results["quick"]:
+            print("База и результаты сняты в разных режимах (--quick): сравнение неинформативно")
+            return 2
+        rows = harness.compare(results, baseline, args.threshold)
+        print_comparison(rows, args.threshold)
+        if any(row["regression"] for row in rows):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
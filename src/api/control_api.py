@@ -0,0 +1,530 @@
+"""
+HTTP/JSON API управления умным домом поверх HomeController
+"""
+
+import asyncio
+import json
+import time
+from functools import partial
+from typing import AsyncIterator, Dict, List
+
+from api.http_server import HttpError, HttpServer, Request, Response, Router, StreamResponse
+from devices.device_snapshot import thaw
+from services import metrics
+from services.scene_engine import SceneError
+from services.transition_engine import TransitionError
+from services.event_stream import EventStream, StreamSubscription
+
+
+class ControlApi:
+    """Маршруты API: устройства, команды, расписание, логи, уведомления, поток событий"""
+
+    def __init__(self, controller, command_timeout: float = 10.0, max_batch: int = 500,
+                 heartbeat_interval: float = 15.0):
+        self.controller = controller
+        self.command_timeout = command_timeout
+        self.max_batch = max_batch
+        self.heartbeat_interval = heartbeat_interval
+        self.event_stream = getattr(controller, "event_stream", None) or EventStream(
+            controller.device_manager, getattr(controller, "event_bus", None)
+        )
+        self.router = Router()
+        self._register_routes()
+
+    def _register_routes(self):
+        add = self.router.add
+        add("GET", "/status", self.get_status)
+        add("GET", "/devices", self.list_devices)
+        add("GET", "/devices/{device_id}", self.get_device)
+        add("GET", "/devices/{device_id}/history", self.get_device_history)
+        add("POST", "/devices/{device_id}/commands", self.send_command)
+        add("POST", "/commands/batch", self.send_batch)
+        add("GET", "/groups", self.list_groups)
+        add("POST", "/groups/commands", self.send_group_command)
+        add("GET", "/transitions", self.list_transitions)
+        add("POST", "/devices/{device_id}/transitions", self.start_transition)
+        add("DELETE", "/devices/{device_id}/transitions", self.cancel_transitions)
+        add("GET", "/schedule", self.list_schedule)
+        add("POST", "/schedule", self.add_schedule_task)
+        add("PUT", "/schedule/{time}/{index}", self.update_schedule_task)
+        add("DELETE", "/schedule/{time}/{index}", self.remove_schedule_task)
+        add("GET", "/logs", self.get_logs)
+        add("GET", "/notifications", self.list_notifications)
+        add("POST", "/notifications/{notification_id}/read", self.mark_notification_read)
+        add("GET", "/scenes", self.list_scenes)
+        add("POST", "/scenes/{name}/start", self.start_scene)
+        add("GET", "/scene-runs/{run_id}", self.get_scene_run)
+        add("POST", "/scene-runs/{run_id}/cancel", self.cancel_scene_run)
+        add("GET", "/telemetry", self.list_telemetry)
+        add("GET", "/telemetry/{device_id}/{metric}", self.get_telemetry)
+        add("POST", "/export", self.export_history)
+        add("GET", "/metrics", self.get_metrics)
+        add("GET", "/metrics.json", self.get_metrics_snapshot)
+        add("GET", "/profiler", self.get_profiler)
+        add("POST", "/profiler/start", self.start_profiler)
+        add("POST", "/profiler/stop", self.stop_profiler)
+        add("GET", "/events", self.stream_events)
+
+    def create_server(self, host: str = "127.0.0.1", port: int = 8080) -> HttpServer:
+        return HttpServer(self.router, host, port)
+
+    @staticmethod
+    async def _blocking(func, *args, **kwargs):
+        """Вызов синхронного API контроллера в пуле, чтобы не останавливать цикл событий"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, partial(func, *args, **kwargs))
+
+    @property
+    def _devices(self):
+        return self.controller.device_manager
+
+    # ============================================================
+    #  Устройства
+    # ============================================================
+
+    async def get_status(self, request: Request):
+        devices = self._devices
+        states = {device_id: device.state for device_id, device in list(devices.devices.items())}
+        return {
+            "devices_total": len(states),
+            "devices_on": sum(1 for state in states.values() if state == "on"),
+            "devices": states,
+            "change_seq": getattr(devices, "change_seq", 0),
+            "notifications_unread": await self._blocking(self.controller.notification_service.unread_count),
+        }
+
+    @staticmethod
+    def _group_filters(values: Dict) -> Dict:
+        """Фильтры групп из параметров запроса или тела: type, room, floor, tags"""
+        filters = {key: values[key] for key in ("type", "room", "floor") if values.get(key) not in (None, "")}
+        tags = values.get("tags") or values.get("tag")
+        if isinstance(tags, str):
+            tags = [tag for tag in tags.split(",") if tag]
+        if tags:
+            filters["tags"] = list(tags)
+        return filters
+
+    @staticmethod
+    def _find_args(filters: Dict) -> Dict:
+        """Фильтры запроса как аргументы find_devices: "type" передается как device_type"""
+        args = dict(filters)
+        if "type" in args:
+            args["device_type"] = args.pop("type")
+        return args
+
+    async def list_devices(self, request: Request):
+        # Снимки берутся из кэша устройств - без блокировок и копирования
+        devices = self._devices
+        filters = self._group_filters(request.query)
+        device_ids = devices.find_devices(**self._find_args(filters)) if filters else list(devices.devices)
+        return {
+            "devices": [thaw(devices.get_device_snapshot(device_id)) for device_id in device_ids]
+        }
+
+    async def get_device(self, request: Request):
+        device_id = request.params["device_id"]
+        if self._devices.get_device(device_id) is None:
+            raise HttpError(404, f"Устройство {device_id} не найдено")
+        return thaw(self._devices.get_device_snapshot(device_id))
+
+    async def get_device_history(self, request: Request):
+        device_id = request.params["device_id"]
+        if self._devices.get_device(device_id) is None:
+            raise HttpError(404, f"Устройство {device_id} не найдено")
+        limit = max(1, min(request.query_int("limit", 10), 100))
+        devices = self._devices
+        return {
+            "device_id": device_id,
+            "history": devices.get_device_state_history(device_id, limit),
+            "stats": devices.get_device_stats(device_id) if hasattr(devices, "get_device_stats") else {},
+        }
+
+    async def list_groups(self, request: Request):
+        return {"groups": self._devices.get_groups()}
+
+    # ============================================================
+    #  Команды
+    # ============================================================
+
+    def _submit(self, device_id: str, action: str):
+        """Поставить команду в очередь устройства; вернуть awaitable с результатом"""
+        dispatcher = getattr(self.controller, "command_dispatcher", None)
+        if dispatcher is not None:
+            return asyncio.wrap_future(dispatcher.submit(device_id, action))
+        return self._blocking(self._devices.send_command, device_id, action)
+
+    async def send_command(self, request: Request):
+        device_id = request.params["device_id"]
+        action = request.json().get("action")
+        if not isinstance(action, str) or not action:
+            raise HttpError(400, "Не указано действие (action)")
+        if self._devices.get_device(device_id) is None:
+            raise HttpError(404, f"Устройство {device_id} не найдено")
+
+        try:
+            # shield: по таймауту отвечаем 504, но команду из очереди устройства не отменяем
+            success = await asyncio.wait_for(asyncio.shield(self._submit(device_id, action)),
+                                             self.command_timeout)
+        except asyncio.TimeoutError:
+            raise HttpError(504, f"Команда {action} для {device_id} не выполнена вовремя")
+        return {"device_id": device_id, "action": action, "success": bool(success)}
+
+    async def send_batch(self, request: Request):
+        commands = request.json().get("commands")
+        if not isinstance(commands, list) or not commands:
+            raise HttpError(400, "Ожидается непустой список commands")
+        if len(commands) > self.max_batch:
+            raise HttpError(413, f"Не больше {self.max_batch} команд за запрос")
+
+        # Все команды ставятся в очереди сразу: разные устройства выполняются
+        # параллельно, команды одного устройства - по порядку
+        results: List[Dict] = [None] * len(commands)
+        pending = []
+        for i, command in enumerate(commands):
+            device_id = command.get("device_id") if isinstance(command, dict) else None
+            action = command.get("action") if isinstance(command, dict) else None
+            if not device_id or not action:
+                results[i] = {"device_id": device_id, "action": action,
+                              "success": False, "error": "Не указаны device_id и action"}
+            elif self._devices.get_device(device_id) is None:
+                results[i] = {"device_id": device_id, "action": action,
+                              "success": False, "error": "Устройство не найдено"}
+            else:
+                results[i] = {"device_id": device_id, "action": action, "success": False}
+                pending.append((i, self._submit(device_id, action)))
+
+        if pending:
+            futures = [(i, asyncio.ensure_future(awaitable)) for i, awaitable in pending]
+            await asyncio.wait([future for _, future in futures], timeout=self.command_timeout)
+            for i, future in futures:
+                if not future.done():
+                    # Остальные результаты пакета возвращаются, не дожидаясь долгой команды;
+                    # сама команда остается в очереди устройства и выполнится
+                    results[i]["error"] = "Команда не выполнена вовремя"
+                elif not future.cancelled() and future.exception() is None:
+                    results[i]["success"] = future.result() is True
+
+        return {
+            "results": results,
+            "succeeded": sum(1 for result in results if result["success"]),
+        }
+
+    async def send_group_command(self, request: Request):
+        body = request.json()
+        action = body.get("action")
+        if not isinstance(action, str) or not action:
+            raise HttpError(400, "Не указано действие (action)")
+        filters = self._group_filters(body)
+        if not filters:
+            # Команда всем устройствам только явным списком, а не пустым фильтром
+            raise HttpError(400, "Не указана группа (type, room, floor или tags)")
+        results = await self._blocking(self._devices.send_group_command, action,
+                                       **self._find_args(filters))
+        return {"action": action, "filters": filters, "results": results,
+                "succeeded": sum(1 for success in results.values() if success)}
+
+    # ============================================================
+    #  Расписание
+    # ============================================================
+
+    @staticmethod
+    def _task_index(request: Request) -> int:
+        try:
+            return int(request.params["index"])
+        except ValueError:
+            raise HttpError(400, "Индекс задачи должен быть числом")
+
+    def _find_task(self, time_str: str, index: int) -> Dict:
+        tasks = self.controller.schedule_service.schedule.get(time_str, [])
+        if not 0 <= index < len(tasks):
+            raise HttpError(404, f"Задача {time_str}/{index} не найдена")
+        return tasks[index]
+
+    async def list_schedule(self, request: Request):
+        tasks = await self._blocking(self.controller.schedule_service.get_all_tasks)
+        return {"tasks": tasks}
+
+    async def add_schedule_task(self, request: Request):
+        body = request.json()
+        time_str, device_id, action = body.get("time"), body.get("device_id"), body.get("action")
+        if not time_str or not device_id or not action:
+            raise HttpError(400, "Нужны поля time, device_id и action")
+        if self._devices.get_device(device_id) is None:
+            raise HttpError(404, f"Устройство {device_id} не найдено")
+
+        added = await self._blocking(
+            self.controller.schedule_service.add_task,
+            time_str, device_id, action, days=body.get("days"), enabled=body.get("enabled", True)
+        )
+        if not added:
+            raise HttpError(400, f"Некорректное время {time_str}")
+        index = len(self.controller.schedule_service.schedule[time_str]) - 1
+        return 201, {"time": time_str, "index": index}
+
+    async def update_schedule_task(self, request: Request):
+        time_str, index = request.params["time"], self._task_index(request)
+        self._find_task(time_str, index)
+        body = request.json()
+
+        updated = await self._blocking(
+            self.controller.schedule_service.update_task,
+            time_str, index,
+            new_time=body.get("time"),
+            new_device_id=body.get("device_id"),
+            new_action=body.get("action"),
+            new_days=body.get("days"),
+            new_enabled=body.get("enabled"),
+        )
+        if not updated:
+            raise HttpError(400, "Некорректные параметры задачи")
+        return {"updated": True}
+
+    async def remove_schedule_task(self, request: Request):
+        time_str, index = request.params["time"], self._task_index(request)
+        self._find_task(time_str, index)
+        await self._blocking(self.controller.schedule_service.remove_task, time_str, index)
+        return {"removed": True}
+
+    # ============================================================
+    #  Плавные переходы
+    # ============================================================
+
+    async def list_transitions(self, request: Request):
+        return {"transitions": [t.to_dict() for t in self.controller.transition_engine.active()]}
+
+    async def start_transition(self, request: Request):
+        body = request.json()
+        attribute, target, duration = body.get("attribute"), body.get("to"), body.get("duration")
+        if not isinstance(attribute, str) or not isinstance(target, (int, float)) \
+                or not isinstance(duration, (int, float)):
+            raise HttpError(400, "Нужны поля attribute, to и duration (секунды)")
+        try:
+            transition = self.controller.transition_engine.start(
+                request.params["device_id"], attribute, target, duration,
+                start=body.get("from"), easing=body.get("easing", "linear"))
+        except TransitionError as e:
+            raise HttpError(400, str(e))
+        except (TypeError, ValueError):
+            raise HttpError(400, "Поле from должно быть числом")
+        return 202, transition.to_dict()
+
+    async def cancel_transitions(self, request: Request):
+        cancelled = self.controller.transition_engine.cancel(
+            request.params["device_id"], request.query.get("attribute"))
+        return {"cancelled": cancelled}
+
+    # ============================================================
+    #  Сцены
+    # ============================================================
+
+    def _scene_run(self, request: Request):
+        try:
+            run_id = int(request.params["run_id"])
+        except ValueError:
+            raise HttpError(400, "run_id должен быть числом")
+        run = self.controller.scene_engine.get_run(run_id)
+        if run is None:
+            raise HttpError(404, f"Запуск сцены {run_id} не найден")
+        return run
+
+    async def list_scenes(self, request: Request):
+        engine = self.controller.scene_engine
+        return {
+            "scenes": [scene.to_dict() for scene in engine.scenes.values()],
+            "active": [run.to_dict() for run in engine.active_runs()],
+        }
+
+    async def start_scene(self, request: Request):
+        name = request.params["name"]
+        priority = request.json().get("priority", 0)
+        if not isinstance(priority, int):
+            raise HttpError(400, "priority должен быть целым числом")
+        engine = self.controller.scene_engine
+        if name not in engine.scenes:
+            raise HttpError(404, f"Сцена {name} не найдена")
+        try:
+            run = engine.start(name, priority)
+        except SceneError as e:
+            raise HttpError(409, str(e))
+        return 202, run.to_dict()
+
+    async def get_scene_run(self, request: Request):
+        return self._scene_run(request).to_dict()
+
+    async def cancel_scene_run(self, request: Request):
+        run = self._scene_run(request)
+        if not self.controller.scene_engine.cancel(run.run_id):
+            raise HttpError(409, f"Сцена уже завершена ({run.status})")
+        return run.to_dict()
+
+    # ============================================================
+    #  Логи и уведомления
+    # ============================================================
+
+    async def get_logs(self, request: Request):
+        log_type = request.query.get("type", "SYSTEM").upper()
+        logging_service = self.controller.logging_service
+        if log_type not in logging_service.get_log_types():
+            raise HttpError(400, f"Неизвестный тип логов {log_type}")
+        limit = max(1, min(request.query_int("limit", 50), 1000))
+        return {"type": log_type, "entries": logging_service.get_logs(log_type, limit)}
+
+    async def list_notifications(self, request: Request):
+        service = self.controller.notification_service
+        limit = max(1, min(request.query_int("limit", 100), 1000))
+        if "before_id" in request.query:
+            items = await self._blocking(
+                service.list_notifications_before, request.query_int("before_id", 0), limit)
+        else:
+            items = await self._blocking(
+                service.list_notifications, request.query_int("after_id", 0), limit)
+        if request.query.get("unread") in ("1", "true"):
+            items = [item for item in items if not item["read"]]
+        return {
+            "notifications": items,
+            "next_after_id": items[-1]["id"] if items else request.query_int("after_id", 0),
+        }
+
+    async def mark_notification_read(self, request: Request):
+        try:
+            notification_id = int(request.params["notification_id"])
+        except ValueError:
+            raise HttpError(400, "Id уведомления должен быть числом")
+        service = self.controller.notification_service
+        if await self._blocking(service.get_notification, notification_id) is None:
+            raise HttpError(404, f"Уведомление {notification_id} не найдено")
+        await self._blocking(service.mark_as_read, notification_id)
+        return {"id": notification_id, "read": True}
+
+    # ============================================================
+    #  Телеметрия
+    # ============================================================
+
+    def _telemetry(self):
+        telemetry = getattr(self.controller, "telemetry", None)
+        if telemetry is None:
+            raise HttpError(404, "Телеметрия не настроена")
+        return telemetry
+
+    async def list_telemetry(self, request: Request):
+        return {"series": self._telemetry().series()}
+
+    async def get_telemetry(self, request: Request):
+        # Период: start/end (секунды Unix) или since - секунд до текущего момента
+        now = time.time()
+        end = request.query_int("end", int(now))
+        start = request.query_int("start", end - request.query_int("since", 3600))
+        max_points = max(1, min(request.query_int("max_points", 1000), 10000))
+        try:
+            return self._telemetry().query(
+                request.params["device_id"], request.params["metric"], start, end,
+                request.query.get("resolution", "auto"), max_points)
+        except ValueError as e:
+            raise HttpError(400, str(e))
+
+    async def export_history(self, request: Request):
+        export = getattr(self.controller, "export_history", None)
+        if export is None:
+            raise HttpError(404, "Выгрузка истории не настроена")
+        return await self._blocking(export)
+
+    # ============================================================
+    #  Метрики
+    # ============================================================
+
+    async def get_metrics(self, request: Request):
+        """Метрики в текстовом формате Prometheus"""
+        return Response(
+            body=metrics.registry.to_prometheus().encode("utf-8"),
+            content_type="text/plain; version=0.0.4; charset=utf-8"
+        )
+
+    async def get_metrics_snapshot(self, request: Request):
+        return {"enabled": metrics.registry.enabled, "metrics": metrics.registry.snapshot()}
+
+    # ============================================================
+    #  Профилировщик
+    # ============================================================
+
+    def _profiler(self):
+        profiler = getattr(self.controller, "profiler", None)
+        if profiler is None:
+            raise HttpError(404, "Профилировщик недоступен")
+        return profiler
+
+    async def get_profiler(self, request: Request):
+        profiler = self._profiler()
+        return dict(profiler.status(), top=profiler.top())
+
+    async def start_profiler(self, request: Request):
+        profiler = self._profiler()
+        interval = request.json().get("interval")
+        if interval is not None and not (isinstance(interval, (int, float)) and 0.0005 <= interval <= 1):
+            raise HttpError(400, "interval должен быть от 0.0005 до 1 секунды")
+        if not profiler.start(interval):
+            raise HttpError(409, "Профилирование уже запущено")
+        return profiler.status()
+
+    async def stop_profiler(self, request: Request):
+        profiler = self._profiler()
+        if not profiler.is_running:
+            raise HttpError(409, "Профилирование не запущено")
+        path = await self._blocking(profiler.stop)
+        return dict(profiler.status(), file=path, top=profiler.top())
+
+    # ============================================================
+    #  Поток событий (Server-Sent Events)
+    # ============================================================
+
+    async def stream_events(self, request: Request):
+        """GET /events?devices=a,b&topics=state_changed,notification&policy=coalesce"""
+        def split(name):
+            value = request.query.get(name, "")
+            return [item for item in value.split(",") if item] or None
+
+        policy = request.query.get("policy", "coalesce")
+        if policy not in StreamSubscription.POLICIES:
+            raise HttpError(400, f"Неизвестная политика {policy}")
+        buffer_size = max(1, min(request.query_int("buffer", 256), 10000))
+
+        subscription = self.event_stream.subscribe(split("devices"), split("topics"), buffer_size, policy)
+        return StreamResponse(self._sse_chunks(subscription))
+
+    @staticmethod
+    def _sse_message(message: Dict) -> bytes:
+        lines = []
+        if "id" in message:
+            lines.append(f"id: {message['id']}")
+        lines.append(f"event: {message['event']}")
+        lines.append("data: " + json.dumps(message, ensure_ascii=False, default=str))
+        return ("\n".join(lines) + "\n\n").encode("utf-8")
+
+    async def _sse_chunks(self, subscription: StreamSubscription) -> AsyncIterator[bytes]:
+        loop = asyncio.get_running_loop()
+        wakeup = asyncio.Event()
+        # Публикация идет из потоков устройств: будим клиента через цикл событий
+        subscription.set_notify(lambda: loop.call_soon_threadsafe(wakeup.set))
+        try:
+            yield b"retry: 3000\n\n"
+            for message in self.event_stream.initial_snapshots(subscription):
+                yield self._sse_message(message)
+
+            reported_drops = 0
+            while not subscription.closed:
+                try:
+                    await asyncio.wait_for(wakeup.wait(), self.heartbeat_interval)
+                except asyncio.TimeoutError:
+                    yield b": keepalive\n\n"
+                    continue
+                wakeup.clear()
+
+                messages = subscription.drain()
+                if subscription.dropped != reported_drops:
+                    # Клиент отстал и потерял дельты - пусть перечитает /devices
+                    reported_drops = subscription.dropped
+                    yield self._sse_message({"event": "resync", "dropped": reported_drops})
+                if messages:
+                    yield b"".join(self._sse_message(message) for message in messages)
+        finally:
+            subscription.set_notify(None)
+            self.event_stream.unsubscribe(subscription)
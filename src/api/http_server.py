@@ -0,0 +1,317 @@
+"""
+Минимальный асинхронный HTTP/1.1 сервер с JSON-ответами (только стандартная библиотека)
+"""
+
+import asyncio
+import json
+import re
+import threading
+from http import HTTPStatus
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, unquote, urlsplit
+
+
+class HttpError(Exception):
+    """Ошибка обработки запроса с HTTP-статусом"""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class Request:
+    """Разобранный HTTP-запрос"""
+
+    def __init__(self, method: str, target: str, version: str,
+                 headers: Dict[str, str], body: bytes):
+        self.method = method
+        self.version = version
+        self.headers = headers
+        self.body = body
+        parts = urlsplit(target)
+        self.path = unquote(parts.path)
+        self.query = {key: values[-1] for key, values in parse_qs(parts.query).items()}
+        self.params: Dict[str, str] = {}
+
+    @property
+    def keep_alive(self) -> bool:
+        connection = self.headers.get("connection", "").lower()
+        if self.version == "HTTP/1.0":
+            return connection == "keep-alive"
+        return connection != "close"
+
+    def json(self):
+        """Тело запроса как JSON (пустое тело - пустой словарь)"""
+        if not self.body:
+            return {}
+        try:
+            return json.loads(self.body)
+        except ValueError:
+            raise HttpError(400, "Тело запроса не является корректным JSON")
+
+    def query_int(self, name: str, default: int) -> int:
+        value = self.query.get(name)
+        if value is None:
+            return default
+        try:
+            return int(value)
+        except ValueError:
+            raise HttpError(400, f"Параметр {name} должен быть числом")
+
+
+class Response:
+    """HTTP-ответ; тело - JSON или готовые байты"""
+
+    def __init__(self, status: int = 200, payload=None, body: bytes = None,
+                 content_type: str = "application/json; charset=utf-8",
+                 headers: Dict[str, str] = None):
+        self.status = status
+        if body is None:
+            body = b"" if payload is None else json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.body = body
+        self.content_type = content_type
+        self.headers = headers or {}
+
+    def encode(self, keep_alive: bool) -> bytes:
+        reason = HTTPStatus(self.status).phrase
+        lines = [
+            f"HTTP/1.1 {self.status} {reason}",
+            f"Content-Type: {self.content_type}",
+            f"Content-Length: {len(self.body)}",
+            "Connection: keep-alive" if keep_alive else "Connection: close",
+        ]
+        lines.extend(f"{name}: {value}" for name, value in self.headers.items())
+        return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + self.body
+
+
+class StreamResponse:
+    """Потоковый ответ (например, text/event-stream): тело отдается по частям
+    до завершения генератора, после чего соединение закрывается
+    """
+
+    def __init__(self, chunks: AsyncIterator[bytes], status: int = 200,
+                 content_type: str = "text/event-stream; charset=utf-8",
+                 headers: Dict[str, str] = None):
+        self.chunks = chunks
+        self.status = status
+        self.content_type = content_type
+        self.headers = headers or {}
+
+    def encode_head(self) -> bytes:
+        reason = HTTPStatus(self.status).phrase
+        lines = [
+            f"HTTP/1.1 {self.status} {reason}",
+            f"Content-Type: {self.content_type}",
+            "Cache-Control: no-cache",
+            "Connection: close",
+        ]
+        lines.extend(f"{name}: {value}" for name, value in self.headers.items())
+        return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+
+
+Handler = Callable[[Request], Awaitable]
+
+
+class Router:
+    """Таблица маршрутов: метод + шаблон пути вида /devices/{device_id}"""
+
+    def __init__(self):
+        self._routes: List[Tuple[str, "re.Pattern", Handler]] = []
+
+    def add(self, method: str, pattern: str, handler: Handler):
+        regex = re.sub(r"\{(\w+)\}", r"(?P<\1>[^/]+)", pattern.rstrip("/") or "/")
+        self._routes.append((method.upper(), re.compile(f"^{regex}/?$"), handler))
+
+    def resolve(self, method: str, path: str) -> Tuple[Handler, Dict[str, str]]:
+        allowed = False
+        for route_method, regex, handler in self._routes:
+            match = regex.match(path)
+            if not match:
+                continue
+            if route_method == method:
+                return handler, match.groupdict()
+            allowed = True
+        if allowed:
+            raise HttpError(405, f"Метод {method} не поддерживается для {path}")
+        raise HttpError(404, f"Путь {path} не найден")
+
+
+class HttpServer:
+    """HTTP/1.1 сервер на asyncio: постоянные соединения, конвейерные запросы, JSON"""
+
+    def __init__(self, router: Router, host: str = "127.0.0.1", port: int = 8080,
+                 keepalive_timeout: float = 15.0, max_header_size: int = 64 * 1024,
+                 max_body_size: int = 1024 * 1024):
+        self.router = router
+        self.host = host
+        self.port = port
+        self.keepalive_timeout = keepalive_timeout
+        self.max_header_size = max_header_size
+        self.max_body_size = max_body_size
+        self.connections = 0
+        self.requests_served = 0
+
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._clients = set()
+        self._streams = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+
+    # ============================================================
+    #  Запуск и остановка
+    # ============================================================
+
+    async def start(self):
+        """Открыть порт в текущем цикле событий (port=0 - свободный порт)"""
+        self._server = await asyncio.start_server(
+            self._handle_client, self.host, self.port, limit=self.max_header_size
+        )
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        """Закрыть порт и все открытые соединения"""
+        if self._server is None:
+            return
+        self._server.close()
+        # Потоковые ответы ждут событий - их задачи отменяются явно
+        streams = list(self._streams)
+        for task in streams:
+            task.cancel()
+        for writer in list(self._clients):
+            writer.close()
+        await asyncio.gather(*streams, return_exceptions=True)
+        await self._server.wait_closed()
+        self._server = None
+
+    def start_in_thread(self):
+        """Запустить сервер с собственным циклом событий в фоновом потоке"""
+        started = threading.Event()
+        errors = []
+
+        def run():
+            self._loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(self._loop)
+            try:
+                self._loop.run_until_complete(self.start())
+            except Exception as e:
+                errors.append(e)
+                started.set()
+                return
+            started.set()
+            self._loop.run_forever()
+            self._loop.run_until_complete(self.stop())
+            self._loop.close()
+
+        self._thread = threading.Thread(target=run, name="http-api", daemon=True)
+        self._thread.start()
+        started.wait(5)
+        if errors:
+            raise errors[0]
+
+    def stop_thread(self, timeout: float = 5.0):
+        """Остановить сервер, запущенный start_in_thread"""
+        if self._loop is not None and self._thread is not None:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join(timeout)
+            self._thread = None
+
+    # ============================================================
+    #  Обработка соединений
+    # ============================================================
+
+    async def _handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.connections += 1
+        self._clients.add(writer)
+        try:
+            while True:
+                try:
+                    request = await asyncio.wait_for(self._read_request(reader), self.keepalive_timeout)
+                except asyncio.TimeoutError:
+                    break
+                except HttpError as e:
+                    writer.write(Response(e.status, {"error": e.message}).encode(False))
+                    await writer.drain()
+                    break
+                if request is None:
+                    break
+
+                response = await self._dispatch(request)
+                self.requests_served += 1
+                if isinstance(response, StreamResponse):
+                    await self._write_stream(response, writer)
+                    break
+                writer.write(response.encode(request.keep_alive))
+                await writer.drain()
+                if not request.keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self._clients.discard(writer)
+            writer.close()
+
+    async def _write_stream(self, response: StreamResponse, writer: asyncio.StreamWriter):
+        """Отдать потоковый ответ; drain дает обратное давление только этому клиенту"""
+        task = asyncio.current_task()
+        self._streams.add(task)
+        try:
+            writer.write(response.encode_head())
+            await writer.drain()
+            async for chunk in response.chunks:
+                writer.write(chunk)
+                await writer.drain()
+        except asyncio.CancelledError:
+            pass
+        finally:
+            self._streams.discard(task)
+            await response.chunks.aclose()
+
+    async def _read_request(self, reader: asyncio.StreamReader) -> Optional[Request]:
+        try:
+            head = await reader.readuntil(b"\r\n\r\n")
+        except asyncio.IncompleteReadError:
+            return None  # клиент закрыл соединение между запросами
+        except asyncio.LimitOverrunError:
+            raise HttpError(431, "Слишком большие заголовки запроса")
+
+        lines = head.decode("latin-1").split("\r\n")
+        try:
+            method, target, version = lines[0].split(" ", 2)
+        except ValueError:
+            raise HttpError(400, "Некорректная строка запроса")
+
+        headers = {}
+        for line in lines[1:]:
+            if ":" in line:
+                name, value = line.split(":", 1)
+                headers[name.strip().lower()] = value.strip()
+
+        if "chunked" in headers.get("transfer-encoding", "").lower():
+            raise HttpError(411, "Требуется заголовок Content-Length")
+        try:
+            length = int(headers.get("content-length", "0"))
+        except ValueError:
+            raise HttpError(400, "Некорректный Content-Length")
+        if length > self.max_body_size:
+            raise HttpError(413, "Слишком большое тело запроса")
+        body = await reader.readexactly(length) if length else b""
+
+        return Request(method.upper(), target, version, headers, body)
+
+    async def _dispatch(self, request: Request):
+        try:
+            handler, params = self.router.resolve(request.method, request.path)
+            request.params = params
+            result = await handler(request)
+        except HttpError as e:
+            return Response(e.status, {"error": e.message})
+        except Exception as e:
+            return Response(500, {"error": f"Внутренняя ошибка: {e}"})
+
+        if isinstance(result, (Response, StreamResponse)):
+            return result
+        if isinstance(result, tuple):
+            status, payload = result
+            return Response(status, payload)
+        return Response(200, result)
@@ -13,23 +13,157 @@ class Settings:
         # Настройки устройств
         self.DEVICE_UPDATE_INTERVAL = 2  # секунды
         self.LOG_RETENTION_DAYS = 30
+
+        # Инвентарь (services/inventory.py): файл JSON/TOML/YAML с разделами "devices",
+        # "schedules" и "settings"; без файла - DEFAULT_DEVICES. Изменения файла
+        # применяются на ходу при мониторинге устройств (не чаще INVENTORY_CHECK_INTERVAL)
+        self.INVENTORY_FILE = "inventory.json"
+        self.INVENTORY_CHECK_INTERVAL = 2  # секунды
+        # Дополнительные типы устройств - манифест {"тип": "модуль:Класс"}
+        # или точки входа пакетов группы smart_home.devices
+        self.DEVICE_TYPES_MANIFEST = "device_types.json"
+
+        # Хранилище истории уведомлений (SQLite)
+        self.NOTIFICATIONS_DB = os.path.join("data", "notifications.db")
+
+        # Очередь команд устройств: потоки исполнителей и размер ящика устройства
+        self.COMMAND_WORKERS = 4
+        self.COMMAND_MAILBOX_SIZE = 100
+
+        # Среда выполнения контроллера: "threads" (поток на каждую задачу)
+        # или "asyncio" (один цикл событий, см. core/async_runtime.py)
+        self.RUNTIME = os.environ.get("SMART_HOME_RUNTIME", "threads")
+
+        # Локальный HTTP/JSON API (src/api)
+        self.API_ENABLED = os.environ.get("SMART_HOME_API", "0") == "1"
+        self.API_HOST = "127.0.0.1"
+        self.API_PORT = 8080
+
+        # Метрики горячих путей (services/metrics.py): GET /metrics и файл при остановке
+        self.METRICS_ENABLED = os.environ.get("SMART_HOME_METRICS", "0") == "1"
+        self.METRICS_FILE = os.path.join("data", "metrics.prom")
+
+        # Восстановление при запуске: "hydrate" - состояние пишется в устройства напрямую
+        # (без событий и потоков симуляции), "replay" - командами turn_on/turn_off.
+        # Активность восстановленных устройств запускается при первой команде устройству
+        # или прогревом пачками по WARM_UP_BATCH через WARM_UP_INTERVAL секунд
+        self.RESTORE_MODE = "hydrate"
+        self.WARM_UP_BATCH = 50
+        self.WARM_UP_INTERVAL = 0.2
+
+        # Журнал событий устройств (services/event_store.py): история, текущее
+        # состояние и статистика - проекции журнала; снимок каждые N событий
+        self.EVENT_LOG = os.path.join("data", "device_events.jsonl")
+        self.EVENT_SNAPSHOT_EVERY = 1000
+        self.EVENT_LOG_FSYNC = False
+
+        # Телеметрия датчиков (services/telemetry.py): кольцо сырых замеров на
+        # величину и агрегаты 1 мин / 1 ч / 1 день; агрегаты сохраняются при остановке
+        self.TELEMETRY_RAW_SIZE = 1000
+        self.TELEMETRY_FILE = os.path.join("data", "telemetry.json")
+
+        # Колоночная выгрузка журнала событий и телеметрии (services/columnar_export.py)
+        self.EXPORT_DIR = os.path.join("data", "export")
+        self.EXPORT_ROW_GROUP_SIZE = 10000
+
+        # Профилировщик по требованию (services/profiler.py): свернутые стеки для flamegraph
+        self.PROFILE_DIR = os.path.join("data", "profiles")
+        self.PROFILE_INTERVAL = 0.005  # секунды между выборками стеков
         
-        # Настройки по умолчанию для устройств
-        self.DEFAULT_DEVICES: Dict[str, Any] = {
-            "lamp_living_room": {
-                "name": "Свет в гостиной",
-                "type": "light", 
-                "brightness": 100
+        # Правила автоматизации (services/rule_engine.py); "*" в device_id -
+        # правило для каждого подходящего устройства. Дополнительные правила
+        # читаются из AUTOMATION_RULES_FILE (JSON-список в том же формате)
+        self.AUTOMATION_RULES_FILE = "automation_rules.json"
+        self.AUTOMATION_RULES = [
+            {
+                "id": "camera_recording",
+                "conditions": [{"device_id": "*camera*", "attribute": "state", "op": "==", "value": "on"}],
+                "actions": [{"notify": {"title": "Камера активирована",
+                                        "message": "Камера {device_id} начала запись", "level": "info"}}],
+            },
+            {
+                "id": "smoke_alarm",
+                "conditions": [{"device_id": "smoke_sensor", "attribute": "state",
+                                "op": "in", "value": ["alarm", "leak"]}],
+                "actions": [{"notify": {"title": "Сработал {device_id}",
+                                        "message": "{device_id} зафиксировал {value}", "level": "warning"}}],
+            },
+            {
+                "id": "water_leak_alarm",
+                "conditions": [{"device_id": "water_leak_sensor", "attribute": "state",
+                                "op": "in", "value": ["alarm", "leak"]}],
+                "actions": [{"notify": {"title": "Сработал {device_id}",
+                                        "message": "{device_id} зафиксировал {value}", "level": "warning"}}],
+            },
+        ]
+        
+        # Плавные переходы (services/transition_engine.py): кадров в секунду и
+        # минимальный интервал промежуточных событий одного перехода
+        self.TRANSITION_FPS = 10
+        self.TRANSITION_EVENT_INTERVAL = 1.0
+        
+        # Сцены (services/scene_engine.py): граф шагов с задержками и переходами.
+        # Шаги без общих зависимостей, готовые одновременно, выполняются одним пакетом
+        self.SCENE_WORKERS = 4
+        self.SCENES: Dict[str, Any] = {
+            "evening": {
+                "description": "Вечернее освещение, камера и тепло",
+                "steps": [
+                    {"id": "light_on", "device_id": "lamp_living_room", "action": "on"},
+                    {"id": "dim", "device_id": "lamp_living_room", "action": "set_brightness:70",
+                     "after": ["light_on"]},
+                    {"id": "camera_on", "device_id": "security_camera", "action": "on"},
+                    {"id": "heat", "device_id": "thermostat", "action": "on_and_set_temperature:23"},
+                ],
             },
-            "thermostat": {
-                "name": "Термостат",
-                "type": "climate",
-                "temperature": 22
+            "morning": {
+                "description": "Плавное пробуждение",
+                "steps": [
+                    {"id": "sunrise", "device_id": "lamp_living_room",
+                     "fade": {"attribute": "brightness", "from": 0, "to": 80, "duration": 2.0, "steps": 4}},
+                    {"id": "camera_off", "device_id": "security_camera", "action": "off"},
+                ],
             },
-            "security_camera": {
-                "name": "Камера безопасности", 
-                "type": "security"
-            }
+            "away": {
+                "description": "Режим отсутствия",
+                "steps": [
+                    {"id": "camera_on", "device_id": "security_camera", "action": "on"},
+                    {"id": "light_off", "device_id": "lamp_living_room", "action": "off"},
+                    {"id": "eco", "device_id": "thermostat", "action": "set_temperature:18"},
+                ],
+            },
+            "demo": {
+                "description": "Демонстрация: устройства по очереди",
+                "steps": [
+                    {"id": "light_on", "device_id": "lamp_living_room", "action": "on"},
+                    {"id": "heat_on", "device_id": "thermostat", "action": "on",
+                     "after": ["light_on"], "delay": 2},
+                    {"id": "camera_on", "device_id": "security_camera", "action": "on",
+                     "after": ["heat_on"], "delay": 2},
+                    {"id": "light_off", "device_id": "lamp_living_room", "action": "off",
+                     "after": ["camera_on"], "delay": 2},
+                    {"id": "heat_off", "device_id": "thermostat", "action": "off",
+                     "after": ["light_off"], "delay": 2},
+                    {"id": "camera_off", "device_id": "security_camera", "action": "off",
+                     "after": ["heat_off"], "delay": 2},
+                ],
+            },
+        }
+        
+        # Устройства по умолчанию: id -> {"type" (тип devices/registry.py), "name",
+        # группы "room", "floor", "tags"}; раздел "devices" файла INVENTORY_FILE
+        # заменяет этот список
+        self.DEFAULT_DEVICES: Dict[str, Any] = {
+            "lamp_living_room": {"type": "light", "name": "Свет в гостиной",
+                                 "room": "living_room", "floor": 1},
+            "thermostat": {"type": "thermostat", "name": "Термостат",
+                           "room": "living_room", "floor": 1},
+            "security_camera": {"type": "security_camera", "name": "Камера безопасности",
+                                "room": "hall", "floor": 1, "tags": ["security"]},
+            "smoke_sensor": {"type": "smoke_sensor", "name": "Датчик дыма",
+                             "room": "kitchen", "floor": 1, "tags": ["security", "sensor"]},
+            "water_leak_sensor": {"type": "water_leak_sensor", "name": "Датчик протечки",
+                                  "room": "bathroom", "floor": 1, "tags": ["security", "sensor"]},
         }
     
     def get_device_config(self, device_id: str):
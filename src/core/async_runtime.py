@@ -0,0 +1,156 @@
+"""
+Среда выполнения контроллера на одном цикле asyncio
+"""
+
+import asyncio
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+
+class AsyncRuntime:
+    """Мониторинг, расписание и симуляции устройств - корутины одного цикла событий.
+
+    Блокирующие операции (симуляции под блокировками устройств, запись состояния
+    на диск, команды) выполняются в небольшом пуле потоков. Синхронный API
+    контроллера сохраняется: из других потоков работа передается в цикл через
+    run_coroutine_threadsafe / call_soon_threadsafe.
+    """
+
+    def __init__(self, controller, monitor_interval: float = 2.0,
+                 schedule_interval: float = 5.0, io_workers: int = 4):
+        self.controller = controller
+        self.monitor_interval = monitor_interval
+        self.schedule_interval = schedule_interval
+        self.io_workers = io_workers
+
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._stopping: Optional[asyncio.Event] = None
+        self._started = threading.Event()
+
+    # ============================================================
+    #  Запуск и остановка
+    # ============================================================
+
+    @property
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """Запустить цикл событий в отдельном потоке и фоновые корутины"""
+        if self.is_running:
+            return
+        self._started.clear()
+        self._executor = ThreadPoolExecutor(max_workers=self.io_workers,
+                                            thread_name_prefix="home-io")
+        self.loop = asyncio.new_event_loop()
+        self.loop.set_default_executor(self._executor)
+
+        # Симуляции устройств теперь ведет мониторинг, а не потоки устройств
+        self.controller.device_manager.use_external_simulation(self.call_later)
+
+        self._thread = threading.Thread(target=self._run_loop, name="home-runtime", daemon=True)
+        self._thread.start()
+        self._started.wait(5)
+
+    def stop(self, timeout: float = 5.0):
+        """Остановить корутины и цикл событий"""
+        if not self.is_running:
+            return
+        self.loop.call_soon_threadsafe(self._stopping.set)
+        self._thread.join(timeout)
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self.loop)
+        try:
+            self.loop.run_until_complete(self._main())
+        finally:
+            self.loop.run_until_complete(self.loop.shutdown_default_executor())
+            self.loop.close()
+
+    async def _main(self):
+        self._stopping = asyncio.Event()
+        tasks = [
+            asyncio.create_task(self._monitor(), name="device-monitor"),
+            asyncio.create_task(self._scheduler(), name="schedule"),
+        ]
+        self._started.set()
+        await self._stopping.wait()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _sleep(self, seconds: float) -> bool:
+        """Пауза, прерываемая остановкой. True - среда останавливается"""
+        try:
+            await asyncio.wait_for(self._stopping.wait(), seconds)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    # ============================================================
+    #  Фоновые корутины
+    # ============================================================
+
+    async def _monitor(self):
+        """Мониторинг и симуляции всех устройств одним проходом за интервал"""
+        device_manager = self.controller.device_manager
+        sampler = getattr(self.controller, "telemetry_sampler", None)
+        inventory_watcher = getattr(self.controller, "inventory_watcher", None)
+        while True:
+            try:
+                await self.run_blocking(device_manager.check_device_changes)
+                if sampler is not None:
+                    await self.run_blocking(sampler.sample)
+                if inventory_watcher is not None:
+                    await self.run_blocking(inventory_watcher.check)
+            except Exception as e:
+                self.controller.logging_service.info("SYSTEM", f"❌ Ошибка мониторинга устройств: {e}")
+            if await self._sleep(self.monitor_interval):
+                return
+
+    async def _scheduler(self):
+        """Проверка расписания"""
+        schedule_service = self.controller.schedule_service
+        while True:
+            try:
+                await self.run_blocking(schedule_service.tick)
+            except Exception as e:
+                self.controller.logging_service.info("SYSTEM", f"❌ Ошибка расписания: {e}")
+            if await self._sleep(self.schedule_interval):
+                return
+
+    # ============================================================
+    #  Асинхронный и потокобезопасный API
+    # ============================================================
+
+    async def run_blocking(self, func: Callable, *args) -> Any:
+        """Выполнить блокирующую функцию в пуле, не останавливая цикл событий"""
+        return await asyncio.get_running_loop().run_in_executor(None, func, *args)
+
+    async def send_command(self, device_id: str, action: str) -> bool:
+        """Асинхронная отправка команды устройству"""
+        return await self.run_blocking(self.controller.device_manager.send_command, device_id, action)
+
+    def submit(self, coro) -> Future:
+        """Запустить корутину в цикле среды из любого потока"""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def run_sync(self, coro, timeout: Optional[float] = None) -> Any:
+        """Выполнить корутину в цикле среды и дождаться результата (из другого потока)"""
+        return self.submit(coro).result(timeout)
+
+    def call_later(self, delay: float, callback: Callable[[], None]):
+        """Отложенный вызов без отдельного потока-таймера (потокобезопасно)"""
+        def schedule():
+            self.loop.call_later(delay, self._offload, callback)
+
+        if self.loop is not None and not self.loop.is_closed():
+            self.loop.call_soon_threadsafe(schedule)
+
+    def _offload(self, callback: Callable[[], None]):
+        # Обратные вызовы устройств берут их блокировки - выполняем в пуле
+        if self._stopping is not None and not self._stopping.is_set():
+            self.loop.run_in_executor(None, callback)
@@ -2,10 +2,25 @@ import threading
 from typing import Dict
 
 from devices.device_manager import DeviceManager
+from devices.registry import normalize_device_specs, registry as device_registry
 from services.logging_service import LoggingService
 from services.automation_service import AutomationService
 from services.event_bus import EventBus
 from services.notification_service import NotificationService
+from services.notification_store import NotificationStore
+from services.command_dispatcher import CommandDispatcher
+from services.event_stream import EventStream
+from services.event_store import EventStore
+from services.inventory import InventoryWatcher, apply_settings
+from services.storage_service import StateStorage
+from services.telemetry import TelemetrySampler, TelemetryStore
+from services import columnar_export
+from services import metrics
+from services.profiler import SamplingProfiler
+from services.scene_engine import SceneEngine
+from services.transition_engine import TransitionEngine
+from core.async_runtime import AsyncRuntime
+from api.control_api import ControlApi
 from config.settings import Settings
 from services.schedule_service import ScheduleService
 from services.email_service import EmailService
@@ -18,14 +33,73 @@ class HomeController:
         # Инициализация сервисов
         self.settings = Settings()
         self.logging_service = LoggingService()
-        self.notification_service = NotificationService()
+        # Инвентарь: его настройки действуют до создания сервисов, изменения файла
+        # применяются на ходу (check() из мониторинга устройств)
+        self.inventory_watcher = InventoryWatcher(self, self.settings.INVENTORY_FILE,
+                                                  self.settings.INVENTORY_CHECK_INTERVAL)
+        inventory = self.inventory_watcher.load()
+        apply_settings(self.settings, inventory.get("settings", {}))
         self.event_bus = EventBus()
-        self.device_manager = DeviceManager()
+        self.notification_service = NotificationService(
+            NotificationStore(self.settings.NOTIFICATIONS_DB),
+            event_bus=self.event_bus
+        )
+        self.event_store = EventStore(
+            self.settings.EVENT_LOG,
+            snapshot_every=self.settings.EVENT_SNAPSHOT_EVERY,
+            fsync=self.settings.EVENT_LOG_FSYNC
+        )
+        if self.event_store.skipped:
+            self.logging_service.info(
+                "SYSTEM", f"❌ Журнал событий: пропущено битых строк: {self.event_store.skipped}")
+        device_registry.load_manifest(self.settings.DEVICE_TYPES_MANIFEST)
+        self.device_manager = DeviceManager(
+            event_bus=self.event_bus,
+            # Состояния пишет журнал событий; прежний файл состояния читается
+            # только при первом запуске (перенос в пустой журнал)
+            state_storage=StateStorage(),
+            event_store=self.event_store,
+            restore_mode=self.settings.RESTORE_MODE,
+            device_specs=inventory.get("devices", normalize_device_specs(self.settings.DEFAULT_DEVICES))
+        )
+        self.event_stream = EventStream(self.device_manager, self.event_bus)
+        self.telemetry = TelemetryStore(raw_size=self.settings.TELEMETRY_RAW_SIZE)
+        self.telemetry.load(self.settings.TELEMETRY_FILE)
+        # Замеры снимает мониторинг устройств (поток или асинхронная среда)
+        self.telemetry_sampler = TelemetrySampler(self.device_manager, self.telemetry)
+        self.telemetry_sampler.attach()
+        self.command_dispatcher = CommandDispatcher(
+            self.device_manager,
+            max_workers=self.settings.COMMAND_WORKERS,
+            mailbox_size=self.settings.COMMAND_MAILBOX_SIZE
+        )
         self.automation_service = AutomationService(self)
-        self.schedule_service = ScheduleService(self)
+        self.automation_service.start(self.settings.AUTOMATION_RULES, self.settings.AUTOMATION_RULES_FILE)
+        self.transition_engine = TransitionEngine(
+            self.device_manager,
+            fps=self.settings.TRANSITION_FPS,
+            event_interval=self.settings.TRANSITION_EVENT_INTERVAL
+        )
+        self.scene_engine = SceneEngine(
+            self.device_manager,
+            max_workers=self.settings.SCENE_WORKERS,
+            transitions=self.transition_engine
+        )
+        self.scene_engine.load_scenes(self.settings.SCENES)
+        # Проверку расписания запускает start_system (поток или асинхронная среда)
+        self.schedule_service = ScheduleService(self, autostart=False)
+        # Остальные разделы (расписание) - когда сервисы созданы; устройства уже совпадают
+        self.inventory_watcher.apply(inventory)
         self.email_service = EmailService()
+        self.profiler = SamplingProfiler(self.settings.PROFILE_DIR, self.settings.PROFILE_INTERVAL)
         
         self.running = True
+        self.runtime = None
+        self.api_server = None
+        
+        if self.settings.METRICS_ENABLED:
+            metrics.registry.enabled = True
+        self._register_metrics()
         
         # УДАЛЕНО: старый словарь devices - больше не нужен!
         
@@ -34,6 +108,15 @@ class HomeController:
         
         self.logging_service.info("SYSTEM", "🚀 Контроллер инициализирован")
     
+    def _register_metrics(self):
+        """Метрики, вычисляемые при экспорте (без затрат на горячих путях)"""
+        metrics.registry.gauge(
+            "smart_home_devices", "Число устройств",
+            callback=lambda: len(self.device_manager.devices))
+        metrics.registry.gauge(
+            "smart_home_command_queue_depth", "Команды в очереди устройств",
+            callback=lambda: sum(m["depth"] for m in self.command_dispatcher.get_metrics().values()))
+    
     def _setup_event_handlers(self):
         """Настройка обработчиков событий"""
         self.event_bus.subscribe(
@@ -52,43 +135,71 @@ class HomeController:
             "SYSTEM", 
             f"Устройство {device_id} изменило состояние: {old_state} → {new_state}"
         )
-        
-        # Уведомление о важных изменениях
-        if new_state == "on" and "camera" in device_id:
-            self.notification_service.add_notification(
-                "Камера активирована",
-                f"Камера {device_id} начала запись", 
-                "info"
-            )
-        if device_id in ["smoke_sensor", "water_leak_sensor"]:
-            if new_state in ["alarm", "leak"]:
-                self.notification_service.add_notification(
-                    title=f"Сработал {device_id}",
-                    message=f"{device_id} зафиксировал {new_state}",
-                    level="warning"
-        )
+        # Уведомления о важных изменениях - правила AutomationService
+        # (Settings.AUTOMATION_RULES)
     
-    def start_system(self):
+    def start_system(self, runtime: str = None):
         """Запуск всей системы"""
         self.logging_service.info("SYSTEM", "🚀 Запуск системы Умный Дом")
+        self.running = True
+        # Отложенная при восстановлении активность устройств - постепенно, без всплеска потоков
+        self.device_manager.start_warm_up(self.settings.WARM_UP_BATCH, self.settings.WARM_UP_INTERVAL)
+        
+        if (runtime or self.settings.RUNTIME) == "asyncio":
+            # Мониторинг, расписание и симуляции - корутины одного цикла событий
+            self.runtime = AsyncRuntime(self)
+            self.runtime.start()
+            if self.settings.API_ENABLED:
+                self.start_api()
+            return True
         
         # Запускаем сервисы в отдельных потоках
-        server_thread = threading.Thread(target=self._run_server)
+        server_thread = threading.Thread(target=self._run_server, name="server")
         server_thread.daemon = True
         server_thread.start()
         
-        device_thread = threading.Thread(target=self._run_device_monitor)
+        device_thread = threading.Thread(target=self._run_device_monitor, name="device-monitor")
         device_thread.daemon = True
         device_thread.start()
 
         self.running = True
         threading.Thread(
         target=self.schedule_service.run,
+        name="scheduler",
         daemon=True
         ).start()
         
+        if self.settings.API_ENABLED:
+            self.start_api()
+        
         return True
     
+    def start_api(self, host: str = None, port: int = None):
+        """Запустить HTTP/JSON API (в цикле асинхронной среды или в своем потоке)"""
+        if self.api_server is not None:
+            return self.api_server
+        server = ControlApi(self).create_server(
+            host or self.settings.API_HOST,
+            self.settings.API_PORT if port is None else port
+        )
+        if self.runtime is not None:
+            self.runtime.run_sync(server.start(), timeout=5)
+        else:
+            server.start_in_thread()
+        self.api_server = server
+        self.logging_service.info("SERVER", f"🌐 API доступно на http://{server.host}:{server.port}")
+        return server
+    
+    def stop_api(self):
+        """Остановить HTTP/JSON API"""
+        if self.api_server is None:
+            return
+        if self.runtime is not None and self.runtime.is_running:
+            self.runtime.run_sync(self.api_server.stop(), timeout=5)
+        else:
+            self.api_server.stop_thread()
+        self.api_server = None
+    
     def _run_server(self):
         """Запуск серверной части"""
         while self.running:
@@ -99,13 +210,45 @@ class HomeController:
         """Мониторинг устройств"""
         while self.running:
             self.device_manager.check_device_changes()
+            self.telemetry_sampler.sample()
+            self.inventory_watcher.check()
             threading.Event().wait(2)
             
     def stop_system(self):
         """Остановка системы"""
         self.running = False
+        self.stop_api()
+        if self.runtime is not None:
+            self.runtime.stop()
+            self.runtime = None
+        self.schedule_service.running = False
+        self.scene_engine.shutdown(wait=False)
+        self.transition_engine.shutdown()
+        self.command_dispatcher.shutdown(wait=False)
+        # Последние данные устройств и снимок проекций: следующий запуск не проигрывает журнал
+        self.device_manager.save_state()
+        self.event_store.close()
+        try:
+            self.telemetry.save(self.settings.TELEMETRY_FILE)
+        except OSError as e:
+            self.logging_service.info("SYSTEM", f"❌ Ошибка записи телеметрии: {e}")
+        if self.profiler.is_running:
+            self.logging_service.info("SYSTEM", f"Профиль сохранен: {self.profiler.stop()}")
+        if metrics.registry.enabled:
+            try:
+                metrics.registry.dump(self.settings.METRICS_FILE)
+            except OSError as e:
+                self.logging_service.info("SYSTEM", f"❌ Ошибка записи метрик: {e}")
         self.logging_service.info("SYSTEM", "🛑 Система остановлена")
     
+    def export_history(self, base_dir: str = None) -> Dict:
+        """Выгрузить журнал событий и телеметрию в колоночные файлы по дням"""
+        base_dir = base_dir or self.settings.EXPORT_DIR
+        result = columnar_export.export_history(self, base_dir, self.settings.EXPORT_ROW_GROUP_SIZE)
+        rows = sum(part["rows"] for part in result.values())
+        self.logging_service.info("SYSTEM", f"Выгружено {rows} строк истории в {base_dir}")
+        return result
+    
     # Методы для совместимости со старым кодом
     def get_devices(self):
         """Получить все устройства (для совместимости)"""
@@ -1,7 +1,10 @@
+import threading
 from abc import ABC, abstractmethod
 from collections.abc import Callable
 from datetime import datetime
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Mapping, Optional
+
+from devices.device_snapshot import freeze
 
 class BaseDevice(ABC):
     """Базовый абстрактный класс для всех устройств умного дома."""
@@ -11,6 +14,20 @@ class BaseDevice(ABC):
         self.name = name
         self.device_type = device_type
         
+        # Блокировка устройства: все изменения состояния идут под ней,
+        # чтение снимка статуса блокировку не берет
+        self._lock = threading.RLock()
+        
+        # Версия растет при каждом изменении устройства
+        self.version = 0
+        self._change_listeners: List[Callable] = []
+        self._snapshot: Optional[Mapping[str, Any]] = None
+        
+        # Симуляцию ведет внешний планировщик (асинхронная среда выполнения),
+        # собственные фоновые потоки устройства не запускаются
+        self.external_simulation = False
+        self._call_later_hook: Optional[Callable[[float, Callable], None]] = None
+        
         self.state = "off"           # Текущее состояние устройства
         self.online = True           # Устройство доступно/недоступно
         self.data: Dict[str, Any] = {}      # Текущие данные устройства
@@ -23,6 +40,90 @@ class BaseDevice(ABC):
         # Список слушателей событий
         self._listeners: List[Callable] = []
 
+    # ============================================================
+    #  Версия и отслеживание изменений
+    # ============================================================
+
+    @property
+    def state(self) -> str:
+        return self._state
+
+    @state.setter
+    def state(self, value: str):
+        changed = getattr(self, "_state", None) != value
+        self._state = value
+        if changed:
+            self._touch()
+
+    @property
+    def lock(self) -> threading.RLock:
+        """Блокировка устройства (повторно входимая)."""
+        return self._lock
+
+    def compare_and_set_state(self, expected: str, new_state: str) -> bool:
+        """Атомарно сменить состояние, только если текущее равно expected."""
+        with self._lock:
+            if self.state != expected:
+                return False
+            self.state = new_state
+            return True
+
+    def add_change_listener(self, callback: Callable[["BaseDevice"], None]):
+        """Подписка на изменения устройства (вызывается при каждом росте версии)."""
+        self._change_listeners.append(callback)
+
+    def _touch(self):
+        """Отметить изменение устройства: увеличить версию и оповестить подписчиков."""
+        self.version += 1
+        for listener in self._change_listeners:
+            listener(self)
+
+    # ============================================================
+    #  Фоновая симуляция
+    # ============================================================
+
+    def use_external_simulation(self, call_later: Optional[Callable[[float, Callable], None]] = None):
+        """Передать симуляцию внешнему планировщику и остановить свои потоки."""
+        self.external_simulation = True
+        self._call_later_hook = call_later
+        self._stop_background_simulation()
+
+    def _stop_background_simulation(self):
+        """Остановить собственные фоновые потоки устройства (если есть)."""
+
+    def _call_later(self, delay: float, callback: Callable[[], None]):
+        """Отложенный вызов: через внешний планировщик или threading.Timer."""
+        if self._call_later_hook is not None:
+            self._call_later_hook(delay, callback)
+            return
+        timer = threading.Timer(delay, callback)
+        timer.daemon = True
+        timer.start()
+
+    # ============================================================
+    #  Восстановление состояния без побочных эффектов
+    # ============================================================
+
+    def hydrate(self, state: Optional[str], data: Optional[Dict[str, Any]] = None):
+        """Принять сохраненное состояние напрямую: без событий, команд и симуляций.
+
+        Фоновая активность для восстановленного состояния запускается
+        отдельно - resume_activity().
+        """
+        with self._lock:
+            if state is not None:
+                self._state = state
+            if data:
+                self.data.update(data)
+            self._after_hydrate()
+            self._touch()
+
+    def _after_hydrate(self):
+        """Синхронизировать поля устройства с восстановленными data (переопределяется)."""
+
+    def resume_activity(self):
+        """Запустить фоновую активность, соответствующую текущему состоянию (переопределяется)."""
+
     # ============================================================
     #  Абстрактные методы — обязательные для всех устройств
     # ============================================================
@@ -64,6 +165,9 @@ class BaseDevice(ABC):
             "payload": payload or {}
         }
 
+        # Каждое событие устройства означает изменение его состояния
+        self._touch()
+
         for listener in self._listeners:
             listener(event)
 
@@ -85,16 +189,38 @@ class BaseDevice(ABC):
     #  Получение статуса
     # ============================================================
 
-    def get_status(self) -> Dict[str, Any]:
-        """Возвращает статус устройства."""
+    def _build_status(self) -> Dict[str, Any]:
+        """Собрать статус устройства (переопределяется наследниками)."""
         return {
             "device_id": self.device_id,
             "name": self.name,
             "type": self.device_type,
             "state": self.state,
             "online": self.online,
-            "data": self.data,
-            "error": self.error,
-            "metadata": self.metadata,
-            "capabilities": self.capabilities
-        }
\ No newline at end of file
+            "data": dict(self.data),
+            "error": list(self.error),
+            "metadata": dict(self.metadata),
+            "capabilities": list(self.capabilities),
+            "version": self.version
+        }
+
+    def snapshot(self) -> Mapping[str, Any]:
+        """
+        Неизменяемый снимок статуса.
+        Пересобирается только после изменения устройства, иначе берется из кэша.
+        """
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot["version"] == self.version:
+            return snapshot
+
+        # Пересборка под блокировкой - снимок всегда согласован
+        with self._lock:
+            snapshot = self._snapshot
+            if snapshot is None or snapshot["version"] != self.version:
+                snapshot = freeze(self._build_status())
+                self._snapshot = snapshot
+            return snapshot
+
+    def get_status(self) -> Dict[str, Any]:
+        """Возвращает статус устройства (вложенные данные неизменяемы)."""
+        return dict(self.snapshot())
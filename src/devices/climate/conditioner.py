@@ -1,24 +1,40 @@
-class Conditioner:
-    def conditioner(self):
-        self.device_id = device_id
-        self.name = name
-        self.state = "off"
-        self.temperature = 22
+from devices.base_device import BaseDevice
 
-    def set_temperature(self, temp):
-        """Установка температуры - попадет в UC3"""
-        self.temperature = temp
-        return True
+
+class Conditioner(BaseDevice):
     def __init__(self, device_id, name):
-        self.device_id = device_id
-        self.name = name
-        self.state = "off"
+        super().__init__(device_id, name, "climate")
         self.temperature = 22
-        
+        self.data["target_temperature"] = 22
+        self.metadata["min_temperature"] = 16
+        self.metadata["max_temperature"] = 30
+        self.capabilities.append("set_temperature")
+        self.type = "conditioner"
+
     def turn_on(self):
         self.state = "on"
+        self.emit_event("state_changed", {"state": "on"})
         return True
-        
+
     def turn_off(self):
         self.state = "off"
-        return True
\ No newline at end of file
+        self.emit_event("state_changed", {"state": "off"})
+        return True
+
+    def toggle(self):
+        if self.state == "on":
+            return self.turn_off()
+        else:
+            return self.turn_on()
+
+    def _after_hydrate(self):
+        self.temperature = self.data.get("target_temperature", self.temperature)
+
+    def set_temperature(self, temp):
+        """Установка температуры - попадет в UC3"""
+        if not (self.metadata["min_temperature"] <= temp <= self.metadata["max_temperature"]):
+            return False
+        self.temperature = temp
+        self.data["target_temperature"] = temp
+        self.emit_event("temperature_set", {"temperature": temp})
+        return True
@@ -27,6 +27,9 @@ class Thermostat(BaseDevice):
         else:
             return self.turn_on()
     
+    def _after_hydrate(self):
+        self.temperature = float(self.data.get("temperature", self.temperature))
+    
     def set_temperature(self, temperature: float) -> bool:
         """Установить целевую температуру"""
         if not (self.metadata["min_temperature"] <= temperature <= self.metadata["max_temperature"]):
@@ -47,15 +50,19 @@ class Thermostat(BaseDevice):
             self.temperature = self.temperature + change
             # Округляем для отображения, но оставляем точную для вычислений
             display_temp = round(self.temperature, 1)
+            changed = self.data.get("temperature") != display_temp
             self.data["temperature"] = display_temp
             
             # Отправляем событие при значительном изменении (>0.5°C)
             if abs(change) > 0.5:
                 self.emit_event("temperature_changed", {"temperature": display_temp})
+            elif changed:
+                # Мелкое изменение без события - только новая версия
+                self._touch()
     
-    def get_status(self):
+    def _build_status(self):
         """Получить статус устройства с округленной температурой"""
-        status = super().get_status()
+        status = super()._build_status()
         status["temperature"] = round(self.temperature, 1)
         status["data"]["temperature"] = round(self.data.get("temperature", 22.0), 1)
         status["data"]["target_temperature"] = round(self.data.get("target_temperature", 22.0), 1)
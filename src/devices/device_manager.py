@@ -1,358 +1,592 @@
-from devices.lighting.smart_light import SmartLight
-from devices.climate.thermostat import Thermostat
-from devices.security.security_camera import SecurityCamera
 from services.logging_service import LoggingService
-from devices.security.smoke_sensor import SmokeSensor
-from devices.security.water_leak_sensor import WaterLeakSensor
 from services.storage_service import StateStorage
-
-
-from typing import Dict
+from services.event_store import EventStore
+from services import metrics
+from devices.base_device import BaseDevice
+from devices.registry import DeviceTypeError, DeviceTypeRegistry, normalize_device_specs, registry as default_registry
+from config.settings import Settings
+from services.inventory import diff_devices
+import time
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from typing import Callable, Dict, List, Mapping, Optional, Tuple
 from datetime import datetime
 
 class DeviceManager:
     """Менеджер для управления всеми устройствами"""
     
-    def __init__(self):
+    def __init__(self, event_bus=None, state_storage: StateStorage = None,
+                 default_devices: bool = True, event_store: EventStore = None,
+                 restore_mode: str = "replay", restore_workers: int = 1,
+                 restore_group_size: int = 1000, device_specs: List[Dict] = None,
+                 registry: DeviceTypeRegistry = None):
         self.logging_service = LoggingService()
+        self.event_bus = event_bus
+        # Словарь устройств не меняется на месте: добавление и удаление заменяют
+        # его копией (под _devices_lock), потоки, обходящие self.devices, дочитывают прежний
         self.devices = {}
+        self._devices_lock = threading.Lock()
         self.device_states = {}
-        self._initialize_devices()
-        self.devices["smoke_sensor"] = SmokeSensor("smoke_sensor", "Датчик дыма")
-        self.devices["water_leak_sensor"] = WaterLeakSensor("water_leak_sensor", "Датчик протечки")
-        self.state_storage = StateStorage()
-        self.restore_state()
-        self.load_initial_state()
-        
+        self.state_storage = state_storage or StateStorage()
+        # Журнал событий (services/event_store.py): если задан, он - единственный
+        # источник истории и сохраненного состояния вместо device_states и StateStorage
+        self.event_store = event_store
+        # Восстановление при запуске: "replay" - командами turn_on/turn_off (с событиями
+        # и симуляциями), "hydrate" - напрямую в устройство; активность запускается
+        # при первой команде устройству или прогревом (start_warm_up)
+        if restore_mode not in ("replay", "hydrate"):
+            raise ValueError(f"Неизвестный режим восстановления {restore_mode}")
+        self.restore_mode = restore_mode
+        self.restore_workers = restore_workers
+        self.restore_group_size = restore_group_size
+        self._pending_activity = set()
+        self._pending_lock = threading.Lock()
+        # Подписчики на события всех устройств (в т.ч. добавленных позже)
+        self._device_event_listeners = []
+        # Вызываются перед выполнением команды: callback(device_id, action)
+        self._command_listeners: List[Callable[[str, str], None]] = []
+        # Журнал изменений: device_id -> номер последнего изменения,
+        # упорядочен по возрастанию номера (последние изменения в конце)
+        self._change_seq = 0
+        self._changes = OrderedDict()
+        self._changes_lock = threading.Lock()
+        # Удаленные через remove_device: в журнале изменений приходят как None
+        self._removed_ids = set()
+        # Внешний планировщик симуляций (None - у устройств свои потоки)
+        self._external_simulation = False
+        self._call_later = None
+        # Типы устройств (devices/registry.py): модуль класса импортируется
+        # при создании первого устройства типа
+        self.registry = registry or default_registry
+        # Группы (тип, комната, этаж, метки) - инвертированные индексы:
+        # (вид, значение) -> device_id; и обратно device_id -> его группы
+        self._groups: Dict[Tuple[str, str], set] = {}
+        self._device_groups: Dict[str, set] = {}
+        self._groups_lock = threading.Lock()
+        # Описания устройств, созданных по конфигурации: device_id -> {"id", "type", "name", ...}
+        self.device_specs: Dict[str, Dict] = {}
+        self._initial_specs = device_specs
+        # default_devices=False - пустой менеджер (для генератора парка и нагрузочных тестов)
+        if default_devices:
+            self._initialize_devices()
         
     def _initialize_devices(self):
-        """Инициализация устройств по умолчанию"""
-        self.add_device(SmartLight("lamp_living_room", "Свет в гостиной"))
-        self.add_device(Thermostat("thermostat", "Термостат"))
-        self.add_device(SecurityCamera("security_camera", "Камера безопасности"))
-
-        # Создаем устройства
-        # self.create_default_devices()
+        """Создание устройств по конфигурации (по умолчанию - Settings.DEFAULT_DEVICES)"""
+        specs = self._initial_specs
+        if specs is None:
+            specs = normalize_device_specs(Settings().DEFAULT_DEVICES)
+        self.add_devices(device for device in map(self._build_from_spec, specs) if device is not None)
         
         # Восстанавливаем сохраненные состояния
         self.restore_state()
         
     def add_device(self, device):
         """Добавить устройство"""
-        self.devices[device.device_id] = device
-        self.logging_service.info("DEVICE", f"Добавлено устройство: {device.name}")
+        self.add_devices([device])
+
+    def add_devices(self, devices):
+        """Добавить устройства одной заменой словаря self.devices"""
+        devices = list(devices)
+        with self._devices_lock:
+            updated = dict(self.devices)
+            for device in devices:
+                updated[device.device_id] = device
+            self.devices = updated
+        for device in devices:
+            self._index_groups(device)
+            for listener in self._device_event_listeners:
+                device.add_event_listener(listener)
+            if hasattr(device, "add_change_listener"):
+                device.add_change_listener(self._on_device_changed)
+            if self._external_simulation and hasattr(device, "use_external_simulation"):
+                device.use_external_simulation(self._call_later)
+            self._removed_ids.discard(device.device_id)
+            self._record_change(device.device_id)
+            self.logging_service.info("DEVICE", f"Добавлено устройство: {device.name}")
+
+    def _build_from_spec(self, spec: Dict):
+        """Создать устройство по описанию (без добавления); None - тип не загрузился"""
+        try:
+            device = self.registry.create_from_spec(spec)
+        except DeviceTypeError as e:
+            self.logging_service.info("DEVICE", f"❌ Устройство {spec.get('id')} не создано: {e}")
+            return None
+        _set_group_metadata(device, spec, replace=True)
+        # Описание - до add_devices: по нему индексируется тип устройства
+        self.device_specs[device.device_id] = dict(spec)
+        return device
+
+    def remove_device(self, device_id: str):
+        """Удалить устройство: остановить его симуляции и отписать слушателей"""
+        with self._devices_lock:
+            devices = dict(self.devices)
+            device = devices.pop(device_id, None)
+            if device is None:
+                return None
+            self.devices = devices
+        self.device_specs.pop(device_id, None)
+        self._unindex_groups(device_id)
+        with self._pending_lock:
+            self._pending_activity.discard(device_id)
+        if hasattr(device, "_stop_background_simulation"):
+            device._stop_background_simulation()
+        for listener in self._device_event_listeners:
+            device.remove_event_listener(listener)
+        if self._on_device_changed in getattr(device, "_change_listeners", []):
+            device._change_listeners.remove(self._on_device_changed)
+        self._removed_ids.add(device_id)
+        self._record_change(device_id)
+        self.logging_service.info("DEVICE", f"Удалено устройство: {device.name}")
+        return device
+
+    def apply_device_specs(self, specs: List[Dict]) -> Dict[str, List[str]]:
+        """Привести состав устройств к specs, не трогая неизмененные.
+
+        Новые устройства получают сохраненное состояние; у измененных без
+        смены типа меняется описание (имя) на месте, при смене типа
+        устройство создается заново.
+        """
+        added, removed, changed = diff_devices(self.device_specs, specs)
+        for device_id in removed:
+            self.remove_device(device_id)
+        recreated = []
+        for spec in changed:
+            device = self.devices.get(spec["id"])
+            if device is None or self.device_specs[spec["id"]].get("type") != spec.get("type"):
+                self.remove_device(spec["id"])
+                recreated.append(spec)
+                continue
+            with self._device_lock(device):
+                device.name = spec.get("name", spec["id"])
+                _set_group_metadata(device, spec, replace=True)
+                device._touch()
+            self._index_groups(device)
+            self.device_specs[spec["id"]] = dict(spec)
+        devices = [device for device in map(self._build_from_spec, added + recreated) if device is not None]
+        self.add_devices(devices)
+        created = [device.device_id for device in devices]
+        if created:
+            self._restore_devices(created)
+        return {"added": [spec["id"] for spec in added if spec["id"] in self.devices], "removed": removed,
+                "changed": [spec["id"] for spec in changed]}
+
+    # ============================================================
+    #  Группы: тип, комната, этаж, метки
+    # ============================================================
+
+    def _device_type(self, device) -> str:
+        """Тип устройства в именах реестра: из описания, по классу или device_type"""
+        spec = self.device_specs.get(device.device_id)
+        if spec is not None and spec.get("type"):
+            return str(spec["type"])
+        return self.registry.type_of(device) or str(getattr(device, "device_type", type(device).__name__))
+
+    def get_device_type(self, device_id: str) -> Optional[str]:
+        """Тип устройства, по которому оно входит в группу "type" (как в инвентаре)"""
+        with self._groups_lock:
+            for kind, value in self._device_groups.get(device_id, ()):
+                if kind == "type":
+                    return value
+        return None
+
+    def _index_groups(self, device):
+        """Переиндексировать группы устройства (тип - имя в реестре, остальное - metadata)"""
+        metadata = getattr(device, "metadata", None)
+        if not isinstance(metadata, Mapping):
+            metadata = {}
+        groups = {("type", self._device_type(device))}
+        for kind in ("room", "floor"):
+            if metadata.get(kind) is not None:
+                groups.add((kind, str(metadata[kind])))
+        groups.update(("tag", str(tag)) for tag in metadata.get("tags", ()))
+        with self._groups_lock:
+            old = self._device_groups.get(device.device_id, set())
+            for key in old - groups:
+                self._discard_group(key, device.device_id)
+            for key in groups - old:
+                self._groups.setdefault(key, set()).add(device.device_id)
+            self._device_groups[device.device_id] = groups
+
+    def _unindex_groups(self, device_id: str):
+        with self._groups_lock:
+            for key in self._device_groups.pop(device_id, ()):
+                self._discard_group(key, device_id)
+
+    def _discard_group(self, key: Tuple[str, str], device_id: str):
+        members = self._groups.get(key)
+        if members is not None:
+            members.discard(device_id)
+            if not members:
+                del self._groups[key]
+
+    def set_device_groups(self, device_id: str, room: str = None, floor=None,
+                          tags: List[str] = None) -> bool:
+        """Задать комнату, этаж и метки устройства (None - не менять)"""
+        device = self.devices.get(device_id)
+        if device is None:
+            return False
+        with self._device_lock(device):
+            _set_group_metadata(device, {"room": room, "floor": floor, "tags": tags})
+            device._touch()
+        self._index_groups(device)
+        return True
+
+    def find_devices(self, device_type: str = None, room: str = None, floor=None,
+                     tags: List[str] = None) -> List[str]:
+        """device_id устройств, входящих во все указанные группы.
+
+        Пересекаются множества индекса, начиная с наименьшего: время -
+        порядка размера наименьшей группы, а не числа всех устройств.
+        """
+        keys = [(kind, str(value)) for kind, value in (("type", device_type), ("room", room), ("floor", floor))
+                if value is not None]
+        keys += [("tag", str(tag)) for tag in tags or ()]
+        if not keys:
+            return list(self.devices)
+        with self._groups_lock:
+            sets = sorted((self._groups.get(key, set()) for key in keys), key=len)
+            result = set(sets[0])
+            for members in sets[1:]:
+                result &= members
+                if not result:
+                    break
+        return sorted(result)
+
+    def get_groups(self) -> Dict[str, Dict[str, int]]:
+        """Группы по видам: {"room": {"kitchen": 3}, ...}"""
+        groups: Dict[str, Dict[str, int]] = {}
+        with self._groups_lock:
+            for (kind, value), members in self._groups.items():
+                groups.setdefault(kind, {})[value] = len(members)
+        return groups
+
+    def send_group_command(self, action: str, **filters) -> Dict[str, bool]:
+        """Команда всем устройствам группы - одним пакетом send_commands"""
+        device_ids = self.find_devices(**filters)
+        results = self.send_commands([(device_id, action) for device_id in device_ids])
+        return dict(zip(device_ids, results))
+
+    def _restore_devices(self, device_ids: List[str]):
+        """Восстановить сохраненное состояние только указанных устройств"""
+        if self.event_store is not None:
+            states = self.event_store.current_states()
+            saved = {device_id: states[device_id] for device_id in device_ids if device_id in states}
+        elif hasattr(self.state_storage, "load_devices"):
+            saved = self.state_storage.load_devices(device_ids)
+        else:
+            states = self.state_storage.load() or {}
+            saved = {device_id: states[device_id] for device_id in device_ids if device_id in states}
+        if saved:
+            if self.restore_mode == "hydrate":
+                self._hydrate_states(saved)
+            else:
+                self._apply_saved_states(saved)
+        if self.event_store is not None:
+            self.save_state()
+
+    def add_event_listener(self, callback):
+        """Подписаться на события всех устройств, включая добавленные позже"""
+        self._device_event_listeners.append(callback)
+        for device in self.devices.values():
+            device.add_event_listener(callback)
+
+    def remove_event_listener(self, callback):
+        """Отписаться от событий всех устройств"""
+        if callback in self._device_event_listeners:
+            self._device_event_listeners.remove(callback)
+        for device in self.devices.values():
+            device.remove_event_listener(callback)
+
+    def add_command_listener(self, callback: Callable[[str, str], None]):
+        """Вызывать callback(device_id, action) перед каждой командой устройству
+        (вне блокировки устройства; например, отмена плавного перехода)"""
+        self._command_listeners.append(callback)
+
+    def _notify_command(self, device_id: str, action: str):
+        for callback in self._command_listeners:
+            callback(device_id, action)
+
+    def use_external_simulation(self, call_later=None):
+        """Симуляции всех устройств ведет check_device_changes, а не потоки устройств"""
+        self._external_simulation = True
+        self._call_later = call_later
+        for device in self.devices.values():
+            if hasattr(device, "use_external_simulation"):
+                device.use_external_simulation(call_later)
         
-    def get_device(self, device_id: str):
-        """Получить устройство по ID"""
+    # ============================================================
+    #  Журнал изменений для дешевого опроса
+    # ============================================================
+
+    def _on_device_changed(self, device):
+        """Вызывается устройством при каждом росте его версии"""
+        self._record_change(device.device_id)
+
+    def _record_change(self, device_id: str):
+        """Записать изменение устройства в журнал"""
+        with self._changes_lock:
+            self._change_seq += 1
+            self._changes[device_id] = self._change_seq
+            self._changes.move_to_end(device_id)
+
+    @property
+    def change_seq(self) -> int:
+        """Номер последнего изменения (курсор для get_changes_since)"""
+        return self._change_seq
+
+    def get_changed_device_ids(self, seq: int) -> Tuple[int, List[str]]:
+        """Получить ID устройств, изменившихся после курсора seq"""
+        with self._changes_lock:
+            changed = []
+            # Идем с конца журнала, пока изменения новее курсора: O(изменений)
+            for device_id in reversed(self._changes):
+                if self._changes[device_id] <= seq:
+                    break
+                changed.append(device_id)
+            current_seq = self._change_seq
+        changed.reverse()
+        return current_seq, changed
+
+    def get_changes_since(self, seq: int) -> Tuple[int, Dict[str, Optional[Mapping]]]:
+        """Получить снимки только изменившихся после курсора seq устройств.
+
+        Удаленное устройство (remove_device) приходит со значением None.
+        """
+        current_seq, changed = self.get_changed_device_ids(seq)
+        devices, removed = self.devices, self._removed_ids
+        return current_seq, {
+            device_id: self.get_device_snapshot(device_id) if device_id in devices else None
+            for device_id in changed
+            if device_id in devices or device_id in removed
+        }
+
+    def get_device(self, device_id: str, activate: bool = False):
+        """Получить устройство по ID.
+
+        activate=True - для команд и изменений: отложенная после восстановления
+        активность устройства запускается. Чтение (статусы, телеметрия, GUI)
+        ее не запускает, иначе первый же опрос поднял бы потоки всех устройств.
+        """
+        if activate and self._pending_activity and device_id in self._pending_activity:
+            self._activate(device_id)
         return self.devices.get(device_id)
     
+    @staticmethod
+    def _device_lock(device):
+        """Блокировка устройства (для объектов не из BaseDevice - пустая)"""
+        if isinstance(device, BaseDevice):
+            return device.lock
+        return nullcontext()
+
     def send_command(self, device_id: str, action: str) -> bool:
         """Отправить команду устройству"""
-        device = self.get_device(device_id)
+        start = time.perf_counter() if metrics.registry.enabled else None
+        success = False
+        device = self.get_device(device_id, activate=True)
         if device:
-            old_state = device.state  # Запомнить старое состояние
-            
-            success = False
-            
-            if action == "on":
-                success = device.turn_on()
-            elif action == "off":
-                success = device.turn_off()
-            elif action == "toggle":
-                if device.state == "on":
-                    success = device.turn_off()
-                else:
-                    success = device.turn_on()
-            elif ":" in action:
-                # Команда с параметром (например, "set_temperature:22")
-                parts = action.split(":", 1)
-                command = parts[0]
-                value = parts[1]
-                
-                if command == "set_temperature" and hasattr(device, "set_temperature"):
-                    try:
-                        success = device.set_temperature(float(value))
-                    except ValueError:
-                        success = False
-                elif command == "set_brightness" and hasattr(device, "set_brightness"):
-                    try:
-                        success = device.set_brightness(int(value))
-                    except ValueError:
-                        success = False
-                else:
-                    success = False
-            else:
-                success = False
+            self._notify_command(device_id, action)
+            # Чтение старого состояния, выполнение и сравнение - атомарно
+            # относительно других потоков, работающих с этим устройством
+            with self._device_lock(device):
+                old_state = device.state  # Запомнить старое состояние
+                success = self._execute_action(device, action)
+                new_state = device.state
             
             # ЗАПИСАТЬ ИСТОРИЮ И СОХРАНИТЬ СОСТОЯНИЕ ЕСЛИ ИЗМЕНИЛОСЬ
-            if success and device.state != old_state:
-                self.update_device_state_history(device_id, device.state)
-                self.logging_service.info("DEVICE", 
-                    f"Состояние {device.name} изменено: {old_state} → {device.state}")
-                
-                # Сохраняем состояние в файл
-                self.save_state()
-                
-                # Отправляем событие об изменении состояния
-                if hasattr(self, 'event_bus'):
-                    self.event_bus.publish(
-                        "device_state_changed",
-                        {"device_id": device_id, "old_state": old_state, "new_state": device.state}
-                    )
-            
-            return success
-        return False
-    
-    def check_device_changes(self):
-        """Проверить изменения состояний устройств и запустить симуляции"""
-        for device_id, device in self.devices.items():
-            # Проверка изменений состояний (если есть метод)
-            if hasattr(device, 'has_state_changed') and device.has_state_changed():
-                state_text = "включено" if device.state == "on" else "выключено"
-                self.logging_service.info("DEVICE", f"{device.name} {state_text}")
-                # ЗАПИСАТЬ В ИСТОРИЮ ПРИ ОБНАРУЖЕНИИ ИЗМЕНЕНИЯ
-                self.update_device_state_history(device_id, device.state)
-            
-            # Запуск симуляций для устройств (только если устройство включено)
-            if device.state == "on":
-                # Симуляция температуры для термостата
-                if hasattr(device, '_simulate_temperature'):
-                    device._simulate_temperature()
-                
-                # Симуляция яркости для лампы
-                if hasattr(device, '_simulate_brightness'):
-                    device._simulate_brightness()
-                
-                # Симуляция движения для камеры
-                if hasattr(device, '_simulate_motion_detection'):
-                    device._simulate_motion_detection()
+            # (вне блокировки устройства: сохранение и события могут быть долгими)
+            if success and new_state != old_state:
+                self._on_state_transition(device_id, device, old_state, new_state)
+            elif success:
+                self._record_data_change(device_id, device)
+        
+        if start is not None:
+            self._record_command_metrics(action, success, time.perf_counter() - start)
+        return success
 
-    def get_device_status(self, device_id: str) -> Dict:
-        """Получить полный статус устройства"""
-        device = self.get_device(device_id)
-        if device:
-            status = device.get_status()
-            status["online"] = self._check_device_online(device_id)
-            return status
-        return {}
-    
-    def get_all_devices_status(self) -> Dict[str, Dict]:
-        """Получить статус всех устройств"""
-        return {
-            device_id: self.get_device_status(device_id)
-            for device_id in self.devices
-        }
-    
-    def _check_device_online(self, device_id: str) -> bool:
-        """Проверить онлайн-статус устройства (заглушка)"""
-        return True  # В реальной системе здесь проверка связи
-    
-    def update_device_state_history(self, device_id: str, state: str):
-        """Обновить историю состояний устройства"""
-        if device_id not in self.device_states:
-            self.device_states[device_id] = []
+    @staticmethod
+    def _record_command_metrics(action: str, success: bool, elapsed: float):
+        command = action.split(":", 1)[0]
+        metrics.registry.histogram(
+            "smart_home_command_seconds", "Длительность DeviceManager.send_command",
+            {"command": command}).observe(elapsed)
+        metrics.registry.counter(
+            "smart_home_commands_total", "Выполненные команды",
+            {"command": command, "result": "ok" if success else "fail"}).inc()
+
+    def send_command_if(self, device_id: str, expected_state: str, action: str) -> bool:
+        """Выполнить команду, только если устройство в ожидаемом состоянии (compare-and-set)"""
+        device = self.get_device(device_id, activate=True)
+        if not device or device.state != expected_state:
+            return False
+        self._notify_command(device_id, action)
         
-        self.device_states[device_id].append({
-            "state": state,
-            "timestamp": datetime.now().isoformat(),
-            "online": True
-        })
+        with self._device_lock(device):
+            old_state = device.state
+            if old_state != expected_state:
+                return False
+            success = self._execute_action(device, action)
+            new_state = device.state
         
-        # Ограничить историю последними 100 записями
-        if len(self.device_states[device_id]) > 100:
-            self.device_states[device_id] = self.device_states[device_id][-100:]
-
-    def save_state(self):
-        state = {}
+        if success and new_state != old_state:
+            self._on_state_transition(device_id, device, old_state, new_state)
+        elif success:
+            self._record_data_change(device_id, device)
+        return success
 
-        for device_id, device in self.devices.items():
-            state[device_id] = {
-                "type": device.type,
-                "state": getattr(device, "state", None),
-                "data": getattr(device, "data", {}).copy()
-            }
-
-        self.state_storage.save(state)
-
-    def restore_state(self):
-            """Восстановить сохраненные состояния устройств"""
-            if not hasattr(self, 'saved_states') or not self.saved_states:
-                return
-            
-            restored_count = 0
-            
-            for device_id, saved_data in self.saved_states.items():
-                device = self.get_device(device_id)
-                if not device:
-                    continue
-                
-                # Восстанавливаем состояние
-                if "state" in saved_data and hasattr(device, "state"):
-                    try:
-                        if saved_data["state"] == "on":
-                            device.turn_on()
-                        elif saved_data["state"] == "off":
-                            device.turn_off()
-                        
-                        restored_count += 1
-                    except Exception as e:
-                        self.logging_service.error("SYSTEM", 
-                            f"Ошибка восстановления состояния {device_id}: {e}")
-                
-                # Восстанавливаем дополнительные данные
-                if "data" in saved_data and hasattr(device, "data"):
-                    for key, value in saved_data["data"].items():
-                        device.data[key] = value
+    def _execute_action(self, device, action: str) -> bool:
+        """Выполнить действие над устройством (вызывается под его блокировкой)"""
+        success = False
+        
+        if action == "on":
+            success = device.turn_on()
+        elif action == "off":
+            success = device.turn_off()
+        elif action == "toggle":
+            if device.state == "on":
+                success = device.turn_off()
+            else:
+                success = device.turn_on()
+        elif ":" in action:
+            # Команда с параметром (например, "set_temperature:22")
+            parts = action.split(":", 1)
+            command = parts[0]
+            value = parts[1]
             
-            self.logging_service.info("SYSTEM", f"Восстановлены состояния {restored_count} устройств")
-
-    def load_initial_state(self):
-        """Загрузить сохраненные состояния при запуске"""
-        saved_states = self.state_storage.load()
-        if saved_states:
-            self.logging_service.info("SYSTEM", f"Загружено {len(saved_states)} сохраненных состояний устройств")
-            # Сохраняем для последующего восстановления
-            self.saved_states = saved_states
+            if command == "set_temperature" and hasattr(device, "set_temperature"):
+                try:
+                    success = device.set_temperature(float(value))
+                except ValueError:
+                    success = False
+            elif command == "set_brightness" and hasattr(device, "set_brightness"):
+                try:
+                    success = device.set_brightness(int(value))
+                except ValueError:
+                    success = False
+            elif command == "on_and_set_temperature" and hasattr(device, "set_temperature"):
+                try:
+                    # Включаем устройство
+                    device.turn_on()
+                    # Устанавливаем температуру
+                    success = device.set_temperature(float(value))
+                except ValueError:
+                    success = False
+            elif command == "on_and_set_brightness" and hasattr(device, "set_brightness"):
+                try:
+                    # Включаем устройство
+                    device.turn_on()
+                    # Устанавливаем яркость
+                    success = device.set_brightness(int(value))
+                except ValueError:
+                    success = False
+            else:
+                success = False
         else:
-            self.saved_states = {}
-            self.logging_service.info("SYSTEM", "Сохраненных состояний устройств не найдено")
-
-    # def update_device_state_history(self, device_id: str, new_state: str):
-    #     """Обновить историю состояний устройства"""
-    #     if device_id not in self.device_state_history:
-    #         self.device_state_history[device_id] = []
+            success = False
         
-    #     timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    #     self.device_state_history[device_id].append({
-    #         "timestamp": timestamp,
-    #         "state": new_state
-    #     })
-    
-    # Ограничиваем историю последними 100 записями
-    # if len(self.device_state_history[device_id]) > 100:
-    #     self.device_state_history[device_id] = self.device_state_history[device_id][-100:]
+        return success
 
-    def get_device_state_history(self, device_id: str, limit: int = 10):
-        """Получить историю состояний устройства"""
-        if device_id in self.device_state_history:
-            return self.device_state_history[device_id][-limit:]
-        return []
+    def update_device(self, device_id: str, mutate: Callable[[BaseDevice], bool]) -> bool:
+        """Изменить устройство функцией mutate(device) под его блокировкой.
 
-    def start_auto_save(self, interval_minutes: int = 5):from devices.lighting.smart_light import SmartLight
-from devices.climate.thermostat import Thermostat
-from devices.security.security_camera import SecurityCamera
-from services.logging_service import LoggingService
-from devices.security.smoke_sensor import SmokeSensor
-from devices.security.water_leak_sensor import WaterLeakSensor
-from services.storage_service import StateStorage
-import time
-from typing import Dict
-from datetime import datetime
+        Для изменений, которых нет среди команд (например, начальный кадр
+        плавного перехода); смена состояния оформляется как в send_command.
+        """
+        device = self.get_device(device_id, activate=True)
+        if device is None:
+            return False
+        with self._device_lock(device):
+            old_state = device.state
+            success = mutate(device)
+            new_state = device.state
+        if success and new_state != old_state:
+            self._on_state_transition(device_id, device, old_state, new_state)
+        elif success:
+            self._record_data_change(device_id, device)
+        return success
 
-class DeviceManager:
-    """Менеджер для управления всеми устройствами"""
-    
-    def __init__(self, event_bus=None):
-        self.logging_service = LoggingService()
-        self.event_bus = event_bus
-        self.devices = {}
-        self.device_states = {}
-        self.state_storage = StateStorage()
-        self._initialize_devices()
+    def send_commands(self, commands: List[Tuple[str, str]]) -> List[bool]:
+        """Выполнить пакет команд (device_id, action) с одним сохранением состояния.
+
+        Каждая команда выполняется под блокировкой своего устройства, как в
+        send_command; история, лог и события - по каждой смене состояния, но
+        файл состояния записывается один раз на весь пакет.
+        """
+        start = time.perf_counter() if metrics.registry.enabled else None
+        results = []
+        transitions = []
+        for device_id, action in commands:
+            device = self.get_device(device_id, activate=True)
+            if device is None:
+                results.append(False)
+                continue
+            self._notify_command(device_id, action)
+            with self._device_lock(device):
+                old_state = device.state
+                success = self._execute_action(device, action)
+                new_state = device.state
+            results.append(success)
+            if success and new_state != old_state:
+                transitions.append((device_id, device, old_state, new_state))
+            elif success:
+                self._record_data_change(device_id, device)
         
-    def _initialize_devices(self):
-        """Инициализация устройств по умолчанию"""
-        # Создаем все устройства
-        self.add_device(SmartLight("lamp_living_room", "Свет в гостиной"))
-        self.add_device(Thermostat("thermostat", "Термостат"))
-        self.add_device(SecurityCamera("security_camera", "Камера безопасности"))
-        self.add_device(SmokeSensor("smoke_sensor", "Датчик дыма"))
-        self.add_device(WaterLeakSensor("water_leak_sensor", "Датчик протечки"))
+        if transitions and self.event_store is not None:
+            # Все смены состояния пакета - одной записью в журнал
+            self.event_store.record_many(
+                self._event_record(device_id, device) for device_id, device, _, _ in transitions)
+        for device_id, device, old_state, new_state in transitions:
+            self._record_transition(device_id, device, old_state, new_state)
+        if transitions and self.event_store is None:
+            self.save_state()
+        for device_id, device, old_state, new_state in transitions:
+            self._publish_transition(device_id, old_state, new_state)
         
-        # Восстанавливаем сохраненные состояния
-        self.restore_state()
+        if start is not None:
+            metrics.registry.histogram(
+                "smart_home_command_batch_seconds", "Длительность DeviceManager.send_commands"
+            ).observe(time.perf_counter() - start)
+            metrics.registry.counter(
+                "smart_home_batched_commands_total", "Команды, выполненные пакетом").inc(len(commands))
+        return results
+
+    def _on_state_transition(self, device_id: str, device, old_state: str, new_state: str):
+        """История, лог, сохранение и событие после смены состояния"""
+        self._record_transition(device_id, device, old_state, new_state)
         
-    def add_device(self, device):
-        """Добавить устройство"""
-        self.devices[device.device_id] = device
-        self.logging_service.info("DEVICE", f"Добавлено устройство: {device.name}")
+        # Сохраняем состояние в файл (с журналом событий устройство уже
+        # записано в _record_transition - перезапись всех устройств не нужна)
+        if self.event_store is None:
+            self.save_state()
         
-    def get_device(self, device_id: str):
-        """Получить устройство по ID"""
-        return self.devices.get(device_id)
-    
-    def send_command(self, device_id: str, action: str) -> bool:
-        """Отправить команду устройству"""
-        device = self.get_device(device_id)
-        if device:
-            old_state = device.state  # Запомнить старое состояние
-            
-            success = False
-            
-            if action == "on":
-                success = device.turn_on()
-            elif action == "off":
-                success = device.turn_off()
-            elif action == "toggle":
-                if device.state == "on":
-                    success = device.turn_off()
-                else:
-                    success = device.turn_on()
-            elif ":" in action:
-                # Команда с параметром (например, "set_temperature:22")
-                parts = action.split(":", 1)
-                command = parts[0]
-                value = parts[1]
-                
-                if command == "set_temperature" and hasattr(device, "set_temperature"):
-                    try:
-                        success = device.set_temperature(float(value))
-                    except ValueError:
-                        success = False
-                elif command == "set_brightness" and hasattr(device, "set_brightness"):
-                    try:
-                        success = device.set_brightness(int(value))
-                    except ValueError:
-                        success = False
-                elif command == "on_and_set_temperature" and hasattr(device, "set_temperature"):
-                    try:
-                        # Включаем устройство
-                        device.turn_on()
-                        # Устанавливаем температуру
-                        success = device.set_temperature(float(value))
-                    except ValueError:
-                        success = False
-                elif command == "on_and_set_brightness" and hasattr(device, "set_brightness"):
-                    try:
-                        # Включаем устройство
-                        device.turn_on()
-                        # Устанавливаем яркость
-                        success = device.set_brightness(int(value))
-                    except ValueError:
-                        success = False
-                else:
-                    success = False
-            else:
-                success = False
-            
-            # ЗАПИСАТЬ ИСТОРИЮ И СОХРАНИТЬ СОСТОЯНИЕ ЕСЛИ ИЗМЕНИЛОСЬ
-            if success and device.state != old_state:
-                self.update_device_state_history(device_id, device.state)
-                self.logging_service.info("DEVICE", 
-                    f"Состояние {device.name} изменено: {old_state} → {device.state}")
-                
-                # Сохраняем состояние в файл
-                self.save_state()
-                
-                # Отправляем событие об изменении состояния
-                if self.event_bus:
-                    self.event_bus.publish(
-                        "device_state_changed",
-                        {"device_id": device_id, "old_state": old_state, "new_state": device.state}
-                    )
-            
-            return success
-        return False
+        self._publish_transition(device_id, old_state, new_state)
+
+    def _record_transition(self, device_id: str, device, old_state: str, new_state: str):
+        self.update_device_state_history(device_id, new_state)
+        self.logging_service.info("DEVICE", 
+            f"Состояние {device.name} изменено: {old_state} → {new_state}")
+
+    def _record_data_change(self, device_id: str, device):
+        """Записать в журнал событий изменение данных без смены состояния"""
+        if self.event_store is not None:
+            self._record_event(device_id, device)
+
+    def _record_event(self, device_id: str, device):
+        self.event_store.record(*self._event_record(device_id, device))
+
+    def _event_record(self, device_id: str, device) -> Tuple[str, str, Dict]:
+        """(device_id, state, копия data) под блокировкой устройства"""
+        with self._device_lock(device):
+            return device_id, getattr(device, "state", None), dict(getattr(device, "data", {}))
+
+    def _publish_transition(self, device_id: str, old_state: str, new_state: str):
+        # Отправляем событие об изменении состояния
+        if self.event_bus:
+            self.event_bus.publish(
+                "device_state_changed",
+                {"device_id": device_id, "old_state": old_state, "new_state": new_state}
+            )
     
     def check_device_changes(self):
         """Проверить изменения состояний устройств и запустить симуляции"""
@@ -365,18 +599,19 @@ class DeviceManager:
                 self.update_device_state_history(device_id, device.state)
             
             # Запуск симуляций для устройств (только если устройство включено)
-            if device.state == "on":
-                # Симуляция температуры для термостата
-                if hasattr(device, '_simulate_temperature'):
-                    device._simulate_temperature()
-                
-                # Симуляция яркости для лампы
-                if hasattr(device, '_simulate_brightness'):
-                    device._simulate_brightness()
-                
-                # Симуляция движения для камеры
-                if hasattr(device, '_simulate_motion_detection'):
-                    device._simulate_motion_detection()
+            with self._device_lock(device):
+                if device.state == "on":
+                    # Симуляция температуры для термостата
+                    if hasattr(device, '_simulate_temperature'):
+                        device._simulate_temperature()
+                    
+                    # Симуляция яркости для лампы
+                    if hasattr(device, '_simulate_brightness'):
+                        device._simulate_brightness()
+                    
+                    # Симуляция движения для камеры
+                    if hasattr(device, '_simulate_motion_detection'):
+                        device._simulate_motion_detection()
 
     def get_device_status(self, device_id: str) -> Dict:
         """Получить полный статус устройства"""
@@ -387,6 +622,15 @@ class DeviceManager:
             return status
         return {}
     
+    def get_device_snapshot(self, device_id: str) -> Mapping:
+        """Получить неизменяемый снимок статуса устройства (из кэша, если не менялось)"""
+        device = self.get_device(device_id)
+        if device is None:
+            return {}
+        if hasattr(device, "snapshot"):
+            return device.snapshot()
+        return self.get_device_status(device_id)
+
     def get_all_devices_status(self) -> Dict[str, Dict]:
         """Получить статус всех устройств"""
         return {
@@ -400,6 +644,12 @@ class DeviceManager:
     
     def update_device_state_history(self, device_id: str, state: str):
         """Обновить историю состояний устройства"""
+        if self.event_store is not None:
+            # История - проекция журнала; повторная запись того же состояния не дублируется
+            device = self.get_device(device_id)
+            if device is not None:
+                self._record_event(device_id, device)
+            return
         if device_id not in self.device_states:
             self.device_states[device_id] = []
         
@@ -415,6 +665,8 @@ class DeviceManager:
 
     def save_state(self):
         """Сохранить текущие состояния всех устройств"""
+        if self.event_store is not None:
+            return self._save_to_event_store()
         state = {}
 
         for device_id, device in self.devices.items():
@@ -426,25 +678,137 @@ class DeviceManager:
             else:
                 device_type = "unknown"
             
-            state[device_id] = {
-                "type": device_type,
-                "state": getattr(device, "state", None),
-                "data": getattr(device, "data", {}).copy()
-            }
+            # Копируем под блокировкой устройства, чтобы не поймать его
+            # посреди изменения из потока симуляции
+            with self._device_lock(device):
+                state[device_id] = {
+                    "type": device_type,
+                    "state": getattr(device, "state", None),
+                    "data": getattr(device, "data", {}).copy()
+                }
 
         success = self.state_storage.save(state)
         if success:
             self.logging_service.info("SYSTEM", f"Сохранены состояния {len(state)} устройств")
         return success
 
-    def restore_state(self):
+    def _save_to_event_store(self) -> bool:
+        """Дописать в журнал изменения всех устройств одной записью в файл.
+
+        Файл целиком не переписывается: в журнал попадают только устройства,
+        отличающиеся от проекции текущего состояния.
+        """
+        self.event_store.record_many(
+            self._event_record(device_id, device) for device_id, device in list(self.devices.items()))
+        return True
+
+    def restore_state(self, mode: str = None):
         """Восстановить сохраненные состояния устройств"""
-        saved_states = self.state_storage.load()
-        
-        if not saved_states:
+        mode = mode or self.restore_mode
+        saved_states = self.event_store.current_states() if self.event_store is not None else None
+        if mode == "hydrate" and not saved_states and self.restore_workers > 1 \
+                and hasattr(self.state_storage, "load_devices"):
+            # Группы устройств читаются из файла состояния параллельно
+            self._log_hydrated(self._hydrate_parallel())
+        else:
+            # Пустой журнал при первом запуске заполняется из прежнего файла состояния
+            saved_states = saved_states or self.state_storage.load()
+            if not saved_states:
+                self.logging_service.info("SYSTEM", "Сохраненных состояний не найдено")
+            elif mode == "hydrate":
+                self._log_hydrated(self._hydrate_states(saved_states))
+            else:
+                self._apply_saved_states(saved_states)
+        if self.event_store is not None:
+            # Начальное состояние новых устройств попадает в журнал сразу
+            self.save_state()
+
+    def _hydrate_states(self, saved_states: Dict[str, Dict]) -> int:
+        """Записать сохраненные состояния в устройства без событий и симуляций"""
+        hydrated = []
+        fallback = {}
+        for device_id, saved_data in saved_states.items():
+            device = self.devices.get(device_id)
+            if device is None:
+                continue
+            if not hasattr(device, "hydrate"):
+                fallback[device_id] = saved_data
+                continue
+            device.hydrate(saved_data.get("state"), saved_data.get("data"))
+            hydrated.append(device_id)
+        with self._pending_lock:
+            self._pending_activity.update(hydrated)
+        if fallback:
+            self._apply_saved_states(fallback)
+        return len(hydrated) + len(fallback)
+
+    def _hydrate_parallel(self) -> int:
+        """Группы устройств одного типа (не больше restore_group_size) - в пуле потоков"""
+        groups: Dict[str, List[List[str]]] = {}
+        for device_id, device in self.devices.items():
+            chunks = groups.setdefault(type(device).__name__, [[]])
+            if len(chunks[-1]) >= self.restore_group_size:
+                chunks.append([])
+            chunks[-1].append(device_id)
+        batches = [chunk for chunks in groups.values() for chunk in chunks if chunk]
+        with ThreadPoolExecutor(max_workers=self.restore_workers, thread_name_prefix="restore") as pool:
+            return sum(pool.map(
+                lambda ids: self._hydrate_states(self.state_storage.load_devices(ids)), batches))
+
+    def _log_hydrated(self, count: int):
+        if count:
+            self.logging_service.info("SYSTEM", f"Восстановлены состояния {count} устройств "
+                                                f"(без событий, активность отложена)")
+        else:
             self.logging_service.info("SYSTEM", "Сохраненных состояний не найдено")
-            return
-        
+
+    def _activate(self, device_id: str) -> bool:
+        """Запустить отложенную активность устройства (один раз)"""
+        with self._pending_lock:
+            if device_id not in self._pending_activity:
+                return False
+            self._pending_activity.discard(device_id)
+        device = self.devices.get(device_id)
+        if device is None:
+            return False
+        with self._device_lock(device):
+            device.resume_activity()
+        return True
+
+    @property
+    def pending_activity(self) -> int:
+        """Число восстановленных устройств, чья активность еще не запущена"""
+        return len(self._pending_activity)
+
+    def warm_up(self, batch_size: int = 50, interval: float = 0.2) -> int:
+        """Запустить отложенную активность пачками по batch_size с паузой interval"""
+        activated = 0
+        while True:
+            with self._pending_lock:
+                batch = [self._pending_activity.pop()
+                         for _ in range(min(batch_size, len(self._pending_activity)))]
+            if not batch:
+                return activated
+            for device_id in batch:
+                device = self.devices.get(device_id)
+                if device is not None:
+                    with self._device_lock(device):
+                        device.resume_activity()
+                    activated += 1
+            if interval:
+                time.sleep(interval)
+
+    def start_warm_up(self, batch_size: int = 50, interval: float = 0.2):
+        """Прогрев в фоновом потоке (если есть отложенная активность)"""
+        if not self._pending_activity:
+            return None
+        thread = threading.Thread(target=self.warm_up, args=(batch_size, interval),
+                                  name="warm-up", daemon=True)
+        thread.start()
+        return thread
+
+    def _apply_saved_states(self, saved_states: Dict[str, Dict]):
+        """Применить сохраненные состояния и данные к устройствам"""
         restored_count = 0
         
         for device_id, saved_data in saved_states.items():
@@ -469,16 +833,26 @@ class DeviceManager:
             if "data" in saved_data and hasattr(device, "data"):
                 for key, value in saved_data["data"].items():
                     device.data[key] = value
+                if hasattr(device, "_touch"):
+                    device._touch()
         
         if restored_count > 0:
             self.logging_service.info("SYSTEM", f"Восстановлены состояния {restored_count} устройств")
 
     def get_device_state_history(self, device_id: str, limit: int = 10):
         """Получить историю состояний устройства"""
+        if self.event_store is not None:
+            return self.event_store.get_history(device_id, limit)
         if device_id in self.device_states:
             return self.device_states[device_id][-limit:]
         return []
 
+    def get_device_stats(self, device_id: str) -> Dict:
+        """Статистика устройства из журнала событий (пусто без журнала)"""
+        if self.event_store is None:
+            return {}
+        return self.event_store.get_stats(device_id)
+
     def start_auto_save(self, interval_minutes: int = 5):
         """Запустить автоматическое сохранение состояний по расписанию"""
         def save_periodically():
@@ -499,4 +873,17 @@ class DeviceManager:
         import threading
         save_thread = threading.Thread(target=save_periodically, daemon=True)
         save_thread.start()
-        self.logging_service.info("SYSTEM", f"Автосохранение запущено (каждые {interval_minutes} минут)")
\ No newline at end of file
+        self.logging_service.info("SYSTEM", f"Автосохранение запущено (каждые {interval_minutes} минут)")
+
+
+def _set_group_metadata(device, spec: Mapping, replace: bool = False):
+    """Комната, этаж и метки из описания устройства - в device.metadata.
+
+    replace=True - описание полное: отсутствующие в нем группы удаляются.
+    """
+    for kind in ("room", "floor", "tags"):
+        value = spec.get(kind)
+        if value is not None:
+            device.metadata[kind] = list(value) if kind == "tags" else value
+        elif replace:
+            device.metadata.pop(kind, None)
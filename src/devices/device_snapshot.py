@@ -0,0 +1,28 @@
+"""
+Неизменяемые снимки статуса устройств
+"""
+
+from types import MappingProxyType
+from typing import Any, Mapping
+
+
+def freeze(value: Any) -> Any:
+    """Глубокая неизменяемая копия: dict -> MappingProxyType, list -> tuple"""
+    if isinstance(value, (dict, MappingProxyType)):
+        return MappingProxyType({key: freeze(item) for key, item in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(item) for item in value)
+    if isinstance(value, (set, frozenset)):
+        return frozenset(freeze(item) for item in value)
+    return value
+
+
+def thaw(value: Any) -> Any:
+    """Обычная изменяемая копия снимка (например, для json.dumps)"""
+    if isinstance(value, Mapping):
+        return {key: thaw(item) for key, item in value.items()}
+    if isinstance(value, (tuple, list)):
+        return [thaw(item) for item in value]
+    if isinstance(value, frozenset):
+        return [thaw(item) for item in value]
+    return value
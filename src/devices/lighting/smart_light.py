@@ -170,28 +170,43 @@ class SmartLight(BaseDevice):
     #             self.data["brightness"] = int(new_brightness)
     #             self.emit_event("brightness_changed", {"brightness": int(new_brightness)})
 
-    def _temperature_simulation_loop(self):
+    def _temperature_simulation_loop(self, stop: threading.Event):
         """Фоновый поток для симуляции температуры"""
-        while not self._stop_simulation.wait(5):  # Проверка каждые 5 секунд
-            if self.state == "on":
-                self._simulate_temperature()
-                self._simulate_brightness()  # Также обновляем яркость
+        while not stop.wait(5):  # Проверка каждые 5 секунд
+            with self.lock:
+                if self.state == "on":
+                    self._simulate_temperature()
 
     def _start_temperature_simulation(self):
         """Запуск фоновой симуляции температуры"""
-        if self._simulation_thread is None or not self._simulation_thread.is_alive():
-            self._stop_simulation.clear()
-            self._simulation_thread = threading.Thread(
-                target=self._temperature_simulation_loop,
-                daemon=True
-            )
-            self._simulation_thread.start()
+        if self.external_simulation:
+            return
+        if self._simulation_thread is not None and self._simulation_thread.is_alive() \
+                and not self._stop_simulation.is_set():
+            return
+        # Каждый запуск - свой флаг: поток, остановленный прежним turn_off,
+        # завершается по своему флагу и не мешает новому
+        self._stop_simulation = threading.Event()
+        self._simulation_thread = threading.Thread(
+            target=self._temperature_simulation_loop,
+            args=(self._stop_simulation,),
+            daemon=True,
+            name=f"LightSim-{self.device_id}"
+        )
+        self._simulation_thread.start()
 
     def _stop_temperature_simulation(self):
         """Остановка фоновой симуляции температуры"""
-        if self._simulation_thread and self._simulation_thread.is_alive():
-            self._stop_simulation.set()
-            self._simulation_thread.join(timeout=2)
+        # Без join: вызывается под блокировкой устройства, а поток симуляции
+        # может как раз ждать эту блокировку. Поток завершится сам по флагу.
+        self._stop_simulation.set()
+
+    def _stop_background_simulation(self):
+        self._stop_temperature_simulation()
+
+    def resume_activity(self):
+        if self.state == "on":
+            self._start_temperature_simulation()
 
     def check_device_changes(self):
         """Проверка изменений устройства (вызывается периодически)"""
@@ -206,8 +221,8 @@ class SmartLight(BaseDevice):
     #  Статус
     # ============================================================
 
-    def get_status(self):
-        status = super().get_status()
+    def _build_status(self):
+        status = super()._build_status()
         # Добавляем температуру в статус
         status["temperature"] = self.data.get("temperature", 22.0)
         return status
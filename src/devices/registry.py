@@ -0,0 +1,135 @@
+"""
+Реестр типов устройств: имя типа -> "модуль:Класс"
+
+Модуль класса импортируется при создании первого устройства этого типа,
+поэтому запуск загружает только используемые типы. Источники типов:
+встроенный список, точки входа пакетов (группа ENTRY_POINT_GROUP) и
+JSON-манифест {"тип": "модуль:Класс"}. Устройство описывается
+записью {"id", "type", "name"} (см. services/inventory.py).
+"""
+
+import importlib
+import json
+import os
+import threading
+from importlib import metadata
+from typing import Any, Dict, List, Optional, Union
+
+ENTRY_POINT_GROUP = "smart_home.devices"
+
+BUILTIN_DEVICE_TYPES: Dict[str, str] = {
+    "light": "devices.lighting.smart_light:SmartLight",
+    "thermostat": "devices.climate.thermostat:Thermostat",
+    "conditioner": "devices.climate.conditioner:Conditioner",
+    "security_camera": "devices.security.security_camera:SecurityCamera",
+    "smoke_sensor": "devices.security.smoke_sensor:SmokeSensor",
+    "water_leak_sensor": "devices.security.water_leak_sensor:WaterLeakSensor",
+}
+
+
+class DeviceTypeError(ValueError):
+    """Неизвестный тип устройства или ошибка загрузки его класса"""
+
+
+class DeviceTypeRegistry:
+    """Типы устройств с отложенным импортом классов"""
+
+    def __init__(self, types: Dict[str, str] = None, entry_points: bool = True):
+        self._targets: Dict[str, Union[str, type]] = dict(BUILTIN_DEVICE_TYPES if types is None else types)
+        self._classes: Dict[str, type] = {}
+        self._lock = threading.Lock()
+        # Точки входа читаются при первом обращении к неизвестному типу
+        self._entry_points_loaded = not entry_points
+
+    def register(self, type_name: str, target: Union[str, type]):
+        """Зарегистрировать тип: класс или строка "модуль:Класс" (импорт отложен)"""
+        if isinstance(target, str) and ":" not in target:
+            raise DeviceTypeError(f"Ожидается 'модуль:Класс', получено {target}")
+        with self._lock:
+            self._targets[type_name] = target
+            self._classes.pop(type_name, None)
+
+    def load_manifest(self, path: str) -> int:
+        """Зарегистрировать типы из JSON-манифеста; вернуть их число"""
+        if not path or not os.path.exists(path):
+            return 0
+        with open(path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        for type_name, target in manifest.items():
+            self.register(type_name, target)
+        return len(manifest)
+
+    def load_entry_points(self, group: str = ENTRY_POINT_GROUP) -> int:
+        """Зарегистрировать типы из точек входа установленных пакетов"""
+        self._entry_points_loaded = True
+        found = 0
+        for entry_point in metadata.entry_points(group=group):
+            with self._lock:
+                # Встроенные и явно зарегистрированные типы не перекрываются
+                if entry_point.name in self._targets:
+                    continue
+                self._targets[entry_point.name] = entry_point.value
+            found += 1
+        return found
+
+    def available_types(self) -> List[str]:
+        if not self._entry_points_loaded:
+            self.load_entry_points()
+        return sorted(self._targets)
+
+    def loaded_types(self) -> List[str]:
+        """Типы, классы которых уже импортированы"""
+        return sorted(self._classes)
+
+    def get_class(self, type_name: str) -> type:
+        cls = self._classes.get(type_name)
+        if cls is not None:
+            return cls
+        if type_name not in self._targets and not self._entry_points_loaded:
+            self.load_entry_points()
+        with self._lock:
+            target = self._targets.get(type_name)
+            if target is None:
+                raise DeviceTypeError(f"Неизвестный тип устройства {type_name}")
+            if isinstance(target, str):
+                module_name, _, class_name = target.partition(":")
+                try:
+                    cls = getattr(importlib.import_module(module_name), class_name)
+                except (ImportError, AttributeError) as e:
+                    raise DeviceTypeError(f"Тип {type_name}: не удалось загрузить {target} ({e})")
+            else:
+                cls = target
+            self._classes[type_name] = cls
+        return cls
+
+    def type_of(self, device) -> Optional[str]:
+        """Имя типа, под которым зарегистрирован класс устройства (без импорта модулей)"""
+        cls = type(device)
+        path = f"{cls.__module__}:{cls.__name__}"
+        with self._lock:
+            for type_name, target in self._targets.items():
+                if target is cls or target == path:
+                    return type_name
+        return None
+
+    def create(self, type_name: str, device_id: str, name: str):
+        """Создать устройство; модуль типа импортируется при первом вызове"""
+        return self.get_class(type_name)(device_id, name)
+
+    def create_from_spec(self, spec: Dict[str, Any]):
+        """Создать устройство по записи конфигурации {"id", "type", "name"}"""
+        try:
+            device_id, type_name = spec["id"], spec["type"]
+        except KeyError as e:
+            raise DeviceTypeError(f"В описании устройства нет поля {e}")
+        return self.create(type_name, device_id, spec.get("name", device_id))
+
+
+def normalize_device_specs(devices: Union[List[Dict[str, Any]], Dict[str, Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """Список описаний устройств из списка [{"id", ...}] или словаря {id: {...}}"""
+    if isinstance(devices, dict):
+        return [dict(spec, id=device_id) for device_id, spec in devices.items()]
+    return [dict(spec) for spec in devices]
+
+
+registry = DeviceTypeRegistry()
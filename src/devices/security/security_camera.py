@@ -105,7 +105,7 @@ class SecurityCamera(BaseDevice):
 
                     # Сброс через случайное время
                     reset_time = random.uniform(8, 15)
-                    threading.Timer(reset_time, self._reset_motion_detection).start()
+                    self._call_later(reset_time, self._reset_motion_detection)
                 else:
                     # Сброс обнаружения, если движение уже было
                     if self.data.get("motion_detected", False):
@@ -130,47 +130,56 @@ class SecurityCamera(BaseDevice):
 
     def _reset_motion_detection(self):
         """Сбрасывает обнаружение движения"""
-        if self.data.get("motion_detected", False):
-            self.data["motion_detected"] = False
-            self.emit_event("motion_cleared", {
-                "device_id": self.device_id,
-                "timestamp": time.time()
-            })
+        # Вызывается и из отложенного таймера - изменения только под блокировкой
+        with self.lock:
+            if self.data.get("motion_detected", False):
+                self.data["motion_detected"] = False
+                self.emit_event("motion_cleared", {
+                    "device_id": self.device_id,
+                    "timestamp": time.time()
+                })
             
-    def _motion_simulation_loop(self):
+    def _motion_simulation_loop(self, stop: threading.Event):
         """Фоновый поток для симуляции обнаружения движения"""
-        # ИЗМЕНЕНО: используем переименованный флаг
-        while not self._stop_motion_simulation_flag.wait(5):  # Проверка каждые 5 секунд
-            if self.state == "on":
-                self._simulate_motion_detection()
+        while not stop.wait(5):  # Проверка каждые 5 секунд
+            with self.lock:
+                if self.state == "on":
+                    self._simulate_motion_detection()
 
     def _start_motion_simulation(self):
         """Запуск фоновой симуляции движения"""
-        if self._motion_simulation_thread is None or not self._motion_simulation_thread.is_alive():
-            # ИЗМЕНЕНО: используем переименованный флаг
-            self._stop_motion_simulation_flag.clear()
-            self._motion_simulation_thread = threading.Thread(
-                target=self._motion_simulation_loop,
-                daemon=True,
-                name=f"MotionSim-{self.device_id}"
-            )
-            self._motion_simulation_thread.start()
+        if self.external_simulation:
+            return
+        if self._motion_simulation_thread is not None and self._motion_simulation_thread.is_alive() \
+                and not self._stop_motion_simulation_flag.is_set():
+            return
+        # Каждый запуск - свой флаг: поток, остановленный прежним turn_off,
+        # завершается по своему флагу и не мешает новому
+        self._stop_motion_simulation_flag = threading.Event()
+        self._motion_simulation_thread = threading.Thread(
+            target=self._motion_simulation_loop,
+            args=(self._stop_motion_simulation_flag,),
+            daemon=True,
+            name=f"MotionSim-{self.device_id}"
+        )
+        self._motion_simulation_thread.start()
 
     def _stop_motion_simulation(self):
         """Остановка фоновой симуляции движения"""
         # ИЗМЕНЕНО: устанавливаем флаг остановки
+        # Без join: вызывается под блокировкой устройства, а поток симуляции
+        # может как раз ждать эту блокировку. Поток завершится сам по флагу.
         self._stop_motion_simulation_flag.set()
-        
-        # Ждем завершения потока
-        if self._motion_simulation_thread and self._motion_simulation_thread.is_alive():
-            self._motion_simulation_thread.join(timeout=2)
-            
-            # Проверяем, завершился ли поток
-            if self._motion_simulation_thread.is_alive():
-                print(f"Предупреждение: Поток симуляции движения для камеры {self.device_id} не завершился вовремя")
-            else:
-                # Очищаем ссылку на поток
-                self._motion_simulation_thread = None
+
+    def _stop_background_simulation(self):
+        self._stop_motion_simulation()
+
+    def _after_hydrate(self):
+        self.recording = bool(self.data.get("recording", self.state == "on"))
+
+    def resume_activity(self):
+        if self.state == "on":
+            self._start_motion_simulation()
 
     def enable_motion_detection(self):
         """Включить обнаружение движения"""
@@ -197,9 +206,9 @@ class SecurityCamera(BaseDevice):
             self._simulate_motion_detection()
         return super().check_device_changes()
 
-    def get_status(self):
+    def _build_status(self):
         """Получить статус камеры"""
-        status = super().get_status()
+        status = super()._build_status()
         status.update({
             "motion_detected": self.data.get("motion_detected", False),
             "motion_detection_enabled": self.metadata.get("motion_detection_enabled", True),
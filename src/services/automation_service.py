@@ -1,9 +1,68 @@
+import json
+import os
 import time
 
+from services.event_bus import EventBus
+from services.rule_engine import Rule, RuleEngine
+
+
+class _SafeFormat(dict):
+    """Подстановка в шаблон сообщения: неизвестные поля остаются как есть"""
+
+    def __missing__(self, key):
+        return "{" + key + "}"
+
+
 class AutomationService:
     def __init__(self, home_controller):
         self.controller = home_controller
-        
+        # Правила "событие/условие -> действия" (services/rule_engine.py)
+        self.rule_engine = RuleEngine(self._run_actions)
+        self._attached = False
+
+    def start(self, rules=(), rules_file: str = None):
+        """Загрузить правила и подписаться на события устройств"""
+        self.rule_engine.load_rules(rules)
+        if rules_file and os.path.exists(rules_file):
+            try:
+                with open(rules_file, "r", encoding="utf-8") as f:
+                    self.rule_engine.load_rules(json.load(f))
+            except (OSError, ValueError) as e:
+                print(f"❌ Ошибка загрузки правил из {rules_file}: {e}")
+
+        if self._attached:
+            return
+        device_manager = self.controller.device_manager
+        for device_id, device in list(device_manager.devices.items()):
+            facts = dict(getattr(device, "data", {}) or {})
+            facts["state"] = device.state
+            self.rule_engine.set_facts(device_id, facts)
+        device_manager.add_event_listener(self.rule_engine.handle_device_event)
+        event_bus = getattr(self.controller, "event_bus", None)
+        if event_bus is not None:
+            event_bus.subscribe(EventBus.DEVICE_STATE_CHANGED, self.rule_engine.handle_state_changed)
+        self._attached = True
+
+    def _run_actions(self, rule: Rule, context: dict):
+        """Выполнить действия сработавшего правила"""
+        values = _SafeFormat({key: value for key, value in context.items() if value is not None})
+        for action in rule.actions:
+            if "notify" in action:
+                notify = action["notify"]
+                self.controller.notification_service.add_notification(
+                    notify.get("title", rule.rule_id).format_map(values),
+                    notify.get("message", "").format_map(values),
+                    notify.get("level", "info")
+                )
+                continue
+            # Команды идут через очередь устройства: обработчик события не ждет
+            # их выполнения и не блокирует поток, приславший событие
+            dispatcher = getattr(self.controller, "command_dispatcher", None)
+            if dispatcher is not None:
+                dispatcher.submit(action["device_id"], action["action"])
+            else:
+                self.controller.device_manager.send_command(action["device_id"], action["action"])
+
     def run_demo_scenario(self):
         """Запуск демонстрационного сценария"""
         print("\nЗАПУСК ДЕМОНСТРАЦИОННОГО СЦЕНАРИЯ...")
@@ -0,0 +1,367 @@
+"""
+Колоночная выгрузка истории устройств и телеметрии (в духе Parquet/Arrow)
+
+Файл: MAGIC, группы строк, оглавление (JSON), длина оглавления, MAGIC.
+В группе строк каждая колонка хранится отдельным сжатым (zlib) блоком:
+числа - массивом struct, строки - словарем значений и массивом индексов.
+Оглавление хранит схему и смещения блоков, поэтому чтение нужных колонок
+не распаковывает остальные, а группы вне периода пропускаются по min/max ts.
+
+Выгрузка разбита по дням (папка date=YYYY-MM-DD, UTC) и пишется группами
+по row_group_size строк: память не зависит от объема истории. Повторная
+выгрузка в тот же каталог дописывает только новое: курсоры (последний seq
+журнала и последний закрытый интервал телеметрии) хранятся в EXPORT_STATE_FILE.
+"""
+
+import json
+import os
+import struct
+import time
+import zlib
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+MAGIC = b"KPOC"
+FILE_EXTENSION = ".kpoc"
+
+INT64 = "int64"
+FLOAT64 = "float64"
+STRING = "string"
+_STRUCT_CODES = {INT64: "q", FLOAT64: "d"}
+
+# Схемы выгрузок: (колонка, тип); колонка "ts" задает разбиение по дням
+EVENT_SCHEMA: Sequence[Tuple[str, str]] = (
+    ("seq", INT64), ("ts", FLOAT64), ("device_id", STRING),
+    ("kind", STRING), ("state", STRING), ("data", STRING),
+)
+TELEMETRY_SCHEMA: Sequence[Tuple[str, str]] = (
+    ("ts", FLOAT64), ("device_id", STRING), ("metric", STRING),
+    ("min", FLOAT64), ("max", FLOAT64), ("avg", FLOAT64), ("count", INT64),
+)
+
+# Курсоры инкрементальной выгрузки в корне каталога выгрузки
+EXPORT_STATE_FILE = "export_state.json"
+
+
+class ColumnarFormatError(ValueError):
+    """Файл не в колоночном формате или поврежден"""
+
+
+def _encode_column(kind: str, values: List[Any]) -> bytes:
+    if kind in _STRUCT_CODES:
+        raw = struct.pack(f"<{len(values)}{_STRUCT_CODES[kind]}", *values)
+    else:
+        # Словарное кодирование: повторяющиеся device_id/kind/state сжимаются до индексов
+        index: Dict[Any, int] = {}
+        codes = [index.setdefault(value, len(index)) for value in values]
+        dictionary = json.dumps(list(index), separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+        raw = struct.pack("<I", len(dictionary)) + dictionary + struct.pack(f"<{len(codes)}I", *codes)
+    return zlib.compress(raw, 6)
+
+
+def _decode_column(kind: str, block: bytes, rows: int) -> List[Any]:
+    raw = zlib.decompress(block)
+    if kind in _STRUCT_CODES:
+        return list(struct.unpack(f"<{rows}{_STRUCT_CODES[kind]}", raw))
+    size = struct.unpack_from("<I", raw)[0]
+    dictionary = json.loads(raw[4:4 + size].decode("utf-8"))
+    codes = struct.unpack_from(f"<{rows}I", raw, 4 + size)
+    return [dictionary[code] for code in codes]
+
+
+class ColumnarWriter:
+    """Запись одного файла: строки копятся до row_group_size и сбрасываются группой"""
+
+    def __init__(self, path: str, schema: Sequence[Tuple[str, str]], row_group_size: int = 10000):
+        self.path = path
+        self.schema = [tuple(column) for column in schema]
+        self.row_group_size = row_group_size
+        self.rows = 0
+        self._columns: List[List[Any]] = [[] for _ in self.schema]
+        self._row_groups: List[Dict] = []
+        self._ts_index = next((i for i, (name, _) in enumerate(self.schema) if name == "ts"), None)
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(path + ".tmp", "wb")
+        self._file.write(MAGIC)
+
+    def write_row(self, row: Sequence[Any]):
+        for column, value in zip(self._columns, row):
+            column.append(value)
+        if len(self._columns[0]) >= self.row_group_size:
+            self._flush()
+
+    def _flush(self):
+        count = len(self._columns[0])
+        if not count:
+            return
+        group = {"rows": count, "columns": {}}
+        if self._ts_index is not None:
+            ts = self._columns[self._ts_index]
+            group["min_ts"], group["max_ts"] = min(ts), max(ts)
+        for (name, kind), values in zip(self.schema, self._columns):
+            block = _encode_column(kind, values)
+            group["columns"][name] = [self._file.tell(), len(block)]
+            self._file.write(block)
+        self._row_groups.append(group)
+        self.rows += count
+        self._columns = [[] for _ in self.schema]
+
+    def close(self):
+        """Дописать оглавление; файл появляется под своим именем только целиком"""
+        if self._file is None:
+            return
+        self._flush()
+        footer = json.dumps({"schema": self.schema, "rows": self.rows, "row_groups": self._row_groups},
+                            separators=(",", ":")).encode("utf-8")
+        self._file.write(footer + struct.pack("<I", len(footer)) + MAGIC)
+        self._file.close()
+        self._file = None
+        os.replace(self.path + ".tmp", self.path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class ColumnarReader:
+    """Чтение файла по группам строк и только нужных колонок"""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ColumnarFormatError(f"{path}: неизвестный формат")
+            f.seek(-(len(MAGIC) + 4), os.SEEK_END)
+            tail = f.read()
+            if tail[4:] != MAGIC:
+                raise ColumnarFormatError(f"{path}: файл не дописан")
+            size = struct.unpack("<I", tail[:4])[0]
+            f.seek(-(len(MAGIC) + 4 + size), os.SEEK_END)
+            footer = json.loads(f.read(size).decode("utf-8"))
+        self.schema = [tuple(column) for column in footer["schema"]]
+        self.rows = footer["rows"]
+        self.row_groups = footer["row_groups"]
+
+    @property
+    def columns(self) -> List[str]:
+        return [name for name, _ in self.schema]
+
+    def iter_row_groups(self, columns: Sequence[str] = None, start: float = None,
+                        end: float = None) -> Iterator[Dict[str, List[Any]]]:
+        """Группы строк как {колонка: значения}; группы вне [start, end] не читаются"""
+        kinds = dict(self.schema)
+        columns = list(columns or self.columns)
+        unknown = [name for name in columns if name not in kinds]
+        if unknown:
+            raise ColumnarFormatError(f"Нет колонок {', '.join(unknown)}")
+        with open(self.path, "rb") as f:
+            for group in self.row_groups:
+                if start is not None and group.get("max_ts", start) < start:
+                    continue
+                if end is not None and group.get("min_ts", end) > end:
+                    continue
+                values = {}
+                for name in columns:
+                    offset, length = group["columns"][name]
+                    f.seek(offset)
+                    values[name] = _decode_column(kinds[name], f.read(length), group["rows"])
+                yield values
+
+    def iter_rows(self, columns: Sequence[str] = None, start: float = None,
+                  end: float = None) -> Iterator[Dict[str, Any]]:
+        names = list(columns or self.columns)
+        filtered = start is not None or end is not None
+        # Для отбора строк по периоду колонка ts читается, даже если не запрошена
+        read = names + ["ts"] if filtered and "ts" not in names else names
+        for group in self.iter_row_groups(read, start, end):
+            timestamps = group["ts"] if filtered else None
+            for i, row in enumerate(zip(*(group[name] for name in names))):
+                if filtered:
+                    ts = timestamps[i]
+                    if (start is not None and ts < start) or (end is not None and ts > end):
+                        continue
+                yield dict(zip(names, row))
+
+
+class PartitionedWriter:
+    """Запись набора файлов с разбиением по дню колонки ts.
+
+    Открыт только файл текущего дня: при смене дня он закрывается, а
+    возврат к уже закрытому дню создает следующий part-файл.
+    """
+
+    def __init__(self, base_dir: str, schema: Sequence[Tuple[str, str]], row_group_size: int = 10000):
+        self.base_dir = base_dir
+        self.schema = schema
+        self.row_group_size = row_group_size
+        self.files: List[str] = []
+        self.rows = 0
+        self._ts_index = [name for name, _ in schema].index("ts")
+        self._partition: Optional[str] = None
+        self._writer: Optional[ColumnarWriter] = None
+        self._parts: Dict[str, int] = {}
+
+    def write_row(self, row: Sequence[Any]):
+        partition = time.strftime("date=%Y-%m-%d", time.gmtime(row[self._ts_index]))
+        if partition != self._partition:
+            self._close_current()
+            directory = os.path.join(self.base_dir, partition)
+            part = self._parts.get(partition)
+            if part is None:
+                # Повторная выгрузка в тот же набор дописывает файлы, а не заменяет
+                part = len(_part_files(directory))
+            self._parts[partition] = part + 1
+            path = os.path.join(directory, f"part-{part:04d}{FILE_EXTENSION}")
+            self._writer = ColumnarWriter(path, self.schema, self.row_group_size)
+            self._partition = partition
+        self._writer.write_row(row)
+        self.rows += 1
+
+    def _close_current(self):
+        if self._writer is not None:
+            self._writer.close()
+            self.files.append(self._writer.path)
+            self._writer = None
+
+    def close(self) -> List[str]:
+        self._close_current()
+        self._partition = None
+        return self.files
+
+
+def _part_files(directory: str) -> List[str]:
+    if not os.path.isdir(directory):
+        return []
+    return [os.path.join(directory, name) for name in sorted(os.listdir(directory))
+            if name.endswith(FILE_EXTENSION)]
+
+
+def _dataset_files(base_dir: str, start: float = None, end: float = None) -> List[str]:
+    """Файлы набора по порядку дней; дни вне [start, end] отбрасываются по имени папки"""
+    if not os.path.isdir(base_dir):
+        return []
+    first = time.strftime("date=%Y-%m-%d", time.gmtime(start)) if start is not None else None
+    last = time.strftime("date=%Y-%m-%d", time.gmtime(end)) if end is not None else None
+    files = []
+    for partition in sorted(os.listdir(base_dir)):
+        if not partition.startswith("date="):
+            continue
+        if (first and partition < first) or (last and partition > last):
+            continue
+        files.extend(_part_files(os.path.join(base_dir, partition)))
+    return files
+
+
+def read_dataset(base_dir: str, columns: Sequence[str] = None, start: float = None,
+                 end: float = None) -> Iterator[Dict[str, Any]]:
+    """Потоково прочитать строки набора за период"""
+    for path in _dataset_files(base_dir, start, end):
+        yield from ColumnarReader(path).iter_rows(columns, start, end)
+
+
+# ============================================================
+#  Выгрузка и загрузка истории
+# ============================================================
+
+def export_events(event_store, base_dir: str, after_seq: int = 0,
+                  row_group_size: int = 10000) -> Dict:
+    """Выгрузить журнал событий устройств (services/event_store.py)"""
+    writer = PartitionedWriter(base_dir, EVENT_SCHEMA, row_group_size)
+    last_seq = after_seq
+    try:
+        for seq, ts, device_id, kind, payload in event_store.iter_events(after_seq):
+            data = payload.get("data")
+            writer.write_row((seq, float(ts), device_id, kind, payload.get("state"),
+                              json.dumps(data, separators=(",", ":"), ensure_ascii=False, default=str)
+                              if data else None))
+            last_seq = seq
+    finally:
+        files = writer.close()
+    return {"rows": writer.rows, "files": files, "last_seq": last_seq}
+
+
+def export_telemetry(telemetry, base_dir: str, resolution: str = "1m",
+                     row_group_size: int = 10000, after_ts: float = None,
+                     before_ts: float = None) -> Dict:
+    """Выгрузить агрегаты телеметрии одного уровня (services/telemetry.py)
+
+    Выгружаются точки с after_ts < ts < before_ts; last_ts - наибольший
+    выгруженный ts (курсор следующей выгрузки).
+    """
+    writer = PartitionedWriter(base_dir, TELEMETRY_SCHEMA, row_group_size)
+    last_ts = after_ts
+    try:
+        for device_id, metric, point in telemetry.iter_points(resolution):
+            if (after_ts is not None and point["ts"] <= after_ts) or \
+                    (before_ts is not None and point["ts"] >= before_ts):
+                continue
+            if resolution == "raw":
+                value = point["value"]
+                row = (float(point["ts"]), device_id, metric, value, value, value, 1)
+            else:
+                row = (float(point["ts"]), device_id, metric, point["min"], point["max"],
+                       point["avg"], point["count"])
+            writer.write_row(row)
+            if last_ts is None or row[0] > last_ts:
+                last_ts = row[0]
+    finally:
+        files = writer.close()
+    return {"rows": writer.rows, "files": files, "resolution": resolution, "last_ts": last_ts}
+
+
+def iter_exported_events(base_dir: str, start: float = None, end: float = None) -> Iterator[Tuple]:
+    """События выгрузки в формате журнала: (seq, ts, device_id, kind, payload)"""
+    for row in read_dataset(base_dir, start=start, end=end):
+        payload: Dict[str, Any] = {}
+        if row["kind"] == "state":
+            payload["state"] = row["state"]
+        if row["data"]:
+            payload["data"] = json.loads(row["data"])
+        yield row["seq"], row["ts"], row["device_id"], row["kind"], payload
+
+
+def import_events(base_dir: str, event_store, start: float = None, end: float = None) -> int:
+    """Загрузить выгрузку в журнал событий (проекции строятся повторным проигрыванием)"""
+    return event_store.import_events(iter_exported_events(base_dir, start, end))
+
+
+def _load_export_state(base_dir: str) -> Dict:
+    try:
+        with open(os.path.join(base_dir, EXPORT_STATE_FILE), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_export_state(base_dir: str, state: Dict):
+    path = os.path.join(base_dir, EXPORT_STATE_FILE)
+    os.makedirs(base_dir, exist_ok=True)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(state, f)
+    os.replace(path + ".tmp", path)
+
+
+def export_history(controller, base_dir: str, row_group_size: int = 10000, now: float = None) -> Dict:
+    """Дописать в base_dir новые события журнала и закрытые минуты телеметрии"""
+    now = time.time() if now is None else now
+    state = _load_export_state(base_dir)
+    result = {}
+    event_store = getattr(controller, "event_store", None)
+    if event_store is not None:
+        result["events"] = export_events(
+            event_store, os.path.join(base_dir, "events"), after_seq=state.get("events_seq", 0),
+            row_group_size=row_group_size)
+        state["events_seq"] = result["events"]["last_seq"]
+    telemetry = getattr(controller, "telemetry", None)
+    if telemetry is not None:
+        # Текущая минута еще пополняется - она выгрузится следующим вызовом
+        interval = {name: length for name, length, _ in telemetry.tiers}["1m"]
+        result["telemetry"] = export_telemetry(
+            telemetry, os.path.join(base_dir, "telemetry"), row_group_size=row_group_size,
+            after_ts=state.get("telemetry_ts"), before_ts=now - now % interval)
+        state["telemetry_ts"] = result["telemetry"]["last_ts"]
+    _save_export_state(base_dir, state)
+    return result
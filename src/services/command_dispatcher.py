@@ -0,0 +1,188 @@
+"""
+Почтовые ящики команд устройств с общим пулом исполнителей
+"""
+
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Optional
+
+
+def coalesce_key(action: str) -> Optional[str]:
+    """Ключ слияния команды: последующая команда с тем же ключом заменяет предыдущую.
+
+    None - команду нельзя сливать (например, toggle зависит от текущего состояния).
+    """
+    if action in ("on", "off"):
+        return "power"
+    if ":" in action:
+        return action.split(":", 1)[0]
+    return None
+
+
+class _Mailbox:
+    """Очередь ожидающих команд одного устройства"""
+
+    def __init__(self, device_id: str):
+        self.device_id = device_id
+        self.lock = threading.Lock()
+        # ключ слияния (или уникальный номер) -> [action, [futures]]
+        self.pending: "OrderedDict[object, list]" = OrderedDict()
+        self.scheduled = False
+        self.seq = 0
+        self.stats = {
+            "submitted": 0,
+            "coalesced": 0,
+            "executed": 0,
+            "rejected": 0,
+            "max_depth": 0,
+        }
+
+
+class CommandDispatcher:
+    """Диспетчер команд: у каждого устройства свой ограниченный почтовый ящик,
+    ящики обрабатываются общим пулом потоков, команды одного устройства - по порядку
+    """
+
+    def __init__(self, device_manager, max_workers: int = 4,
+                 mailbox_size: int = 100, batch_size: int = 16):
+        self.device_manager = device_manager
+        self.mailbox_size = mailbox_size
+        self.batch_size = batch_size
+        self._executor = ThreadPoolExecutor(max_workers=max_workers,
+                                            thread_name_prefix="device-cmd")
+        self._mailboxes: Dict[str, _Mailbox] = {}
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def _mailbox(self, device_id: str) -> _Mailbox:
+        with self._lock:
+            mailbox = self._mailboxes.get(device_id)
+            if mailbox is None:
+                mailbox = _Mailbox(device_id)
+                self._mailboxes[device_id] = mailbox
+            return mailbox
+
+    def submit(self, device_id: str, action: str) -> Future:
+        """Поставить команду в ящик устройства. Future вернет результат send_command"""
+        future: Future = Future()
+        if self._closed:
+            future.set_result(False)
+            return future
+
+        mailbox = self._mailbox(device_id)
+        key = coalesce_key(action)
+        schedule = False
+
+        with mailbox.lock:
+            mailbox.stats["submitted"] += 1
+            if key is not None and key in mailbox.pending:
+                # Более новая команда заменяет ожидающую и встает в конец,
+                # ожидавшие получат результат новой команды
+                entry = mailbox.pending.pop(key)
+                entry[0] = action
+                entry[1].append(future)
+                mailbox.pending[key] = entry
+                mailbox.stats["coalesced"] += 1
+            elif len(mailbox.pending) >= self.mailbox_size:
+                mailbox.stats["rejected"] += 1
+                future.set_result(False)
+                return future
+            else:
+                if key is None:
+                    mailbox.seq += 1
+                    key = ("unique", mailbox.seq)
+                mailbox.pending[key] = [action, [future]]
+                depth = len(mailbox.pending)
+                if depth > mailbox.stats["max_depth"]:
+                    mailbox.stats["max_depth"] = depth
+
+            if not mailbox.scheduled:
+                mailbox.scheduled = True
+                schedule = True
+
+        if schedule:
+            self._executor.submit(self._drain, mailbox)
+        return future
+
+    def send(self, device_id: str, action: str, timeout: Optional[float] = 10.0) -> bool:
+        """Синхронная отправка: дождаться результата команды"""
+        try:
+            return bool(self.submit(device_id, action).result(timeout=timeout))
+        except Exception:
+            return False
+
+    def _drain(self, mailbox: _Mailbox):
+        """Выполнить до batch_size команд ящика, затем уступить пул другим устройствам"""
+        # Пока holding, ящик помечен scheduled этим вызовом: при неожиданном
+        # исключении пометка снимается, иначе ящик больше не обрабатывался бы
+        holding = True
+        try:
+            for _ in range(self.batch_size):
+                with mailbox.lock:
+                    if not mailbox.pending:
+                        mailbox.scheduled = holding = False
+                        return
+                    _, (action, futures) = mailbox.pending.popitem(last=False)
+
+                # Отмененные ожидающие пропускаются; команда, которую отменили все, не выполняется
+                futures = [future for future in futures if future.set_running_or_notify_cancel()]
+                if not futures:
+                    continue
+                try:
+                    result = self.device_manager.send_command(mailbox.device_id, action)
+                except Exception as e:
+                    for future in futures:
+                        future.set_exception(e)
+                else:
+                    for future in futures:
+                        future.set_result(result)
+                with mailbox.lock:
+                    mailbox.stats["executed"] += 1
+
+            # Остались команды - ставим ящик в конец очереди пула
+            with mailbox.lock:
+                if not mailbox.pending:
+                    mailbox.scheduled = holding = False
+                    return
+            try:
+                self._executor.submit(self._drain, mailbox)
+                holding = False
+            except RuntimeError:
+                # Пул остановлен: оставшиеся команды не будут выполнены
+                self._cancel_pending(mailbox)
+                holding = False
+        finally:
+            if holding:
+                with mailbox.lock:
+                    mailbox.scheduled = False
+
+    def _cancel_pending(self, mailbox: _Mailbox):
+        with mailbox.lock:
+            entries = list(mailbox.pending.values())
+            mailbox.pending.clear()
+            mailbox.scheduled = False
+        for _, futures in entries:
+            for future in futures:
+                if future.set_running_or_notify_cancel():
+                    future.set_result(False)
+
+    def get_metrics(self) -> Dict[str, Dict[str, int]]:
+        """Глубина и счетчики почтовых ящиков по устройствам"""
+        with self._lock:
+            mailboxes = list(self._mailboxes.values())
+        metrics = {}
+        for mailbox in mailboxes:
+            with mailbox.lock:
+                metrics[mailbox.device_id] = dict(mailbox.stats, depth=len(mailbox.pending))
+        return metrics
+
+    def shutdown(self, wait: bool = True):
+        """Остановить пул; команды, не начавшие выполняться, отменяются"""
+        self._closed = True
+        if not wait:
+            with self._lock:
+                mailboxes = list(self._mailboxes.values())
+            for mailbox in mailboxes:
+                self._cancel_pending(mailbox)
+        self._executor.shutdown(wait=wait)
@@ -1,5 +1,12 @@
 from typing import Callable, Dict, List
 import threading
+import time
+
+from services import metrics
+
+def _handler_name(callback: Callable) -> str:
+    return getattr(callback, "__qualname__", None) or type(callback).__name__
+
 
 class EventBus:
     """Шина событий для связи между компонентами"""
@@ -14,16 +21,43 @@ class EventBus:
             if event_type not in self._subscribers:
                 self._subscribers[event_type] = []
             self._subscribers[event_type].append(callback)
+
+    def unsubscribe(self, event_type: str, callback: Callable):
+        """Отписаться от событий определенного типа"""
+        with self._lock:
+            if callback in self._subscribers.get(event_type, []):
+                self._subscribers[event_type].remove(callback)
     
     def publish(self, event_type: str, data: Dict):
         """Опубликовать событие"""
+        # Обработчики вызываются вне блокировки: обработчик может сам
+        # публиковать события (например, уведомление при смене состояния)
         with self._lock:
-            if event_type in self._subscribers:
-                for callback in self._subscribers[event_type]:
-                    try:
-                        callback(data)
-                    except Exception as e:
-                        print(f"❌ Ошибка в обработчике {event_type}: {e}")
+            callbacks = list(self._subscribers.get(event_type, ()))
+        if metrics.registry.enabled:
+            self._publish_measured(event_type, data, callbacks)
+            return
+        for callback in callbacks:
+            try:
+                callback(data)
+            except Exception as e:
+                print(f"❌ Ошибка в обработчике {event_type}: {e}")
+
+    def _publish_measured(self, event_type: str, data: Dict, callbacks: List[Callable]):
+        """publish с замером времени каждого подписчика"""
+        metrics.registry.counter(
+            "smart_home_events_published_total", "Опубликованные события",
+            {"event": event_type}).inc()
+        for callback in callbacks:
+            start = time.perf_counter()
+            try:
+                callback(data)
+            except Exception as e:
+                print(f"❌ Ошибка в обработчике {event_type}: {e}")
+            metrics.registry.histogram(
+                "smart_home_event_handler_seconds", "Длительность обработчика события",
+                {"event": event_type, "handler": _handler_name(callback)}
+            ).observe(time.perf_counter() - start)
     
     # Стандартные события системы
     DEVICE_STATE_CHANGED = "device_state_changed"
@@ -0,0 +1,390 @@
+"""
+Журнал событий устройств (event sourcing)
+
+Каждое изменение устройства один раз дописывается в журнал - файл JSON
+Lines, по строке на событие: [seq, ts, device_id, kind, payload].
+Текущее состояние, история и статистика - проекции, которые обновляются
+при записи события и восстанавливаются повторным проигрыванием журнала.
+Снимок проекций с номером события и смещением в журнале пишется каждые
+snapshot_every событий: при запуске проигрывается только хвост журнала.
+"""
+
+import json
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from services import metrics
+
+# Виды событий: смена состояния (с изменившимися данными) и изменение только данных
+STATE = "state"
+DATA = "data"
+
+Event = Tuple[int, float, str, str, Dict[str, Any]]
+
+
+class Projection(ABC):
+    """Проекция журнала: обновляется по одному событию, сериализуется в снимок"""
+
+    name = ""
+
+    @abstractmethod
+    def apply(self, event: Event):
+        """Учесть одно событие журнала"""
+        pass
+
+    @abstractmethod
+    def dump(self) -> Dict:
+        """Данные проекции для снимка"""
+        pass
+
+    @abstractmethod
+    def load(self, data: Dict):
+        """Восстановить проекцию из снимка"""
+        pass
+
+
+class CurrentStateProjection(Projection):
+    """Текущее состояние и данные устройств (формат StateStorage)"""
+
+    name = "current"
+
+    def __init__(self):
+        self.devices: Dict[str, Dict[str, Any]] = {}
+
+    def apply(self, event: Event):
+        _, _, device_id, kind, payload = event
+        current = self.devices.setdefault(device_id, {"state": None, "data": {}})
+        if kind == STATE:
+            current["state"] = payload["state"]
+        current["data"].update(payload.get("data", {}))
+
+    def dump(self) -> Dict:
+        return self.devices
+
+    def load(self, data: Dict):
+        self.devices = data
+
+
+class HistoryProjection(Projection):
+    """Последние history_size смен состояния каждого устройства"""
+
+    name = "history"
+
+    def __init__(self, history_size: int = 100):
+        self.history_size = history_size
+        self.devices: Dict[str, deque] = {}
+
+    def apply(self, event: Event):
+        _, ts, device_id, kind, payload = event
+        if kind != STATE:
+            return
+        history = self.devices.get(device_id)
+        if history is None:
+            history = self.devices[device_id] = deque(maxlen=self.history_size)
+        history.append({
+            "state": payload["state"],
+            "timestamp": datetime.fromtimestamp(ts).isoformat(),
+            "online": True
+        })
+
+    def get(self, device_id: str, limit: int) -> List[Dict]:
+        history = self.devices.get(device_id)
+        if not history or limit <= 0:
+            return []
+        return list(history)[-limit:]
+
+    def dump(self) -> Dict:
+        return {device_id: list(history) for device_id, history in self.devices.items()}
+
+    def load(self, data: Dict):
+        self.devices = {device_id: deque(history, maxlen=self.history_size)
+                        for device_id, history in data.items()}
+
+
+class StatsProjection(Projection):
+    """Статистика устройства: смены состояния, обновления данных, время во включенном состоянии"""
+
+    name = "stats"
+
+    def __init__(self):
+        self.devices: Dict[str, Dict[str, Any]] = {}
+
+    def apply(self, event: Event):
+        _, ts, device_id, kind, payload = event
+        stats = self.devices.get(device_id)
+        if stats is None:
+            stats = self.devices[device_id] = {
+                "transitions": 0, "data_updates": 0, "on_seconds": 0.0,
+                "on_since": None, "last_change": None
+            }
+        stats["last_change"] = ts
+        if kind != STATE:
+            stats["data_updates"] += 1
+            return
+        stats["transitions"] += 1
+        if stats["on_since"] is not None:
+            stats["on_seconds"] += max(0.0, ts - stats["on_since"])
+            stats["on_since"] = None
+        if payload["state"] == "on":
+            stats["on_since"] = ts
+
+    def get(self, device_id: str, now: float = None) -> Dict:
+        stats = self.devices.get(device_id)
+        if stats is None:
+            return {}
+        result = dict(stats)
+        # Текущий интервал во включенном состоянии учитывается до момента запроса
+        if result["on_since"] is not None:
+            result["on_seconds"] += max(0.0, (now or time.time()) - result["on_since"])
+        result["on_seconds"] = round(result["on_seconds"], 3)
+        return result
+
+    def dump(self) -> Dict:
+        return self.devices
+
+    def load(self, data: Dict):
+        self.devices = data
+
+
+class EventStore:
+    """Журнал событий устройств с проекциями и снимками"""
+
+    def __init__(self, path: str, snapshot_path: str = None, snapshot_every: int = 1000,
+                 history_size: int = 100, fsync: bool = False):
+        self.path = path
+        self.snapshot_path = snapshot_path or path + ".snapshot"
+        self.snapshot_every = snapshot_every
+        self.fsync = fsync
+        self.current = CurrentStateProjection()
+        self.history = HistoryProjection(history_size)
+        self.stats = StatsProjection()
+        self.projections: List[Projection] = [self.current, self.history, self.stats]
+        self.seq = 0
+        # Статистика последнего открытия: сколько событий проиграно после снимка
+        # и сколько битых строк в середине журнала пропущено
+        self.replayed = 0
+        self.skipped = 0
+        self._offset = 0
+        self._since_snapshot = 0
+        self._file = None
+        self._lock = threading.RLock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._replay()
+
+    # ============================================================
+    #  Запись
+    # ============================================================
+
+    def record(self, device_id: str, state: Optional[str], data: Dict[str, Any],
+               ts: float = None) -> Optional[int]:
+        """Записать состояние устройства, если оно отличается от проекции.
+
+        В журнал попадает только разница: смена состояния (kind=state) или
+        изменившиеся ключи данных (kind=data). Повторная запись того же
+        состояния ничего не добавляет. Возвращает номер события или None.
+        """
+        return self.record_many([(device_id, state, data)], ts)
+
+    def record_many(self, items: Iterable[Tuple[str, Optional[str], Dict[str, Any]]],
+                    ts: float = None) -> Optional[int]:
+        """Записать несколько устройств одной записью в файл; вернуть номер последнего события"""
+        ts = round(time.time() if ts is None else ts, 3)
+        # Данные устройств собираются до блокировки журнала (под блокировками устройств)
+        items = list(items)
+        with self._lock:
+            events = []
+            for device_id, state, data in items:
+                current = self.current.devices.get(device_id)
+                previous = current["data"] if current else {}
+                changed = {key: value for key, value in data.items()
+                           if key not in previous or previous[key] != value}
+                if current is None or current["state"] != state:
+                    payload = {"state": state}
+                    if changed:
+                        payload["data"] = changed
+                    kind = STATE
+                elif changed:
+                    payload = {"data": changed}
+                    kind = DATA
+                else:
+                    continue
+                self.seq += 1
+                event = (self.seq, ts, device_id, kind, payload)
+                self._apply(event)
+                events.append(event)
+            if not events:
+                return None
+            self._write(events)
+            if self._since_snapshot >= self.snapshot_every:
+                self.snapshot()
+            return self.seq
+
+    def _write(self, events: List[Event]):
+        start = time.perf_counter() if metrics.registry.enabled else None
+        data = "".join(
+            json.dumps(list(event), separators=(",", ":"), ensure_ascii=False, default=str) + "\n"
+            for event in events
+        ).encode("utf-8")
+        if self._file is None:
+            self._file = open(self.path, "ab")
+        self._file.write(data)
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+        self._offset += len(data)
+        self._since_snapshot += len(events)
+        if start is not None:
+            metrics.registry.histogram(
+                "smart_home_event_append_seconds", "Длительность записи в журнал событий"
+            ).observe(time.perf_counter() - start)
+            metrics.registry.counter(
+                "smart_home_events_total", "События, записанные в журнал").inc(len(events))
+
+    def _apply(self, event: Event):
+        for projection in self.projections:
+            projection.apply(event)
+
+    # ============================================================
+    #  Чтение
+    # ============================================================
+
+    def current_states(self) -> Dict[str, Dict[str, Any]]:
+        """Копия текущих состояний: device_id -> {"state", "data"}"""
+        with self._lock:
+            return {device_id: {"state": current["state"], "data": dict(current["data"])}
+                    for device_id, current in self.current.devices.items()}
+
+    def get_history(self, device_id: str, limit: int = 10) -> List[Dict]:
+        with self._lock:
+            return self.history.get(device_id, limit)
+
+    def get_stats(self, device_id: str) -> Dict:
+        with self._lock:
+            return self.stats.get(device_id)
+
+    def read_events(self, after_seq: int = 0) -> List[Event]:
+        """Прочитать события журнала с номером больше after_seq"""
+        return list(self.iter_events(after_seq))
+
+    def iter_events(self, after_seq: int = 0) -> Iterator[Event]:
+        """Потоково читать события, записанные к моменту вызова (без блокировки журнала)"""
+        with self._lock:
+            if self._file is not None:
+                self._file.flush()
+            end = self._offset
+        for event, position in self._iter_log(0):
+            if position > end:
+                return
+            if event is not None and event[0] > after_seq:
+                yield event
+
+    def import_events(self, events: Iterable[Event]) -> int:
+        """Повторно записать события (например, из экспорта) с новыми номерами.
+
+        Каждое событие проходит через record: в журнал попадает только то,
+        что отличается от текущих проекций. Возвращает число записанных событий.
+        """
+        imported = 0
+        for _, ts, device_id, kind, payload in events:
+            with self._lock:
+                current = self.current.devices.get(device_id)
+                state = payload["state"] if kind == STATE else (current or {}).get("state")
+                if self.record(device_id, state, payload.get("data", {}), ts) is not None:
+                    imported += 1
+        return imported
+
+    # ============================================================
+    #  Снимки и проигрывание
+    # ============================================================
+
+    def snapshot(self):
+        """Записать снимок проекций (атомарно, через временный файл)"""
+        with self._lock:
+            snapshot = {
+                "seq": self.seq,
+                "offset": self._offset,
+                "projections": {p.name: p.dump() for p in self.projections},
+            }
+            temp_file = self.snapshot_path + ".tmp"
+            with open(temp_file, "w", encoding="utf-8") as f:
+                json.dump(snapshot, f, separators=(",", ":"), ensure_ascii=False, default=str)
+            os.replace(temp_file, self.snapshot_path)
+            self._since_snapshot = 0
+
+    def close(self):
+        """Сохранить снимок и закрыть журнал (следующая запись откроет его снова)"""
+        with self._lock:
+            if self._since_snapshot:
+                self.snapshot()
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def _replay(self):
+        """Загрузить снимок и проиграть события журнала после него"""
+        size = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+        snapshot = self._load_snapshot()
+        offset = 0
+        if snapshot is not None and snapshot.get("offset", 0) <= size:
+            offset = snapshot["offset"]
+            self.seq = snapshot["seq"]
+            for projection in self.projections:
+                projection.load(snapshot["projections"].get(projection.name, {}))
+        # Иначе (нет снимка или журнал короче снимка) - проигрывание с начала
+
+        self.replayed = 0
+        self.skipped = 0
+        valid_end = offset
+        for event, end in self._iter_log(offset):
+            valid_end = end
+            if event is None:
+                self.skipped += 1
+                continue
+            if event[0] > self.seq:
+                self.seq = event[0]
+                self._apply(event)
+                self.replayed += 1
+        if valid_end < size:
+            # Недописанная последняя строка (сбой во время записи) отбрасывается
+            with open(self.path, "r+b") as f:
+                f.truncate(valid_end)
+        self._offset = valid_end
+        self._since_snapshot = self.replayed
+
+    def _load_snapshot(self) -> Optional[Dict]:
+        if not os.path.exists(self.snapshot_path):
+            return None
+        try:
+            with open(self.snapshot_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _iter_log(self, offset: int):
+        """Пары (событие, смещение конца строки) начиная с offset.
+
+        Битая дописанная строка дает событие None и не прерывает чтение;
+        недописанная последняя строка (без перевода строки) завершает его.
+        """
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            position = offset
+            for line in f:
+                if not line.endswith(b"\n"):
+                    return
+                position += len(line)
+                try:
+                    seq, ts, device_id, kind, payload = json.loads(line)
+                except (ValueError, TypeError):
+                    yield None, position
+                    continue
+                yield (seq, ts, device_id, kind, payload), position
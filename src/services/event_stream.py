@@ -0,0 +1,205 @@
+"""
+Поток событий для внешних клиентов: фильтры, дельты состояния, ограниченные буферы
+"""
+
+import itertools
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional
+
+from devices.device_snapshot import thaw
+
+
+def snapshot_delta(old: Optional[Mapping], new: Mapping) -> Dict[str, Any]:
+    """Изменившиеся поля снимка (вложенные словари сравниваются на один уровень)"""
+    if old is None:
+        return thaw(new)
+    delta = {}
+    for key, value in new.items():
+        previous = old.get(key)
+        if value == previous:
+            continue
+        if isinstance(value, Mapping) and isinstance(previous, Mapping):
+            delta[key] = {
+                sub_key: thaw(sub_value)
+                for sub_key, sub_value in value.items()
+                if previous.get(sub_key) != sub_value
+            }
+        else:
+            delta[key] = thaw(value)
+    return delta
+
+
+def merge_delta(target: Dict[str, Any], delta: Dict[str, Any]):
+    """Слить более новую дельту в накопленную"""
+    for key, value in delta.items():
+        if isinstance(value, dict) and isinstance(target.get(key), dict):
+            target[key].update(value)
+        else:
+            target[key] = value
+
+
+class StreamSubscription:
+    """Подписка клиента: фильтр и ограниченный буфер сообщений.
+
+    Политики переполнения:
+    - "coalesce": дельты одного устройства сливаются в одно сообщение,
+      при переполнении отбрасывается самое старое;
+    - "drop": каждое событие - отдельное сообщение, старые отбрасываются.
+    """
+
+    POLICIES = ("coalesce", "drop")
+
+    def __init__(self, devices: Iterable[str] = None, topics: Iterable[str] = None,
+                 buffer_size: int = 256, policy: str = "coalesce"):
+        if policy not in self.POLICIES:
+            raise ValueError(f"Неизвестная политика {policy}")
+        self.devices = set(devices) if devices else None
+        self.topics = set(topics) if topics else None
+        self.buffer_size = buffer_size
+        self.policy = policy
+        self.dropped = 0
+        self.coalesced = 0
+        self.closed = False
+
+        self._buffer: "OrderedDict[object, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._unique = itertools.count()
+        self._notify: Optional[Callable[[], None]] = None
+
+    def matches(self, topic: str, device_id: Optional[str]) -> bool:
+        if self.topics is not None and topic not in self.topics:
+            return False
+        if self.devices is not None and device_id is not None and device_id not in self.devices:
+            return False
+        return True
+
+    def set_notify(self, callback: Optional[Callable[[], None]]):
+        """Обратный вызов при появлении сообщений (должен быть неблокирующим)"""
+        self._notify = callback
+
+    def offer(self, message: Dict):
+        """Добавить сообщение; никогда не блокирует публикующий поток надолго"""
+        device_id = message.get("device_id")
+        with self._lock:
+            if self.closed:
+                return
+            key = device_id if self.policy == "coalesce" and device_id is not None else next(self._unique)
+            pending = self._buffer.pop(key, None)
+            if pending is not None:
+                # Новая дельта сливается с еще не отправленной
+                merge_delta(pending["delta"], message["delta"])
+                pending.update({k: v for k, v in message.items() if k != "delta"})
+                pending["coalesced"] = pending.get("coalesced", 0) + 1
+                self._buffer[key] = pending
+                self.coalesced += 1
+            else:
+                if len(self._buffer) >= self.buffer_size:
+                    self._buffer.popitem(last=False)
+                    self.dropped += 1
+                self._buffer[key] = dict(message, delta=dict(message["delta"]))
+        notify = self._notify
+        if notify is not None:
+            notify()
+
+    def drain(self) -> List[Dict]:
+        """Забрать все накопленные сообщения"""
+        with self._lock:
+            messages = list(self._buffer.values())
+            self._buffer.clear()
+        return messages
+
+    @property
+    def depth(self) -> int:
+        return len(self._buffer)
+
+
+class EventStream:
+    """Рассылка событий устройств и уведомлений подписчикам.
+
+    Источники: события устройств (BaseDevice.emit_event через DeviceManager)
+    и уведомления из EventBus. Для событий устройств вычисляется дельта
+    относительно предыдущего снимка устройства.
+    """
+
+    NOTIFICATION_TOPIC = "notification"
+
+    def __init__(self, device_manager, event_bus=None):
+        self.device_manager = device_manager
+        self.event_bus = event_bus
+        self._subscriptions: List[StreamSubscription] = []
+        self._last_snapshots: Dict[str, Mapping] = {}
+        self._lock = threading.Lock()
+        self._seq = itertools.count(1)
+
+        # Текущие снимки - база для первых дельт (иначе первая дельта полная)
+        for device_id in list(device_manager.devices):
+            self._last_snapshots[device_id] = device_manager.get_device_snapshot(device_id)
+        device_manager.add_event_listener(self._on_device_event)
+        if event_bus is not None:
+            event_bus.subscribe(event_bus.NOTIFICATION_CREATED, self._on_notification)
+
+    def close(self):
+        """Отписаться от источников и закрыть все подписки"""
+        self.device_manager.remove_event_listener(self._on_device_event)
+        if self.event_bus is not None:
+            self.event_bus.unsubscribe(self.event_bus.NOTIFICATION_CREATED, self._on_notification)
+        with self._lock:
+            subscriptions, self._subscriptions = self._subscriptions, []
+        for subscription in subscriptions:
+            subscription.closed = True
+
+    def subscribe(self, devices: Iterable[str] = None, topics: Iterable[str] = None,
+                  buffer_size: int = 256, policy: str = "coalesce") -> StreamSubscription:
+        subscription = StreamSubscription(devices, topics, buffer_size, policy)
+        with self._lock:
+            self._subscriptions = self._subscriptions + [subscription]
+        return subscription
+
+    def unsubscribe(self, subscription: StreamSubscription):
+        subscription.closed = True
+        with self._lock:
+            self._subscriptions = [s for s in self._subscriptions if s is not subscription]
+
+    def initial_snapshots(self, subscription: StreamSubscription) -> List[Dict]:
+        """Полные снимки устройств из фильтра - база для последующих дельт"""
+        messages = []
+        for device_id in list(self.device_manager.devices):
+            if subscription.devices is not None and device_id not in subscription.devices:
+                continue
+            snapshot = self.device_manager.get_device_snapshot(device_id)
+            messages.append({
+                "event": "snapshot",
+                "device_id": device_id,
+                "version": snapshot.get("version"),
+                "delta": thaw(snapshot),
+            })
+        return messages
+
+    def _publish(self, topic: str, device_id: Optional[str], message: Dict):
+        message["id"] = next(self._seq)
+        # Список подписок заменяется целиком, поэтому читается без блокировки
+        for subscription in self._subscriptions:
+            if subscription.matches(topic, device_id):
+                subscription.offer(message)
+
+    def _on_device_event(self, event: Dict):
+        device_id = event["device_id"]
+        snapshot = self.device_manager.get_device_snapshot(device_id)
+        with self._lock:
+            previous = self._last_snapshots.get(device_id)
+            self._last_snapshots[device_id] = snapshot
+        self._publish(event["event_type"], device_id, {
+            "event": event["event_type"],
+            "device_id": device_id,
+            "version": snapshot.get("version"),
+            "payload": event.get("payload", {}),
+            "delta": snapshot_delta(previous, snapshot),
+        })
+
+    def _on_notification(self, notification: Dict):
+        self._publish(self.NOTIFICATION_TOPIC, None, {
+            "event": self.NOTIFICATION_TOPIC,
+            "payload": notification,
+            "delta": {},
+        })
@@ -0,0 +1,235 @@
+"""
+Инвентарь: устройства, расписание и настройки из файла конфигурации
+
+Файл (JSON, TOML или YAML - если установлен PyYAML) содержит разделы:
+"devices" - список [{"id", "type", "name"}] или словарь {id: {...}},
+"schedules" - список [{"time", "device_id", "action", "days", "enabled"}],
+"settings" - {ИМЯ_НАСТРОЙКИ: значение}. Отсутствующий раздел не меняется.
+
+InventoryWatcher следит за временем изменения файла и применяет к
+работающей системе только разницу: добавленные, удаленные и измененные
+устройства, а также измененные разделы расписания и настроек (на ходу -
+только LIVE_SETTINGS, об остальных пишется в лог). Инвентарь
+управляет только своими задачами расписания (added == "inventory"):
+задачи, добавленные через GUI или API, сохраняются.
+"""
+
+import json
+import os
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from devices.registry import normalize_device_specs
+
+try:
+    import tomllib
+except ImportError:  # Python < 3.11
+    tomllib = None
+
+try:
+    import yaml
+except ImportError:
+    yaml = None
+
+
+# Отметка "added" задач расписания, которыми управляет инвентарь
+INVENTORY_TASK = "inventory"
+
+# Настройки, которые меняются без перезапуска: имя -> (сервис контроллера, атрибут)
+# или None, если значение читается из Settings при каждом использовании.
+# Остальные настройки уже переданы сервисам при запуске и действуют после перезапуска
+LIVE_SETTINGS: Dict[str, Optional[Tuple[str, str]]] = {
+    "EXPORT_DIR": None,
+    "EXPORT_ROW_GROUP_SIZE": None,
+    "TELEMETRY_FILE": None,
+    "METRICS_FILE": None,
+    "COMMAND_MAILBOX_SIZE": ("command_dispatcher", "mailbox_size"),
+    "TRANSITION_FPS": ("transition_engine", "fps"),
+    "TRANSITION_EVENT_INTERVAL": ("transition_engine", "event_interval"),
+    "INVENTORY_CHECK_INTERVAL": ("inventory_watcher", "interval"),
+    "PROFILE_DIR": ("profiler", "output_dir"),
+    "PROFILE_INTERVAL": ("profiler", "interval"),
+}
+
+
+class InventoryError(ValueError):
+    """Файл инвентаря не читается или имеет неверный формат"""
+
+
+def load_inventory(path: str) -> Dict[str, Any]:
+    """Прочитать файл инвентаря; формат определяется расширением"""
+    ext = os.path.splitext(path)[1].lower()
+    try:
+        if ext == ".toml":
+            if tomllib is None:
+                raise InventoryError("Для TOML нужен Python 3.11+")
+            with open(path, "rb") as f:
+                data = tomllib.load(f)
+        elif ext in (".yaml", ".yml"):
+            if yaml is None:
+                raise InventoryError("Для YAML нужен пакет PyYAML")
+            with open(path, "r", encoding="utf-8") as f:
+                data = yaml.safe_load(f) or {}
+        else:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+    except InventoryError:
+        raise
+    except Exception as e:
+        raise InventoryError(f"{path}: {e}")
+    if not isinstance(data, dict):
+        raise InventoryError(f"{path}: ожидается объект с разделами devices/schedules/settings")
+    inventory = {}
+    if "devices" in data:
+        specs = normalize_device_specs(data["devices"])
+        for spec in specs:
+            if "id" not in spec or "type" not in spec:
+                raise InventoryError(f"{path}: у устройства нет id или type: {spec}")
+        inventory["devices"] = specs
+    if "schedules" in data:
+        inventory["schedules"] = list(data["schedules"])
+    if "settings" in data:
+        inventory["settings"] = dict(data["settings"])
+    return inventory
+
+
+def diff_devices(current: Dict[str, Dict], specs: List[Dict]) -> Tuple[List[Dict], List[str], List[Dict]]:
+    """(добавленные, удаленные id, измененные) относительно current {id: описание}"""
+    new = {spec["id"]: spec for spec in specs}
+    added = [spec for device_id, spec in new.items() if device_id not in current]
+    removed = [device_id for device_id in current if device_id not in new]
+    changed = [spec for device_id, spec in new.items()
+               if device_id in current and current[device_id] != spec]
+    return added, removed, changed
+
+
+def schedule_from_inventory(tasks: List[Dict]) -> Dict[str, List[Dict]]:
+    """Раздел "schedules" в формате ScheduleService.schedule ("HH:MM" -> задачи)"""
+    schedule: Dict[str, List[Dict]] = {}
+    for task in tasks:
+        schedule.setdefault(task["time"], []).append({
+            "device_id": task["device_id"],
+            "action": task["action"],
+            "enabled": task.get("enabled", True),
+            "days": task.get("days", [0, 1, 2, 3, 4, 5, 6]),
+            "added": INVENTORY_TASK,
+        })
+    return schedule
+
+
+def merge_schedule(current: Dict[str, List[Dict]], tasks: List[Dict]) -> Dict[str, List[Dict]]:
+    """Заменить в расписании current задачи инвентаря на tasks, сохранив остальные"""
+    schedule: Dict[str, List[Dict]] = {}
+    for time_str, task_list in current.items():
+        kept = [task for task in task_list if task.get("added") != INVENTORY_TASK]
+        if kept:
+            schedule[time_str] = kept
+    for time_str, task_list in schedule_from_inventory(tasks).items():
+        schedule.setdefault(time_str, []).extend(task_list)
+    return schedule
+
+
+class InventoryWatcher:
+    """Применяет изменения файла инвентаря к работающему контроллеру"""
+
+    def __init__(self, controller, path: str, interval: float = 2):
+        self.controller = controller
+        self.path = path
+        self.interval = interval
+        self._signature: Optional[Tuple[int, int]] = None
+        self._checked_at = 0.0
+        self._applied: Dict[str, Any] = {}
+
+    def _stat(self) -> Optional[Tuple[int, int]]:
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def load(self) -> Dict[str, Any]:
+        """Первое чтение при запуске (без применения): ошибка в файле - пустой инвентарь"""
+        self._signature = self._stat()
+        if self._signature is None:
+            return {}
+        try:
+            inventory = load_inventory(self.path)
+        except InventoryError as e:
+            self.controller.logging_service.info("SYSTEM", f"❌ Ошибка инвентаря: {e}")
+            return {}
+        return inventory
+
+    def check(self, now: float = None) -> Optional[Dict[str, Any]]:
+        """Если файл изменился - применить разницу; вернуть сводку или None"""
+        now = time.monotonic() if now is None else now
+        if now - self._checked_at < self.interval:
+            return None
+        self._checked_at = now
+        signature = self._stat()
+        if signature is None or signature == self._signature:
+            return None
+        self._signature = signature
+        try:
+            inventory = load_inventory(self.path)
+        except InventoryError as e:
+            # Недописанный или ошибочный файл: работающая система не меняется
+            self.controller.logging_service.info("SYSTEM", f"❌ Ошибка инвентаря: {e}")
+            return None
+        return self.apply(inventory)
+
+    def apply(self, inventory: Dict[str, Any]) -> Dict[str, Any]:
+        """Применить разделы, отличающиеся от примененных ранее"""
+        summary: Dict[str, Any] = {}
+        if "settings" in inventory and inventory["settings"] != self._applied.get("settings"):
+            changed, restart = apply_live_settings(self.controller, inventory["settings"])
+            if changed:
+                summary["settings"] = changed
+            if restart:
+                self.controller.logging_service.info(
+                    "SYSTEM", f"Настройки {', '.join(restart)} применятся после перезапуска")
+        if "devices" in inventory:
+            changes = self.controller.device_manager.apply_device_specs(inventory["devices"])
+            if any(changes.values()):
+                summary["devices"] = changes
+        if "schedules" in inventory and inventory["schedules"] != self._applied.get("schedules"):
+            schedule_service = self.controller.schedule_service
+            schedule_service.schedule = merge_schedule(schedule_service.schedule, inventory["schedules"])
+            schedule_service.save_schedule()
+            summary["schedules"] = len(inventory["schedules"])
+        self._applied.update(inventory)
+        if summary:
+            self.controller.logging_service.info("SYSTEM", f"Инвентарь применен: {summary}")
+        return summary
+
+
+def apply_live_settings(controller, values: Dict[str, Any]) -> Tuple[List[str], List[str]]:
+    """Применить к работающему контроллеру настройки из LIVE_SETTINGS.
+
+    Возвращает (измененные, требующие перезапуска); вторые не записываются,
+    чтобы Settings не расходились с работающими сервисами.
+    """
+    settings = controller.settings
+    changed, restart = [], []
+    for name, value in values.items():
+        if not hasattr(settings, name) or getattr(settings, name) == value:
+            continue
+        if name not in LIVE_SETTINGS:
+            restart.append(name)
+            continue
+        setattr(settings, name, value)
+        target = LIVE_SETTINGS[name]
+        service = getattr(controller, target[0], None) if target else None
+        if service is not None:
+            setattr(service, target[1], value)
+        changed.append(name)
+    return changed, restart
+
+
+def apply_settings(settings, values: Dict[str, Any]) -> List[str]:
+    """Записать известные настройки до создания сервисов; вернуть имена измененных"""
+    changed = []
+    for name, value in values.items():
+        if hasattr(settings, name) and getattr(settings, name) != value:
+            setattr(settings, name, value)
+            changed.append(name)
+    return changed
@@ -1,6 +1,9 @@
 from datetime import datetime, timedelta
 from typing import List
 import os
+import time
+
+from services import metrics
 
 class LoggingService:
     """Сервис для логирования событий системы"""
@@ -59,7 +62,17 @@ class LoggingService:
         
         # Записываем в файл если включено
         if self.log_to_file:
-            self._write_to_file(log_entry)
+            if metrics.registry.enabled:
+                start = time.perf_counter()
+                self._write_to_file(log_entry)
+                metrics.registry.histogram(
+                    "smart_home_log_write_seconds", "Длительность записи лога в файл"
+                ).observe(time.perf_counter() - start)
+            else:
+                self._write_to_file(log_entry)
+        if metrics.registry.enabled:
+            metrics.registry.counter(
+                "smart_home_log_entries_total", "Записи лога", {"component": component}).inc()
     
     def _write_to_file(self, log_entry: str):
         """Записать лог в файл"""
@@ -0,0 +1,256 @@
+"""
+Метрики горячих путей: счетчики, датчики и гистограммы задержек (HDR-подобные)
+"""
+
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Tuple
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Optional[Dict[str, str]]) -> LabelKey:
+    if not labels:
+        return ()
+    return tuple(sorted((str(k), str(v)) for k, v in labels.items()))
+
+
+def _format_labels(key: LabelKey, extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+    pairs = key + extra
+    if not pairs:
+        return ""
+    body = ",".join('{}="{}"'.format(k, v.replace("\\", "\\\\").replace('"', '\\"')) for k, v in pairs)
+    return "{" + body + "}"
+
+
+class Counter:
+    """Монотонный счетчик"""
+
+    kind = "counter"
+
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1):
+        with self._lock:
+            self.value += amount
+
+    def snapshot(self):
+        return self.value
+
+
+class Gauge:
+    """Текущее значение (может расти и уменьшаться) или вычисляемое при экспорте"""
+
+    kind = "gauge"
+
+    def __init__(self, callback: Callable[[], float] = None):
+        self.value = 0
+        self._callback = callback
+        self._lock = threading.Lock()
+
+    def set(self, value: float):
+        self.value = value
+
+    def inc(self, amount: float = 1):
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount: float = 1):
+        with self._lock:
+            self.value -= amount
+
+    def snapshot(self):
+        if self._callback is not None:
+            try:
+                return self._callback()
+            except Exception:
+                return float("nan")
+        return self.value
+
+
+class Histogram:
+    """Гистограмма с логарифмически-линейными корзинами (как HDR Histogram).
+
+    Каждая степень двойки делится на SUB_BUCKETS корзин, поэтому относительная
+    погрешность процентилей не превышает ~1/SUB_BUCKETS при любом диапазоне значений.
+    """
+
+    kind = "histogram"
+    SUB_BUCKETS = 16
+
+    def __init__(self):
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = 0.0
+        self._buckets: Dict[Tuple[int, int], int] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def _index(cls, value: float) -> Tuple[int, int]:
+        if value <= 0:
+            return (-1074, 0)
+        mantissa, exponent = math.frexp(value)  # value = mantissa * 2**exponent, mantissa в [0.5, 1)
+        return exponent, int((mantissa - 0.5) * 2 * cls.SUB_BUCKETS)
+
+    @classmethod
+    def _upper_bound(cls, index: Tuple[int, int]) -> float:
+        exponent, sub = index
+        return math.ldexp(0.5 + (sub + 1) / (2 * cls.SUB_BUCKETS), exponent)
+
+    def observe(self, value: float):
+        index = self._index(value)
+        with self._lock:
+            self.count += 1
+            self.sum += value
+            if value < self.min:
+                self.min = value
+            if value > self.max:
+                self.max = value
+            self._buckets[index] = self._buckets.get(index, 0) + 1
+
+    @contextmanager
+    def time(self):
+        """Замерить длительность блока with в секундах"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+    def buckets(self) -> List[Tuple[float, int]]:
+        """Непустые корзины: (верхняя граница, накопленное число значений)"""
+        with self._lock:
+            items = sorted(self._buckets.items())
+        cumulative = 0
+        result = []
+        for index, count in items:
+            cumulative += count
+            result.append((self._upper_bound(index), cumulative))
+        return result
+
+    def percentile(self, p: float) -> float:
+        buckets = self.buckets()
+        if not buckets:
+            return 0.0
+        rank = math.ceil(p / 100 * buckets[-1][1])
+        for bound, cumulative in buckets:
+            if cumulative >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def snapshot(self):
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "min": self.min if self.count else 0.0,
+            "max": self.max,
+            "p50": self.percentile(50),
+            "p90": self.percentile(90),
+            "p99": self.percentile(99),
+        }
+
+
+class MetricsRegistry:
+    """Реестр метрик.
+
+    Места замеров проверяют registry.enabled перед замером: выключенные метрики
+    стоят одну проверку атрибута.
+    """
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        # имя -> (тип, описание, {метки -> метрика})
+        self._families: Dict[str, Tuple[type, str, Dict[LabelKey, object]]] = {}
+        self._lock = threading.Lock()
+
+    def _get(self, metric_type: type, name: str, help_text: str,
+             labels: Optional[Dict[str, str]], factory: Callable[[], object] = None):
+        key = _label_key(labels)
+        family = self._families.get(name)
+        if family is not None:
+            metric = family[2].get(key)
+            if metric is not None:
+                return metric
+        with self._lock:
+            family = self._families.setdefault(name, (metric_type, help_text, {}))
+            if family[0] is not metric_type:
+                raise ValueError(f"Метрика {name} уже зарегистрирована с другим типом")
+            metric = family[2].get(key)
+            if metric is None:
+                metric = factory() if factory else metric_type()
+                family[2][key] = metric
+            return metric
+
+    def counter(self, name: str, help_text: str = "", labels: Dict[str, str] = None) -> Counter:
+        return self._get(Counter, name, help_text, labels)
+
+    def gauge(self, name: str, help_text: str = "", labels: Dict[str, str] = None,
+              callback: Callable[[], float] = None) -> Gauge:
+        return self._get(Gauge, name, help_text, labels, lambda: Gauge(callback))
+
+    def histogram(self, name: str, help_text: str = "", labels: Dict[str, str] = None) -> Histogram:
+        return self._get(Histogram, name, help_text, labels)
+
+    def reset(self):
+        """Удалить все метрики"""
+        with self._lock:
+            self._families.clear()
+
+    # ============================================================
+    #  Экспорт
+    # ============================================================
+
+    def snapshot(self) -> Dict[str, Dict]:
+        """Все метрики в виде словаря: имя -> {тип, описание, значения по меткам}"""
+        with self._lock:
+            families = {name: (t, h, dict(m)) for name, (t, h, m) in self._families.items()}
+        result = {}
+        for name, (metric_type, help_text, metrics) in sorted(families.items()):
+            result[name] = {
+                "type": metric_type.kind,
+                "help": help_text,
+                "values": [
+                    {"labels": dict(key), "value": metric.snapshot()}
+                    for key, metric in sorted(metrics.items())
+                ],
+            }
+        return result
+
+    def to_prometheus(self) -> str:
+        """Текстовый формат экспозиции Prometheus"""
+        with self._lock:
+            families = {name: (t, h, dict(m)) for name, (t, h, m) in self._families.items()}
+        lines = []
+        for name, (metric_type, help_text, metrics) in sorted(families.items()):
+            if help_text:
+                lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {metric_type.kind}")
+            for key, metric in sorted(metrics.items()):
+                if metric_type is Histogram:
+                    for bound, cumulative in metric.buckets():
+                        lines.append(f"{name}_bucket{_format_labels(key, (('le', repr(bound)),))} {cumulative}")
+                    lines.append(f"{name}_bucket{_format_labels(key, (('le', '+Inf'),))} {metric.count}")
+                    lines.append(f"{name}_sum{_format_labels(key)} {metric.sum}")
+                    lines.append(f"{name}_count{_format_labels(key)} {metric.count}")
+                else:
+                    lines.append(f"{name}{_format_labels(key)} {metric.snapshot()}")
+        return "\n".join(lines) + "\n"
+
+    def dump(self, path: str):
+        """Записать метрики в файл в формате Prometheus (для node_exporter textfile)"""
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_file = path + ".tmp"
+        with open(temp_file, "w", encoding="utf-8") as f:
+            f.write(self.to_prometheus())
+        os.replace(temp_file, path)
+
+
+# Общий реестр процесса; включается HomeController по Settings.METRICS_ENABLED
+registry = MetricsRegistry()
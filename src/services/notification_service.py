@@ -1,57 +1,81 @@
 from datetime import datetime
-from typing import List, Dict
+from typing import List, Dict, Optional
+
+from services.notification_store import NotificationStore
 
 class NotificationService:
-    def __init__(self):
-        self.notifications: List[Dict] = []
+    def __init__(self, store: Optional[NotificationStore] = None, event_bus=None):
+        # История хранится в NotificationStore без ограничения по размеру;
+        # max_notifications ограничивает только "окно" последних уведомлений
+        self.store = store if store is not None else NotificationStore()
         self.max_notifications = 50
-    
+        self.event_bus = event_bus
+
+    @property
+    def notifications(self) -> List[Dict]:
+        """Последние уведомления (окно из max_notifications записей)"""
+        return self.store.latest(self.max_notifications)
 
     # Получение ВСЕХ уведомлений
     def get_all_notifications(self):
         return self.notifications
 
+    # Постраничное чтение истории по курсору
+    def list_notifications(self, after_id: int = 0, limit: int = 100) -> List[Dict]:
+        """Получить уведомления, появившиеся после after_id"""
+        return self.store.list(after_id=after_id, limit=limit)
+
+    def list_notifications_before(self, before_id: int, limit: int = 100) -> List[Dict]:
+        """Получить страницу более старых уведомлений (id меньше before_id)"""
+        return self.store.list_before(before_id=before_id, limit=limit)
+
+    def recent_notifications(self, limit: int) -> List[Dict]:
+        """Получить limit последних уведомлений"""
+        return self.store.latest(limit)
+
+    def get_notification(self, notification_id: int) -> Optional[Dict]:
+        """Получить уведомление по id"""
+        return self.store.get(notification_id)
 
     # Удаление уведомлений
     def delete_notification(self, notification_id: int):
-        self.notifications = [
-            n for n in self.notifications if n["id"] != notification_id
-        ]
+        self.store.delete(notification_id)
 
     # Очистка уведомлений
     def clear_notifications(self):
-        self.notifications.clear()
+        self.store.clear()
 
     # Количество непрочитанных
     def unread_count(self) -> int:
-        return len(self.get_unread_notifications())
+        return self.store.unread_count()
+
+    # Размер всей истории
+    def total_count(self) -> int:
+        return self.store.count()
 
     def add_notification(self, title: str, message: str, level: str = "info"):
         """Добавить уведомление"""
-        notification = {
-            "id": len(self.notifications) + 1,
-            "title": title,
-            "message": message, 
-            "level": level,  # info, warning, error
-            "timestamp": datetime.now().isoformat(),
-            "read": False
-        }
-        
-        self.notifications.append(notification)
-        
-        # Ограничить количество уведомлений
-        if len(self.notifications) > self.max_notifications:
-            self.notifications = self.notifications[-self.max_notifications:]
-        
+        notification = self.store.append(
+            title=title,
+            message=message,
+            level=level,  # info, warning, error
+            timestamp=datetime.now().isoformat()
+        )
+
         print(f"🔔 {title}: {message}")
-    
+
+        if self.event_bus:
+            self.event_bus.publish("notification_created", notification)
+        return notification
+
     def get_unread_notifications(self) -> List[Dict]:
         """Получить непрочитанные уведомления"""
-        return [n for n in self.notifications if not n["read"]]
-    
+        return self.store.unread()
+
     def mark_as_read(self, notification_id: int):
         """Пометить уведомление как прочитанное"""
-        for notification in self.notifications:
-            if notification["id"] == notification_id:
-                notification["read"] = True
-                break
\ No newline at end of file
+        self.store.mark_as_read(notification_id)
+
+    def mark_all_as_read(self):
+        """Пометить все уведомления как прочитанные"""
+        self.store.mark_all_read()
@@ -0,0 +1,163 @@
+import os
+import sqlite3
+import threading
+from typing import Dict, List, Optional
+
+
+class NotificationStore:
+    """Постоянное хранилище уведомлений (SQLite, только добавление)"""
+
+    def __init__(self, filename: str = ":memory:"):
+        self.filename = filename
+        if filename != ":memory:" and os.path.dirname(filename):
+            os.makedirs(os.path.dirname(filename), exist_ok=True)
+
+        # Соединение используется из разных потоков (GUI, планировщик, устройства)
+        self._conn = sqlite3.connect(filename, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        self._create_schema()
+
+    def _create_schema(self):
+        """Создать таблицу уведомлений, если её нет"""
+        with self._lock, self._conn:
+            # AUTOINCREMENT гарантирует, что id никогда не переиспользуются,
+            # поэтому курсор after_id остается корректным после удалений
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS notifications (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    title TEXT NOT NULL,
+                    message TEXT NOT NULL,
+                    level TEXT NOT NULL,
+                    timestamp TEXT NOT NULL,
+                    read INTEGER NOT NULL DEFAULT 0
+                )
+                """
+            )
+
+    @staticmethod
+    def _row_to_dict(row: sqlite3.Row) -> Dict:
+        return {
+            "id": row["id"],
+            "title": row["title"],
+            "message": row["message"],
+            "level": row["level"],
+            "timestamp": row["timestamp"],
+            "read": bool(row["read"]),
+        }
+
+    def append(self, title: str, message: str, level: str, timestamp: str) -> Dict:
+        """Добавить уведомление и вернуть его с присвоенным id"""
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "INSERT INTO notifications (title, message, level, timestamp, read) "
+                "VALUES (?, ?, ?, ?, 0)",
+                (title, message, level, timestamp),
+            )
+            notification_id = cursor.lastrowid
+
+        return {
+            "id": notification_id,
+            "title": title,
+            "message": message,
+            "level": level,
+            "timestamp": timestamp,
+            "read": False,
+        }
+
+    def list(self, after_id: int = 0, limit: int = 100) -> List[Dict]:
+        """Получить уведомления с id больше after_id (по возрастанию id)"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM notifications WHERE id > ? ORDER BY id LIMIT ?",
+                (after_id, limit),
+            ).fetchall()
+        return [self._row_to_dict(row) for row in rows]
+
+    def list_before(self, before_id: int, limit: int = 100) -> List[Dict]:
+        """Получить limit последних уведомлений с id меньше before_id (по возрастанию id)"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM notifications WHERE id < ? ORDER BY id DESC LIMIT ?",
+                (before_id, limit),
+            ).fetchall()
+        return [self._row_to_dict(row) for row in reversed(rows)]
+
+    def latest(self, limit: int = 50) -> List[Dict]:
+        """Получить последние limit уведомлений (по возрастанию id)"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM notifications ORDER BY id DESC LIMIT ?",
+                (limit,),
+            ).fetchall()
+        return [self._row_to_dict(row) for row in reversed(rows)]
+
+    def get(self, notification_id: int) -> Optional[Dict]:
+        """Получить уведомление по id"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM notifications WHERE id = ?", (notification_id,)
+            ).fetchone()
+        return self._row_to_dict(row) if row else None
+
+    def unread(self, limit: int = 1000) -> List[Dict]:
+        """Получить непрочитанные уведомления"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM notifications WHERE read = 0 ORDER BY id LIMIT ?",
+                (limit,),
+            ).fetchall()
+        return [self._row_to_dict(row) for row in rows]
+
+    def unread_count(self) -> int:
+        """Количество непрочитанных уведомлений"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT COUNT(*) FROM notifications WHERE read = 0"
+            ).fetchone()
+        return row[0]
+
+    def count(self) -> int:
+        """Общее количество уведомлений в истории"""
+        with self._lock:
+            row = self._conn.execute("SELECT COUNT(*) FROM notifications").fetchone()
+        return row[0]
+
+    def last_id(self) -> int:
+        """Id последнего добавленного уведомления (0, если истории нет)"""
+        with self._lock:
+            row = self._conn.execute("SELECT MAX(id) FROM notifications").fetchone()
+        return row[0] or 0
+
+    def mark_as_read(self, notification_id: int) -> bool:
+        """Пометить уведомление как прочитанное"""
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "UPDATE notifications SET read = 1 WHERE id = ?", (notification_id,)
+            )
+        return cursor.rowcount > 0
+
+    def mark_all_read(self) -> int:
+        """Пометить все уведомления как прочитанные"""
+        with self._lock, self._conn:
+            cursor = self._conn.execute("UPDATE notifications SET read = 1 WHERE read = 0")
+        return cursor.rowcount
+
+    def delete(self, notification_id: int) -> bool:
+        """Удалить уведомление"""
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "DELETE FROM notifications WHERE id = ?", (notification_id,)
+            )
+        return cursor.rowcount > 0
+
+    def clear(self):
+        """Удалить всю историю уведомлений (счетчик id не сбрасывается)"""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM notifications")
+
+    def close(self):
+        """Закрыть соединение с базой"""
+        with self._lock:
+            self._conn.close()
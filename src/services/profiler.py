@@ -0,0 +1,116 @@
+"""
+Выборочный профилировщик стеков всех потоков работающей системы
+"""
+
+import os
+import sys
+import threading
+from collections import Counter
+from datetime import datetime
+from typing import Dict, List, Optional
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    """Периодически снимает стеки всех потоков через sys._current_frames().
+
+    Работающие потоки не останавливаются и не перезапускаются: профилировщик
+    только читает их кадры из своего фонового потока. Результат - свернутые
+    стеки (collapsed stacks) для flamegraph.pl / speedscope.
+    """
+
+    def __init__(self, output_dir: str = os.path.join("data", "profiles"),
+                 interval: float = 0.005, max_depth: int = 64):
+        self.output_dir = output_dir
+        self.interval = interval          # секунды между выборками
+        self.max_depth = max_depth        # глубина стека в выборке
+        self.samples = 0
+        self.started_at: Optional[datetime] = None
+        self.last_file: Optional[str] = None
+        self._stacks: Counter = Counter()
+        self._thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+        self._lock = threading.Lock()
+
+    @property
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, interval: float = None) -> bool:
+        """Начать сбор выборок; False, если профилирование уже идет"""
+        with self._lock:
+            if self.is_running:
+                return False
+            if interval:
+                self.interval = interval
+            self._stacks = Counter()
+            self.samples = 0
+            self.started_at = datetime.now()
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+            self._thread.start()
+            return True
+
+    def stop(self) -> Optional[str]:
+        """Остановить сбор и записать свернутые стеки; вернуть путь к файлу"""
+        with self._lock:
+            if self._thread is None:
+                return None
+            self._stop_event.set()
+            self._thread.join()
+            self._thread = None
+            self.last_file = self._write()
+            return self.last_file
+
+    def status(self) -> Dict:
+        return {
+            "running": self.is_running,
+            "interval": self.interval,
+            "samples": self.samples,
+            "started_at": self.started_at.isoformat(timespec="seconds") if self.started_at else None,
+            "last_file": self.last_file,
+        }
+
+    def top(self, limit: int = 10) -> List[Dict]:
+        """Самые частые листовые функции (собственное время)"""
+        leaves: Counter = Counter()
+        for stack, count in list(self._stacks.items()):
+            leaves[stack.rsplit(";", 1)[-1]] += count
+        total = sum(leaves.values()) or 1
+        return [
+            {"frame": frame, "samples": count, "share": round(count / total, 4)}
+            for frame, count in leaves.most_common(limit)
+        ]
+
+    def collapsed(self) -> str:
+        """Свернутые стеки: "поток;внешняя;...;внутренняя N" по строке на стек"""
+        return "".join(f"{stack} {count}\n" for stack, count in sorted(self._stacks.items()))
+
+    def _run(self):
+        own_ident = threading.get_ident()
+        while not self._stop_event.wait(self.interval):
+            self._sample(own_ident)
+
+    def _sample(self, own_ident: int):
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == own_ident:
+                continue
+            stack = []
+            while frame is not None and len(stack) < self.max_depth:
+                stack.append(_frame_label(frame))
+                frame = frame.f_back
+            stack.append(names.get(ident, f"thread-{ident}").replace(";", ":"))
+            self._stacks[";".join(reversed(stack))] += 1
+        self.samples += 1
+
+    def _write(self) -> str:
+        os.makedirs(self.output_dir, exist_ok=True)
+        path = os.path.join(self.output_dir, f"profile_{datetime.now():%Y%m%d_%H%M%S}.folded")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(self.collapsed())
+        return path
@@ -0,0 +1,422 @@
+"""
+Декларативные правила автоматизации: "когда событие/условие - выполнить действия".
+
+Условия индексируются по (устройство, атрибут), а условия на равенство - еще и
+по значению (дискриминационная сеть в духе Rete): изменение атрибута перепроверяет
+только зависящие от него условия, а не все правила.
+"""
+
+import fnmatch
+import operator
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Tuple
+
+
+class RuleError(ValueError):
+    """Некорректное описание правила"""
+
+
+def _contains(value, options) -> bool:
+    return value in options
+
+
+OPERATORS: Dict[str, Callable[[Any, Any], bool]] = {
+    "==": operator.eq,
+    "!=": operator.ne,
+    ">": operator.gt,
+    ">=": operator.ge,
+    "<": operator.lt,
+    "<=": operator.le,
+    "in": _contains,
+}
+
+# Отсутствующее значение атрибута (устройство еще не сообщало его)
+MISSING = object()
+
+
+def _freeze(value):
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+class Condition:
+    """Условие на атрибут устройства (альфа-узел); общее для одинаковых условий разных правил"""
+
+    def __init__(self, device_id: str, attribute: str, op: str, value):
+        self.device_id = device_id
+        self.attribute = attribute
+        self.op = op
+        self.value = _freeze(value)
+        self.satisfied = False
+        self.rules: List["Rule"] = []
+        self._test = OPERATORS[op]
+
+    @property
+    def key(self) -> Tuple:
+        return (self.device_id, self.attribute, self.op, self.value)
+
+    def test(self, actual) -> bool:
+        if actual is MISSING:
+            return False
+        try:
+            return bool(self._test(actual, self.value))
+        except TypeError:
+            return False
+
+    def to_dict(self) -> Dict:
+        value = list(self.value) if isinstance(self.value, tuple) else self.value
+        return {"device_id": self.device_id, "attribute": self.attribute, "op": self.op, "value": value}
+
+
+class Rule:
+    """Правило: необязательный триггер-событие, условия (И) и действия"""
+
+    def __init__(self, rule_id: str, conditions: List[Condition], actions: List[Dict],
+                 trigger: Optional[Tuple[str, str]] = None, cooldown: float = 0.0,
+                 description: str = "", template_id: str = None):
+        self.rule_id = rule_id
+        self.conditions = conditions
+        self.actions = actions
+        self.trigger = trigger              # (device_id, тип события) или None
+        self.cooldown = cooldown            # секунды между срабатываниями
+        self.description = description
+        self.template_id = template_id      # правило создано из шаблона с "*"
+        self.enabled = True
+        self.matched = 0                    # число выполненных условий
+        self.fire_count = 0
+        self.last_fired: Optional[float] = None
+
+    @property
+    def satisfied(self) -> bool:
+        return self.matched == len(self.conditions)
+
+    def to_dict(self) -> Dict:
+        result = {
+            "id": self.rule_id,
+            "conditions": [condition.to_dict() for condition in self.conditions],
+            "actions": self.actions,
+            "cooldown": self.cooldown,
+            "description": self.description,
+            "enabled": self.enabled,
+            "fire_count": self.fire_count,
+        }
+        if self.trigger:
+            result["trigger"] = {"device_id": self.trigger[0], "event": self.trigger[1]}
+        return result
+
+
+class _AttributeIndex:
+    """Условия одного (устройство, атрибут): равенства по значению, остальные списком"""
+
+    def __init__(self):
+        self.equals: Dict[Hashable, List[Condition]] = {}
+        self.others: List[Condition] = []
+
+    def add(self, condition: Condition):
+        if condition.op == "==" and isinstance(condition.value, Hashable):
+            self.equals.setdefault(condition.value, []).append(condition)
+        else:
+            self.others.append(condition)
+
+    def remove(self, condition: Condition):
+        if condition in self.others:
+            self.others.remove(condition)
+            return
+        bucket = self.equals.get(condition.value, [])
+        if condition in bucket:
+            bucket.remove(condition)
+            if not bucket:
+                del self.equals[condition.value]
+
+    def affected(self, old, new) -> Iterable[Condition]:
+        """Условия, истинность которых может измениться при смене old -> new"""
+        for value in (old, new):
+            try:
+                yield from self.equals.get(value, ())
+            except TypeError:
+                pass
+        yield from self.others
+
+    def __len__(self):
+        return len(self.others) + sum(len(bucket) for bucket in self.equals.values())
+
+
+class RuleEngine:
+    """Сопоставление событий устройств с правилами.
+
+    Факты - последние известные атрибуты устройств. Правило с условиями
+    срабатывает по фронту: когда все условия становятся истинными. Правило
+    с триггером срабатывает на событие триггера, если выполнены его условия.
+    Действия выполняет run_actions(rule, context) вне блокировки движка.
+    """
+
+    def __init__(self, run_actions: Callable[[Rule, Dict], None]):
+        self._run_actions = run_actions
+        self._facts: Dict[str, Dict[str, Any]] = {}
+        self._index: Dict[Tuple[str, str], _AttributeIndex] = {}
+        self._conditions: Dict[Tuple, Condition] = {}
+        self._triggers: Dict[Tuple[str, str], List[Rule]] = {}
+        self._rules: Dict[str, Rule] = {}
+        self._templates: Dict[str, Dict] = {}
+        self._lock = threading.RLock()
+        self.events_processed = 0
+        self.evaluations = 0    # проверок условий (для оценки работы индекса)
+
+    # ============================================================
+    #  Правила
+    # ============================================================
+
+    @property
+    def rules(self) -> List[Rule]:
+        with self._lock:
+            return list(self._rules.values())
+
+    def get_rule(self, rule_id: str) -> Optional[Rule]:
+        return self._rules.get(rule_id)
+
+    def add_rule(self, spec: Dict) -> List[Rule]:
+        """Добавить правило из описания; вернуть созданные правила.
+
+        Описание: {"id", "trigger": {"device_id", "event"}, "conditions":
+        [{"device_id", "attribute", "op", "value"}], "actions": [...], "cooldown"}.
+        device_id с "*" делает правило шаблоном: оно создается для каждого
+        подходящего устройства (все "*" в правиле означают одно устройство).
+        """
+        rule_id = self._validate(spec)
+        with self._lock:
+            if rule_id in self._rules or rule_id in self._templates:
+                raise RuleError(f"Правило {rule_id} уже существует")
+            if self._is_template(spec):
+                self._templates[rule_id] = spec
+                return [self._instantiate(rule_id, spec, device_id)
+                        for device_id in list(self._facts)
+                        if self._template_matches(spec, device_id)]
+            return [self._build(rule_id, spec)]
+
+    def load_rules(self, specs: Iterable[Dict]) -> int:
+        """Добавить список правил, вернуть число добавленных описаний"""
+        count = 0
+        for spec in specs:
+            self.add_rule(spec)
+            count += 1
+        return count
+
+    def remove_rule(self, rule_id: str) -> bool:
+        """Удалить правило (или шаблон вместе с созданными из него правилами)"""
+        with self._lock:
+            if rule_id in self._templates:
+                del self._templates[rule_id]
+                for rule in [r for r in self._rules.values() if r.template_id == rule_id]:
+                    self._unlink(rule)
+                return True
+            rule = self._rules.get(rule_id)
+            if rule is None:
+                return False
+            self._unlink(rule)
+            return True
+
+    def set_enabled(self, rule_id: str, enabled: bool) -> bool:
+        rule = self._rules.get(rule_id)
+        if rule is None:
+            return False
+        rule.enabled = enabled
+        return True
+
+    # ============================================================
+    #  Факты и события
+    # ============================================================
+
+    def set_facts(self, device_id: str, facts: Dict[str, Any]):
+        """Задать известные атрибуты устройства без срабатывания правил (начальное состояние)"""
+        with self._lock:
+            self._ensure_device(device_id)
+            for attribute, value in facts.items():
+                self._update(device_id, attribute, value, fired=None)
+
+    def handle_device_event(self, event: Dict):
+        """Событие устройства (BaseDevice.emit_event): атрибуты из payload и триггеры"""
+        device_id = event.get("device_id")
+        if not device_id:
+            return
+        event_type = event.get("event_type")
+        payload = event.get("payload") or {}
+        fired: List[Tuple[Rule, Dict]] = []
+        with self._lock:
+            self.events_processed += 1
+            self._ensure_device(device_id)
+            for attribute, value in payload.items():
+                if attribute != "device_id":
+                    self._update(device_id, attribute, value, fired, event_type)
+            for rule in self._triggers.get((device_id, event_type), ()):
+                if rule.satisfied:
+                    self._fire(rule, {"device_id": device_id, "event": event_type, "payload": payload}, fired)
+        self._execute(fired)
+
+    def handle_state_changed(self, data: Dict):
+        """Событие шины device_state_changed (смена состояния через DeviceManager)"""
+        fired: List[Tuple[Rule, Dict]] = []
+        with self._lock:
+            self.events_processed += 1
+            self._ensure_device(data["device_id"])
+            self._update(data["device_id"], "state", data["new_state"], fired, "state_changed")
+        self._execute(fired)
+
+    def get_fact(self, device_id: str, attribute: str, default=None):
+        return self._facts.get(device_id, {}).get(attribute, default)
+
+    # ============================================================
+    #  Внутреннее
+    # ============================================================
+
+    @staticmethod
+    def _is_template(spec: Dict) -> bool:
+        devices = [c["device_id"] for c in spec.get("conditions", [])]
+        if spec.get("trigger"):
+            devices.append(spec["trigger"]["device_id"])
+        return any("*" in device_id for device_id in devices)
+
+    @staticmethod
+    def _template_matches(spec: Dict, device_id: str) -> bool:
+        patterns = [c["device_id"] for c in spec.get("conditions", []) if "*" in c["device_id"]]
+        if spec.get("trigger") and "*" in spec["trigger"]["device_id"]:
+            patterns.append(spec["trigger"]["device_id"])
+        return all(fnmatch.fnmatchcase(device_id, pattern) for pattern in patterns)
+
+    @staticmethod
+    def _validate(spec: Dict) -> str:
+        rule_id = spec.get("id")
+        if not rule_id or not isinstance(rule_id, str):
+            raise RuleError("У правила должен быть строковый id")
+        conditions = spec.get("conditions", [])
+        trigger = spec.get("trigger")
+        if not conditions and not trigger:
+            raise RuleError(f"Правило {rule_id}: нужен trigger или хотя бы одно условие")
+        for condition in conditions:
+            if not condition.get("device_id") or not condition.get("attribute"):
+                raise RuleError(f"Правило {rule_id}: в условии нужны device_id и attribute")
+            if condition.get("op", "==") not in OPERATORS:
+                raise RuleError(f"Правило {rule_id}: неизвестная операция {condition.get('op')}")
+            if "value" not in condition:
+                raise RuleError(f"Правило {rule_id}: в условии нет value")
+        if trigger and (not trigger.get("device_id") or not trigger.get("event")):
+            raise RuleError(f"Правило {rule_id}: в trigger нужны device_id и event")
+        actions = spec.get("actions")
+        if not actions:
+            raise RuleError(f"Правило {rule_id}: нет действий")
+        for action in actions:
+            if "notify" not in action and not (action.get("device_id") and action.get("action")):
+                raise RuleError(f"Правило {rule_id}: действие - notify или device_id + action")
+        return rule_id
+
+    def _ensure_device(self, device_id: str):
+        """Новое устройство: создать для него правила из подходящих шаблонов"""
+        if device_id in self._facts:
+            return
+        self._facts[device_id] = {}
+        for template_id, spec in self._templates.items():
+            if self._template_matches(spec, device_id):
+                self._instantiate(template_id, spec, device_id)
+
+    def _instantiate(self, template_id: str, spec: Dict, device_id: str) -> Rule:
+        def bind(item: Dict) -> Dict:
+            if "*" in item.get("device_id", ""):
+                return dict(item, device_id=device_id)
+            return item
+
+        concrete = dict(spec, conditions=[bind(c) for c in spec.get("conditions", [])])
+        if spec.get("trigger"):
+            concrete["trigger"] = bind(spec["trigger"])
+        concrete["actions"] = [
+            dict(action, device_id=device_id) if action.get("device_id") == "*" else action
+            for action in spec["actions"]
+        ]
+        return self._build(f"{template_id}@{device_id}", concrete, template_id)
+
+    def _build(self, rule_id: str, spec: Dict, template_id: str = None) -> Rule:
+        conditions = []
+        for item in spec.get("conditions", []):
+            candidate = Condition(item["device_id"], item["attribute"], item.get("op", "=="), item["value"])
+            condition = self._conditions.get(candidate.key)
+            if condition is None:
+                condition = candidate
+                condition.satisfied = condition.test(
+                    self._facts.get(condition.device_id, {}).get(condition.attribute, MISSING))
+                self._conditions[condition.key] = condition
+                self._index.setdefault((condition.device_id, condition.attribute), _AttributeIndex()).add(condition)
+            if condition not in conditions:
+                conditions.append(condition)
+
+        trigger = None
+        if spec.get("trigger"):
+            trigger = (spec["trigger"]["device_id"], spec["trigger"]["event"])
+
+        rule = Rule(rule_id, conditions, list(spec["actions"]), trigger,
+                    float(spec.get("cooldown", 0)), spec.get("description", ""), template_id)
+        rule.enabled = spec.get("enabled", True)
+        rule.matched = sum(1 for condition in conditions if condition.satisfied)
+        for condition in conditions:
+            condition.rules.append(rule)
+        if trigger:
+            self._triggers.setdefault(trigger, []).append(rule)
+        self._rules[rule_id] = rule
+        return rule
+
+    def _unlink(self, rule: Rule):
+        del self._rules[rule.rule_id]
+        for condition in rule.conditions:
+            condition.rules.remove(rule)
+            if not condition.rules:
+                del self._conditions[condition.key]
+                index = self._index[(condition.device_id, condition.attribute)]
+                index.remove(condition)
+                if not len(index):
+                    del self._index[(condition.device_id, condition.attribute)]
+        if rule.trigger:
+            rules = self._triggers[rule.trigger]
+            rules.remove(rule)
+            if not rules:
+                del self._triggers[rule.trigger]
+
+    def _update(self, device_id: str, attribute: str, value, fired: Optional[List],
+                event_type: str = None):
+        facts = self._facts[device_id]
+        old = facts.get(attribute, MISSING)
+        if old == value:
+            return
+        facts[attribute] = value
+        index = self._index.get((device_id, attribute))
+        if index is None:
+            return
+        for condition in list(index.affected(old, value)):
+            self.evaluations += 1
+            now_satisfied = condition.test(value)
+            if now_satisfied == condition.satisfied:
+                continue
+            condition.satisfied = now_satisfied
+            for rule in condition.rules:
+                rule.matched += 1 if now_satisfied else -1
+                # Фронт: правило без триггера стало выполненным целиком
+                if now_satisfied and fired is not None and rule.trigger is None and rule.satisfied:
+                    self._fire(rule, {"device_id": device_id, "attribute": attribute,
+                                      "value": value, "old_value": None if old is MISSING else old,
+                                      "event": event_type}, fired)
+
+    @staticmethod
+    def _fire(rule: Rule, context: Dict, fired: List):
+        if not rule.enabled:
+            return
+        now = time.monotonic()
+        if rule.cooldown and rule.last_fired is not None and now - rule.last_fired < rule.cooldown:
+            return
+        rule.last_fired = now
+        rule.fire_count += 1
+        fired.append((rule, dict(context, rule_id=rule.rule_id)))
+
+    def _execute(self, fired: List[Tuple[Rule, Dict]]):
+        for rule, context in fired:
+            try:
+                self._run_actions(rule, context)
+            except Exception as e:
+                print(f"❌ Ошибка выполнения правила {rule.rule_id}: {e}")
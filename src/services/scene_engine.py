@@ -0,0 +1,411 @@
+"""
+Сцены: граф шагов (команд устройствам) с задержками, плавными переходами и зависимостями
+"""
+
+import heapq
+import itertools
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional
+
+
+class SceneError(ValueError):
+    """Некорректная сцена или конфликт с выполняемой сценой"""
+
+
+class SceneStep:
+    """Шаг сцены: команда устройству после завершения шагов after и задержки delay"""
+
+    def __init__(self, step_id: str, device_id: str, action: str = None,
+                 after: Iterable[str] = (), delay: float = 0.0, fade: Dict = None):
+        self.step_id = step_id
+        self.device_id = device_id
+        self.action = action
+        self.after = list(after)
+        self.delay = float(delay)
+        # Плавный переход: {"attribute": "brightness", "to": 80, "from": 0,
+        # "duration": 2.0, "steps": 10} - серия команд set_<attribute>
+        self.fade = fade
+
+    def to_dict(self) -> Dict:
+        result = {"id": self.step_id, "device_id": self.device_id, "after": self.after, "delay": self.delay}
+        if self.action:
+            result["action"] = self.action
+        if self.fade:
+            result["fade"] = self.fade
+        return result
+
+
+class Scene:
+    """Именованный ациклический граф шагов"""
+
+    def __init__(self, name: str, steps: List[SceneStep], description: str = ""):
+        self.name = name
+        self.steps = {step.step_id: step for step in steps}
+        self.description = description
+        if len(self.steps) != len(steps):
+            raise SceneError(f"Сцена {name}: повторяющиеся id шагов")
+        self._validate()
+
+    @classmethod
+    def from_dict(cls, name: str, spec: Dict) -> "Scene":
+        steps = []
+        for index, item in enumerate(spec.get("steps", [])):
+            if not item.get("device_id"):
+                raise SceneError(f"Сцена {name}: у шага {index} нет device_id")
+            if not item.get("action") and not item.get("fade"):
+                raise SceneError(f"Сцена {name}: у шага {index} нет action или fade")
+            fade = item.get("fade")
+            if fade and ("attribute" not in fade or "to" not in fade):
+                raise SceneError(f"Сцена {name}: в fade нужны attribute и to")
+            steps.append(SceneStep(
+                item.get("id", str(index)), item["device_id"], item.get("action"),
+                item.get("after", ()), item.get("delay", 0.0), fade
+            ))
+        return cls(name, steps, spec.get("description", ""))
+
+    @property
+    def devices(self) -> set:
+        return {step.device_id for step in self.steps.values()}
+
+    def _validate(self):
+        """Зависимости существуют и не образуют цикл (алгоритм Кана)"""
+        remaining = {}
+        for step in self.steps.values():
+            for dependency in step.after:
+                if dependency not in self.steps:
+                    raise SceneError(f"Сцена {self.name}: шаг {step.step_id} зависит от неизвестного {dependency}")
+            remaining[step.step_id] = len(step.after)
+        ready = [step_id for step_id, count in remaining.items() if count == 0]
+        visited = 0
+        while ready:
+            step_id = ready.pop()
+            visited += 1
+            for step in self.steps.values():
+                if step_id in step.after:
+                    remaining[step.step_id] -= 1
+                    if remaining[step.step_id] == 0:
+                        ready.append(step.step_id)
+        if visited != len(self.steps):
+            raise SceneError(f"Сцена {self.name}: зависимости шагов образуют цикл")
+
+    def to_dict(self) -> Dict:
+        return {"name": self.name, "description": self.description,
+                "steps": [step.to_dict() for step in self.steps.values()]}
+
+
+class SceneRun:
+    """Выполнение сцены"""
+
+    PENDING = "pending"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    CANCELLED = "cancelled"
+    PREEMPTED = "preempted"
+
+    def __init__(self, run_id: int, scene: Scene, steps: Dict[str, SceneStep], priority: int):
+        self.run_id = run_id
+        self.scene = scene
+        self.steps = steps                  # шаги после развертывания переходов
+        self.priority = priority
+        self.status = self.PENDING
+        self.results: Dict[str, bool] = {}
+        self.batches = 0                    # пакетов команд (сохранений состояния)
+        self.started_at = datetime.now()
+        self.finished_at: Optional[datetime] = None
+        self._waiting = {step_id: len(step.after) for step_id, step in steps.items()}
+        self._dependents: Dict[str, List[str]] = {step_id: [] for step_id in steps}
+        for step in steps.values():
+            for dependency in step.after:
+                self._dependents[dependency].append(step.step_id)
+        self._done = threading.Event()
+        self._callbacks: List[Callable[["SceneRun"], None]] = []
+        self._callbacks_lock = threading.Lock()
+
+    @property
+    def done(self) -> bool:
+        return self._done.is_set()
+
+    @property
+    def devices(self) -> set:
+        return self.scene.devices
+
+    def wait(self, timeout: float = None) -> bool:
+        """Дождаться завершения; False по таймауту"""
+        return self._done.wait(timeout)
+
+    def add_done_callback(self, callback: Callable[["SceneRun"], None]):
+        """Вызвать callback(run) по завершении (сразу, если сцена уже завершена)"""
+        with self._callbacks_lock:
+            if not self.done:
+                self._callbacks.append(callback)
+                return
+        callback(self)
+
+    def to_dict(self) -> Dict:
+        return {
+            "run_id": self.run_id,
+            "scene": self.scene.name,
+            "status": self.status,
+            "priority": self.priority,
+            "completed_steps": len(self.results),
+            "total_steps": len(self.steps),
+            "failed_steps": [step_id for step_id, ok in self.results.items() if not ok],
+            "batches": self.batches,
+            "started_at": self.started_at.isoformat(timespec="seconds"),
+            "finished_at": self.finished_at.isoformat(timespec="seconds") if self.finished_at else None,
+        }
+
+
+class SceneEngine:
+    """Выполняет сцены на общем пуле потоков.
+
+    Готовые к одному моменту шаги одной сцены уходят одним пакетом в
+    DeviceManager.send_commands (одно сохранение состояния на пакет),
+    независимые пакеты разных моментов и сцен выполняются параллельно.
+    Неуспешная команда не останавливает зависимые шаги: результат шага
+    записывается в SceneRun.results.
+    """
+
+    def __init__(self, device_manager, max_workers: int = 4, history_size: int = 50,
+                 transitions=None):
+        self.device_manager = device_manager
+        # TransitionEngine: шаги fade выполняются им; без него - цепочкой команд
+        self.transitions = transitions
+        self.scenes: Dict[str, Scene] = {}
+        self.history: deque = deque(maxlen=history_size)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="scene")
+        self._active: Dict[int, SceneRun] = {}
+        self._queue: List = []              # куча (время, порядковый номер, запуск, шаг)
+        self._seq = itertools.count()
+        self._run_ids = itertools.count(1)
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+
+    # ============================================================
+    #  Сцены
+    # ============================================================
+
+    def register(self, scene: Scene) -> Scene:
+        self.scenes[scene.name] = scene
+        return scene
+
+    def load_scenes(self, specs: Dict[str, Dict]) -> int:
+        for name, spec in specs.items():
+            self.register(Scene.from_dict(name, spec))
+        return len(specs)
+
+    def start(self, scene, priority: int = 0) -> SceneRun:
+        """Запустить сцену (объект или имя зарегистрированной).
+
+        Выполняемые сцены с общими устройствами и приоритетом не выше
+        вытесняются; при конфликте со сценой большего приоритета - SceneError.
+        """
+        if isinstance(scene, str):
+            if scene not in self.scenes:
+                raise SceneError(f"Сцена {scene} не найдена")
+            scene = self.scenes[scene]
+        if self._closed:
+            raise SceneError("Исполнитель сцен остановлен")
+
+        steps = self._expand(scene)
+        with self._cond:
+            conflicts = [run for run in self._active.values() if run.devices & scene.devices]
+            for run in conflicts:
+                if run.priority > priority:
+                    raise SceneError(f"Устройства заняты сценой {run.scene.name} (приоритет {run.priority})")
+            run = SceneRun(next(self._run_ids), scene, steps, priority)
+        for other in conflicts:
+            self._finish(other, SceneRun.PREEMPTED)
+
+        with self._cond:
+            self._active[run.run_id] = run
+            run.status = SceneRun.RUNNING
+            now = time.monotonic()
+            for step_id, waiting in run._waiting.items():
+                if waiting == 0:
+                    self._push(now + steps[step_id].delay, run, step_id)
+            self._ensure_thread()
+            self._cond.notify()
+        if not steps:
+            self._finish(run, SceneRun.COMPLETED)
+        return run
+
+    def cancel(self, run_id: int) -> bool:
+        """Отменить сцену: запланированные шаги не выполняются"""
+        run = self._active.get(run_id)
+        if run is None:
+            return False
+        return self._finish(run, SceneRun.CANCELLED)
+
+    def get_run(self, run_id: int) -> Optional[SceneRun]:
+        run = self._active.get(run_id)
+        if run is not None:
+            return run
+        for run in self.history:
+            if run.run_id == run_id:
+                return run
+        return None
+
+    def active_runs(self) -> List[SceneRun]:
+        with self._cond:
+            return list(self._active.values())
+
+    def shutdown(self, wait: bool = True):
+        """Отменить выполняемые сцены и остановить пул"""
+        self._closed = True
+        for run in self.active_runs():
+            self._finish(run, SceneRun.CANCELLED)
+        with self._cond:
+            self._cond.notify_all()
+        if self._thread is not None and wait:
+            self._thread.join()
+        self._executor.shutdown(wait=wait)
+
+    # ============================================================
+    #  Внутреннее
+    # ============================================================
+
+    def _expand(self, scene: Scene) -> Dict[str, SceneStep]:
+        """Развернуть плавные переходы в цепочки команд с равными интервалами"""
+        if self.transitions is not None:
+            return dict(scene.steps)
+        steps: Dict[str, SceneStep] = {}
+        for step in scene.steps.values():
+            if not step.fade:
+                steps[step.step_id] = step
+                continue
+            fade = step.fade
+            attribute = fade["attribute"]
+            target = float(fade["to"])
+            start = fade.get("from")
+            if start is None:
+                device = self.device_manager.get_device(step.device_id)
+                start = (getattr(device, "data", {}) or {}).get(attribute, 0) if device else 0
+            start = float(start)
+            count = max(1, int(fade.get("steps", 10)))
+            interval = float(fade.get("duration", 1.0)) / count
+            after, delay = step.after, step.delay
+            for k in range(1, count + 1):
+                value = start + (target - start) * k / count
+                value = round(value) if float(target).is_integer() and float(start).is_integer() else round(value, 1)
+                sub_id = step.step_id if k == count else f"{step.step_id}#{k}"
+                steps[sub_id] = SceneStep(sub_id, step.device_id, f"set_{attribute}:{value}", after, delay)
+                after, delay = [sub_id], interval
+        return steps
+
+    def _push(self, due: float, run: SceneRun, step_id: str):
+        heapq.heappush(self._queue, (due, next(self._seq), run, step_id))
+
+    def _ensure_thread(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._scheduler, name="scene-scheduler", daemon=True)
+            self._thread.start()
+
+    def _scheduler(self):
+        while True:
+            with self._cond:
+                while not self._closed:
+                    if self._queue:
+                        delay = self._queue[0][0] - time.monotonic()
+                        if delay <= 0:
+                            break
+                        self._cond.wait(delay)
+                    else:
+                        self._cond.wait()
+                if self._closed:
+                    return
+                # Все наступившие шаги одной сцены - один пакет
+                batches: Dict[int, List[str]] = {}
+                runs: Dict[int, SceneRun] = {}
+                now = time.monotonic()
+                while self._queue and self._queue[0][0] <= now:
+                    _, _, run, step_id = heapq.heappop(self._queue)
+                    if run.done:
+                        continue
+                    batches.setdefault(run.run_id, []).append(step_id)
+                    runs[run.run_id] = run
+            for run_id, step_ids in batches.items():
+                try:
+                    self._executor.submit(self._execute_batch, runs[run_id], step_ids)
+                except RuntimeError:
+                    return  # пул остановлен
+
+    def _execute_batch(self, run: SceneRun, step_ids: List[str]):
+        if run.done:
+            return
+        fades = [step_id for step_id in step_ids if run.steps[step_id].fade]
+        for step_id in fades:
+            self._start_fade(run, run.steps[step_id])
+        step_ids = [step_id for step_id in step_ids if not run.steps[step_id].fade]
+        if not step_ids:
+            return
+
+        commands = [(run.steps[step_id].device_id, run.steps[step_id].action) for step_id in step_ids]
+        try:
+            results = self.device_manager.send_commands(commands)
+        except Exception as e:
+            print(f"❌ Ошибка шага сцены {run.scene.name}: {e}")
+            results = [False] * len(commands)
+        self._complete_steps(run, step_ids, results, batch=True)
+
+    def _start_fade(self, run: SceneRun, step: SceneStep):
+        """Шаг fade завершается вместе с переходом; отмена сцены отменяет переход"""
+        fade = step.fade
+        try:
+            transition = self.transitions.start(
+                step.device_id, fade["attribute"], fade["to"], float(fade.get("duration", 1.0)),
+                start=fade.get("from"), easing=fade.get("easing", "linear"))
+        except ValueError as e:
+            print(f"❌ Ошибка шага сцены {run.scene.name}: {e}")
+            self._complete_steps(run, [step.step_id], [False])
+            return
+
+        def on_run_done(finished_run: SceneRun):
+            if finished_run.status != SceneRun.COMPLETED:
+                self.transitions.cancel_transition(transition)
+
+        run.add_done_callback(on_run_done)
+        transition.add_done_callback(lambda t: self._complete_steps(
+            run, [step.step_id], [t.status == t.COMPLETED]))
+
+    def _complete_steps(self, run: SceneRun, step_ids: List[str], results: List[bool], batch: bool = False):
+        finished = False
+        with self._cond:
+            if run.done:
+                return
+            if batch:
+                run.batches += 1
+            now = time.monotonic()
+            for step_id, success in zip(step_ids, results):
+                run.results[step_id] = bool(success)
+                for dependent in run._dependents[step_id]:
+                    run._waiting[dependent] -= 1
+                    if run._waiting[dependent] == 0:
+                        self._push(now + run.steps[dependent].delay, run, dependent)
+            self._cond.notify()
+            finished = len(run.results) == len(run.steps)
+        if finished:
+            self._finish(run, SceneRun.COMPLETED)
+
+    def _finish(self, run: SceneRun, status: str) -> bool:
+        with self._cond:
+            if run.done:
+                return False
+            run.status = status
+            run.finished_at = datetime.now()
+            self._active.pop(run.run_id, None)
+            self.history.append(run)
+            with run._callbacks_lock:
+                run._done.set()
+                callbacks, run._callbacks = run._callbacks, []
+        for callback in callbacks:
+            try:
+                callback(run)
+            except Exception as e:
+                print(f"❌ Ошибка обработчика завершения сцены {run.scene.name}: {e}")
+        return True
@@ -6,9 +6,11 @@ import threading
 import json
 import os
 
+from services import metrics
+
 
 class ScheduleService:
-    def __init__(self, controller):
+    def __init__(self, controller, autostart: bool = True):
         self.controller = controller
         self.schedule = {}  # "HH:MM" -> [{"device_id": str, "action": str, "enabled": bool, "days": List[int]}]
         self.running = True
@@ -17,9 +19,14 @@ class ScheduleService:
         # Загружаем сохраненные задачи
         self.load_schedule()
         
+        self._last_checked_minute = -1
+        
         # Запускаем проверку расписания в отдельном потоке
-        self.thread = threading.Thread(target=self.run, daemon=True)
-        self.thread.start()
+        # (autostart=False - проверку запускает контроллер: поток или tick())
+        self.thread = None
+        if autostart:
+            self.thread = threading.Thread(target=self.run, daemon=True)
+            self.thread.start()
     
     def add_task(self, time_str: str, device_id: str, action: str, 
                  days: List[int] = None, enabled: bool = True) -> bool:
@@ -84,11 +91,12 @@ class ScheduleService:
     
     def get_device_names(self) -> Dict[str, str]:
         """Получить имена устройств"""
-        devices = self.controller.device_manager.get_all_devices_status()
-        device_names = {}
-        for device_id, info in devices.items():
-            device_names[device_id] = info.get("name", device_id)
-        return device_names
+        # Для имен полный статус устройств не нужен
+        devices = self.controller.device_manager.devices
+        return {
+            device_id: getattr(device, "name", device_id)
+            for device_id, device in devices.items()
+        }
     
     def run(self):
         """Фоновая проверка расписания"""
@@ -199,57 +207,47 @@ class ScheduleService:
         self.save_schedule()
         return True
 
+    def tick(self, now: datetime = None) -> int:
+        """Одна проверка расписания: выполнить задачи текущей минуты (один раз за минуту)"""
+        now = now or datetime.now()
+        current_time = now.strftime("%H:%M")
+        current_day = now.weekday()  # 0 = Monday, 6 = Sunday
+        
+        # Проверяем только если минута изменилась
+        if now.minute == self._last_checked_minute:
+            return 0
+        self._last_checked_minute = now.minute
+        
+        executed = 0
+        for task in list(self.schedule.get(current_time, [])):
+            if task["enabled"] and current_day in task["days"]:
+                # Выполняем задачу через очередь команд устройства: команды с
+                # параметром (set_temperature:22, on_and_set_brightness:80 ...)
+                # разбирает DeviceManager, повторы в одном слоте сливаются
+                dispatcher = getattr(self.controller, "command_dispatcher", None)
+                if dispatcher is not None:
+                    dispatcher.submit(task["device_id"], task["action"])
+                else:
+                    self.controller.device_manager.send_command(
+                        task["device_id"],
+                        task["action"]
+                    )
+                executed += 1
+        
+        if executed and metrics.registry.enabled:
+            # Запаздывание срабатывания относительно начала минуты слота
+            lag = (now - now.replace(second=0, microsecond=0)).total_seconds()
+            metrics.registry.histogram(
+                "smart_home_schedule_fire_lag_seconds", "Запаздывание срабатывания слота расписания"
+            ).observe(lag)
+            metrics.registry.counter(
+                "smart_home_schedule_fires_total", "Выполненные задачи расписания").inc(executed)
+        return executed
+
     def run(self):
         """Фоновая проверка расписания"""
-        last_checked_minute = -1
-        
         while self.running:
-            now = datetime.now()
-            current_time = now.strftime("%H:%M")
-            current_day = now.weekday()  # 0 = Monday, 6 = Sunday
-            
-            # Проверяем только если минута изменилась
-            if now.minute != last_checked_minute and current_time in self.schedule:
-                for task in self.schedule[current_time]:
-                    if task["enabled"] and current_day in task["days"]:
-                        # Выполняем задачу
-                        action = task["action"]
-                        
-                        # Проверяем сложные команды
-                        if ":" in action:
-                            # Команда с параметром
-                            parts = action.split(":", 1)
-                            command = parts[0]
-                            value = parts[1]
-                            
-                            if command == "set_temperature":
-                                # Установка температуры (термостат должен быть включен)
-                                device = self.controller.device_manager.get_device(task["device_id"])
-                                if device and hasattr(device, "set_temperature"):
-                                    device.set_temperature(float(value))
-                            elif command == "on_and_set_temperature":
-                                # Включить и установить температуру
-                                self.controller.device_manager.send_command(task["device_id"], "on")
-                                device = self.controller.device_manager.get_device(task["device_id"])
-                                if device and hasattr(device, "set_temperature"):
-                                    device.set_temperature(float(value))
-                            elif command == "set_brightness":
-                                # Установка яркости (лампа должна быть включена)
-                                device = self.controller.device_manager.get_device(task["device_id"])
-                                if device and hasattr(device, "set_brightness"):
-                                    device.set_brightness(int(value))
-                            elif command == "on_and_set_brightness":
-                                # Включить и установить яркость
-                                self.controller.device_manager.send_command(task["device_id"], "on")
-                                device = self.controller.device_manager.get_device(task["device_id"])
-                                if device and hasattr(device, "set_brightness"):
-                                    device.set_brightness(int(value))
-                        else:
-                            # Простая команда
-                            self.controller.device_manager.send_command(task["device_id"], action)
-                
-                last_checked_minute = now.minute
-            
+            self.tick()
             time.sleep(5)  # Проверяем каждые 5 секунд
     
     def stop(self):
@@ -0,0 +1,247 @@
+"""
+Двоичный формат снимка состояний устройств
+
+Заголовок (struct): MAGIC, версия, сжатие, число записей, число блоков,
+смещение оглавления. Записи устройств - компактный JSON - собираются в
+блоки по ~64 КБ, каждый блок сжимается отдельно (zlib/lzma или без сжатия).
+Оглавление: таблица блоков и для каждой записи device_id, номер блока,
+смещение и длина внутри блока.
+
+Чтение одного устройства распаковывает один блок и разбирает одну запись;
+полная загрузка разбирает блок целиком одним вызовом json.loads.
+"""
+
+import json
+import lzma
+import os
+import struct
+import zlib
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+MAGIC = b"KPOS"
+VERSION = 1
+BLOCK_SIZE = 64 * 1024
+
+# MAGIC, версия, сжатие, число записей, число блоков, смещение оглавления
+_HEADER = struct.Struct("<4sHHIIQ")
+
+COMPRESSIONS = {"none": 0, "zlib": 1, "lzma": 2}
+_COMPRESS = {
+    0: lambda data: data,
+    1: lambda data: zlib.compress(data, 6),
+    2: lambda data: lzma.compress(data, preset=1),
+}
+_DECOMPRESS = {
+    0: lambda data: data,
+    1: zlib.decompress,
+    2: lzma.decompress,
+}
+
+
+class SnapshotFormatError(ValueError):
+    """Файл не является снимком или записан неизвестной версией"""
+
+
+def _pack_array(code: str, values: List[int]) -> bytes:
+    return struct.pack(f"<{len(values)}{code}", *values)
+
+
+def write_snapshot(path: str, states: Dict[str, Any], compression: str = "none",
+                   block_size: int = BLOCK_SIZE):
+    """Записать снимок {device_id: состояние} в path (через временный файл)"""
+    if compression not in COMPRESSIONS:
+        raise ValueError(f"Неизвестное сжатие {compression}")
+    code = COMPRESSIONS[compression]
+    compress = _COMPRESS[code]
+    ids: List[str] = []
+    record_blocks: List[int] = []
+    record_offsets: List[int] = []
+    record_lengths: List[int] = []
+    block_offsets: List[int] = []
+    block_lengths: List[int] = []
+    block_counts: List[int] = []
+
+    temp_file = path + ".tmp"
+    with open(temp_file, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, VERSION, code, 0, 0, 0))
+        block = bytearray()
+        count = 0
+
+        def flush():
+            data = compress(bytes(block))
+            block_offsets.append(f.tell())
+            block_lengths.append(len(data))
+            block_counts.append(count)
+            f.write(data)
+
+        for device_id, state in states.items():
+            record = json.dumps(state, separators=(",", ":"), ensure_ascii=False,
+                                default=str).encode("utf-8")
+            if count:
+                # Записи блока разделены запятыми: весь блок - тело JSON-массива
+                block += b","
+            ids.append(device_id)
+            record_blocks.append(len(block_offsets))
+            record_offsets.append(len(block))
+            record_lengths.append(len(record))
+            block += record
+            count += 1
+            if len(block) >= block_size:
+                flush()
+                block = bytearray()
+                count = 0
+        if count:
+            flush()
+
+        index_offset = f.tell()
+        id_blob = "\0".join(ids).encode("utf-8")
+        f.write(_pack_array("Q", block_offsets) + _pack_array("I", block_lengths)
+                + _pack_array("I", block_counts) + struct.pack("<I", len(id_blob)) + id_blob
+                + _pack_array("I", record_blocks) + _pack_array("I", record_offsets)
+                + _pack_array("I", record_lengths))
+        f.seek(0)
+        f.write(_HEADER.pack(MAGIC, VERSION, code, len(ids), len(block_offsets), index_offset))
+    os.replace(temp_file, path)
+
+
+def is_snapshot(path: str) -> bool:
+    """Файл начинается с MAGIC двоичного снимка"""
+    try:
+        with open(path, "rb") as f:
+            return f.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
+
+
+class SnapshotReader:
+    """Произвольный доступ к снимку: при открытии читается только оглавление"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "rb")
+        try:
+            header = self._file.read(_HEADER.size)
+            if len(header) < _HEADER.size:
+                raise SnapshotFormatError(f"{path}: файл короче заголовка")
+            magic, version, code, count, blocks, index_offset = _HEADER.unpack(header)
+            if magic != MAGIC:
+                raise SnapshotFormatError(f"{path}: не двоичный снимок")
+            if version > VERSION or code not in _DECOMPRESS:
+                raise SnapshotFormatError(f"{path}: версия {version} / сжатие {code} не поддерживаются")
+            self.version = version
+            self.count = count
+            self._decompress = _DECOMPRESS[code]
+            self._file.seek(index_offset)
+            self._read_index(self._file.read(), count, blocks)
+        except (struct.error, UnicodeDecodeError) as e:
+            self._file.close()
+            raise SnapshotFormatError(f"{path}: оглавление повреждено ({e})")
+        except Exception:
+            self._file.close()
+            raise
+        self._positions: Optional[Dict[str, int]] = None
+        self._lookups = 0
+        # Последний распакованный блок: соседние устройства читаются без повторной распаковки
+        self._cached_block: Tuple[int, bytes] = (-1, b"")
+
+    def _read_index(self, data: bytes, count: int, blocks: int):
+        pos = 0
+
+        def array(code: str, n: int):
+            nonlocal pos
+            values = struct.unpack_from(f"<{n}{code}", data, pos)
+            pos += struct.calcsize(f"<{n}{code}")
+            return values
+
+        self._block_offsets = array("Q", blocks)
+        self._block_lengths = array("I", blocks)
+        self._block_counts = array("I", blocks)
+        size = struct.unpack_from("<I", data, pos)[0]
+        pos += 4
+        blob = data[pos:pos + size].decode("utf-8")
+        pos += size
+        self._ids = blob.split("\0") if count else []
+        if len(self._ids) != count or len(data) < pos + 12 * count:
+            raise SnapshotFormatError("Оглавление снимка повреждено")
+        # Массивы записей (блок, смещение, длина) не разбираются целиком:
+        # значения одной записи читаются из оглавления по ее номеру
+        self._index = data
+        self._records_at = pos
+
+    def device_ids(self) -> List[str]:
+        return list(self._ids)
+
+    def _position(self, device_id: str) -> Optional[int]:
+        if self._positions is None:
+            self._lookups += 1
+            if self._lookups <= 16:
+                # Несколько поисков дешевле линейным проходом, чем построением словаря
+                try:
+                    return self._ids.index(device_id)
+                except ValueError:
+                    return None
+            self._positions = dict(zip(self._ids, range(len(self._ids))))
+        return self._positions.get(device_id)
+
+    def _record(self, i: int) -> Tuple[int, int, int]:
+        """(номер блока, смещение, длина) записи i"""
+        base, count = self._records_at, self.count
+        return (struct.unpack_from("<I", self._index, base + 4 * i)[0],
+                struct.unpack_from("<I", self._index, base + 4 * (count + i))[0],
+                struct.unpack_from("<I", self._index, base + 4 * (2 * count + i))[0])
+
+    def __contains__(self, device_id: str) -> bool:
+        return self._position(device_id) is not None
+
+    def __len__(self) -> int:
+        return self.count
+
+    def _block(self, number: int) -> bytes:
+        if self._cached_block[0] != number:
+            self._file.seek(self._block_offsets[number])
+            try:
+                data = self._decompress(self._file.read(self._block_lengths[number]))
+            except (zlib.error, lzma.LZMAError) as e:
+                raise SnapshotFormatError(f"{self.path}: блок {number} поврежден ({e})")
+            self._cached_block = (number, data)
+        return self._cached_block[1]
+
+    def get(self, device_id: str, default: Any = None) -> Any:
+        """Прочитать и разобрать одну запись"""
+        i = self._position(device_id)
+        if i is None:
+            return default
+        number, offset, length = self._record(i)
+        return json.loads(self._block(number)[offset:offset + length])
+
+    def iter_items(self, device_ids: Iterable[str] = None) -> Iterator[Tuple[str, Any]]:
+        """Пары (device_id, состояние) в порядке файла"""
+        if device_ids is None:
+            first = 0
+            for number, count in enumerate(self._block_counts):
+                records = json.loads(b"[" + self._block(number) + b"]")
+                yield from zip(self._ids[first:first + count], records)
+                first += count
+            return
+        positions = sorted(i for i in map(self._position, device_ids) if i is not None)
+        for i in positions:
+            device_id = self._ids[i]
+            yield device_id, self.get(device_id)
+
+    def load_all(self) -> Dict[str, Any]:
+        return dict(self.iter_items())
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def read_snapshot(path: str, device_ids: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+    """Прочитать весь снимок или только указанные устройства"""
+    with SnapshotReader(path) as reader:
+        return dict(reader.iter_items(device_ids))
@@ -1,24 +1,93 @@
 import json
 import os
+import threading
+import time
+
+from services import metrics
+from services import snapshot_codec
 
 
 class StateStorage:
-    def __init__(self, filename="/Users/evgenii/Documents/Лабы/Лабы Проектирование ПО/KPO/src/data/device_state.json"):
+    def __init__(self, filename="/Users/evgenii/Documents/Лабы/Лабы Проектирование ПО/KPO/src/data/device_state.json",
+                 format: str = "json", compression: str = "none"):
+        if format not in ("json", "binary"):
+            raise ValueError(f"Неизвестный формат состояния {format}")
+        if compression not in snapshot_codec.COMPRESSIONS:
+            raise ValueError(f"Неизвестное сжатие {compression}")
+        self.format = format
+        self.compression = compression
+        # Прежний JSON-файл читается, пока двоичный снимок еще не записан
+        self.legacy_filename = None
+        if format == "binary" and filename.endswith(".json"):
+            self.legacy_filename = filename
+            filename = filename[:-len(".json")] + ".bin"
         self.filename = filename
         os.makedirs(os.path.dirname(filename), exist_ok=True)
+        # Команды разных устройств выполняются параллельно: без блокировки
+        # два сохранения пишут в один .tmp и os.replace второго падает
+        self._lock = threading.Lock()
 
     def save(self, data: dict):
+        start = time.perf_counter() if metrics.registry.enabled else None
         temp_file = self.filename + ".tmp"
-        with open(temp_file, "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=4, ensure_ascii=False)
-        os.replace(temp_file, self.filename)
+        with self._lock:
+            if self.format == "binary":
+                snapshot_codec.write_snapshot(self.filename, data, self.compression)
+            else:
+                with open(temp_file, "w", encoding="utf-8") as f:
+                    json.dump(data, f, indent=4, ensure_ascii=False)
+                os.replace(temp_file, self.filename)
+        if start is not None:
+            metrics.registry.histogram(
+                "smart_home_state_save_seconds", "Длительность StateStorage.save"
+            ).observe(time.perf_counter() - start)
 
     def load(self) -> dict:
-        if not os.path.exists(self.filename):
+        path = self._readable_path()
+        if path is None:
+            return {}
+        if snapshot_codec.is_snapshot(path):
+            try:
+                return snapshot_codec.read_snapshot(path)
+            except (snapshot_codec.SnapshotFormatError, OSError, ValueError):
+                return {}
+        return self._load_json(path)
+
+    def load_devices(self, device_ids) -> dict:
+        """Состояния только указанных устройств (двоичный снимок читает лишь их записи)"""
+        path = self._readable_path()
+        if path is None:
             return {}
+        if snapshot_codec.is_snapshot(path):
+            try:
+                return snapshot_codec.read_snapshot(path, device_ids)
+            except (snapshot_codec.SnapshotFormatError, OSError, ValueError):
+                return {}
+        states = self._load_json(path)
+        return {device_id: states[device_id] for device_id in device_ids if device_id in states}
+
+    def load_device(self, device_id: str):
+        """Состояние одного устройства или None"""
+        return self.load_devices([device_id]).get(device_id)
+
+    def open_reader(self):
+        """SnapshotReader для многократного чтения по устройствам (None, если снимка нет)"""
+        path = self._readable_path()
+        if path is None or not snapshot_codec.is_snapshot(path):
+            return None
+        return snapshot_codec.SnapshotReader(path)
+
+    def _readable_path(self):
+        if os.path.exists(self.filename):
+            return self.filename
+        if self.legacy_filename and os.path.exists(self.legacy_filename):
+            return self.legacy_filename
+        return None
 
+    @staticmethod
+    def _load_json(path: str) -> dict:
         try:
-            with open(self.filename, "r", encoding="utf-8") as f:
+            with open(path, "r", encoding="utf-8") as f:
                 content = f.read().strip()
                 if not content:
                     return {}
@@ -0,0 +1,256 @@
+"""
+Телеметрия датчиков: кольцо сырых замеров и агрегаты 1 мин / 1 ч / 1 день
+
+Каждый замер попадает в кольцо фиксированного размера и сразу в открытый
+интервал каждого уровня (min/max/сумма/число). Закрытые интервалы хранятся
+ограниченное время (tiered retention). Запрос за месяц читает несколько
+сотен готовых агрегатов вместо всех сырых замеров.
+"""
+
+import json
+import os
+import threading
+import time
+from collections import deque
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+# Уровни агрегации: имя, длина интервала и срок хранения (секунды)
+TELEMETRY_TIERS: Sequence[Tuple[str, int, int]] = (
+    ("1m", 60, 7 * 86400),
+    ("1h", 3600, 90 * 86400),
+    ("1d", 86400, 5 * 365 * 86400),
+)
+
+# Числовые ключи device.data, которые пишутся в телеметрию
+TELEMETRY_KEYS = ("temperature", "target_temperature", "brightness")
+
+# События устройств, которые считаются как замер со значением 1
+TELEMETRY_EVENTS = {"motion_detected": "motion"}
+
+
+class _Tier:
+    """Агрегаты одного уровня: закрытые интервалы и текущий открытый"""
+
+    def __init__(self, name: str, interval: int, retention: int):
+        self.name = name
+        self.interval = interval
+        self.retention = retention
+        # [начало, min, max, сумма, число]
+        self.closed: deque = deque(maxlen=max(1, retention // interval))
+        self.open: Optional[List[float]] = None
+
+    def add(self, ts: float, value: float):
+        start = ts - ts % self.interval
+        bucket = self.open
+        if bucket is not None and bucket[0] == start:
+            if value < bucket[1]:
+                bucket[1] = value
+            if value > bucket[2]:
+                bucket[2] = value
+            bucket[3] += value
+            bucket[4] += 1
+            return
+        if bucket is not None and start < bucket[0]:
+            # Запоздавший замер из уже закрытого интервала не учитывается
+            return
+        if bucket is not None:
+            self.closed.append(bucket)
+            oldest = start - self.retention
+            while self.closed and self.closed[0][0] < oldest:
+                self.closed.popleft()
+        self.open = [start, value, value, value, 1]
+
+    def points(self, start: float, end: float) -> List[Dict]:
+        buckets = list(self.closed)
+        if self.open is not None:
+            buckets.append(self.open)
+        return [
+            {"ts": b[0], "min": b[1], "max": b[2], "avg": round(b[3] / b[4], 3), "count": b[4]}
+            for b in buckets
+            if start - self.interval < b[0] <= end
+        ]
+
+    def dump(self) -> Dict:
+        return {"closed": list(self.closed), "open": self.open}
+
+    def load(self, data: Dict):
+        self.closed.extend(data.get("closed", []))
+        self.open = data.get("open")
+
+
+class Series:
+    """Ряд одной величины устройства: сырые замеры и агрегаты всех уровней"""
+
+    def __init__(self, raw_size: int, tiers: Sequence[Tuple[str, int, int]]):
+        self.raw: deque = deque(maxlen=raw_size)
+        self.tiers = [_Tier(*tier) for tier in tiers]
+        # Начало истории ряда: первый замер или (после load) начало самого старого агрегата
+        self.first_ts: Optional[float] = None
+
+    def add(self, ts: float, value: float):
+        if self.first_ts is None:
+            self.first_ts = ts
+        self.raw.append((ts, value))
+        for tier in self.tiers:
+            tier.add(ts, value)
+
+    def raw_points(self, start: float, end: float) -> List[Dict]:
+        return [{"ts": ts, "value": value} for ts, value in self.raw if start <= ts <= end]
+
+    def raw_covers(self, start: float) -> bool:
+        """Кольцо сырых замеров содержит всю историю ряда с момента start"""
+        if not self.raw:
+            return False
+        oldest = self.raw[0][0]
+        return oldest <= start or oldest <= self.first_ts
+
+
+class TelemetryStore:
+    """Хранилище телеметрии: (device_id, метрика) -> Series"""
+
+    def __init__(self, raw_size: int = 1000, tiers: Sequence[Tuple[str, int, int]] = TELEMETRY_TIERS):
+        self.raw_size = raw_size
+        self.tiers = tuple(tiers)
+        self._series: Dict[Tuple[str, str], Series] = {}
+        self._lock = threading.Lock()
+
+    def record(self, device_id: str, metric: str, value: float, ts: float = None):
+        """Добавить замер (O(число уровней))"""
+        ts = time.time() if ts is None else ts
+        with self._lock:
+            series = self._series.get((device_id, metric))
+            if series is None:
+                series = self._series[(device_id, metric)] = Series(self.raw_size, self.tiers)
+            series.add(ts, float(value))
+
+    def series(self) -> List[Dict[str, str]]:
+        with self._lock:
+            return [{"device_id": device_id, "metric": metric} for device_id, metric in self._series]
+
+    def query(self, device_id: str, metric: str, start: float = None, end: float = None,
+              resolution: str = "auto", max_points: int = 1000) -> Dict:
+        """Точки ряда за [start, end].
+
+        resolution: "raw", имя уровня ("1m", "1h", "1d") или "auto" - самый
+        подробный источник, который покрывает начало периода и дает не больше
+        max_points точек.
+        """
+        end = time.time() if end is None else end
+        start = end - 3600 if start is None else start
+        names = ["raw"] + [name for name, _, _ in self.tiers]
+        if resolution != "auto" and resolution not in names:
+            raise ValueError(f"Неизвестное разрешение {resolution}")
+        with self._lock:
+            series = self._series.get((device_id, metric))
+            if series is None:
+                return {"device_id": device_id, "metric": metric, "resolution": None, "points": []}
+            if resolution == "auto":
+                resolution = self._choose(series, start, end, max_points)
+            if resolution == "raw":
+                points = series.raw_points(start, end)
+            else:
+                points = series.tiers[names.index(resolution) - 1].points(start, end)
+        return {"device_id": device_id, "metric": metric, "resolution": resolution,
+                "points": points[-max_points:]}
+
+    def iter_points(self, resolution: str = "1m") -> Iterator[Tuple[str, str, Dict]]:
+        """(device_id, метрика, точка) всех рядов одного уровня - для выгрузки"""
+        names = ["raw"] + [name for name, _, _ in self.tiers]
+        if resolution not in names:
+            raise ValueError(f"Неизвестное разрешение {resolution}")
+        with self._lock:
+            keys = list(self._series)
+        for device_id, metric in keys:
+            # Блокировка берется на копию одного ряда, а не на всю выгрузку
+            with self._lock:
+                series = self._series[(device_id, metric)]
+                if resolution == "raw":
+                    points = series.raw_points(float("-inf"), float("inf"))
+                else:
+                    points = series.tiers[names.index(resolution) - 1].points(float("-inf"), float("inf"))
+            for point in points:
+                yield device_id, metric, point
+
+    def _choose(self, series: Series, start: float, end: float, max_points: int) -> str:
+        # Кольцо сырых замеров подходит, если покрывает начало периода
+        if series.raw_covers(start) \
+                and sum(1 for ts, _ in series.raw if start <= ts <= end) <= max_points:
+            return "raw"
+        for tier in series.tiers:
+            if (end - start) / tier.interval <= max_points and end - tier.retention <= start:
+                return tier.name
+        return series.tiers[-1].name
+
+    # ============================================================
+    #  Сохранение агрегатов (сырые замеры не сохраняются)
+    # ============================================================
+
+    def save(self, path: str):
+        with self._lock:
+            data = [
+                {"device_id": device_id, "metric": metric,
+                 "tiers": {tier.name: tier.dump() for tier in series.tiers}}
+                for (device_id, metric), series in self._series.items()
+            ]
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temp_file = path + ".tmp"
+        with open(temp_file, "w", encoding="utf-8") as f:
+            json.dump(data, f, separators=(",", ":"))
+        os.replace(temp_file, path)
+
+    def load(self, path: str) -> int:
+        """Загрузить агрегаты; вернуть число рядов"""
+        if not os.path.exists(path):
+            return 0
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return 0
+        with self._lock:
+            for item in data:
+                series = Series(self.raw_size, self.tiers)
+                for tier in series.tiers:
+                    tier.load(item["tiers"].get(tier.name, {}))
+                starts = [tier.closed[0][0] for tier in series.tiers if tier.closed]
+                starts += [tier.open[0] for tier in series.tiers if tier.open]
+                series.first_ts = min(starts) if starts else None
+                self._series[(item["device_id"], item["metric"])] = series
+        return len(data)
+
+
+class TelemetrySampler:
+    """Снимает замеры с устройств, изменившихся с прошлого вызова sample()"""
+
+    def __init__(self, device_manager, store: TelemetryStore):
+        self.device_manager = device_manager
+        self.store = store
+        self._cursor = 0
+
+    def attach(self):
+        """Подписаться на события устройств (движение и т.п. - TELEMETRY_EVENTS)"""
+        self.device_manager.add_event_listener(self.handle_device_event)
+
+    def handle_device_event(self, event: Dict):
+        metric = TELEMETRY_EVENTS.get(event.get("event_type"))
+        if metric is not None:
+            self.store.record(event["device_id"], metric, 1)
+
+    def sample(self, now: float = None) -> int:
+        """Записать числовые данные изменившихся устройств; вернуть число замеров"""
+        now = time.time() if now is None else now
+        self._cursor, changed = self.device_manager.get_changed_device_ids(self._cursor)
+        recorded = 0
+        for device_id in changed:
+            device = self.device_manager.get_device(device_id)
+            if device is None:
+                continue
+            data = getattr(device, "data", {})
+            for key in TELEMETRY_KEYS:
+                value = data.get(key)
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    self.store.record(device_id, key, value, now)
+                    recorded += 1
+        return recorded
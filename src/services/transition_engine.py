@@ -0,0 +1,332 @@
+"""
+Плавные переходы (яркость ламп, целевая температура термостатов)
+"""
+
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+from services import metrics
+
+
+class TransitionError(ValueError):
+    """Переход невозможен (нет устройства, атрибута или значение вне диапазона)"""
+
+
+# Атрибут перехода -> ключ в device.data, допустимый диапазон и округление.
+# Диапазон задается числами или именами полей device.metadata
+TRANSITION_ATTRIBUTES: Dict[str, Dict] = {
+    "brightness": {"key": "brightness", "min": 0, "max": 100, "digits": 0},
+    "temperature": {"key": "target_temperature", "min": "min_temperature",
+                    "max": "max_temperature", "digits": 1},
+}
+
+
+def _linear(x: float) -> float:
+    return x
+
+
+def _ease_in_out(x: float) -> float:
+    return x * x * (3 - 2 * x)
+
+
+EASINGS: Dict[str, Callable[[float], float]] = {
+    "linear": _linear,
+    "ease_in_out": _ease_in_out,
+}
+
+
+class Transition:
+    """Переход атрибута устройства от start к target за duration секунд"""
+
+    RUNNING = "running"
+    COMPLETED = "completed"
+    CANCELLED = "cancelled"
+
+    def __init__(self, device_id: str, attribute: str, start: float, target: float,
+                 duration: float, easing: str, started_at: float, digits: int):
+        self.device_id = device_id
+        self.attribute = attribute
+        self.start = start
+        self.target = target
+        self.duration = duration
+        self.easing = easing
+        self.started_at = started_at
+        self.digits = digits
+        self.status = self.RUNNING
+        self.value = self._round(start)
+        self.last_event_at = started_at
+        self._done = threading.Event()
+        self._callbacks: List[Callable[["Transition"], None]] = []
+        self._callbacks_lock = threading.Lock()
+
+    def _round(self, value: float):
+        return int(round(value)) if self.digits == 0 else round(value, self.digits)
+
+    def progress(self, now: float) -> float:
+        if self.duration <= 0:
+            return 1.0
+        return min(1.0, max(0.0, (now - self.started_at) / self.duration))
+
+    def value_at(self, now: float):
+        fraction = EASINGS[self.easing](self.progress(now))
+        return self._round(self.start + (self.target - self.start) * fraction)
+
+    @property
+    def done(self) -> bool:
+        return self._done.is_set()
+
+    def wait(self, timeout: float = None) -> bool:
+        return self._done.wait(timeout)
+
+    def add_done_callback(self, callback: Callable[["Transition"], None]):
+        """Вызвать callback(transition) по завершении или отмене"""
+        with self._callbacks_lock:
+            if not self.done:
+                self._callbacks.append(callback)
+                return
+        callback(self)
+
+    def _finish(self, status: str):
+        with self._callbacks_lock:
+            if self.done:
+                return []
+            self.status = status
+            self._done.set()
+            callbacks, self._callbacks = self._callbacks, []
+        return callbacks
+
+    def to_dict(self) -> Dict:
+        return {
+            "device_id": self.device_id,
+            "attribute": self.attribute,
+            "from": self.start,
+            "to": self.target,
+            "duration": self.duration,
+            "easing": self.easing,
+            "value": self.value,
+            "status": self.status,
+        }
+
+
+class TransitionEngine:
+    """Один планировщик продвигает все активные переходы с частотой fps.
+
+    Кадр меняет только device.data и версию устройства (GUI и API видят
+    новое значение через журнал изменений) - без команды, лога и сохранения.
+    Команда устройству (on/off/toggle) отменяет его переходы, set_<атрибут> -
+    переход этого атрибута: новое значение не перезаписывается следующим кадром.
+    События устройства: transition_started, transition_progress не чаще
+    event_interval секунд на переход и transition_finished. Состояние
+    сохраняется один раз за кадр, в котором завершились переходы.
+    """
+
+    def __init__(self, device_manager, fps: float = 10.0, event_interval: float = 1.0,
+                 clock: Callable[[], float] = time.monotonic, autostart: bool = True):
+        self.device_manager = device_manager
+        self.fps = fps
+        self.event_interval = event_interval
+        self.clock = clock
+        self.autostart = autostart
+        self.frames = 0
+        self._active: Dict[tuple, Transition] = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+        add_listener = getattr(device_manager, "add_command_listener", None)
+        if add_listener is not None:
+            add_listener(self._on_command)
+
+    # ============================================================
+    #  Управление переходами
+    # ============================================================
+
+    def start(self, device_id: str, attribute: str, target: float, duration: float,
+              start: float = None, easing: str = "linear") -> Transition:
+        """Начать переход; идущий переход того же атрибута отменяется"""
+        device = self.device_manager.get_device(device_id, activate=True)
+        if device is None:
+            raise TransitionError(f"Устройство {device_id} не найдено")
+        spec = TRANSITION_ATTRIBUTES.get(attribute)
+        if spec is None or spec["key"] not in getattr(device, "data", {}):
+            raise TransitionError(f"Устройство {device_id} не поддерживает переход {attribute}")
+        if easing not in EASINGS:
+            raise TransitionError(f"Неизвестная функция сглаживания {easing}")
+        if duration < 0:
+            raise TransitionError("Длительность перехода не может быть отрицательной")
+        low, high = self._bounds(device, spec)
+        start = float(device.data[spec["key"]] if start is None else start)
+        target = float(target)
+        for value in (start, target):
+            if not low <= value <= high:
+                raise TransitionError(f"{attribute}: значение {value} вне диапазона {low}..{high}")
+
+        transition = Transition(device_id, attribute, start, target, duration, easing,
+                                self.clock(), spec["digits"])
+        with self._lock:
+            if self._closed:
+                raise TransitionError("Планировщик переходов остановлен")
+            previous = self._active.pop((device_id, attribute), None)
+            self._active[(device_id, attribute)] = transition
+        if previous is not None:
+            self._run_callbacks(previous, previous._finish(Transition.CANCELLED))
+
+        def apply_start(device) -> bool:
+            # Лампа при нарастании яркости включается в начале перехода
+            if attribute == "brightness" and target > 0 and device.state != "on":
+                device.turn_on()
+            device.data[spec["key"]] = transition.value
+            device.emit_event("transition_started", transition.to_dict())
+            return True
+
+        self.device_manager.update_device(device_id, apply_start)
+        self.device_manager.logging_service.info(
+            "DEVICE", f"Плавный переход {device.name}: {attribute} {transition.value} → "
+                      f"{transition._round(target)} за {duration:g} с")
+        self._ensure_thread()
+        return transition
+
+    def cancel(self, device_id: str, attribute: str = None) -> int:
+        """Остановить переходы устройства на текущем значении"""
+        with self._lock:
+            keys = [key for key in self._active
+                    if key[0] == device_id and (attribute is None or key[1] == attribute)]
+            cancelled = [self._active.pop(key) for key in keys]
+        for transition in cancelled:
+            self._run_callbacks(transition, transition._finish(Transition.CANCELLED))
+        return len(cancelled)
+
+    def cancel_transition(self, transition: Transition) -> bool:
+        """Отменить именно этот переход (если его еще не заменили другим)"""
+        key = (transition.device_id, transition.attribute)
+        with self._lock:
+            if self._active.get(key) is not transition:
+                return False
+            del self._active[key]
+        self._run_callbacks(transition, transition._finish(Transition.CANCELLED))
+        return True
+
+    def _on_command(self, device_id: str, action: str):
+        """Команда устройству важнее идущего перехода"""
+        command = action.split(":", 1)[0]
+        attribute = command[len("set_"):] if command.startswith("set_") else None
+        if attribute is not None and attribute not in TRANSITION_ATTRIBUTES:
+            # Команда не меняет атрибутов переходов
+            return
+        if self._active:
+            self.cancel(device_id, attribute)
+
+    def active(self) -> List[Transition]:
+        with self._lock:
+            return list(self._active.values())
+
+    def shutdown(self):
+        """Остановить планировщик; незавершенные переходы отменяются"""
+        with self._lock:
+            self._closed = True
+            cancelled = list(self._active.values())
+            self._active.clear()
+        self._wakeup.set()
+        for transition in cancelled:
+            self._run_callbacks(transition, transition._finish(Transition.CANCELLED))
+        if self._thread is not None:
+            self._thread.join()
+
+    # ============================================================
+    #  Кадры
+    # ============================================================
+
+    def tick(self, now: float = None) -> int:
+        """Один кадр: продвинуть все переходы, вернуть число активных после кадра"""
+        now = self.clock() if now is None else now
+        measured = time.perf_counter() if metrics.registry.enabled else None
+        with self._lock:
+            transitions = list(self._active.values())
+        by_device: Dict[str, List[Transition]] = {}
+        for transition in transitions:
+            by_device.setdefault(transition.device_id, []).append(transition)
+
+        finished = []
+        for device_id, device_transitions in by_device.items():
+            device = self.device_manager.get_device(device_id)
+            if device is None:
+                finished.extend((t, Transition.CANCELLED) for t in device_transitions)
+                continue
+            with device.lock:
+                for transition in device_transitions:
+                    if transition.done:
+                        continue
+                    transition.value = transition.value_at(now)
+                    device.data[TRANSITION_ATTRIBUTES[transition.attribute]["key"]] = transition.value
+                    if transition.progress(now) >= 1.0:
+                        finished.append((transition, Transition.COMPLETED))
+                        device.emit_event("transition_finished", dict(transition.to_dict(), status="completed"))
+                    elif now - transition.last_event_at >= self.event_interval:
+                        transition.last_event_at = now
+                        device.emit_event("transition_progress", dict(
+                            transition.to_dict(), progress=round(transition.progress(now), 3)))
+                # Один рост версии на устройство за кадр
+                device._touch()
+
+        if finished:
+            with self._lock:
+                for transition, _ in finished:
+                    key = (transition.device_id, transition.attribute)
+                    if self._active.get(key) is transition:
+                        del self._active[key]
+            self.device_manager.save_state()
+            for transition, status in finished:
+                self._run_callbacks(transition, transition._finish(status))
+
+        self.frames += 1
+        if measured is not None:
+            metrics.registry.histogram(
+                "smart_home_transition_frame_seconds", "Длительность кадра плавных переходов"
+            ).observe(time.perf_counter() - measured)
+        with self._lock:
+            return len(self._active)
+
+    # ============================================================
+    #  Внутреннее
+    # ============================================================
+
+    @staticmethod
+    def _bounds(device, spec: Dict):
+        def resolve(bound):
+            return float(device.metadata.get(bound, 0) if isinstance(bound, str) else bound)
+        return resolve(spec["min"]), resolve(spec["max"])
+
+    def _ensure_thread(self):
+        if not self.autostart:
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._wakeup.clear()
+                self._thread = threading.Thread(target=self._run, name="transitions", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        """Кадры идут, пока есть активные переходы; затем поток завершается"""
+        interval = 1.0 / self.fps
+        while not self._closed:
+            started = time.monotonic()
+            try:
+                remaining = self.tick()
+            except Exception as e:
+                print(f"❌ Ошибка кадра плавных переходов: {e}")
+                remaining = len(self._active)
+            if not remaining:
+                with self._lock:
+                    if not self._active:
+                        self._thread = None
+                        return
+            self._wakeup.wait(max(0.0, interval - (time.monotonic() - started)))
+
+    @staticmethod
+    def _run_callbacks(transition: Transition, callbacks):
+        for callback in callbacks:
+            try:
+                callback(transition)
+            except Exception as e:
+                print(f"❌ Ошибка обработчика перехода {transition.device_id}: {e}")
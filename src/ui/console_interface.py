@@ -5,6 +5,9 @@ from datetime import datetime
 class ConsoleInterface:
     def __init__(self, home_controller):
         self.controller = home_controller
+        # Кэш статусов устройств, обновляемый по журналу изменений
+        self._status_cache = {}
+        self._status_seq = 0
         
     def display_main_menu(self):
         """Главное меню управления"""
@@ -32,8 +35,7 @@ class ConsoleInterface:
         print(f"\n🏠 {self.controller.settings.SYSTEM_NAME} v{self.controller.settings.VERSION}")
         print("=" * 60)
         
-        # ИСПРАВЛЕНИЕ: используем device_manager вместо devices
-        devices_status = self.controller.device_manager.get_all_devices_status()
+        devices_status = self._poll_devices_status()
         online_count = sum(1 for status in devices_status.values() if status.get("online"))
         on_count = sum(1 for status in devices_status.values() if status.get("state") == "on")
         
@@ -52,6 +54,8 @@ class ConsoleInterface:
         # ИСПРАВЛЕНИЕ: используем device_manager
         for device_id, status in devices_status.items():
             device = self.controller.device_manager.get_device(device_id)
+            if device is None:
+                continue
             
             # Иконки состояний
             state_icon = "💡" if status["state"] == "on" else "⚫"
@@ -59,17 +63,29 @@ class ConsoleInterface:
             
             # Дополнительная информация
             extra_info = ""
-            if device_id == "thermostat" and status["state"] == "on":
+            device_type = self.controller.device_manager.get_device_type(device_id)
+            if device_type in ("thermostat", "conditioner") and status["state"] == "on":
                 extra_info = f" | 🌡️ {getattr(device, 'temperature', 'N/A')}°C"
-            elif device_id == "lamp_living_room" and status["state"] == "on":
+            elif device_type == "light" and status["state"] == "on":
                 extra_info = f" | 💡 {getattr(device, 'brightness', 'N/A')}%"
-            elif device_id == "security_camera" and status["state"] == "on":
+            elif device_type == "security_camera" and status["state"] == "on":
                 recording_status = "🔴 Запись" if getattr(device, 'recording', False) else "⏸️ Пауза"
                 extra_info = f" | {recording_status}"
             
             state_text = "ВКЛ" if status["state"] == "on" else "ВЫКЛ"
             print(f"{online_icon} {state_icon} {device.name}: {state_text}{extra_info}")
     
+    def _poll_devices_status(self):
+        """Обновить кэш статусов только для изменившихся устройств"""
+        self._status_seq, changed = self.controller.device_manager.get_changes_since(self._status_seq)
+        for device_id, status in changed.items():
+            if status is None:
+                # Устройство удалено (перезагрузка инвентаря)
+                self._status_cache.pop(device_id, None)
+            else:
+                self._status_cache[device_id] = status
+        return self._status_cache
+
     def _handle_menu_choice(self, choice):
         """Обработка выбора в меню"""
         menu_actions = {
@@ -89,16 +105,35 @@ class ConsoleInterface:
         else:
             input("❌ Неверный выбор! Нажмите Enter...")
     
+    def _select_device(self, device_types):
+        """Устройство меню по группе "type" (имена типов инвентаря); из нескольких выбирает пользователь"""
+        manager = self.controller.device_manager
+        device_ids = [device_id for device_type in device_types
+                      for device_id in manager.find_devices(device_type=device_type)]
+        if not device_ids:
+            print("❌ Устройство не найдено!")
+            return None
+        if len(device_ids) == 1:
+            return device_ids[0]
+        for number, device_id in enumerate(device_ids, 1):
+            device = manager.get_device(device_id)
+            print(f"{number}. {device.name if device else device_id}")
+        choice = input("\nВыберите устройство: ").strip()
+        if not choice.isdigit() or not 1 <= int(choice) <= len(device_ids):
+            input("❌ Неверный выбор! Нажмите Enter...")
+            return None
+        return device_ids[int(choice) - 1]
+
     def _manage_lighting(self):
         """Управление освещением"""
-        device = self.controller.device_manager.get_device("lamp_living_room")
-        if not device:
-            print("❌ Устройство не найдено!")
+        device_id = self._select_device(("light",))
+        if device_id is None:
             return
+        device = self.controller.device_manager.get_device(device_id)
             
         while True:
             os.system('clear')
-            status = self.controller.device_manager.get_device_status("lamp_living_room")
+            status = self.controller.device_manager.get_device_status(device_id)
             
             print(f"💡 УПРАВЛЕНИЕ ОСВЕЩЕНИЕМ")
             print("=" * 50)
@@ -115,13 +150,13 @@ class ConsoleInterface:
             sub_choice = input("\nВыберите действие: ").strip()
             
             if sub_choice == "1":
-                success = self.controller.device_manager.send_command("lamp_living_room", "toggle")
+                success = self.controller.device_manager.send_command(device_id, "toggle")
                 action = "переключен"
             elif sub_choice == "2":
-                success = self.controller.device_manager.send_command("lamp_living_room", "on")
+                success = self.controller.device_manager.send_command(device_id, "on")
                 action = "включен"
             elif sub_choice == "3":
-                success = self.controller.device_manager.send_command("lamp_living_room", "off")
+                success = self.controller.device_manager.send_command(device_id, "off")
                 action = "выключен"
             elif sub_choice == "4":
                 break
@@ -138,14 +173,14 @@ class ConsoleInterface:
     
     def _manage_climate(self):
         """Управление климатом"""
-        device = self.controller.device_manager.get_device("thermostat")
-        if not device:
-            print("❌ Устройство не найдено!")
+        device_id = self._select_device(("thermostat", "conditioner"))
+        if device_id is None:
             return
+        device = self.controller.device_manager.get_device(device_id)
             
         while True:
             os.system('clear')
-            status = self.controller.device_manager.get_device_status("thermostat")
+            status = self.controller.device_manager.get_device_status(device_id)
             
             print(f"🌡️ УПРАВЛЕНИЕ КЛИМАТОМ")
             print("=" * 50)
@@ -162,13 +197,13 @@ class ConsoleInterface:
             sub_choice = input("\nВыберите действие: ").strip()
             
             if sub_choice == "1":
-                success = self.controller.device_manager.send_command("thermostat", "toggle")
+                success = self.controller.device_manager.send_command(device_id, "toggle")
                 action = "переключен"
             elif sub_choice == "2":
-                success = self.controller.device_manager.send_command("thermostat", "on")
+                success = self.controller.device_manager.send_command(device_id, "on")
                 action = "включен"
             elif sub_choice == "3":
-                success = self.controller.device_manager.send_command("thermostat", "off")
+                success = self.controller.device_manager.send_command(device_id, "off")
                 action = "выключен"
             elif sub_choice == "4":
                 break
@@ -185,14 +220,14 @@ class ConsoleInterface:
     
     def _manage_security(self):
         """Управление безопасностью"""
-        device = self.controller.device_manager.get_device("security_camera")
-        if not device:
-            print("❌ Устройство не найдено!")
+        device_id = self._select_device(("security_camera",))
+        if device_id is None:
             return
+        device = self.controller.device_manager.get_device(device_id)
             
         while True:
             os.system('clear')
-            status = self.controller.device_manager.get_device_status("security_camera")
+            status = self.controller.device_manager.get_device_status(device_id)
             
             print(f"📹 УПРАВЛЕНИЕ БЕЗОПАСНОСТЬЮ")
             print("=" * 50)
@@ -209,13 +244,13 @@ class ConsoleInterface:
             sub_choice = input("\nВыберите действие: ").strip()
             
             if sub_choice == "1":
-                success = self.controller.device_manager.send_command("security_camera", "toggle")
+                success = self.controller.device_manager.send_command(device_id, "toggle")
                 action = "переключена"
             elif sub_choice == "2":
-                success = self.controller.device_manager.send_command("security_camera", "on")
+                success = self.controller.device_manager.send_command(device_id, "on")
                 action = "включена"
             elif sub_choice == "3":
-                success = self.controller.device_manager.send_command("security_camera", "off")
+                success = self.controller.device_manager.send_command(device_id, "off")
                 action = "выключена"
             elif sub_choice == "4":
                 break
@@ -252,9 +287,9 @@ class ConsoleInterface:
         
         # Уведомления
         if hasattr(self.controller, 'notification_service'):
-            notifications = self.controller.notification_service.notifications
-            unread_count = len([n for n in notifications if not n['read']])
-            print(f"\n🔔 УВЕДОМЛЕНИЯ: {unread_count} непрочитанных из {len(notifications)}")
+            unread_count = self.controller.notification_service.unread_count()
+            total_count = self.controller.notification_service.total_count()
+            print(f"\n🔔 УВЕДОМЛЕНИЯ: {unread_count} непрочитанных из {total_count}")
         
         input("\nНажмите Enter для возврата в меню...")
     
@@ -272,7 +307,8 @@ class ConsoleInterface:
         
         print("🔔 УВЕДОМЛЕНИЯ СИСТЕМЫ")
         print("=" * 60)
-        print(f"Всего: {len(notifications)} | Непрочитанных: {len(unread_notifications)}")
+        total_count = self.controller.notification_service.total_count()
+        print(f"Всего: {total_count} | Непрочитанных: {len(unread_notifications)}")
         print("-" * 60)
         
         if not notifications:
@@ -306,7 +342,7 @@ class ConsoleInterface:
             time.sleep(1)
         
         elif choice == "2":
-            self.controller.notification_service.notifications = []
+            self.controller.notification_service.clear_notifications()
             print("✅ Все уведомления очищены")
             time.sleep(1)
     
@@ -320,9 +356,28 @@ class ConsoleInterface:
         print(f"Интервал обновления: {self.controller.settings.DEVICE_UPDATE_INTERVAL} сек")
         print(f"Хранение логов: {self.controller.settings.LOG_RETENTION_DAYS} дней")
         
-        print("\n1. ↩️ Назад")
+        profiler = self.controller.profiler
+        if profiler.is_running:
+            print(f"Профилирование: идет сбор, выборок {profiler.samples}")
+        else:
+            print(f"Профилирование: выключено (последний профиль: {profiler.last_file or '-'})")
+        
+        print("\n1. 🔬 " + ("Остановить профилирование" if profiler.is_running else "Начать профилирование"))
+        print("2. ↩️ Назад")
         
-        input("\nНажмите Enter для возврата...")
+        choice = input("\nВыберите действие: ").strip()
+        
+        if choice == "1":
+            if profiler.is_running:
+                path = profiler.stop()
+                print(f"✅ Профиль сохранен: {path}")
+                for item in profiler.top(5):
+                    print(f"   {item['share']:6.1%}  {item['frame']}")
+                input("\nНажмите Enter для возврата...")
+            else:
+                profiler.start()
+                print("✅ Профилирование запущено")
+                time.sleep(1)
     
     def _run_demo_scenario(self):
         """Запуск демонстрационного сценария"""
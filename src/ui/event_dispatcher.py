@@ -0,0 +1,83 @@
+"""
+Доставка событий из фоновых потоков в поток Tkinter
+"""
+
+import queue
+import time
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+from services import metrics
+
+
+class UiEventDispatcher:
+    """Потокобезопасная очередь событий, разбираемая в потоке GUI через after()
+
+    Любой поток может вызвать post(); обработчики вызываются только из
+    _drain(), который планируется через schedule (обычно root.after).
+    События одного вида для одной сущности склеиваются: за один цикл
+    обработчик получает только последнее значение.
+    """
+
+    def __init__(self, schedule: Callable, drain_interval: int = 100, max_batch: int = 1000):
+        self._schedule = schedule              # root.after(ms, callback)
+        self.drain_interval = drain_interval   # мс между разборами очереди
+        self.max_batch = max_batch             # максимум событий за один разбор
+        self._queue: "queue.SimpleQueue[Tuple[str, Hashable, Any]]" = queue.SimpleQueue()
+        self._handlers: Dict[str, Callable[[Hashable, Any], None]] = {}
+        self._running = False
+
+    def on(self, kind: str, handler: Callable[[Hashable, Any], None]):
+        """Зарегистрировать обработчик для вида событий"""
+        self._handlers[kind] = handler
+
+    def post(self, kind: str, key: Hashable = None, payload: Any = None):
+        """Поставить событие в очередь (можно вызывать из любого потока)"""
+        self._queue.put((kind, key, payload))
+
+    def start(self):
+        """Запустить периодический разбор очереди"""
+        if not self._running:
+            self._running = True
+            self._schedule(self.drain_interval, self._drain)
+
+    def stop(self):
+        """Остановить разбор очереди"""
+        self._running = False
+
+    def drain(self) -> int:
+        """Разобрать накопленные события, вернуть число вызванных обработчиков"""
+        pending: Dict[Tuple[str, Hashable], Any] = {}
+        for _ in range(self.max_batch):
+            try:
+                kind, key, payload = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            # dict сохраняет порядок первого появления, значение - последнее
+            pending[(kind, key)] = payload
+
+        for (kind, key), payload in pending.items():
+            handler = self._handlers.get(kind)
+            if handler is None:
+                continue
+            try:
+                handler(key, payload)
+            except Exception as e:
+                print(f"❌ Ошибка обработки события GUI {kind}: {e}")
+
+        return len(pending)
+
+    def _drain(self):
+        if not self._running:
+            return
+        if metrics.registry.enabled:
+            start = time.perf_counter()
+            handled = self.drain()
+            if handled:
+                metrics.registry.histogram(
+                    "smart_home_gui_refresh_seconds", "Длительность цикла обновления GUI",
+                    {"cycle": "events"}).observe(time.perf_counter() - start)
+                metrics.registry.counter(
+                    "smart_home_gui_events_total", "События, обработанные в потоке GUI").inc(handled)
+        else:
+            self.drain()
+        self._schedule(self.drain_interval, self._drain)
@@ -5,9 +5,9 @@
 
 import tkinter as tk
 from tkinter import ttk, messagebox, scrolledtext
-import threading
 import time
 from datetime import datetime
+from collections import OrderedDict
 import sys
 import os
 
@@ -17,26 +17,43 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from core.home_controller import HomeController
 from services.logging_service import LoggingService
 from services.event_bus import EventBus
+from services import metrics
+from services.scene_engine import SceneError
+from ui.event_dispatcher import UiEventDispatcher
+from ui.widgets.tree_reconciler import TreeReconciler
+from ui.widgets.paginator import Paginator
 
 
 class SmartHomeGUI:
     """Графический интерфейс системы Умный Дом"""
     
-    def __init__(self, root, controller):
+    def __init__(self, root, controller=None):
         self.root = root
         self.root.title("🏠 Умный Дом - Система управления")
         self.root.geometry("1200x700")
         self.root.configure(bg='#2c3e50')
 
-        self.root = root
+        # Используем переданный (уже запущенный) контроллер,
+        # собственный создаем только при автономном запуске GUI
+        if controller is None:
+            controller = HomeController()
+            controller.start_system()
         self.controller = controller
         
-        # Инициализация контроллера
-        self.controller = HomeController()
-        self.controller.start_system()
+        # Основное обновление - по событиям; периодический опрос только
+        # страхует от пропущенных событий
+        self.update_interval = 30000  # 30 секунд
+        
+        # Последние известные состояния устройств для статистики
+        self._device_state_cache = {}
+        self._last_active_count = None
+        self._devices_seq = 0  # курсор журнала изменений DeviceManager
         
-        # Переменные для обновления интерфейса
-        self.update_interval = 3000  # 5 секунды
+        # Очередь событий из фоновых потоков в поток Tkinter
+        self.ui_events = UiEventDispatcher(self.root.after)
+        self.ui_events.on("device", self._on_device_event)
+        self.ui_events.on("notification", self._on_notification_event)
+        self.ui_events.on("scene", self._on_scene_finished)
         
         # Стили
         self.setup_styles()
@@ -54,6 +71,12 @@ class SmartHomeGUI:
             EventBus.DEVICE_STATE_CHANGED,
             self.on_device_state_changed
         )
+        self.controller.event_bus.subscribe(
+            EventBus.NOTIFICATION_CREATED,
+            self.on_notification_created
+        )
+        self.controller.device_manager.add_event_listener(self.on_device_event)
+        self.ui_events.start()
 
         self.test_schedule_service()
     
@@ -108,13 +131,65 @@ class SmartHomeGUI:
 
         self.create_info_panels(info_frame)
 
+    # ============================================================
+    #  События из фоновых потоков: только ставим в очередь GUI
+    # ============================================================
+
     def on_device_state_changed(self, data):
-        """Метод для обработки одного изменения"""
-        device_id = data['device_id']
+        """Изменение состояния устройства (EventBus, любой поток)"""
+        self.ui_events.post("device", data['device_id'])
+
+    def on_device_event(self, event):
+        """Событие устройства (emit_event, любой поток)"""
+        self.ui_events.post("device", event['device_id'])
+
+    def on_notification_created(self, notification):
+        """Новое уведомление (EventBus, любой поток)"""
+        self.ui_events.post("notification")
+
+    # ============================================================
+    #  Обработчики в потоке Tkinter: обновляем только изменившееся
+    # ============================================================
+
+    def _on_device_event(self, device_id, payload=None):
+        """Обновить карточку и статистику одного устройства"""
         device_info = self.controller.device_manager.get_device_status(device_id)
+        if not device_info:
+            if self._remove_device_card(device_id):
+                self._update_stats_labels()
+            return
         
         if device_id in self.device_frames:
             self.device_frames[device_id].update_state(device_info)
+        else:
+            self.device_frames[device_id] = self.create_device_card(device_id, device_info)
+        
+        self._device_state_cache[device_id] = {
+            "state": device_info.get("state"),
+            "online": device_info.get("online", True)
+        }
+        self._update_stats_labels()
+
+    def _remove_device_card(self, device_id) -> bool:
+        """Убрать карточку удаленного устройства"""
+        self._device_state_cache.pop(device_id, None)
+        frame = self.device_frames.pop(device_id, None)
+        if frame is None:
+            return False
+        frame.destroy()
+        return True
+
+    def _on_notification_event(self, key=None, payload=None):
+        """Дочитать новые уведомления по курсору"""
+        self.refresh_notifications()
+
+    def _on_scene_finished(self, run_id, payload):
+        """Сообщить о завершении сцены (в потоке GUI)"""
+        run, title, message = payload
+        if run.status == run.COMPLETED:
+            messagebox.showinfo(title, message)
+        else:
+            messagebox.showwarning(title, f"Сцена {run.scene.name} прервана ({run.status})")
     
     def create_device_controls(self, parent):
         """Создание панели управления устройствами"""
@@ -238,6 +313,18 @@ class SmartHomeGUI:
         # Привязка двойного клика для редактирования
         self.schedule_tree.bind("<Double-1>", self.edit_schedule_task)
         
+        # Постраничный просмотр больших расписаний
+        paging_frame = ttk.Frame(parent)
+        paging_frame.pack(fill=tk.X, padx=5)
+        ttk.Button(paging_frame, text="◀", command=self.schedule_prev_page).pack(side=tk.LEFT, padx=5)
+        self.schedule_page_label = ttk.Label(paging_frame, text="")
+        self.schedule_page_label.pack(side=tk.LEFT, padx=5)
+        ttk.Button(paging_frame, text="▶", command=self.schedule_next_page).pack(side=tk.LEFT, padx=5)
+        
+        # Строки таблицы обновляются по ключу (время, индекс)
+        self.schedule_reconciler = TreeReconciler(self.schedule_tree)
+        self.schedule_paginator = Paginator(page_size=200)
+        
         # Обновляем список задач
         self.refresh_schedule()
 
@@ -248,32 +335,13 @@ class SmartHomeGUI:
             messagebox.showwarning("Внимание", "Выберите задачу для редактирования!")
             return
         
-        # Получаем данные выбранной задачи
-        item = self.schedule_tree.item(selection[0])
-        item_values = item['values']
-        
-        # Получаем индекс задачи из скрытой колонки
-        if len(item_values) >= 7:  # Проверяем наличие индекса
-            task_index = item_values[6]  # Индекс в скрытой колонке
-            
-            # Получаем все задачи
-            if hasattr(self.controller, 'schedule_service'):
-                tasks = self.controller.schedule_service.get_all_tasks()
-                
-                # Находим задачу по индексу
-                task_to_edit = None
-                for task in tasks:
-                    if task.get("index") == task_index:
-                        task_to_edit = task
-                        break
-                
-                if task_to_edit:
-                    # Открываем диалог редактирования
-                    self.open_edit_task_dialog(task_to_edit)
-                else:
-                    messagebox.showerror("Ошибка", "Не удалось найти задачу для редактирования")
+        # Задача определяется по ключу строки (время, индекс)
+        task_to_edit = self._selected_schedule_task()
+        if task_to_edit:
+            # Открываем диалог редактирования
+            self.open_edit_task_dialog(task_to_edit)
         else:
-            messagebox.showerror("Ошибка", "Не удалось получить информацию о задаче")
+            messagebox.showerror("Ошибка", "Не удалось найти задачу для редактирования")
 
     def open_edit_task_dialog(self, task):
         """Открыть диалог редактирования задачи"""
@@ -683,64 +751,95 @@ class SmartHomeGUI:
             return False
 
     def refresh_schedule(self):
-        """Обновить отображение расписания"""
-        # Очищаем текущий список
-        for item in self.schedule_tree.get_children():
-            self.schedule_tree.delete(item)
+        """Обновить отображение расписания (меняются только изменившиеся строки)"""
+        if not hasattr(self.controller, 'schedule_service'):
+            return
         
         # Получаем все задачи
-        if hasattr(self.controller, 'schedule_service'):
-            tasks = self.controller.schedule_service.get_all_tasks()
-            device_names = self.controller.schedule_service.get_device_names()
+        tasks = self.controller.schedule_service.get_all_tasks()
+        device_names = self.controller.schedule_service.get_device_names()
+        
+        # В таблицу попадает только текущая страница
+        page_tasks = self.schedule_paginator.page_slice(tasks)
+        self.schedule_page_label.config(text=self.schedule_paginator.label())
+        
+        self.schedule_reconciler.reconcile(
+            ((task["time"], task["index"]), self._schedule_row_values(task, device_names))
+            for task in page_tasks
+        )
+
+    def _schedule_row_values(self, task, device_names):
+        """Значения строки таблицы расписания"""
+        time_str = task["time"]
+        device_name = device_names.get(task["device_id"], task["device_id"])
+        action = task["action"]
+        days = self.controller.schedule_service.get_day_names(task["days"])
+        status = "✅ Вкл" if task["enabled"] else "❌ Выкл"
+        added = task["added"][:16]  # Обрезаем секунды
+        
+        # Определяем иконку и текст действия
+        action_text = action
+        if ":" in action:
+            parts = action.split(":", 1)
+            command = parts[0]
+            value = parts[1]
             
-            for task in tasks:
-                time_str = task["time"]
-                device_name = device_names.get(task["device_id"], task["device_id"])
-                action = task["action"]
-                days = self.controller.schedule_service.get_day_names(task["days"])
-                status = "✅ Вкл" if task["enabled"] else "❌ Выкл"
-                added = task["added"][:16]  # Обрезаем секунды
-                
-                # Определяем иконку и текст действия
-                action_text = action
-                if ":" in action:
-                    parts = action.split(":", 1)
-                    command = parts[0]
-                    value = parts[1]
-                    
-                    if command == "set_temperature":
-                        action_text = f"🌡️ {value}°C"
-                    elif command == "on_and_set_temperature":
-                        action_text = f"🟢 + 🌡️ {value}°C"
-                    elif command == "set_brightness":
-                        action_text = f"💡 {value}%"
-                    elif command == "on_and_set_brightness":
-                        action_text = f"🟢 + 💡 {value}%"
-                    else:
-                        action_icon = {
-                            "on": "🟢",
-                            "off": "⚫",
-                            "toggle": "🔄"
-                        }.get(command, "⚡")
-                        action_text = f"{action_icon} {command}"
-                else:
-                    action_icon = {
-                        "on": "🟢",
-                        "off": "⚫",
-                        "toggle": "🔄"
-                    }.get(action, "⚡")
-                    action_text = f"{action_icon} {action}"
-                
-                # Вставляем в таблицу
-                self.schedule_tree.insert("", tk.END, values=(
-                    time_str,
-                    f"{device_name}",
-                    action_text,
-                    days,
-                    status,
-                    added,
-                    task.get("index") 
-                ))
+            if command == "set_temperature":
+                action_text = f"🌡️ {value}°C"
+            elif command == "on_and_set_temperature":
+                action_text = f"🟢 + 🌡️ {value}°C"
+            elif command == "set_brightness":
+                action_text = f"💡 {value}%"
+            elif command == "on_and_set_brightness":
+                action_text = f"🟢 + 💡 {value}%"
+            else:
+                action_icon = {
+                    "on": "🟢",
+                    "off": "⚫",
+                    "toggle": "🔄"
+                }.get(command, "⚡")
+                action_text = f"{action_icon} {command}"
+        else:
+            action_icon = {
+                "on": "🟢",
+                "off": "⚫",
+                "toggle": "🔄"
+            }.get(action, "⚡")
+            action_text = f"{action_icon} {action}"
+        
+        return (
+            time_str,
+            f"{device_name}",
+            action_text,
+            days,
+            status,
+            added,
+            task.get("index")
+        )
+
+    def schedule_next_page(self):
+        """Следующая страница расписания"""
+        if self.schedule_paginator.next():
+            self.refresh_schedule()
+
+    def schedule_prev_page(self):
+        """Предыдущая страница расписания"""
+        if self.schedule_paginator.prev():
+            self.refresh_schedule()
+
+    def _selected_schedule_task(self):
+        """Задача, выбранная в таблице расписания (по ключу строки)"""
+        selection = self.schedule_tree.selection()
+        if not selection:
+            return None
+        key = self.schedule_reconciler.key_for(selection[0])
+        if key is None:
+            return None
+        time_str, task_index = key
+        for task in self.controller.schedule_service.get_all_tasks():
+            if task["time"] == time_str and task["index"] == task_index:
+                return task
+        return None
 
     def remove_selected_task(self):
         """Удалить выбранную задачу"""
@@ -753,23 +852,8 @@ class SmartHomeGUI:
                                 "Удалить выбранную задачу?"):
             return
         
-        # Получаем данные выбранной задачи
-        item = self.schedule_tree.item(selection[0])
-        time_str = item['values'][0]
-        
-        # Находим индекс задачи
-        tasks = self.controller.schedule_service.get_all_tasks()
-        task_to_delete = None
-        
-        for task in tasks:
-            if task["time"] == time_str:
-                # Сравниваем другие поля для точного определения
-                device_names = self.controller.schedule_service.get_device_names()
-                device_name = device_names.get(task["device_id"], task["device_id"])
-                
-                if device_name in item['values'][1]:
-                    task_to_delete = task
-                    break
+        # Задача определяется по ключу строки (время, индекс)
+        task_to_delete = self._selected_schedule_task()
         
         if task_to_delete:
             self.controller.schedule_service.remove_task(
@@ -787,24 +871,14 @@ class SmartHomeGUI:
         if not selection:
             return
         
-        # Получаем данные выбранной задачи
-        item = self.schedule_tree.item(selection[0])
-        time_str = item['values'][0]
-        
-        # Находим задачу
-        tasks = self.controller.schedule_service.get_all_tasks()
-        task_to_edit = None
-        
-        for task in tasks:
-            if task["time"] == time_str:
-                device_names = self.controller.schedule_service.get_device_names()
-                device_name = device_names.get(task["device_id"], task["device_id"])
-                
-                if device_name in item['values'][1]:
-                    task_to_edit = task
-                    break
+        # Находим задачу по ключу строки (время, индекс)
+        task_to_edit = self._selected_schedule_task()
         
         if task_to_edit:
+            time_str = task_to_edit["time"]
+            device_names = self.controller.schedule_service.get_device_names()
+            device_name = device_names.get(task_to_edit["device_id"], task_to_edit["device_id"])
+            
             # Создаем диалог редактирования
             dialog = tk.Toplevel(self.root)
             dialog.title("✏️ Редактировать задачу")
@@ -957,6 +1031,21 @@ class SmartHomeGUI:
         self.notification_details.pack(fill=tk.X)
         self.notification_details.config(state=tk.DISABLED)
         
+        # Постраничный просмотр истории
+        paging_frame = ttk.Frame(parent)
+        paging_frame.pack(fill=tk.X)
+        ttk.Button(paging_frame, text="◀ Новее", command=self.show_newer_notifications).pack(side=tk.LEFT, padx=5)
+        self.notifications_page_label = ttk.Label(paging_frame, text="Последние")
+        self.notifications_page_label.pack(side=tk.LEFT, padx=5)
+        ttk.Button(paging_frame, text="Старее ▶", command=self.show_older_notifications).pack(side=tk.LEFT, padx=5)
+        
+        # Строки таблицы обновляются по id уведомления
+        self.notifications_reconciler = TreeReconciler(self.notifications_tree)
+        self._notifications_view = OrderedDict()   # id -> уведомление на экране
+        self._notification_pages = []              # стек границ страниц истории
+        self._notifications_cursor = 0             # id последнего полученного уведомления
+        self.notifications_view_limit = 200
+        
         # Привязка события выбора
         self.notifications_tree.bind("<<TreeviewSelect>>", self.on_notification_select)
     
@@ -1068,6 +1157,9 @@ class SmartHomeGUI:
         # Сохраняем ID устройства для кнопок
         card_frame.device_id = device_id
         card_frame.device_type = device_info['type']
+        # Вид карточки - по типу устройства в реестре/инвентаре (как группа "type"), а не по ID
+        card_type = self.controller.device_manager.get_device_type(device_id)
+        sensor_types = ("smoke_sensor", "water_leak_sensor")
         
         # ========================================================
         # 3. ФУНКЦИЯ ОБНОВЛЕНИЯ СОСТОЯНИЯ
@@ -1076,7 +1168,7 @@ class SmartHomeGUI:
         def update_state(new_info):
             """Обновить все элементы состояния устройства"""
             # Определяем текущее состояние
-            if new_info['type'] in ['smoke', 'water']:
+            if card_type in sensor_types:
                 is_active = new_info['data'].get('enabled', False)
                 triggered = new_info['data'].get('triggered', False)
             else:
@@ -1100,13 +1192,14 @@ class SmartHomeGUI:
                 card_frame._state_text_label.config(font=('Arial', 10, 'bold'))
             
             # Обновляем дополнительные данные
-            if device_id == "thermostat":
-                temp = new_info.get('data', {}).get('temperature', 'N/A')
+            if card_type in ("thermostat", "conditioner"):
+                data = new_info.get('data', {})
+                temp = data.get('temperature', data.get('target_temperature', 'N/A'))
                 card_frame._data_label.config(text=f"🌡️ {temp}°C")
-            elif device_id == "lamp_living_room":
+            elif card_type == "light":
                 brightness = new_info.get('data', {}).get('brightness', 'N/A')
                 card_frame._data_label.config(text=f"💡 {brightness}%")
-            elif device_id == "security_camera":
+            elif card_type == "security_camera":
                 motion = new_info.get('data', {}).get('motion_detected', False)
                 motion_text = "🔴 Движение" if motion else "✅ Нет движения"
                 card_frame._data_label.config(text=motion_text)
@@ -1118,7 +1211,7 @@ class SmartHomeGUI:
         # ========================================================
         
         # Кнопки включения/выключения
-        if device_info['type'] in ['smoke', 'water']:
+        if card_type in sensor_types:
             # Для датчиков - включаем/выключаем мониторинг
             is_active = device_info['data'].get('enabled', False)
             
@@ -1134,10 +1227,10 @@ class SmartHomeGUI:
                     command=lambda d=device_id: self.toggle_device(d, 'toggle')).pack(side=tk.LEFT, padx=2)
             
             # Кнопка для эмуляции срабатывания
-            if device_info['type'] == "smoke":
+            if card_type == "smoke_sensor":
                 ttk.Button(btn_frame, text="🔥 Сработать", 
                         command=lambda d=device_id: self.trigger_device_alarm(d)).pack(side=tk.LEFT, padx=2)
-            elif device_info['type'] == "water":
+            elif card_type == "water_leak_sensor":
                 ttk.Button(btn_frame, text="💧 Сработать", 
                         command=lambda d=device_id: self.trigger_device_alarm(d)).pack(side=tk.LEFT, padx=2)
         else:
@@ -1155,12 +1248,12 @@ class SmartHomeGUI:
                     command=lambda d=device_id: self.toggle_device(d, 'toggle')).pack(side=tk.LEFT, padx=2)
             
             # Специальные кнопки для разных устройств
-            if device_id == "thermostat" and is_active:
+            if card_type in ("thermostat", "conditioner") and is_active:
                 ttk.Button(btn_frame, text="🌡️ Установить температуру", 
-                        command=self.set_temperature_dialog).pack(side=tk.LEFT, padx=2)
-            elif device_id == "lamp_living_room" and is_active:
+                        command=lambda d=device_id: self.set_temperature_dialog(d)).pack(side=tk.LEFT, padx=2)
+            elif card_type == "light" and is_active:
                 ttk.Button(btn_frame, text="💡 Установить яркость", 
-                        command=self.set_brightness_dialog).pack(side=tk.LEFT, padx=2)
+                        command=lambda d=device_id: self.set_brightness_dialog(d)).pack(side=tk.LEFT, padx=2)
         
         # ========================================================
         # 5. ИНИЦИАЛИЗАЦИЯ И ВОЗВРАТ
@@ -1236,7 +1329,7 @@ class SmartHomeGUI:
         else:
             messagebox.showerror("Ошибка", f"Не удалось выполнить команду для {device_id}")
     
-    def set_temperature_dialog(self):
+    def set_temperature_dialog(self, device_id: str = "thermostat"):
         """Диалог установки температуры"""
         dialog = tk.Toplevel(self.root)
         dialog.title("Установка температуры")
@@ -1252,9 +1345,10 @@ class SmartHomeGUI:
         def apply_temp():
             try:
                 temp = float(temp_var.get())
-                device = self.controller.device_manager.get_device("thermostat")
+                device = self.controller.device_manager.get_device(device_id)
                 if device and hasattr(device, 'set_temperature'):
-                    success = device.set_temperature(temp)
+                    success = self.controller.command_dispatcher.send(
+                        device_id, f"set_temperature:{temp}")
                     if success:
                         messagebox.showinfo("Успех", f"Температура установлена на {temp}°C")
                         dialog.destroy()
@@ -1269,7 +1363,7 @@ class SmartHomeGUI:
         ttk.Button(dialog, text="Установить", command=apply_temp).pack(pady=10)
         ttk.Button(dialog, text="Отмена", command=dialog.destroy).pack(pady=5)
     
-    def set_brightness_dialog(self):
+    def set_brightness_dialog(self, device_id: str = "lamp_living_room"):
         """Диалог установки яркости"""
         dialog = tk.Toplevel(self.root)
         dialog.title("Установка яркости")
@@ -1294,9 +1388,10 @@ class SmartHomeGUI:
         
         def apply_brightness():
             brightness = brightness_var.get()
-            device = self.controller.device_manager.get_device("lamp_living_room")
+            device = self.controller.device_manager.get_device(device_id)
             if device and hasattr(device, 'set_brightness'):
-                success = device.set_brightness(brightness)
+                success = self.controller.command_dispatcher.send(
+                    device_id, f"set_brightness:{brightness}")
                 if success:
                     messagebox.showinfo("Успех", f"Яркость установлена на {brightness}%")
                     dialog.destroy()
@@ -1310,10 +1405,14 @@ class SmartHomeGUI:
         ttk.Button(dialog, text="Отмена", command=dialog.destroy).pack(pady=5)
 
     def refresh_devices(self):
-        """Обновление отображения устройств"""
-        devices_status = self.controller.device_manager.get_all_devices_status()
+        """Обновление отображения устройств (только изменившихся с прошлого опроса)"""
+        self._devices_seq, changed = self.controller.device_manager.get_changes_since(self._devices_seq)
 
-        for device_id, device_info in devices_status.items():
+        for device_id, device_info in changed.items():
+            if device_info is None:
+                # устройство удалено (перезагрузка инвентаря) - убираем карточку
+                self._remove_device_card(device_id)
+                continue
             if device_id in self.device_frames:
                 # обновляем состояние существующей карточки
                 self.device_frames[device_id].update_state(device_info)
@@ -1321,6 +1420,14 @@ class SmartHomeGUI:
                 # создаем новую карточку
                 frame = self.create_device_card(device_id, device_info)
                 self.device_frames[device_id] = frame
+            
+            self._device_state_cache[device_id] = {
+                "state": device_info.get("state"),
+                "online": device_info.get("online", True)
+            }
+        
+        if changed:
+            self._update_stats_labels()
     
     def refresh_logs(self):
         """Обновление отображения логов"""
@@ -1343,40 +1450,112 @@ class SmartHomeGUI:
         self.logs_text.config(state=tk.DISABLED)
         self.logs_text.see(tk.END)
     
-    def refresh_notifications(self):
-        """Обновление списка уведомлений"""
-        # Очищаем текущий список
-        for item in self.notifications_tree.get_children():
-            self.notifications_tree.delete(item)
-        
-        # Получаем уведомления
-        if hasattr(self.controller, 'notification_service'):
-            notifications = self.controller.notification_service.notifications
-            
-            for notification in notifications[-50:]:  # Последние 50
-                level_icon = {
-                    "info": "ℹ️",
-                    "warning": "⚠️",
-                    "error": "❌"
-                }.get(notification['level'], "📝")
-                
-                read_icon = "📪" if notification['read'] else "📬"
-                time_str = notification['timestamp'][11:16] if len(notification['timestamp']) > 11 else notification['timestamp']
-                
-                self.notifications_tree.insert("", tk.END, values=(
-                    notification['id'],
-                    time_str,
-                    notification['title'][:30],
-                    read_icon,
-                    level_icon
-                ))
+    def refresh_notifications(self, full: bool = False):
+        """Обновление списка уведомлений (только новые с последнего опроса)"""
+        if not hasattr(self.controller, 'notification_service'):
+            return
+
+        # На страницах истории таблица статична до возврата к последним
+        if self._notification_pages and not full:
+            return
+
+        service = self.controller.notification_service
+
+        if full or self._notifications_cursor == 0:
+            # Полная перезагрузка - при первом показе и по явному действию пользователя
+            self._notification_pages = []
+            self._notifications_view.clear()
+            notifications = service.recent_notifications(self.notifications_view_limit)
+        else:
+            notifications = service.list_notifications(
+                after_id=self._notifications_cursor,
+                limit=self.notifications_view_limit
+            )
+
+        for notification in notifications:
+            self._notifications_view[notification['id']] = notification
+            self._notifications_cursor = max(self._notifications_cursor, notification['id'])
+
+        # В таблице держим только окно последних уведомлений, история - в хранилище
+        while len(self._notifications_view) > self.notifications_view_limit:
+            self._notifications_view.popitem(last=False)
+
+        self._render_notifications()
+
+    def _render_notifications(self):
+        """Согласовать таблицу уведомлений с текущей страницей"""
+        self.notifications_reconciler.reconcile(
+            (notification_id, self._notification_row_values(notification))
+            for notification_id, notification in self._notifications_view.items()
+        )
+        page_text = "Последние" if not self._notification_pages else f"История ({len(self._notification_pages)})"
+        self.notifications_page_label.config(text=page_text)
+
+    def show_older_notifications(self):
+        """Показать предыдущую страницу истории уведомлений"""
+        if not self._notifications_view:
+            return
+        oldest_id = next(iter(self._notifications_view))
+        older = self.controller.notification_service.list_notifications_before(
+            oldest_id, limit=self.notifications_view_limit
+        )
+        if not older:
+            return
+        self._notification_pages.append(oldest_id)
+        self._notifications_view = OrderedDict((n['id'], n) for n in older)
+        self._render_notifications()
+
+    def show_newer_notifications(self):
+        """Вернуться к более новой странице уведомлений"""
+        if not self._notification_pages:
+            return
+        self._notification_pages.pop()
+        if not self._notification_pages:
+            # Вернулись к последним - дальше снова работает курсор
+            self.refresh_notifications(full=True)
+            return
+        newer = self.controller.notification_service.list_notifications_before(
+            self._notification_pages[-1], limit=self.notifications_view_limit
+        )
+        self._notifications_view = OrderedDict((n['id'], n) for n in newer)
+        self._render_notifications()
+
+    def _notification_row_values(self, notification):
+        """Значения строки таблицы уведомлений"""
+        level_icon = {
+            "info": "ℹ️",
+            "warning": "⚠️",
+            "error": "❌"
+        }.get(notification['level'], "📝")
+
+        read_icon = "📪" if notification['read'] else "📬"
+        time_str = notification['timestamp'][11:16] if len(notification['timestamp']) > 11 else notification['timestamp']
+
+        return (
+            notification['id'],
+            time_str,
+            notification['title'][:30],
+            read_icon,
+            level_icon
+        )
     
     def refresh_status(self):
         """Обновление статуса системы"""
         devices_status = self.controller.device_manager.get_all_devices_status()
-        total_devices = len(devices_status)
-        online_devices = sum(1 for status in devices_status.values() if status.get("online", True))
-        active_devices = sum(1 for status in devices_status.values() if status.get("state") == "on")
+        self._device_state_cache = {
+            device_id: {
+                "state": status.get("state"),
+                "online": status.get("online", True)
+            }
+            for device_id, status in devices_status.items()
+        }
+        self._update_stats_labels()
+
+    def _update_stats_labels(self):
+        """Пересчитать статистику по кэшу состояний устройств"""
+        total_devices = len(self._device_state_cache)
+        online_devices = sum(1 for status in self._device_state_cache.values() if status["online"])
+        active_devices = sum(1 for status in self._device_state_cache.values() if status["state"] == "on")
         
         # Обновляем статистику
         self.stats_labels['total_devices'].config(text=str(total_devices))
@@ -1387,44 +1566,34 @@ class SmartHomeGUI:
             percent = (active_devices / total_devices) * 100
             self.stats_labels['activity_percent'].config(text=f"{percent:.1f}%")
         
-        # Обновляем историю активности
-        self.activity_text.config(state=tk.NORMAL)
-        
-        # Добавляем текущую запись
+        # История активности пополняется только при изменении числа активных
+        if active_devices != self._last_active_count:
+            self._last_active_count = active_devices
+            self._add_activity_entry(active_devices, total_devices)
+
+    def _add_activity_entry(self, active_devices, total_devices):
+        """Добавить запись в историю активности (последние 20 строк)"""
         timestamp = datetime.now().strftime("%H:%M:%S")
-        active_text = f"{active_devices}/{total_devices}"
-        new_entry = f"[{timestamp}] Активных устройств: {active_text}\n"
-        
-        # Получаем текущий текст и добавляем новую запись
-        current_text = self.activity_text.get(1.0, tk.END)
-        lines = current_text.split('\n')
-        
-        # Ограничиваем количество строк
-        if len(lines) > 20:
-            lines = lines[-20:]
-        
-        lines.insert(0, new_entry.strip())
-        self.activity_text.delete(1.0, tk.END)
-        self.activity_text.insert(1.0, '\n'.join(lines))
+        new_entry = f"[{timestamp}] Активных устройств: {active_devices}/{total_devices}\n"
         
+        self.activity_text.config(state=tk.NORMAL)
+        self.activity_text.insert(1.0, new_entry)
+        self.activity_text.delete("21.0", tk.END)
         self.activity_text.config(state=tk.DISABLED)
-        self.activity_text.see(tk.END)
     
     def mark_all_read(self):
         """Пометить все уведомления как прочитанные"""
         if hasattr(self.controller, 'notification_service'):
-            unread = self.controller.notification_service.get_unread_notifications()
-            for notification in unread:
-                self.controller.notification_service.mark_as_read(notification['id'])
+            self.controller.notification_service.mark_all_as_read()
             messagebox.showinfo("Успех", "Все уведомления помечены как прочитанные")
-            self.refresh_notifications()
+            self.refresh_notifications(full=True)
     
     def clear_notifications(self):
         """Очистить все уведомления"""
         if hasattr(self.controller, 'notification_service'):
             self.controller.notification_service.clear_notifications()
             messagebox.showinfo("Успех", "Все уведомления очищены")
-            self.refresh_notifications()
+            self.refresh_notifications(full=True)
     
     def clear_logs(self):
         """Очистить логи"""
@@ -1442,101 +1611,52 @@ class SmartHomeGUI:
             
             # Находим полное уведомление
             if hasattr(self.controller, 'notification_service'):
-                notifications = self.controller.notification_service.notifications
-                for notification in notifications:
-                    if notification['id'] == notification_id:
-                        # Показываем детали
-                        self.notification_details.config(state=tk.NORMAL)
-                        self.notification_details.delete(1.0, tk.END)
-                        
-                        details = f"Заголовок: {notification['title']}\n"
-                        details += f"Сообщение: {notification['message']}\n"
-                        details += f"Время: {notification['timestamp']}\n"
-                        details += f"Уровень: {notification['level']}\n"
-                        details += f"Статус: {'Прочитано' if notification['read'] else 'Новое'}"
-                        
-                        self.notification_details.insert(1.0, details)
-                        self.notification_details.config(state=tk.DISABLED)
-                        
-                        # Помечаем как прочитанное
-                        if not notification['read']:
-                            self.controller.notification_service.mark_as_read(notification_id)
-                            self.refresh_notifications()
-                        break
+                notification = self.controller.notification_service.get_notification(notification_id)
+                if notification:
+                    # Показываем детали
+                    self.notification_details.config(state=tk.NORMAL)
+                    self.notification_details.delete(1.0, tk.END)
+                    
+                    details = f"Заголовок: {notification['title']}\n"
+                    details += f"Сообщение: {notification['message']}\n"
+                    details += f"Время: {notification['timestamp']}\n"
+                    details += f"Уровень: {notification['level']}\n"
+                    details += f"Статус: {'Прочитано' if notification['read'] else 'Новое'}"
+                    
+                    self.notification_details.insert(1.0, details)
+                    self.notification_details.config(state=tk.DISABLED)
+                    
+                    # Помечаем как прочитанное - меняется только эта строка
+                    if not notification['read']:
+                        self.controller.notification_service.mark_as_read(notification_id)
+                        if notification_id in self._notifications_view:
+                            self._notifications_view[notification_id] = dict(notification, read=True)
+                            self._render_notifications()
+    
+    def _run_scene(self, name: str, title: str, message: str):
+        """Запустить сцену; сообщение о завершении приходит через очередь событий GUI"""
+        try:
+            run = self.controller.scene_engine.start(name)
+        except SceneError as e:
+            messagebox.showerror(title, str(e))
+            return
+        run.add_done_callback(lambda r: self.ui_events.post("scene", r.run_id, (r, title, message)))
     
     def run_evening_scenario(self):
         """Запуск вечернего сценария"""
-        def scenario():
-            steps = [
-                ("lamp_living_room", "on", "Включение света"),
-                (None, None, "Установка яркости 70%"),
-                (None, None, "Включение камеры"),
-                ("thermostat", "on", "Включение термостата на 23°C")
-            ]
-            
-            for device_id, action, description in steps:
-                if device_id and action:
-                    self.controller.device_manager.send_command(device_id, action)
-                    time.sleep(1)
-            
-            messagebox.showinfo("Сценарий", "Вечерний режим активирован!")
-        
-        threading.Thread(target=scenario, daemon=True).start()
+        self._run_scene("evening", "Сценарий", "Вечерний режим активирован!")
     
     def run_morning_scenario(self):
         """Запуск утреннего сценария"""
-        def scenario():
-            # Плавное включение света
-            device = self.controller.device_manager.get_device("lamp_living_room")
-            if device and hasattr(device, 'set_brightness'):
-                for brightness in range(0, 81, 20):
-                    device.set_brightness(brightness)
-                    time.sleep(0.5)
-            
-            # Выключение камеры
-            self.controller.device_manager.send_command("security_camera", "off")
-            
-            messagebox.showinfo("Сценарий", "Утренний режим активирован!")
-        
-        threading.Thread(target=scenario, daemon=True).start()
+        self._run_scene("morning", "Сценарий", "Утренний режим активирован!")
     
     def run_away_scenario(self):
         """Запуск сценария отсутствия"""
-        def scenario():
-            # Включение камеры
-            self.controller.device_manager.send_command("security_camera", "on")
-            
-            # Выключение света
-            self.controller.device_manager.send_command("lamp_living_room", "off")
-            
-            # Установка температуры на экономный режим
-            device = self.controller.device_manager.get_device("thermostat")
-            if device and hasattr(device, 'set_temperature'):
-                device.set_temperature(18)
-            
-            messagebox.showinfo("Сценарий", "Режим отсутствия активирован!")
-        
-        threading.Thread(target=scenario, daemon=True).start()
+        self._run_scene("away", "Сценарий", "Режим отсутствия активирован!")
     
     def run_full_demo(self):
         """Запуск полной демонстрации"""
-        def scenario():
-            steps = [
-                ("lamp_living_room", "on", "Включение света в гостиной"),
-                ("thermostat", "on", "Включение термостата"),
-                ("security_camera", "on", "Включение камеры безопасности"),
-                ("lamp_living_room", "off", "Выключение света в гостиной"),
-                ("thermostat", "off", "Выключение термостата"),
-                ("security_camera", "off", "Выключение камеры безопасности"),
-            ]
-            
-            for device_id, action, description in steps:
-                self.controller.device_manager.send_command(device_id, action)
-                time.sleep(2)
-            
-            messagebox.showinfo("Демо", "Демонстрационный сценарий завершен!")
-        
-        threading.Thread(target=scenario, daemon=True).start()
+        self._run_scene("demo", "Демо", "Демонстрационный сценарий завершен!")
     
     def refresh_all(self):
         """Обновить все данные"""
@@ -1551,7 +1671,7 @@ class SmartHomeGUI:
         """Показать настройки"""
         dialog = tk.Toplevel(self.root)
         dialog.title("Настройки системы")
-        dialog.geometry("400x300")
+        dialog.geometry("400x360")
         
         ttk.Label(dialog, text="⚙️ Настройки системы", 
                  font=('Arial', 14, 'bold')).pack(pady=10)
@@ -1559,21 +1679,49 @@ class SmartHomeGUI:
         settings_frame = ttk.Frame(dialog)
         settings_frame.pack(fill=tk.BOTH, expand=True, padx=20, pady=10)
         
-        # Интервал обновления
-        ttk.Label(settings_frame, text="Интервал обновления (мс):").grid(row=0, column=0, sticky=tk.W, pady=5)
+        # Интервал резервного опроса (основное обновление - по событиям)
+        ttk.Label(settings_frame, text="Интервал опроса (мс):").grid(row=0, column=0, sticky=tk.W, pady=5)
         interval_var = tk.StringVar(value=str(self.update_interval))
         interval_entry = ttk.Entry(settings_frame, textvariable=interval_var, width=10)
         interval_entry.grid(row=0, column=1, sticky=tk.W, pady=5)
         
+        # Профилирование работающей системы без перезапуска
+        profiler = self.controller.profiler
+        ttk.Label(settings_frame, text="Профилирование:").grid(row=1, column=0, sticky=tk.W, pady=5)
+        profiler_var = tk.StringVar()
+        ttk.Label(settings_frame, textvariable=profiler_var, wraplength=220).grid(
+            row=2, column=0, columnspan=2, sticky=tk.W)
+        
+        def update_profiler_view():
+            if profiler.is_running:
+                profiler_var.set(f"⏺ идет сбор, выборок: {profiler.samples}")
+                profiler_button.config(text="Остановить")
+            else:
+                profiler_var.set(f"Последний профиль: {profiler.last_file}" if profiler.last_file else "выключено")
+                profiler_button.config(text="Начать")
+        
+        def toggle_profiler():
+            if profiler.is_running:
+                path = profiler.stop()
+                self.controller.logging_service.info("SYSTEM", f"Профиль сохранен: {path}")
+            else:
+                profiler.start()
+                self.controller.logging_service.info("SYSTEM", "Профилирование запущено")
+            update_profiler_view()
+        
+        profiler_button = ttk.Button(settings_frame, command=toggle_profiler)
+        profiler_button.grid(row=1, column=1, sticky=tk.W, pady=5)
+        update_profiler_view()
+        
         def save_settings():
             try:
                 new_interval = int(interval_var.get())
-                if 500 <= new_interval <= 10000:
+                if 500 <= new_interval <= 600000:
                     self.update_interval = new_interval
                     messagebox.showinfo("Успех", "Настройки сохранены!")
                     dialog.destroy()
                 else:
-                    messagebox.showerror("Ошибка", "Интервал должен быть от 500 до 10000 мс")
+                    messagebox.showerror("Ошибка", "Интервал должен быть от 500 до 600000 мс")
             except ValueError:
                 messagebox.showerror("Ошибка", "Введите корректное число")
         
@@ -1609,13 +1757,17 @@ class SmartHomeGUI:
         messagebox.showinfo("Помощь", help_text)
     
     def update_ui(self):
-        """Периодическое обновление интерфейса"""
+        """Резервный периодический опрос (основные обновления приходят по событиям)"""
+        start = time.perf_counter()
         try:
             self.refresh_devices()
-            self.refresh_status()
             self.refresh_notifications()
         except Exception as e:
             print(f"Ошибка обновления UI: {e}")
+        if metrics.registry.enabled:
+            metrics.registry.histogram(
+                "smart_home_gui_refresh_seconds", "Длительность цикла обновления GUI",
+                {"cycle": "poll"}).observe(time.perf_counter() - start)
         
         # Планируем следующее обновление
         self.root.after(self.update_interval, self.update_ui)
@@ -1627,6 +1779,7 @@ class SmartHomeGUI:
             if hasattr(self.controller, 'schedule_service'):
                 self.controller.schedule_service.stop()
             
+            self.ui_events.stop()
             self.controller.stop_system()
             self.root.destroy()
 
@@ -0,0 +1,46 @@
+"""
+Постраничный показ длинных списков в таблицах GUI
+"""
+
+from typing import List, Sequence
+
+
+class Paginator:
+    """Состояние постраничного просмотра: в таблице только одна страница"""
+
+    def __init__(self, page_size: int = 100):
+        self.page_size = page_size
+        self.page = 0
+        self.total = 0
+
+    @property
+    def page_count(self) -> int:
+        return max(1, (self.total + self.page_size - 1) // self.page_size)
+
+    def set_total(self, total: int):
+        """Обновить общее число строк, удерживая страницу в допустимых пределах"""
+        self.total = total
+        self.page = min(self.page, self.page_count - 1)
+
+    def page_slice(self, items: Sequence) -> List:
+        """Вернуть строки текущей страницы"""
+        self.set_total(len(items))
+        start = self.page * self.page_size
+        return list(items[start:start + self.page_size])
+
+    def next(self) -> bool:
+        """Перейти на следующую страницу"""
+        if self.page < self.page_count - 1:
+            self.page += 1
+            return True
+        return False
+
+    def prev(self) -> bool:
+        """Перейти на предыдущую страницу"""
+        if self.page > 0:
+            self.page -= 1
+            return True
+        return False
+
+    def label(self) -> str:
+        return f"Стр. {self.page + 1} из {self.page_count}"
@@ -0,0 +1,78 @@
+"""
+Обновление ttk.Treeview по ключам строк вместо полной перерисовки
+"""
+
+from typing import Dict, Hashable, Iterable, List, Optional, Tuple
+
+
+class TreeReconciler:
+    """Синхронизирует Treeview со списком строк (ключ, значения)
+
+    Treeview трогается только для реально вставленных, удаленных,
+    измененных или переставленных строк.
+    """
+
+    def __init__(self, tree):
+        self.tree = tree
+        self._values: Dict[str, tuple] = {}    # iid -> значения строки
+        self._keys: Dict[str, Hashable] = {}   # iid -> исходный ключ
+        self._order: List[str] = []            # порядок iid в таблице
+
+    @staticmethod
+    def make_iid(key: Hashable) -> str:
+        """Идентификатор строки Treeview для ключа"""
+        if isinstance(key, tuple):
+            return "|".join(str(part) for part in key)
+        return str(key)
+
+    def key_for(self, iid: str) -> Optional[Hashable]:
+        """Исходный ключ по идентификатору строки"""
+        return self._keys.get(iid)
+
+    def reconcile(self, rows: Iterable[Tuple[Hashable, tuple]]) -> Dict[str, int]:
+        """Привести таблицу к заданному упорядоченному списку строк"""
+        desired: Dict[str, tuple] = {}
+        keys: Dict[str, Hashable] = {}
+        for key, values in rows:
+            iid = self.make_iid(key)
+            desired[iid] = tuple(values)
+            keys[iid] = key
+
+        stats = {"inserted": 0, "removed": 0, "updated": 0, "moved": 0}
+
+        removed = [iid for iid in self._order if iid not in desired]
+        if removed:
+            self.tree.delete(*removed)
+            removed_set = set(removed)
+            self._order = [iid for iid in self._order if iid not in removed_set]
+            for iid in removed:
+                del self._values[iid]
+            stats["removed"] = len(removed)
+
+        for index, (iid, values) in enumerate(desired.items()):
+            if iid not in self._values:
+                self.tree.insert("", index, iid=iid, values=values)
+                self._order.insert(index, iid)
+                stats["inserted"] += 1
+            else:
+                if self._order[index] != iid:
+                    # Перемещение нужно только при изменении порядка
+                    self.tree.move(iid, "", index)
+                    self._order.remove(iid)
+                    self._order.insert(index, iid)
+                    stats["moved"] += 1
+                if self._values[iid] != values:
+                    self.tree.item(iid, values=values)
+                    stats["updated"] += 1
+            self._values[iid] = values
+
+        self._keys = keys
+        return stats
+
+    def reset(self):
+        """Очистить таблицу и забыть текущее состояние"""
+        if self._order:
+            self.tree.delete(*self._order)
+        self._values.clear()
+        self._keys.clear()
+        self._order.clear()
@@ -0,0 +1,66 @@
+import threading
+import pytest
+from datetime import datetime
+from unittest.mock import MagicMock
+
+from core.async_runtime import AsyncRuntime
+from devices.lighting.smart_light import SmartLight
+from services.schedule_service import ScheduleService
+
+
+@pytest.fixture
+def controller():
+    controller = MagicMock()
+    controller.device_manager.send_command.return_value = True
+    return controller
+
+
+@pytest.fixture
+def runtime(controller):
+    runtime = AsyncRuntime(controller, monitor_interval=0.01, schedule_interval=0.01)
+    runtime.start()
+    yield runtime
+    runtime.stop()
+
+
+# Тест проверяет, что мониторинг и расписание выполняются корутинами цикла
+def test_background_coroutines_run(controller, runtime):
+    called = threading.Event()
+    controller.schedule_service.tick.side_effect = lambda: called.set()
+
+    assert called.wait(2)
+    assert controller.device_manager.check_device_changes.called
+    controller.device_manager.use_external_simulation.assert_called_once_with(runtime.call_later)
+
+# Тест проверяет синхронную обертку и отложенный вызов без потока-таймера
+def test_sync_wrappers(controller, runtime):
+    assert runtime.run_sync(runtime.send_command("lamp", "on"), timeout=2) is True
+    controller.device_manager.send_command.assert_called_with("lamp", "on")
+
+    fired = threading.Event()
+    runtime.call_later(0.01, fired.set)
+    assert fired.wait(2)
+
+# Тест проверяет остановку среды
+def test_stop(runtime):
+    runtime.stop()
+    assert not runtime.is_running
+
+# Тест проверяет, что при внешней симуляции лампа не запускает свой поток
+def test_external_simulation_disables_device_threads():
+    light = SmartLight("lamp", "Lamp")
+    light.use_external_simulation()
+    light.turn_on()
+    assert light._simulation_thread is None
+
+# Тест проверяет, что задача расписания выполняется один раз за минуту
+def test_schedule_tick_runs_once_per_minute(controller, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    schedule = ScheduleService(controller, autostart=False)
+    schedule.schedule = {"07:00": [{"device_id": "lamp", "action": "on", "enabled": True, "days": [0]}]}
+    monday = datetime(2024, 1, 1, 7, 0, 10)
+
+    assert schedule.tick(monday) == 1
+    assert schedule.tick(monday.replace(second=40)) == 0
+    controller.command_dispatcher.submit.assert_called_once_with("lamp", "on")
+    assert schedule.thread is None
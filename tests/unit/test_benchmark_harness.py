@@ -0,0 +1,39 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "benchmarks"))
+
+import harness  # noqa: E402
+
+
+def results(cases):
+    return {"quick": False, "results": {"event_bus": cases}}
+
+
+# Тест проверяет порог регрессии для времени (меньше - лучше) и пропускной способности (больше - лучше)
+def test_compare_threshold():
+    baseline = results({"publish": {"median_us": 10.0, "p95_us": 12.0},
+                        "fanout": {"ops_per_sec": 1000.0},
+                        "removed": {"median_us": 1.0}})
+    current = results({"publish": {"median_us": 12.5, "p95_us": 30.0},
+                       "fanout": {"ops_per_sec": 850.0},
+                       "added": {"median_us": 1.0}})
+
+    rows = {row["benchmark"]: row for row in harness.compare(current, baseline, threshold=0.20)}
+
+    # Случаи без пары в базе не сравниваются
+    assert sorted(rows) == ["event_bus/fanout", "event_bus/publish"]
+    assert rows["event_bus/publish"]["metric"] == "median_us"
+    assert rows["event_bus/publish"]["change"] == 0.25 and rows["event_bus/publish"]["regression"]
+    assert rows["event_bus/fanout"]["metric"] == "ops_per_sec"
+    assert not rows["event_bus/fanout"]["regression"]
+    strict = {row["benchmark"]: row for row in harness.compare(current, baseline, threshold=0.10)}
+    assert strict["event_bus/fanout"]["regression"]
+
+
+# Тест проверяет, что база из репозитория читается и сравнивается сама с собой без регрессий
+def test_committed_baseline_compares():
+    path = os.path.join(os.path.dirname(__file__), "..", "..", "benchmarks", "baseline.json")
+    baseline = harness.load_results(path)
+    rows = harness.compare(baseline, baseline)
+    assert rows and not any(row["regression"] for row in rows)
@@ -0,0 +1,91 @@
+import os
+from unittest.mock import Mock
+
+import pytest
+
+from services import columnar_export
+from services.columnar_export import (ColumnarFormatError, ColumnarReader, ColumnarWriter,
+                                      INT64, FLOAT64, STRING, read_dataset)
+from services.event_store import EventStore
+from services.telemetry import TelemetryStore
+
+DAY = 86400
+
+
+# Тест проверяет запись группами строк и чтение только нужных колонок
+def test_writer_and_reader_round_trip(tmp_path):
+    path = str(tmp_path / "part.kpoc")
+    schema = [("ts", FLOAT64), ("device_id", STRING), ("value", INT64)]
+    with ColumnarWriter(path, schema, row_group_size=4) as writer:
+        for i in range(10):
+            writer.write_row((float(i), f"lamp_{i % 2}", i * 10))
+        # Буфер не превышает одной группы строк
+        assert len(writer._columns[0]) < 4
+
+    reader = ColumnarReader(path)
+    assert reader.rows == 10 and len(reader.row_groups) == 3
+    assert [row["value"] for row in reader.iter_rows(["value"])] == [i * 10 for i in range(10)]
+    assert [row["device_id"] for row in reader.iter_rows(["device_id"], start=8)] == ["lamp_0", "lamp_1"]
+    # Группы вне периода не читаются
+    assert len(list(reader.iter_row_groups(start=8))) == 1
+
+    with pytest.raises(ColumnarFormatError):
+        list(reader.iter_rows(["missing"]))
+    with open(path, "r+b") as f:
+        f.truncate(os.path.getsize(path) - 2)
+    with pytest.raises(ColumnarFormatError):
+        ColumnarReader(path)
+
+
+# Тест проверяет выгрузку журнала по дням и загрузку с теми же проекциями
+def test_export_and_import_events(tmp_path):
+    store = EventStore(str(tmp_path / "events.jsonl"))
+    for i in range(30):
+        state = "on" if i % 3 else "off"
+        store.record("lamp", state, {"brightness": i}, ts=DAY * (i // 10) + i)
+        store.record("thermostat", "on", {"target_temperature": 18 + i}, ts=DAY * (i // 10) + i)
+
+    result = columnar_export.export_events(store, str(tmp_path / "export"), row_group_size=7)
+    assert result["rows"] == store.seq == result["last_seq"]
+    assert sorted(os.path.basename(os.path.dirname(path)) for path in result["files"]) == [
+        "date=1970-01-01", "date=1970-01-02", "date=1970-01-03"]
+    rows = list(read_dataset(str(tmp_path / "export"), ["seq", "device_id"], start=DAY, end=2 * DAY - 1))
+    assert rows and all(row["seq"] > 20 for row in rows)
+
+    replayed = EventStore(str(tmp_path / "replayed.jsonl"))
+    assert columnar_export.import_events(str(tmp_path / "export"), replayed) == store.seq
+    assert replayed.current_states() == store.current_states()
+    assert replayed.get_stats("lamp") == store.get_stats("lamp")
+
+
+# Тест проверяет выгрузку агрегатов телеметрии
+def test_export_telemetry(tmp_path):
+    telemetry = TelemetryStore()
+    for ts in range(0, 600, 10):
+        telemetry.record("thermostat", "temperature", 20 + ts / 100, ts=ts)
+
+    result = columnar_export.export_telemetry(telemetry, str(tmp_path / "telemetry"))
+    assert result["rows"] == 10
+    rows = list(read_dataset(str(tmp_path / "telemetry")))
+    assert rows[0] == {"ts": 0.0, "device_id": "thermostat", "metric": "temperature",
+                       "min": 20.0, "max": 20.5, "avg": 20.25, "count": 6}
+
+
+# Тест проверяет, что повторная выгрузка истории дописывает только новые строки
+def test_export_history_is_incremental(tmp_path):
+    controller = Mock(event_store=EventStore(str(tmp_path / "events.jsonl")), telemetry=TelemetryStore())
+    for i in range(5):
+        controller.event_store.record("lamp", "on", {"brightness": i}, ts=i)
+        controller.telemetry.record("thermostat", "temperature", 20 + i, ts=i * 60)
+    export_dir = str(tmp_path / "export")
+
+    first = columnar_export.export_history(controller, export_dir, now=4 * 60 + 30)
+    # Минута 4*60 еще не закрыта
+    assert first["events"]["rows"] == 5 and first["telemetry"]["rows"] == 4
+    assert columnar_export.export_history(controller, export_dir, now=4 * 60 + 40)["events"]["rows"] == 0
+
+    controller.event_store.record("lamp", "off", {}, ts=10)
+    second = columnar_export.export_history(controller, export_dir, now=10 * 60)
+    assert second["events"]["rows"] == 1 and second["telemetry"]["rows"] == 1
+    assert [row["seq"] for row in read_dataset(os.path.join(export_dir, "events"), ["seq"])] == list(range(1, 7))
+    assert len(list(read_dataset(os.path.join(export_dir, "telemetry")))) == 5
@@ -0,0 +1,87 @@
+import threading
+import pytest
+from services.command_dispatcher import CommandDispatcher, coalesce_key
+
+
+class BlockingManager:
+    """Замена DeviceManager: первая команда ждет сигнала, остальные записываются"""
+
+    def __init__(self):
+        self.executed = []
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def send_command(self, device_id, action):
+        if not self.started.is_set():
+            self.started.set()
+            self.release.wait(5)
+        self.executed.append((device_id, action))
+        return True
+
+
+@pytest.fixture
+def manager():
+    return BlockingManager()
+
+
+@pytest.fixture
+def dispatcher(manager):
+    dispatcher = CommandDispatcher(manager, max_workers=2, mailbox_size=3)
+    yield dispatcher
+    manager.release.set()
+    dispatcher.shutdown()
+
+
+# Тест проверяет ключи слияния команд
+def test_coalesce_keys():
+    assert coalesce_key("set_brightness:40") == "set_brightness"
+    assert coalesce_key("on") == coalesce_key("off") == "power"
+    assert coalesce_key("toggle") is None
+
+# Тест проверяет, что из серии set_brightness выполняется только последняя команда
+def test_burst_is_coalesced(manager, dispatcher):
+    dispatcher.submit("lamp", "on")
+    assert manager.started.wait(5)
+
+    futures = [dispatcher.submit("lamp", f"set_brightness:{value}") for value in range(10, 101, 10)]
+    assert dispatcher.get_metrics()["lamp"]["depth"] == 1
+    manager.release.set()
+
+    assert all(future.result(5) for future in futures)
+    assert manager.executed == [("lamp", "on"), ("lamp", "set_brightness:100")]
+    metrics = dispatcher.get_metrics()["lamp"]
+    assert metrics["coalesced"] == 9 and metrics["executed"] == 2 and metrics["depth"] == 0
+
+# Тест проверяет ограничение размера ящика: несливаемые команды сверх лимита отклоняются
+def test_mailbox_is_bounded(manager, dispatcher):
+    dispatcher.submit("lamp", "on")
+    assert manager.started.wait(5)
+
+    futures = [dispatcher.submit("lamp", "toggle") for _ in range(5)]
+    manager.release.set()
+
+    results = [future.result(5) for future in futures]
+    assert results == [True, True, True, False, False]
+    assert dispatcher.get_metrics()["lamp"]["rejected"] == 2
+    assert dispatcher.get_metrics()["lamp"]["max_depth"] == 3
+
+# Тест проверяет, что занятое устройство не задерживает команды другого
+def test_devices_are_independent(manager, dispatcher):
+    dispatcher.submit("lamp", "on")
+    assert manager.started.wait(5)
+
+    assert dispatcher.send("thermostat", "set_temperature:21", timeout=5)
+    assert manager.executed == [("thermostat", "set_temperature:21")]
+
+# Тест проверяет, что отмена ожидающей команды не блокирует ящик устройства
+def test_cancelled_command_does_not_block_mailbox(manager, dispatcher):
+    dispatcher.submit("lamp", "on")
+    assert manager.started.wait(5)
+
+    cancelled = dispatcher.submit("lamp", "toggle")
+    assert cancelled.cancel()
+    manager.release.set()
+
+    assert dispatcher.send("lamp", "off", timeout=5)
+    assert manager.executed == [("lamp", "on"), ("lamp", "off")]
+    assert dispatcher.get_metrics()["lamp"]["depth"] == 0
@@ -67,6 +67,18 @@ class TestConditioner(unittest.TestCase):
         self.conditioner.set_temperature(22)
         self.assertEqual(self.conditioner.temperature, 22)
     
+    def test_set_temperature_out_of_range(self):
+        """Тест отказа на температуру вне диапазона 16-30"""
+        # Act
+        too_low = self.conditioner.set_temperature(15)
+        too_high = self.conditioner.set_temperature(31)
+        
+        # Assert
+        self.assertFalse(too_low)
+        self.assertFalse(too_high)
+        self.assertEqual(self.conditioner.temperature, 22)
+        self.assertEqual(self.conditioner.data["target_temperature"], 22)
+    
     def test_turn_on_off_sequence(self):
         """Тест последовательности включения/выключения"""
         # Act & Assert
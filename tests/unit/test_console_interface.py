@@ -35,6 +35,13 @@ def mock_controller():
     # Настраиваем методы device_manager
     controller.device_manager.get_device.side_effect = lambda device_id: controller.device_manager.devices[device_id]
     controller.device_manager.send_command.return_value = True
+    device_types = {"lamp_living_room": "light", "thermostat": "thermostat",
+                    "security_camera": "security_camera"}
+    controller.device_manager.find_devices.side_effect = lambda device_type=None: sorted(
+        device_id for device_id in controller.device_manager.devices
+        if device_types.get(device_id) == device_type
+    )
+    controller.device_types = device_types
     
     return controller
 
@@ -230,4 +237,25 @@ def test_device_access(console_interface):
     assert camera is not None
     assert lamp.name == "Лампа в гостиной"  # 👈 Теперь работает!
     assert thermostat.temperature == 22
-    assert camera.name == "Камера безопасности"
\ No newline at end of file
+    assert camera.name == "Камера безопасности"
+
+
+# Тест проверяет, что меню освещения находит лампы по типу и дает выбрать одну из нескольких
+@patch('time.sleep')
+@patch('os.system')
+@patch('builtins.input')
+@patch('builtins.print')
+def test_manage_lighting_selects_device_by_type(mock_print, mock_input, mock_system, mock_sleep, console_interface):
+    bedroom_lamp = Mock()
+    bedroom_lamp.state = "off"
+    bedroom_lamp.name = "Свет в спальне"
+    console_interface.controller.device_manager.devices["lamp_bedroom"] = bedroom_lamp
+    console_interface.controller.device_types["lamp_bedroom"] = "light"
+    console_interface.controller.device_manager.get_device_status.return_value = {"state": "off", "online": True}
+    mock_input.side_effect = ["1", "3", "4"]  # Первая по списку лампа, выключить, назад
+
+    console_interface._manage_lighting()
+
+    console_interface.controller.device_manager.find_devices.assert_any_call(device_type="light")
+    mock_print.assert_any_call("1. Свет в спальне")
+    console_interface.controller.device_manager.send_command.assert_called_with("lamp_bedroom", "off")
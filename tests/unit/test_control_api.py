@@ -0,0 +1,327 @@
+import json
+import http.client
+import threading
+import pytest
+from concurrent.futures import Future, ThreadPoolExecutor
+from unittest.mock import Mock
+
+from api.control_api import ControlApi
+from devices.device_manager import DeviceManager
+from services import metrics
+from services.command_dispatcher import CommandDispatcher
+from services.logging_service import LoggingService
+from services.notification_service import NotificationService
+from services.notification_store import NotificationStore
+from services.profiler import SamplingProfiler
+from services.scene_engine import SceneEngine
+from services.telemetry import TelemetryStore
+from services.schedule_service import ScheduleService
+
+
+class FakeController:
+    """Контроллер из настоящих сервисов, без файлов вне временной папки"""
+
+    def __init__(self):
+        self.logging_service = LoggingService(log_to_file=False)
+        self.notification_service = NotificationService(NotificationStore())
+        self.device_manager = DeviceManager()
+        self.device_manager.state_storage = Mock()
+        self.command_dispatcher = CommandDispatcher(self.device_manager)
+        self.schedule_service = ScheduleService(self, autostart=False)
+
+
+@pytest.fixture
+def controller(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    controller = FakeController()
+    yield controller
+    controller.command_dispatcher.shutdown()
+
+
+@pytest.fixture
+def server(controller):
+    server = ControlApi(controller).create_server(port=0)
+    server.start_in_thread()
+    yield server
+    server.stop_thread()
+
+
+def request(conn, method, path, body=None):
+    payload = json.dumps(body) if body is not None else None
+    headers = {"Content-Type": "application/json"} if payload else {}
+    conn.request(method, path, body=payload, headers=headers)
+    response = conn.getresponse()
+    return response.status, json.loads(response.read() or b"null")
+
+
+# Тест проверяет список устройств и статус одного устройства по одному соединению
+def test_devices_over_keep_alive(server):
+    conn = http.client.HTTPConnection("127.0.0.1", server.port)
+
+    status, body = request(conn, "GET", "/devices")
+    assert status == 200
+    assert "thermostat" in [device["device_id"] for device in body["devices"]]
+
+    status, body = request(conn, "GET", "/devices/thermostat")
+    assert status == 200 and body["type"] == "climate"
+
+    status, body = request(conn, "GET", "/devices/unknown")
+    assert status == 404 and "error" in body
+
+    conn.close()
+    assert server.connections == 1
+    assert server.requests_served == 3
+
+# Тест проверяет одиночную и пакетную отправку команд
+def test_commands(server, controller):
+    conn = http.client.HTTPConnection("127.0.0.1", server.port)
+
+    status, body = request(conn, "POST", "/devices/thermostat/commands", {"action": "on"})
+    assert status == 200 and body["success"] is True
+    assert controller.device_manager.get_device("thermostat").state == "on"
+
+    status, body = request(conn, "POST", "/commands/batch", {"commands": [
+        {"device_id": "thermostat", "action": "set_temperature:25"},
+        {"device_id": "lamp_living_room", "action": "set_brightness:40"},
+        {"device_id": "nope", "action": "on"},
+    ]})
+    assert status == 200
+    assert [result["success"] for result in body["results"]] == [True, True, False]
+    assert controller.device_manager.get_device("thermostat").data["target_temperature"] == 25
+
+    status, _ = request(conn, "POST", "/devices/thermostat/commands", {})
+    assert status == 400
+    conn.close()
+
+# Тест проверяет, что зависшая команда пакета помечается ошибкой, а не обрывает ответ
+def test_batch_marks_timed_out_commands(controller, monkeypatch):
+    done = Future()
+    done.set_result(True)
+    monkeypatch.setattr(controller.command_dispatcher, "submit",
+                        lambda device_id, action: done if device_id == "thermostat" else Future())
+    server = ControlApi(controller, command_timeout=0.1).create_server(port=0)
+    server.start_in_thread()
+    try:
+        conn = http.client.HTTPConnection("127.0.0.1", server.port)
+        status, body = request(conn, "POST", "/commands/batch", {"commands": [
+            {"device_id": "thermostat", "action": "on"},
+            {"device_id": "lamp_living_room", "action": "on"},
+        ]})
+        conn.close()
+    finally:
+        server.stop_thread()
+    assert status == 200 and body["succeeded"] == 1
+    assert body["results"][1] == {"device_id": "lamp_living_room", "action": "on",
+                                  "success": False, "error": "Команда не выполнена вовремя"}
+
+# Тест проверяет, что после 504 по долгой команде устройство принимает следующие команды
+def test_command_after_timeout_succeeds(controller, monkeypatch):
+    release = threading.Event()
+    send_command = controller.device_manager.send_command
+
+    def slow_send_command(device_id, action):
+        if action == "set_temperature:25":
+            release.wait(5)
+        return send_command(device_id, action)
+
+    monkeypatch.setattr(controller.device_manager, "send_command", slow_send_command)
+    server = ControlApi(controller, command_timeout=0.2).create_server(port=0)
+    server.start_in_thread()
+    try:
+        conn = http.client.HTTPConnection("127.0.0.1", server.port)
+        slow = request(conn, "POST", "/devices/thermostat/commands", {"action": "set_temperature:25"})
+        # Команда ждет в очереди за долгой и тоже не успевает, но не отменяется
+        queued = request(conn, "POST", "/devices/thermostat/commands", {"action": "set_temperature:21"})
+        release.set()
+        status, body = request(conn, "POST", "/devices/thermostat/commands", {"action": "on"})
+        conn.close()
+    finally:
+        server.stop_thread()
+    assert slow[0] == 504 and queued[0] == 504
+    assert status == 200 and body["success"] is True
+    thermostat = controller.device_manager.get_device("thermostat")
+    assert thermostat.state == "on" and thermostat.data["target_temperature"] == 21
+
+# Тест проверяет фильтр устройств по группам и групповую команду
+def test_group_endpoints(server, controller):
+    conn = http.client.HTTPConnection("127.0.0.1", server.port)
+
+    status, body = request(conn, "GET", "/devices?room=living_room&floor=1")
+    assert status == 200
+    assert sorted(device["device_id"] for device in body["devices"]) == ["lamp_living_room", "thermostat"]
+
+    status, body = request(conn, "GET", "/groups")
+    assert status == 200 and body["groups"]["tag"]["security"] == 3
+
+    status, body = request(conn, "POST", "/groups/commands", {"action": "on", "tags": ["sensor"]})
+    assert status == 200 and body["succeeded"] == 2
+    assert controller.device_manager.get_device("smoke_sensor").state == "on"
+
+    status, _ = request(conn, "POST", "/groups/commands", {"action": "on"})
+    assert status == 400
+    conn.close()
+
+# Тест проверяет создание, изменение и удаление задачи расписания
+def test_schedule_crud(server, controller):
+    conn = http.client.HTTPConnection("127.0.0.1", server.port)
+
+    status, body = request(conn, "POST", "/schedule",
+                           {"time": "07:30", "device_id": "thermostat", "action": "on"})
+    assert status == 201 and body == {"time": "07:30", "index": 0}
+
+    status, _ = request(conn, "PUT", "/schedule/07:30/0", {"action": "off", "days": [0]})
+    assert status == 200
+    status, body = request(conn, "GET", "/schedule")
+    assert body["tasks"][0]["action"] == "off" and body["tasks"][0]["days"] == [0]
+
+    status, _ = request(conn, "DELETE", "/schedule/07:30/0")
+    assert status == 200
+    assert request(conn, "DELETE", "/schedule/07:30/0")[0] == 404
+    assert request(conn, "PATCH", "/schedule")[0] == 405
+    conn.close()
+
+# Тест проверяет курсорный запрос уведомлений и логи
+def test_notifications_and_logs(server, controller):
+    for i in range(3):
+        controller.notification_service.add_notification(f"N{i}", "text")
+    conn = http.client.HTTPConnection("127.0.0.1", server.port)
+
+    status, body = request(conn, "GET", "/notifications?limit=2")
+    assert [item["title"] for item in body["notifications"]] == ["N0", "N1"]
+    status, body = request(conn, "GET", f"/notifications?after_id={body['next_after_id']}")
+    assert [item["title"] for item in body["notifications"]] == ["N2"]
+
+    status, body = request(conn, "POST", f"/notifications/{body['next_after_id']}/read")
+    assert status == 200 and controller.notification_service.unread_count() == 2
+
+    status, body = request(conn, "GET", "/logs?type=device&limit=5")
+    assert status == 200 and body["type"] == "DEVICE"
+    conn.close()
+
+# Тест проверяет экспорт метрик в формате Prometheus и JSON
+def test_metrics_endpoints(server):
+    metrics.registry.reset()
+    metrics.registry.enabled = True
+    try:
+        conn = http.client.HTTPConnection("127.0.0.1", server.port)
+        request(conn, "POST", "/devices/thermostat/commands", {"action": "toggle"})
+
+        conn.request("GET", "/metrics")
+        response = conn.getresponse()
+        text = response.read().decode("utf-8")
+        assert response.status == 200
+        assert response.getheader("Content-Type").startswith("text/plain")
+        assert "# TYPE smart_home_command_seconds histogram" in text
+
+        status, body = request(conn, "GET", "/metrics.json")
+        assert status == 200 and body["enabled"] is True
+        assert "smart_home_commands_total" in body["metrics"]
+        conn.close()
+    finally:
+        metrics.registry.enabled = False
+        metrics.registry.reset()
+
+# Тест проверяет чтение телеметрии через API
+def test_telemetry_endpoints(server, controller):
+    controller.telemetry = TelemetryStore()
+    for i in range(5):
+        controller.telemetry.record("thermostat", "temperature", 20 + i, ts=1000 + i)
+    conn = http.client.HTTPConnection("127.0.0.1", server.port)
+
+    status, body = request(conn, "GET", "/telemetry")
+    assert status == 200 and body["series"] == [{"device_id": "thermostat", "metric": "temperature"}]
+
+    status, body = request(conn, "GET", "/telemetry/thermostat/temperature?start=900&end=1100&resolution=1m")
+    assert status == 200
+    assert body["points"] == [{"ts": 960, "min": 20.0, "max": 24.0, "avg": 22.0, "count": 5}]
+
+    status, _ = request(conn, "GET", "/telemetry/thermostat/temperature?resolution=5m")
+    assert status == 400
+    conn.close()
+
+# Тест проверяет запуск и остановку профилировщика через API
+def test_profiler_endpoints(server, controller, tmp_path):
+    controller.profiler = SamplingProfiler(str(tmp_path / "profiles"), interval=0.001)
+    conn = http.client.HTTPConnection("127.0.0.1", server.port)
+
+    status, body = request(conn, "POST", "/profiler/start", {"interval": 5})
+    assert status == 400
+    status, body = request(conn, "POST", "/profiler/start", {})
+    assert status == 200 and body["running"] is True
+    status, body = request(conn, "POST", "/profiler/start", {})
+    assert status == 409
+
+    status, body = request(conn, "POST", "/profiler/stop")
+    assert status == 200 and body["running"] is False
+    assert body["file"].endswith(".folded")
+    status, body = request(conn, "POST", "/profiler/stop")
+    assert status == 409
+    conn.close()
+
+# Тест проверяет запуск, статус и отмену сцены через API
+def test_scene_endpoints(server, controller):
+    engine = SceneEngine(controller.device_manager)
+    engine.load_scenes({"night": {"steps": [
+        {"id": "off", "device_id": "lamp_living_room", "action": "off", "delay": 30}]}})
+    controller.scene_engine = engine
+    conn = http.client.HTTPConnection("127.0.0.1", server.port)
+    try:
+        status, body = request(conn, "GET", "/scenes")
+        assert status == 200 and body["scenes"][0]["name"] == "night"
+
+        status, body = request(conn, "POST", "/scenes/night/start", {})
+        assert status == 202 and body["status"] == "running"
+        run_id = body["run_id"]
+        status, body = request(conn, "POST", "/scenes/missing/start", {})
+        assert status == 404
+
+        status, body = request(conn, "POST", f"/scene-runs/{run_id}/cancel")
+        assert status == 200 and body["status"] == "cancelled"
+        status, body = request(conn, "GET", f"/scene-runs/{run_id}")
+        assert status == 200 and body["status"] == "cancelled"
+    finally:
+        conn.close()
+        engine.shutdown()
+
+# Тест проверяет обслуживание многих клиентов одновременно
+def test_concurrent_clients(server):
+    def client(_):
+        conn = http.client.HTTPConnection("127.0.0.1", server.port)
+        statuses = [request(conn, "GET", "/status")[0] for _ in range(5)]
+        conn.close()
+        return statuses
+
+    with ThreadPoolExecutor(max_workers=20) as pool:
+        results = list(pool.map(client, range(40)))
+
+    assert all(statuses == [200] * 5 for statuses in results)
+    assert server.connections == 40
+
+# Тест проверяет поток событий: начальные снимки и дельты по фильтру устройства
+def test_event_stream_endpoint(server, controller):
+    conn = http.client.HTTPConnection("127.0.0.1", server.port, timeout=5)
+    conn.request("GET", "/events?devices=thermostat")
+    response = conn.getresponse()
+    assert response.status == 200
+    assert response.getheader("Content-Type").startswith("text/event-stream")
+
+    def next_event():
+        fields = {}
+        while True:
+            line = response.fp.readline().decode("utf-8").rstrip("\n")
+            if not line:
+                if "data" in fields:
+                    return fields["event"], json.loads(fields["data"])
+                continue
+            name, _, value = line.partition(": ")
+            fields[name] = value
+
+    event, message = next_event()
+    assert event == "snapshot" and message["device_id"] == "thermostat"
+
+    controller.command_dispatcher.send("lamp_living_room", "on")
+    controller.command_dispatcher.send("thermostat", "set_temperature:26")
+    event, message = next_event()
+    assert event == "temperature_set"
+    assert message["delta"]["data"] == {"target_temperature": 26}
+    conn.close()
@@ -0,0 +1,67 @@
+from unittest.mock import Mock
+
+from devices.climate.thermostat import Thermostat
+from devices.device_manager import DeviceManager
+
+SPECS = [
+    {"id": "lamp_1", "type": "light", "name": "Лампа 1", "room": "kitchen", "floor": 3, "tags": ["night"]},
+    {"id": "lamp_2", "type": "light", "name": "Лампа 2", "room": "hall", "floor": 3},
+    {"id": "lamp_3", "type": "light", "name": "Лампа 3", "room": "hall", "floor": 1, "tags": ["night"]},
+    {"id": "thermostat", "type": "thermostat", "name": "Термостат", "room": "hall", "floor": 3},
+]
+
+
+def make_manager():
+    manager = DeviceManager(state_storage=Mock(load=Mock(return_value={})), device_specs=SPECS)
+    manager.use_external_simulation()
+    return manager
+
+
+# Тест проверяет поиск по пересечению групп и обновление индексов
+def test_find_devices_by_groups():
+    manager = make_manager()
+
+    assert manager.find_devices(device_type="light", floor=3) == ["lamp_1", "lamp_2"]
+    assert manager.find_devices(room="hall", floor="3") == ["lamp_2", "thermostat"]
+    assert manager.find_devices(device_type="light", tags=["night"]) == ["lamp_1", "lamp_3"]
+    assert manager.find_devices(room="garage") == []
+    assert manager.get_groups()["room"] == {"kitchen": 1, "hall": 3}
+
+    assert manager.set_device_groups("lamp_3", floor=3)
+    assert manager.find_devices(device_type="light", floor=3) == ["lamp_1", "lamp_2", "lamp_3"]
+    assert manager.get_device_snapshot("lamp_3")["metadata"]["floor"] == 3
+
+    # Описание без комнаты убирает устройство из группы комнаты
+    specs = [dict(spec) for spec in SPECS if spec["id"] != "lamp_1"]
+    del specs[0]["room"]
+    manager.apply_device_specs(specs)
+    assert manager.find_devices(room="hall") == ["lamp_3", "thermostat"]
+    assert manager.find_devices(tags=["night"]) == ["lamp_3"]
+    assert "kitchen" not in manager.get_groups()["room"]
+
+
+# Тест проверяет групповую команду одним пакетом
+def test_group_command_is_batched():
+    manager = make_manager()
+    manager.send_commands = Mock(wraps=manager.send_commands)
+
+    results = manager.send_group_command("on", device_type="light", floor=3)
+
+    assert results == {"lamp_1": True, "lamp_2": True}
+    manager.send_commands.assert_called_once_with([("lamp_1", "on"), ("lamp_2", "on")])
+    assert manager.get_device("lamp_3").state == "off"
+
+
+# Тест проверяет, что группа "type" - имена типов инвентаря, а не категории device_type
+def test_type_group_uses_inventory_type_names():
+    manager = DeviceManager(state_storage=Mock(load=Mock(return_value={})))
+    manager.use_external_simulation()
+
+    assert manager.find_devices(device_type="thermostat") == ["thermostat"]
+    assert manager.find_devices(device_type="climate") == []
+    assert manager.find_devices(device_type="smoke_sensor") == ["smoke_sensor"]
+    assert manager.find_devices(tags=["security"]) == ["security_camera", "smoke_sensor", "water_leak_sensor"]
+    # Устройство без описания - тип по зарегистрированному классу
+    manager.add_device(Thermostat("thermostat_2", "Термостат 2"))
+    assert manager.find_devices(device_type="thermostat") == ["thermostat", "thermostat_2"]
+    assert manager.get_device_type("thermostat_2") == "thermostat"
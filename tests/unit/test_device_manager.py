@@ -242,5 +242,164 @@ class TestDeviceManager(unittest.TestCase):
         # Проверяем что было 3 вызова логирования для добавленных устройств
         self.assertEqual(manager.logging_service.info.call_count, 3)
 
+    def test_get_changes_since_returns_only_changed(self):
+        """Тест журнала изменений: возвращаются только изменившиеся устройства"""
+        # Arrange
+        from devices.lighting.smart_light import SmartLight
+        from devices.climate.thermostat import Thermostat
+        manager = self._create_device_manager()
+        manager.add_device(SmartLight("lamp", "Lamp"))
+        manager.add_device(Thermostat("thermo", "Thermo"))
+        cursor, initial = manager.get_changes_since(0)
+        
+        # Act
+        manager.devices["thermo"].set_temperature(25)
+        new_cursor, changed = manager.get_changes_since(cursor)
+        
+        # Assert
+        self.assertEqual(set(initial), {"lamp", "thermo"})
+        self.assertEqual(list(changed), ["thermo"])
+        self.assertGreater(new_cursor, cursor)
+        self.assertEqual(changed["thermo"]["data"]["target_temperature"], 25)
+        self.assertEqual(manager.get_changes_since(new_cursor), (new_cursor, {}))
+    
+    def test_device_version_increments_on_change(self):
+        """Тест версии устройства: растет при каждом изменении"""
+        # Arrange
+        from devices.lighting.smart_light import SmartLight
+        light = SmartLight("lamp", "Lamp")
+        version = light.version
+        
+        # Act
+        light.set_color("#FF0000")
+        
+        # Assert
+        self.assertGreater(light.version, version)
+        self.assertEqual(light.get_status()["version"], light.version)
+
+    def test_concurrent_commands_are_serialized_per_device(self):
+        """Тест блокировки устройства: параллельные команды не теряются"""
+        # Arrange
+        import threading
+        from devices.climate.thermostat import Thermostat
+        manager = self._create_device_manager()
+        manager.state_storage = Mock()
+        manager.add_device(Thermostat("thermo", "Thermo"))
+        transitions = []
+        manager._on_state_transition = lambda *args: transitions.append(args[2:])
+        
+        def worker():
+            for _ in range(50):
+                manager.send_command("thermo", "toggle")
+        
+        # Act
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        # Assert: 200 переключений - четное число, и каждое видело свое старое состояние
+        self.assertEqual(manager.devices["thermo"].state, "off")
+        self.assertEqual(len(transitions), 200)
+        self.assertTrue(all(old != new for old, new in transitions))
+        self.assertEqual(sum(1 for _, new in transitions if new == "on"), 100)
+    
+    def test_send_command_if_checks_expected_state(self):
+        """Тест условной команды: выполняется только из ожидаемого состояния"""
+        # Arrange
+        from devices.climate.thermostat import Thermostat
+        manager = self._create_device_manager()
+        manager.state_storage = Mock()
+        manager.add_device(Thermostat("thermo", "Thermo"))
+        
+        # Act & Assert
+        self.assertFalse(manager.send_command_if("thermo", "on", "off"))
+        self.assertTrue(manager.send_command_if("thermo", "off", "on"))
+        self.assertFalse(manager.send_command_if("thermo", "off", "on"))
+        self.assertEqual(manager.devices["thermo"].state, "on")
+        self.assertTrue(manager.devices["thermo"].compare_and_set_state("on", "off"))
+        self.assertFalse(manager.devices["thermo"].compare_and_set_state("on", "off"))
+
+    def test_empty_manager_without_default_devices(self):
+        """Тест менеджера без стандартных устройств (для генератора парка)"""
+        # Arrange
+        with patch('device_manager.LoggingService'):
+            from device_manager import DeviceManager
+            
+            # Act
+            manager = DeviceManager(state_storage=Mock(), default_devices=False)
+        
+        # Assert
+        self.assertEqual(manager.devices, {})
+        manager.state_storage.load.assert_not_called()
+
+    def test_hydrate_restore_defers_activity(self):
+        """Тест восстановления без побочных эффектов: события и симуляции отложены"""
+        # Arrange
+        from devices.device_manager import DeviceManager
+        from devices.lighting.smart_light import SmartLight
+        from devices.climate.thermostat import Thermostat
+        storage = Mock()
+        storage.load.return_value = {
+            "lamp": {"state": "on", "data": {"brightness": 55}},
+            "thermo": {"state": "on", "data": {"temperature": 24.5}},
+        }
+        manager = DeviceManager(state_storage=storage, default_devices=False, restore_mode="hydrate")
+        lamp = SmartLight("lamp", "Lamp")
+        lamp._start_temperature_simulation = Mock()
+        manager.add_device(lamp)
+        manager.add_device(Thermostat("thermo", "Thermo"))
+        events = []
+        manager.add_event_listener(events.append)
+        
+        # Act
+        manager.restore_state()
+        
+        # Assert: состояние на месте, событий и потоков нет до первого обращения
+        self.assertEqual(lamp.state, "on")
+        self.assertEqual(lamp.data["brightness"], 55)
+        self.assertEqual(manager.devices["thermo"].temperature, 24.5)
+        self.assertEqual(events, [])
+        self.assertEqual(manager.pending_activity, 2)
+        lamp._start_temperature_simulation.assert_not_called()
+        
+        # Чтение (снимки, опрос изменений) активность не запускает
+        self.assertIs(manager.get_device("lamp"), lamp)
+        manager.get_changes_since(0)
+        manager.get_all_devices_status()
+        lamp._start_temperature_simulation.assert_not_called()
+        self.assertEqual(manager.pending_activity, 2)
+        
+        # Команда запускает активность только своего устройства
+        manager.send_command("lamp", "set_brightness:60")
+        lamp._start_temperature_simulation.assert_called()
+        self.assertEqual(manager.warm_up(interval=0), 1)
+        self.assertEqual(manager.pending_activity, 0)
+    
+    def test_hydrate_restore_parallel_groups(self):
+        """Тест параллельного восстановления групп из двоичного снимка"""
+        # Arrange
+        import tempfile
+        from devices.device_manager import DeviceManager
+        from devices.climate.thermostat import Thermostat
+        from services.storage_service import StateStorage
+        with tempfile.TemporaryDirectory() as tmp:
+            storage = StateStorage(os.path.join(tmp, "state.json"), format="binary")
+            storage.save({f"t{i}": {"state": "on" if i % 2 else "off",
+                                    "data": {"target_temperature": 15 + i % 10}} for i in range(500)})
+            manager = DeviceManager(state_storage=storage, default_devices=False,
+                                    restore_mode="hydrate", restore_workers=4, restore_group_size=64)
+            for i in range(500):
+                manager.add_device(Thermostat(f"t{i}", f"T{i}"))
+            
+            # Act
+            manager.restore_state()
+        
+        # Assert
+        self.assertEqual(sum(1 for d in manager.devices.values() if d.state == "on"), 250)
+        self.assertEqual(manager.devices["t7"].data["target_temperature"], 22)
+        self.assertEqual(manager.pending_activity, 500)
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
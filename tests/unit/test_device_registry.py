@@ -0,0 +1,69 @@
+import json
+import sys
+from unittest.mock import Mock
+
+import pytest
+
+from devices.device_manager import DeviceManager
+from devices.registry import DeviceTypeError, DeviceTypeRegistry
+from services.inventory import load_inventory
+
+PLUGIN = '''
+from devices.base_device import BaseDevice
+
+
+class Fan(BaseDevice):
+    def __init__(self, device_id, name):
+        super().__init__(device_id, name, "climate")
+
+    def turn_on(self):
+        self.state = "on"
+        return True
+
+    def turn_off(self):
+        self.state = "off"
+        return True
+
+    def toggle(self):
+        return self.turn_off() if self.state == "on" else self.turn_on()
+'''
+
+
+# Тест проверяет, что модуль типа импортируется только при создании первого устройства
+def test_type_module_imported_on_first_create(tmp_path, monkeypatch):
+    (tmp_path / "kpo_fan_plugin.py").write_text(PLUGIN, encoding="utf-8")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    (tmp_path / "types.json").write_text(json.dumps({"fan": "kpo_fan_plugin:Fan"}), encoding="utf-8")
+    registry = DeviceTypeRegistry(entry_points=False)
+    assert registry.load_manifest(str(tmp_path / "types.json")) == 1
+    assert "kpo_fan_plugin" not in sys.modules
+    assert registry.loaded_types() == []
+
+    fan = registry.create("fan", "fan_1", "Вентилятор")
+    assert fan.turn_on() and fan.state == "on"
+    assert "kpo_fan_plugin" in sys.modules
+    assert registry.loaded_types() == ["fan"]
+    monkeypatch.delitem(sys.modules, "kpo_fan_plugin")
+
+    with pytest.raises(DeviceTypeError):
+        registry.create("heater", "heater_1", "Обогреватель")
+    registry.register("broken", "kpo_missing_module:Heater")
+    with pytest.raises(DeviceTypeError):
+        registry.create("broken", "heater_1", "Обогреватель")
+
+
+# Тест проверяет создание устройств менеджера по файлу конфигурации
+def test_manager_builds_devices_from_specs(tmp_path):
+    path = tmp_path / "devices.json"
+    path.write_text(json.dumps({"devices": [
+        {"id": "ac", "type": "conditioner", "name": "Кондиционер"},
+        {"id": "lamp", "type": "light", "name": "Лампа"},
+        {"id": "ghost", "type": "unknown"},
+    ]}), encoding="utf-8")
+    registry = DeviceTypeRegistry(entry_points=False)
+    manager = DeviceManager(device_specs=load_inventory(str(path))["devices"], registry=registry,
+                            state_storage=Mock(load=Mock(return_value={})))
+
+    assert sorted(manager.devices) == ["ac", "lamp"]
+    assert registry.loaded_types() == ["conditioner", "light"]
+    assert manager.send_command("ac", "on") and manager.get_device("ac").state == "on"
@@ -0,0 +1,50 @@
+import json
+import pytest
+from devices.climate.thermostat import Thermostat
+from devices.lighting.smart_light import SmartLight
+from devices.device_snapshot import thaw
+
+@pytest.fixture
+def thermostat():
+    return Thermostat("thermo1", "Living Room Thermostat")
+
+# Тест проверяет, что снимок не пересобирается, пока устройство не менялось
+def test_snapshot_is_cached_until_change(thermostat):
+    first = thermostat.snapshot()
+    assert thermostat.snapshot() is first
+
+    thermostat.set_temperature(25)
+    second = thermostat.snapshot()
+    assert second is not first
+    assert second["data"]["target_temperature"] == 25
+    assert first["data"]["target_temperature"] == 22.0
+
+# Тест проверяет неизменяемость снимка и вложенных данных
+def test_snapshot_is_immutable(thermostat):
+    snapshot = thermostat.snapshot()
+    with pytest.raises(TypeError):
+        snapshot["state"] = "on"
+    with pytest.raises(TypeError):
+        snapshot["data"]["temperature"] = 100
+
+# Тест проверяет, что изменение статуса вызывающим кодом не попадает в устройство
+def test_get_status_does_not_leak_device_state(thermostat):
+    status = thermostat.get_status()
+    status["state"] = "broken"
+
+    assert thermostat.state == "off"
+    assert thermostat.get_status()["state"] == "off"
+    assert thermostat.data is not status["data"]
+
+# Тест проверяет, что прямое изменение состояния тоже обновляет снимок
+def test_direct_state_assignment_invalidates_snapshot():
+    light = SmartLight("lamp1", "Lamp")
+    light.snapshot()
+    light.state = "on"
+    assert light.snapshot()["state"] == "on"
+
+# Тест проверяет преобразование снимка обратно в обычные структуры
+def test_thaw_is_json_serializable(thermostat):
+    plain = thaw(thermostat.snapshot())
+    assert json.loads(json.dumps(plain))["device_id"] == "thermo1"
+    assert isinstance(plain["capabilities"], list)
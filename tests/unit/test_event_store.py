@@ -0,0 +1,120 @@
+import json
+from unittest.mock import Mock
+
+import pytest
+
+from devices.device_manager import DeviceManager
+from devices.lighting.smart_light import SmartLight
+from services.event_store import EventStore, Projection
+
+
+# Тест проверяет, что в журнал пишется только разница, а повтор не дублируется
+def test_record_appends_only_changes(tmp_path):
+    store = EventStore(str(tmp_path / "events.jsonl"))
+    assert store.record("lamp", "off", {"brightness": 0, "color": "#FFFFFF"}, ts=100) == 1
+    assert store.record("lamp", "off", {"brightness": 0, "color": "#FFFFFF"}, ts=101) is None
+    assert store.record("lamp", "on", {"brightness": 80, "color": "#FFFFFF"}, ts=110) == 2
+    assert store.record("lamp", "on", {"brightness": 50, "color": "#FFFFFF"}, ts=115) == 3
+
+    lines = (tmp_path / "events.jsonl").read_text(encoding="utf-8").splitlines()
+    assert json.loads(lines[1]) == [2, 110, "lamp", "state", {"state": "on", "data": {"brightness": 80}}]
+    assert json.loads(lines[2]) == [3, 115, "lamp", "data", {"data": {"brightness": 50}}]
+    assert store.current_states() == {"lamp": {"state": "on", "data": {"brightness": 50, "color": "#FFFFFF"}}}
+    assert [h["state"] for h in store.get_history("lamp")] == ["off", "on"]
+
+    store.record("lamp", "off", {"brightness": 0, "color": "#FFFFFF"}, ts=130)
+    stats = store.get_stats("lamp")
+    assert stats["transitions"] == 3 and stats["data_updates"] == 1
+    assert stats["on_seconds"] == 20
+
+
+# Тест проверяет, что после снимка при открытии проигрывается только хвост журнала
+def test_snapshot_bounds_replay(tmp_path):
+    path = str(tmp_path / "events.jsonl")
+    store = EventStore(path, snapshot_every=10)
+    for i in range(25):
+        store.record("thermostat", "on", {"target_temperature": 18 + i}, ts=1000 + i)
+    store._file.close()
+
+    reopened = EventStore(path, snapshot_every=10)
+    assert reopened.replayed == 5
+    assert reopened.seq == 25
+    assert reopened.current_states()["thermostat"]["data"]["target_temperature"] == 42
+    assert reopened.get_stats("thermostat")["data_updates"] == 24
+
+    # Без снимка те же проекции получаются проигрыванием всего журнала
+    (tmp_path / "events.jsonl.snapshot").unlink()
+    full = EventStore(path)
+    assert full.replayed == 25
+    assert full.current_states() == reopened.current_states()
+    assert full.get_history("thermostat") == reopened.get_history("thermostat")
+
+
+# Тест проверяет, что недописанная при сбое строка отбрасывается
+def test_truncated_tail_is_dropped(tmp_path):
+    path = tmp_path / "events.jsonl"
+    store = EventStore(str(path))
+    store.record("lamp", "on", {"brightness": 80}, ts=1)
+    store._file.close()
+    with open(path, "ab") as f:
+        f.write(b'[2,2,"lamp","state",{"sta')
+
+    reopened = EventStore(str(path))
+    assert reopened.seq == 1
+    assert reopened.record("lamp", "off", {"brightness": 0}, ts=3) == 2
+    assert [event[0] for event in reopened.read_events()] == [1, 2]
+
+
+# Тест проверяет, что битая строка в середине журнала пропускается, а не обрезает журнал
+def test_corrupted_middle_line_is_skipped(tmp_path):
+    path = tmp_path / "events.jsonl"
+    store = EventStore(str(path))
+    store.record("lamp", "on", {"brightness": 80}, ts=1)
+    store._file.close()
+    with open(path, "ab") as f:
+        f.write(b'[2,2,"lamp"\x00garbage\n[3,3,"lamp","state",{"state":"off"}]\n')
+
+    reopened = EventStore(str(path))
+    assert reopened.seq == 3 and reopened.skipped == 1
+    assert reopened.current_states()["lamp"]["state"] == "off"
+    assert reopened.record("lamp", "on", {"brightness": 10}, ts=4) == 4
+    assert [event[0] for event in reopened.read_events()] == [1, 3, 4]
+
+
+# Тест проверяет, что история, статистика и восстановление менеджера идут из журнала
+def test_device_manager_uses_event_store(tmp_path):
+    path = str(tmp_path / "events.jsonl")
+    manager = DeviceManager(state_storage=Mock(load=Mock(return_value={})), default_devices=False,
+                            event_store=EventStore(path))
+    manager.add_device(SmartLight("lamp", "Лампа"))
+    manager.restore_state()
+
+    manager.send_command("lamp", "on")
+    manager.send_command("lamp", "set_brightness:40")
+    manager.send_commands([("lamp", "off")])
+
+    assert [h["state"] for h in manager.get_device_state_history("lamp")] == ["off", "on", "off"]
+    assert manager.get_device_stats("lamp")["transitions"] == 3
+    assert manager.device_states == {}
+    manager.state_storage.save.assert_not_called()
+    manager.event_store.close()
+
+    restarted = DeviceManager(state_storage=Mock(load=Mock(return_value={})), default_devices=False,
+                              event_store=EventStore(path))
+    restarted.add_device(SmartLight("lamp", "Лампа"))
+    restarted.restore_state()
+    assert restarted.get_device("lamp").state == "off"
+    assert restarted.get_device("lamp").data["brightness"] == 0
+    assert restarted.event_store.replayed == 0
+
+
+# Тест проверяет, что проекцию без apply/dump/load нельзя создать
+def test_projection_requires_methods():
+    class NameOnly(Projection):
+        name = "partial"
+
+        def apply(self, event):
+            pass
+
+    with pytest.raises(TypeError):
+        NameOnly()
@@ -0,0 +1,72 @@
+import pytest
+from unittest.mock import Mock
+
+from devices.device_manager import DeviceManager
+from devices.lighting.smart_light import SmartLight
+from devices.climate.thermostat import Thermostat
+from services.event_bus import EventBus
+from services.event_stream import EventStream, snapshot_delta
+
+
+@pytest.fixture
+def manager(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    manager = DeviceManager()
+    manager.devices = {}
+    manager.state_storage = Mock()
+    manager.add_device(SmartLight("lamp", "Lamp"))
+    manager.add_device(Thermostat("thermo", "Thermo"))
+    return manager
+
+
+@pytest.fixture
+def bus():
+    return EventBus()
+
+
+@pytest.fixture
+def stream(manager, bus):
+    stream = EventStream(manager, bus)
+    yield stream
+    stream.close()
+
+
+# Тест проверяет вычисление дельты снимков
+def test_snapshot_delta():
+    old = {"state": "off", "data": {"brightness": 10, "color": "#fff"}, "version": 1}
+    new = {"state": "on", "data": {"brightness": 10, "color": "#000"}, "version": 2}
+    assert snapshot_delta(old, new) == {"state": "on", "data": {"color": "#000"}, "version": 2}
+
+# Тест проверяет фильтры по устройствам и темам
+def test_filters(manager, bus, stream):
+    lamp_only = stream.subscribe(devices=["lamp"])
+    notifications = stream.subscribe(topics=["notification"])
+
+    manager.send_command("thermo", "on")
+    manager.send_command("lamp", "set_brightness:40")
+    bus.publish(EventBus.NOTIFICATION_CREATED, {"id": 1, "title": "T"})
+
+    # Фильтр по устройствам не отсекает уведомления - их выбирают по теме
+    assert {m.get("device_id") for m in lamp_only.drain()} == {"lamp", None}
+    assert [m["event"] for m in notifications.drain()] == ["notification"]
+
+# Тест проверяет слияние дельт одного устройства у медленного клиента
+def test_coalesce_policy(manager, stream):
+    slow = stream.subscribe(devices=["lamp"], policy="coalesce")
+    for brightness in range(10, 60, 10):
+        manager.send_command("lamp", f"set_brightness:{brightness}")
+
+    messages = slow.drain()
+    assert len(messages) == 1
+    assert messages[0]["delta"]["data"]["brightness"] == 50
+    assert slow.coalesced == 4 and slow.dropped == 0
+
+# Тест проверяет ограниченный буфер с отбрасыванием старых событий
+def test_drop_policy_bounds_buffer(manager, stream):
+    slow = stream.subscribe(policy="drop", buffer_size=3)
+    for brightness in range(10, 60, 10):
+        manager.send_command("lamp", f"set_brightness:{brightness}")
+
+    messages = slow.drain()
+    assert len(messages) == 3 and slow.dropped == 2
+    assert messages[-1]["delta"]["data"]["brightness"] == 50
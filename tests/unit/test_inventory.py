@@ -0,0 +1,101 @@
+import json
+from unittest.mock import Mock
+
+import pytest
+
+from config.settings import Settings
+from devices.device_manager import DeviceManager
+from services.inventory import InventoryError, InventoryWatcher, load_inventory
+from services.storage_service import StateStorage
+
+
+def make_controller(path):
+    controller = Mock()
+    controller.settings = Settings()
+    storage = StateStorage(str(path.parent / "device_state.bin"), format="binary")
+    controller.device_manager = DeviceManager(state_storage=storage,
+                                              device_specs=load_inventory(str(path))["devices"])
+    controller.device_manager.use_external_simulation()
+    controller.schedule_service = Mock(schedule={})
+    return controller
+
+
+# Тест проверяет форматы файла и отказ на устройство без типа
+def test_load_inventory_formats(tmp_path):
+    toml_path = tmp_path / "inventory.toml"
+    toml_path.write_text('[devices.lamp]\ntype = "light"\nname = "Лампа"\n\n'
+                         '[settings]\nWARM_UP_BATCH = 10\n', encoding="utf-8")
+    assert load_inventory(str(toml_path)) == {
+        "devices": [{"id": "lamp", "type": "light", "name": "Лампа"}],
+        "settings": {"WARM_UP_BATCH": 10},
+    }
+    json_path = tmp_path / "inventory.json"
+    json_path.write_text(json.dumps({"devices": [{"id": "lamp"}]}), encoding="utf-8")
+    with pytest.raises(InventoryError):
+        load_inventory(str(json_path))
+    json_path.write_text("{", encoding="utf-8")
+    with pytest.raises(InventoryError):
+        load_inventory(str(json_path))
+
+
+# Тест проверяет, что изменения файла применяются только к затронутым устройствам
+def test_watcher_applies_diff(tmp_path):
+    path = tmp_path / "inventory.json"
+    devices = {"lamp": {"type": "light", "name": "Лампа"},
+               "thermostat": {"type": "thermostat", "name": "Термостат"},
+               "smoke": {"type": "smoke_sensor", "name": "Дым"}}
+    path.write_text(json.dumps({"devices": devices}), encoding="utf-8")
+    controller = make_controller(path)
+    manager = controller.device_manager
+    watcher = InventoryWatcher(controller, str(path), interval=0)
+    watcher.load()
+    lamp, thermostat = manager.get_device("lamp"), manager.get_device("thermostat")
+    lamp.turn_on()
+    cursor, _ = manager.get_changes_since(0)
+    gui_task = {"device_id": "lamp", "action": "off", "enabled": True, "days": [0], "added": "2025-01-01 00:00:00"}
+    old_task = {"device_id": "lamp", "action": "on", "enabled": True, "days": [0], "added": "inventory"}
+    controller.schedule_service.schedule = {"06:00": [old_task], "07:00": [gui_task]}
+
+    devices["lamp"]["name"] = "Свет"
+    devices["thermostat"]["type"] = "conditioner"
+    del devices["smoke"]
+    devices["ac"] = {"type": "conditioner", "name": "Кондиционер"}
+    path.write_text(json.dumps({"devices": devices, "settings": {"WARM_UP_BATCH": 7, "TRANSITION_FPS": 5},
+                                "schedules": [{"time": "07:00", "device_id": "lamp", "action": "on"}]}),
+                    encoding="utf-8")
+    summary = watcher.check()
+
+    assert summary["devices"] == {"added": ["ac"], "removed": ["smoke"], "changed": ["lamp", "thermostat"]}
+    # Имя меняется на месте: устройство и его состояние сохраняются
+    assert manager.get_device("lamp") is lamp and lamp.name == "Свет" and lamp.state == "on"
+    assert type(manager.get_device("thermostat")).__name__ == "Conditioner"
+    assert manager.get_device("thermostat") is not thermostat
+    assert sorted(manager.devices) == ["ac", "lamp", "thermostat"]
+    # Удаление попадает в журнал изменений, чтобы интерфейсы убрали устройство
+    _, changed = manager.get_changes_since(cursor)
+    assert changed["smoke"] is None and changed["ac"]["name"] == "Кондиционер"
+    # Частота переходов меняется на ходу, размер прогрева - только после перезапуска
+    assert summary["settings"] == ["TRANSITION_FPS"] and controller.transition_engine.fps == 5
+    assert controller.settings.WARM_UP_BATCH == Settings().WARM_UP_BATCH
+    controller.logging_service.info.assert_any_call("SYSTEM", "Настройки WARM_UP_BATCH применятся после перезапуска")
+    # Задачи инвентаря заменены, задача из GUI сохранена
+    schedule = controller.schedule_service.schedule
+    assert list(schedule) == ["07:00"]
+    assert schedule["07:00"][0] == gui_task and schedule["07:00"][1]["added"] == "inventory"
+    # Файл не менялся - повторной проверки нет
+    assert watcher.check() is None
+
+
+# Тест проверяет, что добавление и удаление не меняют словарь, который обходит другой поток
+def test_devices_dict_is_copy_on_write(tmp_path):
+    path = tmp_path / "inventory.json"
+    path.write_text(json.dumps({"devices": {"lamp": {"type": "light"}}}), encoding="utf-8")
+    manager = make_controller(path).device_manager
+    snapshot = manager.devices
+
+    for device_id in snapshot:
+        manager.apply_device_specs([{"id": "lamp", "type": "light"}, {"id": "ac", "type": "conditioner"}])
+        manager.remove_device(device_id)
+
+    assert list(snapshot) == ["lamp"]
+    assert list(manager.devices) == ["ac"]
@@ -0,0 +1,86 @@
+import pytest
+from unittest.mock import Mock
+
+from devices.device_manager import DeviceManager
+from devices.climate.thermostat import Thermostat
+from services import metrics
+from services.event_bus import EventBus
+from services.metrics import Histogram, MetricsRegistry
+
+
+@pytest.fixture
+def enabled_registry():
+    metrics.registry.reset()
+    metrics.registry.enabled = True
+    yield metrics.registry
+    metrics.registry.enabled = False
+    metrics.registry.reset()
+
+
+# Тест проверяет процентили гистограммы с логарифмическими корзинами
+def test_histogram_percentiles_relative_error():
+    histogram = Histogram()
+    for i in range(1, 1001):
+        histogram.observe(i / 1000)  # 1 мс .. 1 с
+    assert histogram.count == 1000
+    assert histogram.percentile(50) == pytest.approx(0.5, rel=1 / Histogram.SUB_BUCKETS)
+    assert histogram.percentile(99) == pytest.approx(0.99, rel=1 / Histogram.SUB_BUCKETS)
+    assert histogram.percentile(100) == 1.0
+    assert histogram.buckets()[-1][1] == 1000
+
+# Тест проверяет экспорт в формате Prometheus и снимок
+def test_registry_prometheus_and_snapshot(tmp_path):
+    registry = MetricsRegistry(enabled=True)
+    registry.counter("requests_total", "Запросы", {"path": "/a\"b"}).inc(3)
+    registry.gauge("devices", callback=lambda: 7)
+    registry.histogram("latency_seconds").observe(0.25)
+
+    text = registry.to_prometheus()
+    assert '# TYPE requests_total counter' in text
+    assert 'requests_total{path="/a\\"b"} 3' in text
+    assert 'devices 7' in text
+    assert 'latency_seconds_bucket{le="+Inf"} 1' in text
+    assert 'latency_seconds_count 1' in text
+
+    snapshot = registry.snapshot()
+    assert snapshot["devices"]["values"][0]["value"] == 7
+    assert snapshot["latency_seconds"]["values"][0]["value"]["max"] == 0.25
+
+    with pytest.raises(ValueError):
+        registry.gauge("requests_total", labels={"path": "/x"})
+
+    path = tmp_path / "out" / "metrics.prom"
+    registry.dump(str(path))
+    assert path.read_text(encoding="utf-8") == text
+
+# Тест проверяет, что выключенный реестр ничего не собирает
+def test_disabled_registry_records_nothing(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    metrics.registry.reset()
+    manager = DeviceManager(default_devices=False)
+    manager.state_storage = Mock()
+    manager.add_device(Thermostat("thermo", "Thermo"))
+    manager.send_command("thermo", "on")
+    assert metrics.registry.snapshot() == {}
+
+# Тест проверяет замеры команд и обработчиков событий
+def test_hot_paths_instrumented(tmp_path, monkeypatch, enabled_registry):
+    monkeypatch.chdir(tmp_path)
+    bus = EventBus()
+    received = []
+    bus.subscribe(EventBus.DEVICE_STATE_CHANGED, received.append)
+    manager = DeviceManager(event_bus=bus, default_devices=False)
+    manager.state_storage = Mock()
+    manager.add_device(Thermostat("thermo", "Thermo"))
+
+    assert manager.send_command("thermo", "on")
+    assert not manager.send_command("missing", "set_temperature:22")
+
+    snapshot = enabled_registry.snapshot()
+    commands = {tuple(sorted(v["labels"].items())): v["value"]
+                for v in snapshot["smart_home_commands_total"]["values"]}
+    assert commands[(("command", "on"), ("result", "ok"))] == 1
+    assert commands[(("command", "set_temperature"), ("result", "fail"))] == 1
+    handlers = snapshot["smart_home_event_handler_seconds"]["values"]
+    assert received and handlers[0]["labels"]["event"] == EventBus.DEVICE_STATE_CHANGED
+    assert handlers[0]["value"]["count"] == len(received)
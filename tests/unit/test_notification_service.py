@@ -0,0 +1,66 @@
+import pytest
+from services.notification_service import NotificationService
+from services.notification_store import NotificationStore
+
+@pytest.fixture
+def service():
+    return NotificationService()
+
+# Тест проверяет, что история не ограничена окном max_notifications
+# Убеждается, что старые уведомления остаются доступны через курсор
+def test_history_is_not_capped(service):
+    for i in range(120):
+        service.add_notification(f"Title {i}", "msg")
+
+    assert service.total_count() == 120
+    assert len(service.notifications) == service.max_notifications
+    assert service.notifications[-1]["title"] == "Title 119"
+    assert service.list_notifications(after_id=0, limit=1)[0]["title"] == "Title 0"
+
+# Тест проверяет постраничное чтение по курсору after_id
+# Убеждается, что клиент получает только новые уведомления с последнего опроса
+def test_list_after_cursor(service):
+    first = service.add_notification("A", "a")
+    service.add_notification("B", "b")
+    service.add_notification("C", "c")
+
+    page = service.list_notifications(after_id=first["id"], limit=1)
+    assert [n["title"] for n in page] == ["B"]
+
+    rest = service.list_notifications(after_id=page[-1]["id"])
+    assert [n["title"] for n in rest] == ["C"]
+    assert service.list_notifications(after_id=rest[-1]["id"]) == []
+
+# Тест проверяет, что id не переиспользуются после удаления и очистки
+def test_ids_are_monotonic_after_clear(service):
+    old = service.add_notification("Old", "x")
+    service.clear_notifications()
+    new = service.add_notification("New", "y")
+
+    assert new["id"] > old["id"]
+    assert service.list_notifications(after_id=old["id"]) == [new]
+
+# Тест проверяет пометку прочитанных и счетчик непрочитанных
+def test_mark_as_read(service):
+    n1 = service.add_notification("A", "a")
+    service.add_notification("B", "b")
+
+    service.mark_as_read(n1["id"])
+    assert service.unread_count() == 1
+    assert service.get_notification(n1["id"])["read"] is True
+
+    service.mark_all_as_read()
+    assert service.get_unread_notifications() == []
+
+# Тест проверяет сохранение истории между перезапусками
+def test_history_survives_restart(tmp_path):
+    db_file = str(tmp_path / "notifications.db")
+    store = NotificationStore(db_file)
+    NotificationService(store).add_notification("Persisted", "msg", "warning")
+    store.close()
+
+    restored = NotificationService(NotificationStore(db_file))
+    notifications = restored.list_notifications()
+    assert len(notifications) == 1
+    assert notifications[0]["title"] == "Persisted"
+    assert notifications[0]["level"] == "warning"
@@ -0,0 +1,40 @@
+import threading
+
+from services.profiler import SamplingProfiler
+
+
+def _busy_worker(stop: threading.Event):
+    while not stop.is_set():
+        sum(range(200))
+
+
+# Тест проверяет сбор свернутых стеков из чужих потоков
+def test_profiler_collects_collapsed_stacks(tmp_path):
+    stop = threading.Event()
+    worker = threading.Thread(target=_busy_worker, args=(stop,), name="busy-worker", daemon=True)
+    worker.start()
+    profiler = SamplingProfiler(str(tmp_path / "profiles"), interval=0.001)
+    try:
+        assert profiler.start()
+        assert not profiler.start()  # повторный запуск не создает второй поток
+        while profiler.samples < 20:
+            stop.wait(0.01)
+        path = profiler.stop()
+    finally:
+        stop.set()
+        worker.join()
+
+    assert not profiler.is_running
+    lines = open(path, encoding="utf-8").read().splitlines()
+    worker_lines = [line for line in lines if line.startswith("busy-worker;")]
+    assert worker_lines
+    stack, count = worker_lines[0].rsplit(" ", 1)
+    assert "_busy_worker (test_profiler.py:" in stack and int(count) > 0
+    assert not any(line.startswith("profiler;") for line in lines)
+    assert profiler.top(1)[0]["samples"] > 0
+
+# Тест проверяет остановку без запуска
+def test_profiler_stop_without_start(tmp_path):
+    profiler = SamplingProfiler(str(tmp_path))
+    assert profiler.stop() is None
+    assert profiler.status()["running"] is False
@@ -0,0 +1,134 @@
+import pytest
+from unittest.mock import Mock
+
+from config.settings import Settings
+from devices.device_manager import DeviceManager
+from devices.security.security_camera import SecurityCamera
+from devices.security.water_leak_sensor import WaterLeakSensor
+from services.automation_service import AutomationService
+from services.event_bus import EventBus
+from services.rule_engine import RuleEngine, RuleError
+
+
+def notify_rule(rule_id, conditions, **extra):
+    return dict({"id": rule_id, "conditions": conditions,
+                 "actions": [{"notify": {"title": rule_id, "message": "{device_id}={value}"}}]}, **extra)
+
+
+@pytest.fixture
+def fired():
+    return []
+
+
+@pytest.fixture
+def engine(fired):
+    return RuleEngine(lambda rule, context: fired.append((rule.rule_id, context)))
+
+
+def state_event(device_id, state, event_type="state_changed"):
+    return {"device_id": device_id, "event_type": event_type, "payload": {"state": state}}
+
+
+# Тест проверяет срабатывание по фронту: повтор того же значения правило не запускает
+def test_rule_fires_on_edge_when_all_conditions_hold(engine, fired):
+    engine.set_facts("lamp", {"state": "off"})
+    engine.set_facts("thermo", {"temperature": 20})
+    engine.add_rule(notify_rule("evening", [
+        {"device_id": "lamp", "attribute": "state", "op": "==", "value": "on"},
+        {"device_id": "thermo", "attribute": "temperature", "op": "<", "value": 18},
+    ]))
+
+    engine.handle_device_event(state_event("lamp", "on"))
+    assert fired == []
+    engine.handle_device_event({"device_id": "thermo", "event_type": "temperature_changed",
+                                "payload": {"temperature": 17.5}})
+    assert [rule_id for rule_id, _ in fired] == ["evening"]
+    assert fired[0][1]["value"] == 17.5
+
+    engine.handle_device_event({"device_id": "thermo", "event_type": "temperature_changed",
+                                "payload": {"temperature": 17}})
+    engine.handle_state_changed({"device_id": "lamp", "old_state": "off", "new_state": "on"})
+    assert len(fired) == 1
+
+# Тест проверяет, что событие проверяет только условия своего устройства и значения
+def test_index_limits_evaluations_with_thousands_of_rules(engine, fired):
+    for i in range(1000):
+        engine.set_facts(f"sensor_{i}", {"state": "off", "temperature": 20})
+        engine.add_rule(notify_rule(f"hot_{i}", [
+            {"device_id": f"sensor_{i}", "attribute": "temperature", "op": ">", "value": 30}]))
+        for state in ("alarm", "leak", "fault"):
+            engine.add_rule(notify_rule(f"{state}_{i}", [
+                {"device_id": f"sensor_{i}", "attribute": "state", "op": "==", "value": state}]))
+
+    before = engine.evaluations
+    engine.handle_device_event(state_event("sensor_500", "alarm"))
+    assert [rule_id for rule_id, _ in fired] == ["alarm_500"]
+    # Проверено только условие "== alarm" (старое значение "off" условий не имеет)
+    assert engine.evaluations - before == 1
+
+# Тест проверяет правило-триггер с паузой между срабатываниями
+def test_trigger_rule_with_conditions_and_cooldown(engine, fired):
+    engine.set_facts("camera", {"state": "on"})
+    engine.add_rule({
+        "id": "motion_light",
+        "trigger": {"device_id": "camera", "event": "motion_detected"},
+        "conditions": [{"device_id": "camera", "attribute": "state", "op": "==", "value": "on"}],
+        "actions": [{"device_id": "lamp", "action": "on"}],
+        "cooldown": 60,
+    })
+    motion = {"device_id": "camera", "event_type": "motion_detected", "payload": {"zone": "door"}}
+    engine.handle_device_event(motion)
+    engine.handle_device_event(motion)
+    assert len(fired) == 1
+    assert fired[0][1]["payload"] == {"zone": "door"}
+
+# Тест проверяет шаблон с "*": правило создается и для устройства, появившегося позже
+def test_template_rule_instantiated_per_device(engine, fired):
+    engine.set_facts("camera_hall", {"state": "off"})
+    created = engine.add_rule(notify_rule("camera_on", [
+        {"device_id": "*camera*", "attribute": "state", "op": "==", "value": "on"}]))
+    assert [rule.rule_id for rule in created] == ["camera_on@camera_hall"]
+
+    engine.handle_device_event(state_event("camera_yard", "on"))
+    engine.handle_device_event(state_event("lamp", "on"))
+    assert [context["device_id"] for _, context in fired] == ["camera_yard"]
+
+    assert engine.remove_rule("camera_on")
+    assert engine.rules == []
+    engine.handle_device_event(state_event("camera_hall", "on"))
+    assert len(fired) == 1
+
+# Тест проверяет отказ на некорректные описания правил
+def test_invalid_rules_rejected(engine):
+    with pytest.raises(RuleError):
+        engine.add_rule({"id": "no_conditions", "actions": [{"device_id": "lamp", "action": "on"}]})
+    with pytest.raises(RuleError):
+        engine.add_rule(notify_rule("bad_op", [
+            {"device_id": "lamp", "attribute": "state", "op": "~", "value": "on"}]))
+    engine.add_rule(notify_rule("dup", [{"device_id": "lamp", "attribute": "state", "value": "on"}]))
+    with pytest.raises(RuleError):
+        engine.add_rule(notify_rule("dup", [{"device_id": "lamp", "attribute": "state", "value": "on"}]))
+
+# Тест проверяет правила по умолчанию: одно уведомление на включение камеры и на протечку
+def test_automation_service_rules_with_device_manager(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    controller = Mock()
+    controller.event_bus = EventBus()
+    controller.device_manager = DeviceManager(event_bus=controller.event_bus, default_devices=False)
+    controller.device_manager.state_storage = Mock()
+    controller.device_manager.add_device(SecurityCamera("security_camera", "Камера"))
+    sensor = WaterLeakSensor("water_leak_sensor", "Датчик протечки")
+    controller.device_manager.add_device(sensor)
+    del controller.command_dispatcher
+
+    service = AutomationService(controller)
+    service.start(Settings().AUTOMATION_RULES)
+
+    controller.device_manager.send_command("security_camera", "on")
+    controller.device_manager.send_command("water_leak_sensor", "on")
+    sensor.trigger_alarm()
+
+    titles = [call.args[0] for call in controller.notification_service.add_notification.call_args_list]
+    assert titles == ["Камера активирована", "Сработал water_leak_sensor"]
+    assert controller.notification_service.add_notification.call_args_list[1].args[1] == \
+        "water_leak_sensor зафиксировал alarm"
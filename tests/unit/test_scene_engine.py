@@ -0,0 +1,86 @@
+import pytest
+from unittest.mock import Mock
+
+from devices.climate.thermostat import Thermostat
+from devices.device_manager import DeviceManager
+from devices.lighting.smart_light import SmartLight
+from services.scene_engine import Scene, SceneEngine, SceneError, SceneRun
+
+
+@pytest.fixture
+def manager(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    manager = DeviceManager(default_devices=False)
+    manager.state_storage = Mock()
+    manager.use_external_simulation()
+    manager.add_device(SmartLight("lamp", "Lamp"))
+    return manager
+
+
+@pytest.fixture
+def engine(manager):
+    engine = SceneEngine(manager)
+    yield engine
+    engine.shutdown()
+
+
+# Тест проверяет отказ на цикл и неизвестную зависимость
+def test_scene_validation():
+    with pytest.raises(SceneError):
+        Scene.from_dict("loop", {"steps": [
+            {"id": "a", "device_id": "lamp", "action": "on", "after": ["b"]},
+            {"id": "b", "device_id": "lamp", "action": "off", "after": ["a"]},
+        ]})
+    with pytest.raises(SceneError):
+        Scene.from_dict("unknown", {"steps": [{"id": "a", "device_id": "lamp", "action": "on", "after": ["x"]}]})
+
+# Тест проверяет, что сцена на 200 устройств выполняется одним пакетом с одним сохранением
+def test_scene_on_many_devices_commits_once(manager, engine):
+    for i in range(200):
+        manager.add_device(Thermostat(f"thermo_{i}", f"Thermo {i}"))
+    scene = Scene.from_dict("all_on", {"steps": [
+        {"id": f"t{i}", "device_id": f"thermo_{i}", "action": "on"} for i in range(200)
+    ]})
+
+    run = engine.start(scene)
+    assert run.wait(5)
+    assert run.status == SceneRun.COMPLETED
+    assert run.batches == 1
+    assert manager.state_storage.save.call_count == 1
+    assert all(manager.get_device(f"thermo_{i}").state == "on" for i in range(200))
+
+# Тест проверяет порядок по зависимостям и развертывание плавного перехода
+def test_dependencies_and_fade(manager, engine):
+    sent = []
+    original = manager.send_commands
+    manager.send_commands = lambda commands: sent.append(list(commands)) or original(commands)
+
+    run = engine.start(Scene.from_dict("sunrise", {"steps": [
+        {"id": "on", "device_id": "lamp", "action": "on"},
+        {"id": "fade", "device_id": "lamp", "after": ["on"],
+         "fade": {"attribute": "brightness", "from": 0, "to": 60, "duration": 0.06, "steps": 3}},
+        {"id": "off", "device_id": "lamp", "action": "off", "after": ["fade"], "delay": 0.01},
+    ]}))
+    assert run.wait(5)
+    assert [batch[0][1] for batch in sent] == [
+        "on", "set_brightness:20", "set_brightness:40", "set_brightness:60", "off"]
+    assert run.results == {"on": True, "fade#1": True, "fade#2": True, "fade": True, "off": True}
+
+# Тест проверяет вытеснение, приоритет и отмену сцен
+def test_preempt_and_cancel(manager, engine):
+    slow = Scene.from_dict("slow", {"steps": [
+        {"id": "later", "device_id": "lamp", "action": "on", "delay": 30}]})
+    first = engine.start(slow, priority=1)
+
+    with pytest.raises(SceneError):
+        engine.start(slow, priority=0)
+    second = engine.start(slow, priority=1)
+    assert first.status == SceneRun.PREEMPTED and first.done
+    assert engine.active_runs() == [second]
+
+    finished = []
+    second.add_done_callback(finished.append)
+    assert engine.cancel(second.run_id)
+    assert not engine.cancel(second.run_id)
+    assert finished == [second] and second.status == SceneRun.CANCELLED
+    assert manager.get_device("lamp").state == "off"
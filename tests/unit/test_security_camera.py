@@ -113,5 +113,25 @@ class TestSecurityCamera(unittest.TestCase):
         self.assertEqual(camera1.state, "on")
         self.assertEqual(camera2.state, "off")
 
+    def test_off_on_under_lock_keeps_simulation(self):
+        """Тест: выключение и включение под блокировкой оставляет симуляцию движения"""
+        # Arrange
+        self.camera.turn_on()
+        old_thread = self.camera._motion_simulation_thread
+        
+        # Act
+        with self.camera.lock:
+            self.camera.turn_off()
+            self.camera.turn_on()
+        
+        # Assert
+        self.assertEqual(self.camera.state, "on")
+        self.assertTrue(self.camera._motion_simulation_thread.is_alive())
+        self.assertFalse(self.camera._stop_motion_simulation_flag.is_set())
+        old_thread.join(timeout=6)
+        self.assertFalse(old_thread.is_alive())
+        self.assertTrue(self.camera._motion_simulation_thread.is_alive())
+        self.camera.turn_off()
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
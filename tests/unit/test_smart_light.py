@@ -47,4 +47,22 @@ def test_set_brightness_invalid(light):
 def test_get_status_includes_brightness(light):
     status = light.get_status()
     assert "brightness" in status
-    assert status["brightness"] == light.brightness
\ No newline at end of file
+    assert status["brightness"] == light.brightness
+
+
+# Тест проверяет, что выключение и включение под блокировкой устройства
+# оставляет работающую симуляцию (старый поток не "съедает" новый запуск)
+def test_off_on_under_lock_keeps_simulation(light):
+    light.turn_on()
+    old_thread = light._simulation_thread
+    with light.lock:
+        light.turn_off()
+        light.turn_on()
+
+    assert light.state == "on"
+    assert light._simulation_thread.is_alive()
+    assert not light._stop_simulation.is_set()
+    # Флаг старого потока уже выставлен: wait() возвращается сразу, без ожидания интервала
+    old_thread.join(timeout=1)
+    assert not old_thread.is_alive() and light._simulation_thread.is_alive()
+    light.turn_off()
@@ -0,0 +1,77 @@
+import threading
+from services.storage_service import StateStorage
+
+
+# Тест проверяет, что параллельные сохранения не мешают друг другу
+def test_concurrent_saves(tmp_path):
+    storage = StateStorage(str(tmp_path / "state.json"))
+    errors = []
+
+    def worker(n):
+        try:
+            for i in range(20):
+                storage.save({"device": {"state": "on", "data": {"n": n, "i": i}}})
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert storage.load()["device"]["data"]["i"] == 19
+
+# Тест проверяет загрузку из отсутствующего файла
+def test_load_missing_file(tmp_path):
+    assert StateStorage(str(tmp_path / "missing.json")).load() == {}
+
+# Тест проверяет двоичный снимок: полная загрузка и чтение отдельных устройств
+def test_binary_format_random_access(tmp_path):
+    state = {f"device_{i}": {"type": "thermostat", "state": "on" if i % 2 else "off",
+                             "data": {"temperature": 20 + i / 10, "name": f"Термостат {i}"}}
+             for i in range(3000)}
+    for compression in ("none", "zlib", "lzma"):
+        storage = StateStorage(str(tmp_path / f"state_{compression}.json"),
+                               format="binary", compression=compression)
+        assert storage.filename.endswith(".bin")
+        storage.save(state)
+        assert storage.load() == state
+        assert storage.load_device("device_1234") == state["device_1234"]
+        assert storage.load_device("missing") is None
+        assert storage.load_devices(["device_5", "device_2999", "missing"]) == {
+            "device_5": state["device_5"], "device_2999": state["device_2999"]}
+
+    reader = StateStorage(str(tmp_path / "state_zlib.json"), format="binary").open_reader()
+    with reader:
+        assert len(reader) == 3000 and "device_0" in reader
+        assert [reader.get(f"device_{i}")["data"]["temperature"] for i in range(0, 3000, 100)] == [
+            20 + i / 10 for i in range(0, 3000, 100)]
+
+# Тест проверяет переход с JSON на двоичный формат: прежний файл читается до первого сохранения
+def test_binary_format_reads_legacy_json(tmp_path):
+    StateStorage(str(tmp_path / "state.json")).save({"lamp": {"state": "on", "data": {}}})
+    storage = StateStorage(str(tmp_path / "state.json"), format="binary")
+    assert storage.load_device("lamp") == {"state": "on", "data": {}}
+
+    storage.save({"lamp": {"state": "off", "data": {}}})
+    assert storage.load() == {"lamp": {"state": "off", "data": {}}}
+    with open(storage.filename, "r+b") as f:
+        f.truncate(10)
+    assert storage.load() == {}
+
+# Тест проверяет, что поврежденный сжатый блок снимка дает пустую загрузку, а не исключение
+def test_binary_format_corrupted_block(tmp_path):
+    state = {f"device_{i}": {"state": "on", "data": {"temperature": i}} for i in range(100)}
+    storage = StateStorage(str(tmp_path / "state.json"), format="binary", compression="zlib")
+    storage.save(state)
+    with open(storage.filename, "r+b") as f:
+        # Байты внутри первого блока (заголовок - 24 байта)
+        f.seek(40)
+        chunk = f.read(16)
+        f.seek(40)
+        f.write(bytes(b ^ 0xFF for b in chunk))
+
+    assert storage.load() == {}
+    assert storage.load_device("device_0") is None
@@ -0,0 +1,87 @@
+import pytest
+
+from devices.device_manager import DeviceManager
+from devices.climate.thermostat import Thermostat
+from services.telemetry import TelemetrySampler, TelemetryStore
+
+
+# Тест проверяет агрегаты min/max/avg/count по минутным интервалам
+def test_rollups(tmp_path):
+    store = TelemetryStore(raw_size=10)
+    for i, value in enumerate([20, 22, 24, 30, 10]):
+        store.record("thermostat", "temperature", value, ts=60 * 100 + 20 * i)
+
+    result = store.query("thermostat", "temperature", 6000, 6100, resolution="1m")
+    assert result["points"] == [
+        {"ts": 6000, "min": 20.0, "max": 24.0, "avg": 22.0, "count": 3},
+        {"ts": 6060, "min": 10.0, "max": 30.0, "avg": 20.0, "count": 2},
+    ]
+    assert store.query("thermostat", "temperature", 6000, 6100, resolution="1h")["points"][0]["count"] == 5
+
+    # Агрегаты переживают сохранение, сырые замеры - нет
+    store.save(str(tmp_path / "telemetry.json"))
+    restored = TelemetryStore(raw_size=10)
+    assert restored.load(str(tmp_path / "telemetry.json")) == 1
+    assert restored.query("thermostat", "temperature", 6000, 6100, resolution="1m") == result
+    assert restored.query("thermostat", "temperature", 6000, 6100, resolution="raw")["points"] == []
+    with pytest.raises(ValueError):
+        restored.query("thermostat", "temperature", resolution="5m")
+
+
+# Тест проверяет, что месяц читается из часовых агрегатов, а хранение уровней ограничено
+def test_month_query_uses_rollups():
+    store = TelemetryStore(raw_size=100, tiers=(("1m", 60, 86400), ("1h", 3600, 40 * 86400),
+                                                ("1d", 86400, 365 * 86400)))
+    day = 86400
+    for ts in range(0, 30 * day, 30):
+        store.record("lamp", "brightness", ts % 100, ts=ts)
+
+    end = 30 * day
+    result = store.query("lamp", "brightness", end - 30 * day, end)
+    assert result["resolution"] == "1h"
+    assert len(result["points"]) == 720
+    assert sum(point["count"] for point in result["points"]) == 30 * day // 30
+    # Недавний час - из кольца сырых замеров
+    assert store.query("lamp", "brightness", end - 600, end)["resolution"] == "raw"
+    # Минутные агрегаты старше суток удалены
+    assert store.query("lamp", "brightness", 0, 600, resolution="1m")["points"] == []
+
+
+# Тест проверяет выбор уровня после перезапуска: сырые замеры не сохраняются
+def test_query_after_load_uses_rollups(tmp_path):
+    tiers = (("1m", 60, 86400), ("1h", 3600, 40 * 86400), ("1d", 86400, 365 * 86400))
+    store = TelemetryStore(raw_size=100, tiers=tiers)
+    day = 86400
+    for ts in range(0, 30 * day, 300):
+        store.record("lamp", "brightness", ts % 100, ts=ts)
+    store.save(str(tmp_path / "telemetry.json"))
+
+    restored = TelemetryStore(raw_size=100, tiers=tiers)
+    restored.load(str(tmp_path / "telemetry.json"))
+    end = 30 * day
+    result = restored.query("lamp", "brightness", end - 30 * day, end)
+    assert result["resolution"] == "1h" and len(result["points"]) == 720
+
+    restored.record("lamp", "brightness", 50, ts=end)
+    assert restored.query("lamp", "brightness", end - 30 * day, end)["resolution"] == "1h"
+    # Кольцо начинается с нового замера - час до него берется из агрегатов
+    assert restored.query("lamp", "brightness", end - 3600, end)["resolution"] == "1m"
+    assert restored.query("lamp", "brightness", end, end)["resolution"] == "raw"
+
+
+# Тест проверяет, что замеры снимаются только с изменившихся устройств
+def test_sampler_reads_changed_devices():
+    manager = DeviceManager(default_devices=False)
+    manager.add_device(Thermostat("thermostat", "Термостат"))
+    store = TelemetryStore()
+    sampler = TelemetrySampler(manager, store)
+    sampler.attach()
+
+    manager.get_device("thermostat").set_temperature(24)
+    assert sampler.sample(now=1000) == 2
+    assert sampler.sample(now=1001) == 0
+    assert store.query("thermostat", "target_temperature", 900, 1100, resolution="raw")["points"] == [
+        {"ts": 1000, "value": 24.0}]
+
+    sampler.handle_device_event({"device_id": "camera", "event_type": "motion_detected"})
+    assert {"device_id": "camera", "metric": "motion"} in store.series()
@@ -0,0 +1,139 @@
+import pytest
+from unittest.mock import Mock
+
+from devices.climate.thermostat import Thermostat
+from devices.device_manager import DeviceManager
+from devices.lighting.smart_light import SmartLight
+from services.scene_engine import Scene, SceneEngine, SceneRun
+from services.transition_engine import Transition, TransitionEngine, TransitionError
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def manager(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    manager = DeviceManager(default_devices=False)
+    manager.state_storage = Mock()
+    manager.use_external_simulation()
+    manager.add_device(SmartLight("lamp", "Lamp"))
+    manager.add_device(Thermostat("thermo", "Thermo"))
+    return manager
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def engine(manager, clock):
+    return TransitionEngine(manager, fps=10, event_interval=60, clock=clock, autostart=False)
+
+
+# Тест проверяет рассвет: одна команда, кадры без лишних событий и одно сохранение в конце
+def test_sunrise_frames_and_throttled_events(manager, engine, clock):
+    events = []
+    manager.add_event_listener(events.append)
+
+    transition = engine.start("lamp", "brightness", 80, duration=600, start=0)
+    lamp = manager.get_device("lamp")
+    assert lamp.state == "on" and lamp.data["brightness"] == 0
+    saves_after_start = manager.state_storage.save.call_count
+
+    for frame in range(1, 6000):
+        clock.now = 100.0 + frame * 0.1
+        engine.tick()
+        if frame == 3000:
+            assert lamp.data["brightness"] == 40
+    clock.now = 700.0
+    assert engine.tick() == 0
+
+    assert transition.status == Transition.COMPLETED and lamp.data["brightness"] == 80
+    kinds = [event["event_type"] for event in events]
+    assert kinds.count("transition_started") == 1
+    assert kinds.count("transition_finished") == 1
+    assert kinds.count("transition_progress") == 9   # раз в минуту за 10 минут
+    assert "brightness_changed" not in kinds
+    assert manager.state_storage.save.call_count == saves_after_start + 1
+
+# Тест проверяет сглаживание, замену перехода и отмену
+def test_replace_and_cancel(manager, engine, clock):
+    first = engine.start("thermo", "temperature", 28, duration=10, easing="ease_in_out")
+    clock.now += 5
+    engine.tick()
+    assert manager.get_device("thermo").data["target_temperature"] == 25.0
+
+    second = engine.start("thermo", "temperature", 18, duration=10)
+    assert first.status == Transition.CANCELLED
+    assert engine.cancel("thermo") == 1
+    assert second.status == Transition.CANCELLED
+    assert engine.active() == []
+
+# Тест проверяет, что команда устройству отменяет его переход и кадры ее не перезаписывают
+def test_command_cancels_transition(manager, engine, clock):
+    fade = engine.start("lamp", "brightness", 80, duration=10, start=0)
+    heat = engine.start("thermo", "temperature", 28, duration=10)
+    clock.now += 5
+    engine.tick()
+    lamp = manager.get_device("lamp")
+    assert lamp.data["brightness"] == 40
+
+    assert manager.send_command("lamp", "off")
+    clock.now += 1
+    engine.tick()
+    assert fade.status == Transition.CANCELLED
+    assert lamp.state == "off" and lamp.data["brightness"] == 0
+
+    # set_<атрибут> отменяет только переход этого атрибута
+    assert manager.send_command("thermo", "set_brightness:10") is False
+    assert heat.status == Transition.RUNNING
+    assert manager.send_command("thermo", "set_temperature:20")
+    engine.tick()
+    assert heat.status == Transition.CANCELLED
+    assert manager.get_device("thermo").data["target_temperature"] == 20
+
+# Тест проверяет отказ на недопустимые переходы
+def test_invalid_transitions(engine):
+    with pytest.raises(TransitionError):
+        engine.start("lamp", "brightness", 150, duration=1)
+    with pytest.raises(TransitionError):
+        engine.start("thermo", "brightness", 50, duration=1)
+    with pytest.raises(TransitionError):
+        engine.start("missing", "brightness", 50, duration=1)
+
+# Тест проверяет шаг сцены fade через планировщик переходов и отмену сцены
+def test_scene_fade_uses_transition_engine(manager, engine, clock):
+    scenes = SceneEngine(manager, transitions=engine)
+    try:
+        run = scenes.start(Scene.from_dict("sunrise", {"steps": [
+            {"id": "fade", "device_id": "lamp", "fade": {"attribute": "brightness", "from": 0, "to": 50,
+                                                         "duration": 10}},
+            {"id": "heat", "device_id": "thermo", "action": "on", "after": ["fade"]},
+        ]}))
+        for _ in range(100):
+            if engine.active():
+                break
+            run.wait(0.01)
+        clock.now += 10
+        engine.tick()
+        assert run.wait(5) and run.status == SceneRun.COMPLETED
+        assert manager.get_device("thermo").state == "on"
+
+        slow = scenes.start(Scene.from_dict("slow", {"steps": [
+            {"id": "fade", "device_id": "lamp", "fade": {"attribute": "brightness", "to": 0, "duration": 60}}]}))
+        for _ in range(100):
+            if engine.active():
+                break
+            slow.wait(0.01)
+        transition = engine.active()[0]
+        scenes.cancel(slow.run_id)
+        assert transition.status == Transition.CANCELLED
+    finally:
+        scenes.shutdown()
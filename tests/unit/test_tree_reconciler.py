@@ -0,0 +1,88 @@
+import pytest
+from ui.widgets.tree_reconciler import TreeReconciler
+from ui.widgets.paginator import Paginator
+
+
+class FakeTree:
+    """Минимальная замена ttk.Treeview: хранит строки и считает операции"""
+
+    def __init__(self):
+        self.rows = []      # порядок iid
+        self.values = {}
+        self.ops = []
+
+    def insert(self, parent, index, iid=None, values=()):
+        self.rows.insert(index, iid)
+        self.values[iid] = values
+        self.ops.append(("insert", iid))
+
+    def delete(self, *iids):
+        for iid in iids:
+            self.rows.remove(iid)
+            del self.values[iid]
+            self.ops.append(("delete", iid))
+
+    def item(self, iid, values=None):
+        self.values[iid] = values
+        self.ops.append(("item", iid))
+
+    def move(self, iid, parent, index):
+        self.rows.remove(iid)
+        self.rows.insert(index, iid)
+        self.ops.append(("move", iid))
+
+
+@pytest.fixture
+def tree():
+    return FakeTree()
+
+
+# Тест проверяет, что повторное согласование без изменений не трогает таблицу
+def test_unchanged_rows_are_not_touched(tree):
+    reconciler = TreeReconciler(tree)
+    rows = [(1, ("a",)), (2, ("b",))]
+    reconciler.reconcile(rows)
+    tree.ops.clear()
+
+    stats = reconciler.reconcile(rows)
+
+    assert tree.ops == []
+    assert stats == {"inserted": 0, "removed": 0, "updated": 0, "moved": 0}
+
+# Тест проверяет, что меняются только вставленные, удаленные и измененные строки
+def test_only_diff_is_applied(tree):
+    reconciler = TreeReconciler(tree)
+    reconciler.reconcile([(1, ("a",)), (2, ("b",)), (3, ("c",))])
+    tree.ops.clear()
+
+    stats = reconciler.reconcile([(2, ("b*",)), (3, ("c",)), (4, ("d",))])
+
+    assert sorted(tree.ops) == [("delete", "1"), ("insert", "4"), ("item", "2")]
+    assert stats["inserted"] == 1 and stats["removed"] == 1 and stats["updated"] == 1
+    assert tree.rows == ["2", "3", "4"]
+    assert tree.values["2"] == ("b*",)
+
+# Тест проверяет сохранение порядка строк и составные ключи (время, индекс)
+def test_reorder_and_tuple_keys(tree):
+    reconciler = TreeReconciler(tree)
+    reconciler.reconcile([(("07:00", 0), ("x",)), (("08:00", 0), ("y",))])
+
+    reconciler.reconcile([(("08:00", 0), ("y",)), (("07:00", 0), ("x",))])
+
+    assert tree.rows == ["08:00|0", "07:00|0"]
+    assert reconciler.key_for("07:00|0") == ("07:00", 0)
+
+# Тест проверяет постраничный показ длинного списка
+def test_paginator_pages():
+    paginator = Paginator(page_size=100)
+    items = list(range(250))
+
+    assert paginator.page_slice(items) == list(range(100))
+    assert paginator.page_count == 3
+    assert paginator.next() and paginator.next()
+    assert not paginator.next()
+    assert paginator.page_slice(items) == list(range(200, 250))
+
+    # Если список сократился, страница остается в допустимых пределах
+    assert paginator.page_slice(items[:120]) == list(range(100, 120))
+    assert paginator.label() == "Стр. 2 из 2"
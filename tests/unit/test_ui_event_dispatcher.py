@@ -0,0 +1,79 @@
+import threading
+import pytest
+from ui.event_dispatcher import UiEventDispatcher
+
+
+class FakeScheduler:
+    """Заменяет root.after: запоминает запланированные вызовы"""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, delay, callback):
+        self.calls.append((delay, callback))
+
+    def run_next(self):
+        _, callback = self.calls.pop(0)
+        callback()
+
+
+@pytest.fixture
+def scheduler():
+    return FakeScheduler()
+
+
+# Тест проверяет склеивание событий одной сущности за цикл разбора
+# Убеждается, что обработчик получает только последнее значение
+def test_drain_coalesces_by_key(scheduler):
+    dispatcher = UiEventDispatcher(scheduler)
+    received = []
+    dispatcher.on("device", lambda key, payload: received.append((key, payload)))
+
+    dispatcher.post("device", "lamp", 1)
+    dispatcher.post("device", "thermostat", 5)
+    dispatcher.post("device", "lamp", 2)
+
+    assert dispatcher.drain() == 2
+    assert received == [("lamp", 2), ("thermostat", 5)]
+    assert dispatcher.drain() == 0
+
+# Тест проверяет, что события из других потоков доставляются только при разборе
+def test_post_from_background_thread(scheduler):
+    dispatcher = UiEventDispatcher(scheduler, drain_interval=50)
+    received = []
+    dispatcher.on("notification", lambda key, payload: received.append(key))
+    dispatcher.start()
+
+    worker = threading.Thread(target=lambda: dispatcher.post("notification"))
+    worker.start()
+    worker.join()
+
+    assert received == []
+    scheduler.run_next()
+    assert received == [None]
+    # Разбор перепланирует сам себя с тем же интервалом
+    assert scheduler.calls[0][0] == 50
+
+# Тест проверяет, что ошибка в обработчике не останавливает разбор очереди
+def test_handler_error_does_not_stop_drain(scheduler):
+    dispatcher = UiEventDispatcher(scheduler)
+    received = []
+
+    def failing(key, payload):
+        raise RuntimeError("boom")
+
+    dispatcher.on("bad", failing)
+    dispatcher.on("good", lambda key, payload: received.append(key))
+    dispatcher.post("bad", 1)
+    dispatcher.post("good", 2)
+
+    dispatcher.drain()
+    assert received == [2]
+
+# Тест проверяет остановку периодического разбора
+def test_stop_prevents_reschedule(scheduler):
+    dispatcher = UiEventDispatcher(scheduler)
+    dispatcher.start()
+    dispatcher.stop()
+    scheduler.run_next()
+    assert scheduler.calls == []